@@ -0,0 +1,47 @@
+"""Tabla backtest_forward_panel: retornos forward persistidos por (activo, lag,
+horizonte) para el backtest de cuantiles (ver app/services/forward_return_store).
+
+Es caché derivado de `prices`: cada backtest releía los precios de todo el
+universo y recalculaba los retornos por activo, y comparar estrategias o
+variantes repetía exactamente el mismo trabajo. La marca de agua por activo
+(n_prices, last_date, close_sum) dice cuándo un panel quedó viejo.
+
+Portable (post-0076): tipos genéricos y DDL de nombre fijo → se renderiza
+offline en ambos dialectos (tests/test_bootstrap_portability). Espeja
+app/models/backtest.py::BacktestForwardPanel. El largo del LargeBinary lo
+vuelve MEDIUMBLOB en MySQL (un BLOB corta en 64 KB).
+
+Revision ID: 0101
+Revises: 0100
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0101"
+down_revision = "0100"
+branch_labels = None
+depends_on = None
+
+_BLOB_BYTES = 16 * 1024 * 1024 - 1
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backtest_forward_panel",
+        sa.Column("asset_id", sa.Integer(),
+                  sa.ForeignKey("assets.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("lag", sa.Integer(), primary_key=True),
+        sa.Column("horizon", sa.Integer(), primary_key=True),
+        sa.Column("n_prices", sa.Integer(), nullable=False),
+        sa.Column("last_date", sa.Date(), nullable=False),
+        sa.Column("close_sum", sa.Float(), nullable=False),
+        sa.Column("dates", sa.LargeBinary(_BLOB_BYTES), nullable=False),
+        sa.Column("returns", sa.LargeBinary(_BLOB_BYTES), nullable=False),
+        sa.Column("build_seconds", sa.Float()),
+        sa.Column("built_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("backtest_forward_panel")
@@ -0,0 +1,108 @@
+"""Partición anual OPCIONAL de ind_daily, signal_values_wide y
+strategy_results_wide (solo PostgreSQL).
+
+Las anchas son un heap único por (asset_id, date). Un "Recalcular completo" con
+horizonte NULLea las columnas del alcance ventana por ventana: tuplas muertas y
+trabajo de vacuum (maintenance_service.vacuum_bloat_tables). Particionadas por
+RANGE (date), una partición por año, el rebuild con horizonte vacía las
+particiones que cubre enteras (signal_store.truncate_wide_range) y las lecturas
+acotadas por fecha (as-of, ventanas de backtest) leen solo los años que tocan.
+
+Es opt-in: solo corre con WIDE_TABLE_PARTITIONS=1 en el entorno del `alembic
+upgrade`, porque reescribe las tablas enteras (lock exclusivo mientras copia,
+disco temporal ~= tamaño de la tabla): correrla con el pipeline detenido. Sin
+la variable, o en MySQL/MariaDB, no hace nada y las tablas quedan como están.
+Una base ya migrada sin la variable se convierte después con
+db_compat.partition_by_year (misma lógica, desde la consola o un script).
+
+Esquema resultante: `{tabla}_y{año}` desde el primer año con datos hasta el
+siguiente al actual, más `{tabla}_ydefault` (DEFAULT: ningún INSERT falla por
+falta de partición; db_compat.maintain_year_partitions muda esas filas a su
+año en el arranque). PK, FK e índices conservan sus nombres (0077/0091).
+
+Autocontenido (snapshot): NO importar app. Bloques DO de PL/pgSQL → se
+renderiza offline (tests/test_bootstrap_portability, que la ejercita también
+con la variable prendida).
+
+Revision ID: 0102
+Revises: 0101
+"""
+import os
+
+from alembic import op
+
+revision = "0102"
+down_revision = "0101"
+branch_labels = None
+depends_on = None
+
+# tabla → (columnas de la PK, FK a assets con CASCADE, índice secundario)
+_TABLES = {
+    "ind_daily": ("asset_id, date", True, ("ix_ind_daily_date", "date")),
+    "signal_values_wide": ("date, asset_id", False,
+                           ("ix_signal_values_wide_asset_date", "asset_id, date")),
+    "strategy_results_wide": ("date, asset_id", False,
+                              ("ix_strategy_results_wide_asset_date",
+                               "asset_id, date")),
+}
+
+
+def _enabled() -> bool:
+    return (op.get_context().dialect.name == "postgresql"
+            and os.environ.get("WIDE_TABLE_PARTITIONS", "0").strip().lower()
+            in ("1", "true", "yes", "on"))
+
+
+def _constraints(t: str, pk: str, fk: bool, ix: tuple) -> str:
+    sql = f"  EXECUTE 'ALTER TABLE {t} ADD CONSTRAINT {t}_pkey PRIMARY KEY ({pk})';\n"
+    if fk:
+        sql += (f"  EXECUTE 'ALTER TABLE {t} ADD CONSTRAINT {t}_asset_id_fkey "
+                f"FOREIGN KEY (asset_id) REFERENCES assets (id) ON DELETE CASCADE';\n")
+    sql += f"  EXECUTE 'CREATE INDEX {ix[0]} ON {t} ({ix[1]})';\n"
+    return sql
+
+
+def upgrade() -> None:
+    if not _enabled():
+        return
+    for t, (pk, fk, ix) in _TABLES.items():
+        op.execute(f"""DO $$
+DECLARE
+  y0 int;
+  y1 int;
+  cur int := EXTRACT(YEAR FROM CURRENT_DATE)::int;
+BEGIN
+  IF to_regclass('{t}') IS NULL THEN RETURN; END IF;
+  IF EXISTS (SELECT 1 FROM pg_partitioned_table
+             WHERE partrelid = to_regclass('{t}')) THEN RETURN; END IF;
+  SELECT EXTRACT(YEAR FROM MIN(date))::int, EXTRACT(YEAR FROM MAX(date))::int
+    INTO y0, y1 FROM {t};
+  y0 := LEAST(COALESCE(y0, cur), cur);
+  y1 := GREATEST(COALESCE(y1, cur), cur + 1);
+  EXECUTE 'CREATE TABLE {t}__part (LIKE {t} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE (date)';
+  FOR y IN y0..y1 LOOP
+    EXECUTE format('CREATE TABLE %I PARTITION OF {t}__part FOR VALUES FROM (%L) TO (%L)',
+                   '{t}_y' || y, make_date(y, 1, 1), make_date(y + 1, 1, 1));
+  END LOOP;
+  EXECUTE 'CREATE TABLE {t}_ydefault PARTITION OF {t}__part DEFAULT';
+  EXECUTE 'INSERT INTO {t}__part SELECT * FROM {t}';
+  EXECUTE 'DROP TABLE {t}';
+  EXECUTE 'ALTER TABLE {t}__part RENAME TO {t}';
+{_constraints(t, pk, fk, ix)}END $$""")
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    # Vuelta al heap único, solo para las que estén particionadas (con o sin la
+    # variable: una base convertida a mano también tiene que poder bajar).
+    for t, (pk, fk, ix) in _TABLES.items():
+        op.execute(f"""DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_partitioned_table
+                 WHERE partrelid = to_regclass('{t}')) THEN RETURN; END IF;
+  EXECUTE 'CREATE TABLE {t}__heap (LIKE {t} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)';
+  EXECUTE 'INSERT INTO {t}__heap SELECT * FROM {t}';
+  EXECUTE 'DROP TABLE {t}';
+  EXECUTE 'ALTER TABLE {t}__heap RENAME TO {t}';
+{_constraints(t, pk, fk, ix)}END $$""")
@@ -0,0 +1,29 @@
+"""Columna `query_stats` en run_history: el agregado de la instrumentación por
+fase de cada corrida (query_stats_service) — sentencias, filas leídas y
+escritas, tiempo en la base y en Python por fase — como JSON.
+
+Texto y no columnas: las fases cambian con el código (cada servicio nombra las
+suyas) y el dato se lee entero, por corrida, para el Centro de Datos. Nace NULL:
+las corridas previas y las que terminan sin grabación no lo traen.
+
+Portable (post-0076): un ADD COLUMN de nombre fijo, se renderiza offline en
+ambos dialectos (tests/test_bootstrap_portability).
+
+Revision ID: 0103
+Revises: 0102
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0103"
+down_revision = "0102"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("run_history", sa.Column("query_stats", sa.Text, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("run_history", "query_stats")
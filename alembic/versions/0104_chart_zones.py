@@ -0,0 +1,46 @@
+"""Tabla chart_zones: zonas de los overlays del gráfico (régimen, volatilidad,
+drawdowns) persistidas por el pipeline (ver app/services/chart_zone_store).
+
+Es caché derivado de `prices` y de la config de cada familia: los callbacks
+del gráfico recalculaban las zonas sobre la historia completa en cada cambio
+de activo, aunque el pipeline ya las hubiera calculado esa noche. La marca de
+agua por activo (n_prices, last_date, close_sum) más config_checksum dicen
+cuándo una fila quedó vieja.
+
+Portable (post-0076): tipos genéricos y DDL de nombre fijo → se renderiza
+offline en ambos dialectos (tests/test_bootstrap_portability). Espeja
+app/models/chart_zone.py::ChartZone. El largo del LargeBinary lo vuelve
+MEDIUMBLOB en MySQL (un BLOB corta en 64 KB).
+
+Revision ID: 0104
+Revises: 0103
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0104"
+down_revision = "0103"
+branch_labels = None
+depends_on = None
+
+_BLOB_BYTES = 16 * 1024 * 1024 - 1
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chart_zones",
+        sa.Column("asset_id", sa.Integer(),
+                  sa.ForeignKey("assets.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("code", sa.String(40), primary_key=True),
+        sa.Column("config_checksum", sa.String(64), nullable=False),
+        sa.Column("n_prices", sa.Integer(), nullable=False),
+        sa.Column("last_date", sa.Date(), nullable=False),
+        sa.Column("close_sum", sa.Float(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(_BLOB_BYTES), nullable=False),
+        sa.Column("built_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("chart_zones")
@@ -0,0 +1,47 @@
+"""Tabla import_job: cursor persistido del import masivo de activos (ver
+app/services/import_service.import_from_excel).
+
+El import procesa el Excel por chunks y commitea cada uno (activos, logs y
+cursor juntos). Si el proceso muere a mitad, volver a subir el mismo archivo
+(mismo hash de contenido) retoma desde la primera fila sin commitear en vez de
+revalidar contra la fuente todo lo ya importado.
+
+Portable (post-0076): tipos genéricos y DDL de nombre fijo → se renderiza
+offline en ambos dialectos (tests/test_bootstrap_portability). Espeja
+app/models/import_log.py::ImportJob. `status` es String y no Enum: sin
+CREATE TYPE en PostgreSQL.
+
+Revision ID: 0105
+Revises: 0104
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0105"
+down_revision = "0104"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "import_job",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("file_hash", sa.String(64), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("total_rows", sa.Integer(), nullable=False),
+        sa.Column("next_row", sa.Integer(), nullable=False),
+        sa.Column("n_imported", sa.Integer(), nullable=False),
+        sa.Column("n_skipped", sa.Integer(), nullable=False),
+        sa.Column("n_error", sa.Integer(), nullable=False),
+        sa.Column("pending_benchmarks", sa.Text()),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime()),
+    )
+    op.create_index("ix_import_job_file_hash", "import_job", ["file_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_import_job_file_hash", table_name="import_job")
+    op.drop_table("import_job")
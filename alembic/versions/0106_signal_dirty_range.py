@@ -0,0 +1,41 @@
+"""Tabla signal_dirty_range: fecha mínima "sucia" por activo para el delta de
+señales (ver app/services/signal_dirty_range.py).
+
+El delta de señales decide qué fechas correr globalmente: una fecha ya
+evaluada no se vuelve a tocar. Un activo cuyos precios llegan tarde (feriado
+local, fuente atrasada) queda con los scores arrastrados de los días en que
+no operó, aunque después lleguen sus precios reales. Las escrituras de
+precios y el delta de indicadores marcan acá desde qué fecha hay dato nuevo;
+el delta de señales recalcula solo esas celdas (activo, fecha) más los
+percentiles de esas fechas y borra la marca.
+
+Portable (post-0076): tipos genéricos y DDL de nombre fijo → se renderiza
+offline en ambos dialectos (tests/test_bootstrap_portability). Espeja
+app/models/signal_dirty_range.py::SignalDirtyRange.
+
+Revision ID: 0106
+Revises: 0105
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0106"
+down_revision = "0105"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "signal_dirty_range",
+        sa.Column("asset_id", sa.Integer(),
+                  sa.ForeignKey("assets.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("min_dirty_date", sa.Date(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("signal_dirty_range")
@@ -0,0 +1,48 @@
+"""Tablas prices_weekly / prices_monthly: barras OHLC semanales y mensuales
+de `prices` (ver app/services/price_bar_store.py).
+
+El pipeline de indicadores, los vigentes, la verificación y el RRG
+resampleaban la historia diaria completa de cada activo en cada corrida
+(_resample_ohlc). Ahora las barras se guardan: las escrituras de precios
+reescriben solo la barra abierta y las posteriores al punto de escritura, y
+los lectores verifican la marca de agua (n_days/close_sum/last_day sumados)
+contra los precios antes de usarlas. Caché derivado: vacías se rearman solas.
+
+Portable (post-0076): tipos genéricos y DDL de nombre fijo → se renderiza
+offline en ambos dialectos (tests/test_bootstrap_portability). Espeja
+app/models/price_bar.py::PriceWeekly / PriceMonthly.
+
+Revision ID: 0107
+Revises: 0106
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0107"
+down_revision = "0106"
+branch_labels = None
+depends_on = None
+
+_TABLES = ("prices_weekly", "prices_monthly")
+
+
+def upgrade() -> None:
+    for name in _TABLES:
+        op.create_table(
+            name,
+            sa.Column("asset_id", sa.Integer(),
+                      sa.ForeignKey("assets.id", ondelete="CASCADE"),
+                      primary_key=True),
+            sa.Column("date", sa.Date(), primary_key=True),
+            sa.Column("close", sa.Float(), nullable=False),
+            sa.Column("high", sa.Float(), nullable=True),
+            sa.Column("low", sa.Float(), nullable=True),
+            sa.Column("n_days", sa.Integer(), nullable=False),
+            sa.Column("close_sum", sa.Float(), nullable=False),
+            sa.Column("last_day", sa.Date(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    for name in reversed(_TABLES):
+        op.drop_table(name)
@@ -0,0 +1,41 @@
+"""Tabla portfolio_run_robustness: análisis de robustez de una corrida de
+cartera guardada (ver app/services/robustness_service.py).
+
+Una corrida reporta un solo camino realizado. Al guardarla se le corre el
+remuestreo (bootstrap por bloques de sus curvas, permutación del orden de los
+trades y entradas al azar sobre el mismo panel) y las bandas quedan junto al
+snapshot, con los parámetros que las reproducen (n_paths, block, seed).
+
+Portable (post-0076): tipos genéricos y DDL de nombre fijo → se renderiza
+offline en ambos dialectos (tests/test_bootstrap_portability). Espeja
+app/models/portfolio.py::PortfolioRunRobustness.
+
+Revision ID: 0108
+Revises: 0107
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0108"
+down_revision = "0107"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "portfolio_run_robustness",
+        sa.Column("run_id", sa.Integer(),
+                  sa.ForeignKey("portfolio_run.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("n_paths", sa.Integer(), nullable=False),
+        sa.Column("block", sa.Integer(), nullable=False),
+        sa.Column("seed", sa.Integer(), nullable=False),
+        sa.Column("result", sa.Text(), nullable=False),
+        sa.Column("duration_seconds", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("portfolio_run_robustness")
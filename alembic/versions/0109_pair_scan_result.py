@@ -0,0 +1,48 @@
+"""Tabla pair_scan_result: ranking de pares por grupo del escáner de pares
+(ver app/services/pair_scan_service.py).
+
+Un escaneo recorre todos los pares de un grupo (sector, industria, mercado o
+miembros de un benchmark) sobre la matriz de cierres alineada y guarda los
+mejores, ordenados, con sus estadísticas (z-score del ratio, vida media del
+log-spread, correlación y su estabilidad). Derivada de `prices`: cada escaneo
+reemplaza las filas de su grupo.
+
+Portable (post-0076): tipos genéricos y DDL de nombre fijo → se renderiza
+offline en ambos dialectos (tests/test_bootstrap_portability). Espeja
+app/models/pair_scan.py::PairScanResult.
+
+Revision ID: 0109
+Revises: 0108
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0109"
+down_revision = "0108"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pair_scan_result",
+        sa.Column("scope", sa.String(16), primary_key=True),
+        sa.Column("group_id", sa.Integer(), primary_key=True),
+        sa.Column("rank", sa.Integer(), primary_key=True),
+        sa.Column("asset_id_1", sa.Integer(),
+                  sa.ForeignKey("assets.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("asset_id_2", sa.Integer(),
+                  sa.ForeignKey("assets.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("zscore", sa.Float(), nullable=False),
+        sa.Column("half_life", sa.Float(), nullable=True),
+        sa.Column("corr", sa.Float(), nullable=True),
+        sa.Column("corr_std", sa.Float(), nullable=True),
+        sa.Column("n_obs", sa.Integer(), nullable=False),
+        sa.Column("date_from", sa.Date(), nullable=True),
+        sa.Column("date_to", sa.Date(), nullable=True),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pair_scan_result")
@@ -0,0 +1,46 @@
+"""Tabla purge_job: avance persistido de las purgas de historia por activo
+(ver app/services/purge_service.py).
+
+Una purga borra por lotes, en paralelo y con commit por lote, la historia de
+uno o muchos activos en todas las tablas que la guardan; esta fila registra
+qué tablas ya quedaron limpias para que una purga cortada por un reciclado
+del proceso se retome al arranque en vez de dejar la historia a medias. Sirve
+también al barrido periódico de huérfanos de las tablas dinámicas.
+
+Portable (post-0076): tipos genéricos y DDL de nombre fijo → se renderiza
+offline en ambos dialectos (tests/test_bootstrap_portability). Espeja
+app/models/purge_job.py::PurgeJob.
+
+Revision ID: 0110
+Revises: 0109
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0110"
+down_revision = "0109"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "purge_job",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.String(16), nullable=False),
+        sa.Column("status", sa.String(12), nullable=False),
+        sa.Column("asset_ids", sa.Text(), nullable=False),
+        sa.Column("tables_total", sa.Integer(), nullable=False),
+        sa.Column("tables_done", sa.Text(), nullable=True),
+        sa.Column("rows_deleted", sa.BigInteger(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_purge_job_started_at", "purge_job", ["started_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_purge_job_started_at", table_name="purge_job")
+    op.drop_table("purge_job")
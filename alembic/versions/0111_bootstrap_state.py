@@ -0,0 +1,35 @@
+"""Tabla bootstrap_state: huella del manifiesto de datos integrados que
+reconcilió el último arranque exitoso (ver
+app/services/startup_service.py::ensure_builtin_data).
+
+Con la huella al día el arranque saltea la reconciliación de fuentes, activos
+e indicadores integrados; cambia solo cuando un deploy trae un manifiesto
+distinto.
+
+Portable (post-0076): tipos genéricos y DDL de nombre fijo → se renderiza
+offline en ambos dialectos (tests/test_bootstrap_portability). Espeja
+app/models/bootstrap_state.py::BootstrapState.
+
+Revision ID: 0111
+Revises: 0110
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0111"
+down_revision = "0110"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bootstrap_state",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("manifest_hash", sa.String(64), nullable=False),
+        sa.Column("applied_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bootstrap_state")
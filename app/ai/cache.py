@@ -0,0 +1,160 @@
+"""Caché de resultados de las herramientas analíticas de la IA.
+
+Un cliente MCP repite llamadas: el modelo vuelve a pedir el ranking de la
+misma estrategia al reformular la respuesta, o la misma vista previa de
+backtest con los mismos argumentos tres turnos después. Cada una de esas es un
+barrido de la tabla de resultados o, peor, un backtest entero — y la respuesta
+no cambió, porque los datos de fondo solo cambian cuando corre el pipeline.
+
+La clave es (herramienta, argumentos normalizados, alcance de visibilidad,
+marca de agua):
+
+- **Argumentos** en JSON con claves ordenadas y sin los `None`: pedir
+  `{"date": None}` es lo mismo que no pedir fecha.
+- **Alcance**: "admin" o el id del usuario. Dos usuarios que ven conjuntos de
+  estrategias distintos NUNCA comparten entrada, aunque pidan lo mismo: el gate
+  de visibilidad corre dentro del handler y lo cacheado ya lo pasó.
+- **Marca de agua**: la última corrida de run_history (id y fin — el pipeline
+  diario y las operaciones del Centro de Datos pasan por ahí, y son lo que
+  reescribe indicadores, señales y resultados) más cantidad y última
+  modificación de estrategias, señales y backtests guardados. Crear, editar o
+  borrar una definición mueve la marca sin esperar al pipeline.
+
+Acotado por entradas y por bytes aproximados (el JSON del resultado): una
+respuesta que sola supera el tope por entrada no se guarda. Es un LRU del
+proceso, como el de `asset_history_reader`; cada worker tiene el suyo.
+
+Solo se cachean las herramientas que lo piden (`@tool(cache=True)`): las que
+leen resultados calculados o simulan sobre ellos. Las de catálogo y manual ya
+son baratas, y las de cartera leen estado que se edita desde la UI sin pasar
+por ninguna de las tablas de la marca.
+
+Se apaga con AI_RESULT_CACHE=0 (la suite lo hace en conftest: sus fixtures
+recrean filas con los mismos ids y fechas y la marca no las distinguiría).
+"""
+import copy
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRADAS = 256
+MAX_BYTES = 32 * 1024 * 1024          # total aproximado del caché
+MAX_BYTES_ENTRADA = 2 * 1024 * 1024   # una respuesta más grande no se guarda
+
+# Centinela de "no está": None es un resultado legítimo de una herramienta.
+FALTA = object()
+
+_cache: "OrderedDict[tuple, tuple[Any, int]]" = OrderedDict()
+_bytes = 0
+_lock = threading.Lock()
+_stats = {"aciertos": 0, "fallos": 0}
+
+
+def activo() -> bool:
+    return os.environ.get("AI_RESULT_CACHE", "1").strip().lower() in (
+        "1", "true", "yes", "on")
+
+
+def clear() -> None:
+    global _bytes
+    with _lock:
+        _cache.clear()
+        _bytes = 0
+        _stats.update(aciertos=0, fallos=0)
+
+
+def stats() -> dict:
+    with _lock:
+        return {"entradas": len(_cache), "bytes": _bytes, **_stats}
+
+
+# ── Clave ─────────────────────────────────────────────────────────────────────
+
+def _argumentos(arguments: dict) -> str:
+    limpios = {k: v for k, v in (arguments or {}).items() if v is not None}
+    return json.dumps(limpios, sort_keys=True, default=str)
+
+
+def _alcance(caller) -> str:
+    user_id, is_admin = caller.viewer()
+    return "admin" if is_admin else f"u{user_id}"
+
+
+def marca_de_agua(session) -> tuple | None:
+    """Lo que mueve cualquier dato que una herramienta cacheada puede leer.
+
+    None si la consulta falla (base a medio migrar): sin marca no se cachea.
+    """
+    from app.models import BacktestRun, SignalDefinition, Strategy
+    from app.models.run_history import RunHistory
+
+    f = sa.func
+    try:
+        return tuple(session.execute(sa.select(
+            sa.select(f.max(RunHistory.id)).scalar_subquery(),
+            sa.select(f.max(RunHistory.finished_at)).scalar_subquery(),
+            sa.select(f.count(Strategy.id)).scalar_subquery(),
+            sa.select(f.max(Strategy.updated_at)).scalar_subquery(),
+            sa.select(f.count(SignalDefinition.id)).scalar_subquery(),
+            sa.select(f.max(SignalDefinition.id)).scalar_subquery(),
+            sa.select(f.max(SignalDefinition.created_at)).scalar_subquery(),
+            sa.select(f.count(BacktestRun.id)).scalar_subquery(),
+            sa.select(f.max(BacktestRun.id)).scalar_subquery(),
+        )).one())
+    except Exception as exc:
+        session.rollback()
+        logger.debug("Sin marca de agua para el caché de la IA: %s", exc)
+        return None
+
+
+def clave(nombre: str, caller, arguments: dict) -> tuple | None:
+    from app.database import get_session
+
+    marca = marca_de_agua(get_session())
+    if marca is None:
+        return None
+    return (nombre, _argumentos(arguments), _alcance(caller), marca)
+
+
+# ── Lectura y escritura ───────────────────────────────────────────────────────
+
+def leer(k: tuple) -> Any:
+    """El resultado guardado (una copia: quien lo recibe lo puede mutar) o
+    FALTA."""
+    with _lock:
+        hit = _cache.get(k)
+        if hit is None:
+            _stats["fallos"] += 1
+            return FALTA
+        _cache.move_to_end(k)
+        _stats["aciertos"] += 1
+        valor = hit[0]
+    return copy.deepcopy(valor)
+
+
+def guardar(k: tuple, valor: Any) -> bool:
+    global _bytes
+    try:
+        peso = len(json.dumps(valor, default=str))
+    except (TypeError, ValueError):
+        return False
+    if peso > MAX_BYTES_ENTRADA:
+        return False
+    valor = copy.deepcopy(valor)
+    with _lock:
+        viejo = _cache.pop(k, None)
+        if viejo is not None:
+            _bytes -= viejo[1]
+        _cache[k] = (valor, peso)
+        _bytes += peso
+        while _cache and (len(_cache) > MAX_ENTRADAS or _bytes > MAX_BYTES):
+            _, (_, p) = _cache.popitem(last=False)
+            _bytes -= p
+    return True
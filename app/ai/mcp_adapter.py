@@ -10,9 +10,13 @@ No es una elección estética: el SDK no está instalado en la PC de desarrollo
 (como `yfinance`), así que cualquier lógica que viviera junto a él sería lógica
 sin tests hasta llegar a Railway, que es producción.
 """
+import asyncio
 import datetime as _dt
 import decimal
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from app.ai import registry, tokens
 from app.ai.caller import AiCaller, ScopeDenegado
@@ -191,3 +195,69 @@ def ejecutar(nombre: str, caller: AiCaller | None,
                 f"quedó registrado en el servidor"}
 
     return {"ok": True, "resultado": _serializable(resultado)}
+
+
+# ── Ejecución fuera del event loop ───────────────────────────────────────────
+# Los handlers son síncronos y tocan la base: corridos en el loop de uvicorn,
+# una vista previa de backtest de un minuto congelaba TODAS las llamadas,
+# incluso un `list_strategies` de otro usuario. Van a un pool de threads
+# acotado, y las herramientas `pesada=True` (simulaciones y backtests) tienen
+# además un cupo de `workers - 1`: por muchas que se encolen, siempre queda un
+# thread para las livianas.
+
+def _workers() -> int:
+    try:
+        return max(2, int(os.environ.get("MCP_TOOL_WORKERS", "4")))
+    except ValueError:
+        return 4
+
+
+_pool: ThreadPoolExecutor | None = None
+_pesadas: asyncio.Semaphore | None = None
+_pool_lock = threading.Lock()
+
+
+def _ejecutor() -> tuple[ThreadPoolExecutor, asyncio.Semaphore]:
+    global _pool, _pesadas
+    with _pool_lock:
+        if _pool is None:
+            n = _workers()
+            _pool = ThreadPoolExecutor(max_workers=n,
+                                       thread_name_prefix="mcp-tool")
+            _pesadas = asyncio.Semaphore(n - 1)
+        return _pool, _pesadas
+
+
+def es_pesada(nombre: str) -> bool:
+    try:
+        return registry.get(nombre).pesada
+    except registry.HerramientaDesconocida:
+        return False
+
+
+def _ejecutar_y_soltar(nombre, caller, argumentos) -> dict:
+    from app.database import Session
+
+    try:
+        return ejecutar(nombre, caller, argumentos)
+    finally:
+        # La sesión con ámbito es del thread del pool, que se reusa: sin esto
+        # la próxima herramienta hereda una transacción abierta.
+        Session.remove()
+
+
+async def ejecutar_en_pool(nombre: str, caller: AiCaller | None,
+                           argumentos: dict | None = None) -> dict:
+    """`ejecutar` en el pool de herramientas, sin bloquear el event loop.
+
+    El caller se resuelve ANTES de llamar (en el loop): el token autenticado
+    viaja en una contextvar del request, y el thread del pool no la ve.
+    """
+    pool, pesadas = _ejecutor()
+    loop = asyncio.get_running_loop()
+    if not es_pesada(nombre):
+        return await loop.run_in_executor(pool, _ejecutar_y_soltar, nombre,
+                                          caller, argumentos)
+    async with pesadas:
+        return await loop.run_in_executor(pool, _ejecutar_y_soltar, nombre,
+                                          caller, argumentos)
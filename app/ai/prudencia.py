@@ -31,6 +31,7 @@ la primera llamada— y no pretenden serlo. Lo que hacen es que mirar el holdout
 sea un acto deliberado y contado, en vez de algo que ya pasó sin que nadie lo
 note.
 """
+import threading
 from datetime import timedelta
 
 # Qué proporción de la historia queda reservada. Un cuarto es el equilibrio
@@ -125,16 +126,20 @@ def _a_fecha(valor):
 # En memoria del proceso y a propósito: persistirlo sería la primera escritura
 # de la IA sobre la base, y no vale una migración. Las dos limitaciones que eso
 # trae están dichas en la respuesta al usuario, no escondidas — se reinicia con
-# el servicio, y cuenta por usuario y no por conversación.
+# el servicio, y cuenta por usuario y no por conversación. Las herramientas
+# corren en los workers del pool del servidor MCP: el leer-sumar-escribir va
+# bajo lock, o dos simulaciones simultáneas del mismo usuario contarían una.
 
 _INTENTOS: dict = {}
+_INTENTOS_LOCK = threading.Lock()
 
 
 def registrar_intento(caller) -> int:
     """Suma uno a las simulaciones de este usuario y devuelve el total."""
     user_id, _admin = caller.viewer()
-    _INTENTOS[user_id] = _INTENTOS.get(user_id, 0) + 1
-    return _INTENTOS[user_id]
+    with _INTENTOS_LOCK:
+        n = _INTENTOS[user_id] = _INTENTOS.get(user_id, 0) + 1
+    return n
 
 
 def aviso_intentos(n: int) -> str | None:
@@ -156,4 +161,5 @@ def aviso_intentos(n: int) -> str | None:
 
 def reiniciar_contador() -> None:
     """Solo para los tests: el estado de módulo no se comparte entre casos."""
-    _INTENTOS.clear()
+    with _INTENTOS_LOCK:
+        _INTENTOS.clear()
@@ -19,6 +19,7 @@ probar entero con la suite normal.
 from dataclasses import dataclass
 from typing import Any, Callable
 
+from app.ai import cache as _cache
 from app.ai.caller import SCOPE_READ, AiCaller
 
 # Tope duro de filas para CUALQUIER herramienta. Una respuesta de 200 filas ya
@@ -66,6 +67,9 @@ class Tool:
     familia: str = ""           # una de FAMILIAS — obligatoria, ver `tool()`
     scope: str = SCOPE_READ
     max_rows: int | None = None   # None = no devuelve listas de filas
+    cache: bool = False         # resultado reusable, ver app/ai/cache.py
+    al_reusar: Callable | None = None   # (caller, resultado) en un acierto
+    pesada: bool = False        # simula/backtestea: cupo propio en mcp_server
 
     def __post_init__(self):
         if self.max_rows is not None and self.max_rows > MAX_ROWS_TOPE:
@@ -85,11 +89,19 @@ _REGISTRO: dict[str, Tool] = {}
 
 
 def tool(*, name: str, description: str, input_schema: dict, familia: str,
-         scope: str = SCOPE_READ, max_rows: int | None = None):
+         scope: str = SCOPE_READ, max_rows: int | None = None,
+         cache: bool = False, al_reusar: Callable | None = None,
+         pesada: bool = False):
     """Decorador de registro. El handler recibe `(caller, **argumentos)`.
 
     `familia` es obligatoria y sin default: elegirla es lo que ata la
     herramienta nueva a su párrafo del manual (ver FAMILIAS).
+
+    `cache=True` solo para handlers cuyo resultado depende de los argumentos,
+    de lo que el caller ve y de datos que mueve la marca de agua de
+    `app.ai.cache` — nada más. Si el handler además tiene un efecto por
+    llamada (el contador de simulaciones), `al_reusar` lo repite sobre el
+    resultado reusado.
     """
 
     def deco(fn: Callable) -> Callable:
@@ -97,7 +109,8 @@ def tool(*, name: str, description: str, input_schema: dict, familia: str,
             raise ValueError(f"herramienta duplicada: {name}")
         _REGISTRO[name] = Tool(name=name, description=description,
                                input_schema=input_schema, handler=fn,
-                               familia=familia, scope=scope, max_rows=max_rows)
+                               familia=familia, scope=scope, max_rows=max_rows,
+                               cache=cache, al_reusar=al_reusar, pesada=pesada)
         return fn
 
     return deco
@@ -128,7 +141,23 @@ def call(name: str, caller: AiCaller, arguments: dict | None = None) -> Any:
     """
     herramienta = get(name)
     caller.exigir(herramienta.scope)
-    return herramienta.handler(caller, **(arguments or {}))
+    arguments = arguments or {}
+    if not (herramienta.cache and _cache.activo()):
+        return herramienta.handler(caller, **arguments)
+
+    # La clave se arma DESPUÉS de exigir el scope y lleva el alcance de
+    # visibilidad del caller: un acierto nunca saltea ninguno de los dos gates.
+    k = _cache.clave(name, caller, arguments)
+    if k is not None:
+        hit = _cache.leer(k)
+        if hit is not _cache.FALTA:
+            if herramienta.al_reusar is not None:
+                hit = herramienta.al_reusar(caller, hit)
+            return hit
+    resultado = herramienta.handler(caller, **arguments)
+    if k is not None:
+        _cache.guardar(k, resultado)
+    return resultado
 
 
 def limite(pedido: int | None, tope: int) -> int:
@@ -143,7 +172,7 @@ def limite(pedido: int | None, tope: int) -> int:
 def _cargar() -> None:
     """Importa los módulos de herramientas la primera vez (el decorador corre
     al importar). Explícito y no por descubrimiento de archivos: el mismo
-    criterio que `app/__init__.py` usa con las páginas — sin registro, no
+    criterio que `app/web.py` usa con las páginas — sin registro, no
     existe."""
     if _REGISTRO:
         return
@@ -38,12 +38,25 @@ def _ventana(caller, date_from, date_to, revelar_holdout):
 
 def _prudencia(caller, vent: dict) -> dict:
     """Los campos de holdout y contador que acompañan a toda corrida."""
+    return _contar_intento(caller, {"modo": vent["modo"],
+                                    "corte_holdout": vent["corte"],
+                                    "holdout": vent["nota"]})
+
+
+def _contar_intento(caller, salida: dict) -> dict:
+    """Suma la simulación al contador y lo escribe (con su aviso) en `salida`.
+
+    Es también el `al_reusar` de las corridas cacheadas (app/ai/cache.py): una
+    respuesta reusada cuenta como un intento más, porque para el sobreajuste lo
+    que importa es cuántas veces se MIRÓ un resultado, no cuántas se computó.
+    """
     n = prudencia.registrar_intento(caller)
-    salida = {"modo": vent["modo"], "corte_holdout": vent["corte"],
-              "holdout": vent["nota"], "simulaciones_en_esta_sesion": n}
+    salida["simulaciones_en_esta_sesion"] = n
     aviso = prudencia.aviso_intentos(n)
     if aviso:
         salida["aviso_sobreajuste"] = aviso
+    else:
+        salida.pop("aviso_sobreajuste", None)
     return salida
 
 
@@ -94,6 +107,7 @@ def list_backtest_runs(caller: AiCaller, strategy_id: int,
 @tool(
     name="get_backtest_results",
     familia="backtest",
+    cache=True,
     description=(
         "El resultado de un backtest guardado: rendimiento medio por cuantil y "
         "horizonte, más el resumen del IC (correlación entre el puntaje y el "
@@ -241,6 +255,9 @@ def _resumen_ic(datos: dict) -> dict:
 @tool(
     name="backtest_strategy_variant",
     familia="backtest",
+    cache=True,
+    al_reusar=_contar_intento,
+    pesada=True,
     description=(
         "Prueba una VARIANTE de una estrategia —otros componentes u otros "
         "pesos— y la compara con la original, sin crear nada. Contesta '¿y si "
@@ -314,6 +331,7 @@ def backtest_strategy_variant(caller: AiCaller, strategy_id: int,
         **_prudencia(caller, vent),
         "config": datos["config"],
         "duration_seconds": round(datos.get("duration_seconds") or 0, 2),
+        "forward_panel": datos.get("forward_panel"),
         "base": {"ic_in_sample": _resumen_ic(datos["base"]),
                  "estabilidad": _estabilidad(datos["base"]),
                  "quantiles": datos["base"]["quantile_stats"],
@@ -333,6 +351,9 @@ def backtest_strategy_variant(caller: AiCaller, strategy_id: int,
 @tool(
     name="run_backtest_preview",
     familia="backtest",
+    cache=True,
+    al_reusar=_contar_intento,
+    pesada=True,
     description=(
         "Corre un backtest de cuantiles y devuelve el resultado SIN guardarlo. "
         "Sirve para explorar: probar otro horizonte o período no deja rastro "
@@ -393,6 +414,7 @@ def run_backtest_preview(caller: AiCaller, strategy_id: int,
         "date_to": str(datos["date_to"]),
         "n_dates": datos["n_dates"],
         "duration_seconds": round(datos.get("duration_seconds") or 0, 2),
+        "forward_panel": datos.get("forward_panel"),
         "ic_in_sample": resumen,
         "estabilidad": _estabilidad(datos),
         "quantiles": datos["quantile_stats"],
@@ -157,6 +157,7 @@ def _comun(caller, vent: dict, cobertura: dict, paso: int) -> dict:
 @tool(
     name="backtest_strategy_draft",
     familia="backtest",
+    pesada=True,
     description=(
         "Mide una estrategia que NO EXISTE: le pasás los componentes, los "
         "pesos y (opcional) el filtro de elegibilidad, y devuelve qué tan bien "
@@ -252,6 +253,7 @@ def backtest_strategy_draft(caller: AiCaller, components: list,
 @tool(
     name="simulate_strategy_draft_portfolio",
     familia="carteras",
+    pesada=True,
     description=(
         "Simula la CARTERA de una estrategia que no existe: compra los N "
         "mejores del ranking, los rebalancea cada tantas ruedas y descuenta "
@@ -60,27 +60,30 @@ def _por_tramos(datos: dict, n: int = _TRAMOS) -> list | None:
     pasados: el resultado global siempre se ve bien. Partirlo muestra si la
     cartera se sostuvo o si vivió de un tramo.
     """
-    from app.services import portfolio_metrics as pm
+    import numpy as np
+
+    from app.services import portfolio_metrics_matrix as pmm
 
     fechas, equity = datos.get("dates") or [], datos.get("equity") or []
     if len(fechas) < n * 2:
         return None
 
     corte = len(fechas) // n
-    salida = []
-    for i in range(n):
-        lo = i * corte
-        hi = (i + 1) * corte if i < n - 1 else len(fechas)
-        eq, fe = equity[lo:hi], fechas[lo:hi]
-        if len(eq) < 2:
-            continue
-        # Reescalado a 1 para que cada tramo se lea por sí mismo y no arrastre
-        # el nivel acumulado del anterior.
-        base = eq[0] or 1.0
-        m = pm.summary([v / base for v in eq], dates=fe)
-        salida.append({"desde": str(fe[0]), "hasta": str(fe[-1]),
-                       **_solo_kpis(m)})
-    return salida
+    tramos = [(i * corte, (i + 1) * corte if i < n - 1 else len(fechas))
+              for i in range(n)]
+    tramos = [(lo, hi) for lo, hi in tramos if hi - lo >= 2]
+    # Todos los tramos en una pasada: una fila por tramo sobre la misma grilla
+    # de fechas, con la máscara marcando su tramo. Reescalado a 1 para que
+    # cada tramo se lea por sí mismo y no arrastre el nivel acumulado del
+    # anterior.
+    eq = np.asarray(equity, dtype=float)
+    base = np.array([equity[lo] or 1.0 for lo, _hi in tramos])
+    mask = np.zeros((len(tramos), len(eq)), dtype=bool)
+    for i, (lo, hi) in enumerate(tramos):
+        mask[i, lo:hi] = True
+    kpis = pmm.summary_many(eq / base[:, None], fechas, mask)
+    return [{"desde": str(fechas[lo]), "hasta": str(fechas[hi - 1]),
+             **_solo_kpis(m)} for (lo, hi), m in zip(tramos, kpis)]
 
 
 @tool(
@@ -162,9 +165,78 @@ def get_portfolio_performance(caller: AiCaller, portfolio_id: int) -> dict:
     }
 
 
+def _redondear(x, nd: int = 6):
+    if isinstance(x, dict):
+        return {k: _redondear(v, nd) for k, v in x.items()}
+    if isinstance(x, float):
+        return round(x, nd)
+    return x
+
+
+@tool(
+    name="get_portfolio_robustness",
+    familia="carteras",
+    pesada=True,
+    description=(
+        "Cuánto del rendimiento de una cartera puede ser suerte. Remuestrea "
+        "su curva miles de veces (bootstrap por bloques: la misma historia "
+        "rearmada en otro orden) y devuelve bandas del 5 %, 50 % y 95 % para "
+        "CAGR, máxima caída y Sharpe, la probabilidad de CAGR positivo y, si "
+        "es la cartera de una estrategia, la de ganarle a comprar todo el "
+        "universo. Si la corrida se guardó con sus trades, suma la prueba "
+        "contra entradas al azar (probabilidad de habilidad) y cuánto "
+        "dependió la máxima caída del orden de los trades."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {"portfolio_id": {"type": "integer"}},
+        "required": ["portfolio_id"],
+        "additionalProperties": False,
+    },
+)
+def get_portfolio_robustness(caller: AiCaller, portfolio_id: int) -> dict:
+    from app.services import portfolio_backtest_service as pbs
+    from app.services import robustness_service
+    from app.services.portfolio_service import resolve_membership
+
+    p = _cartera_visible(caller, portfolio_id)
+    s = _sesion()
+
+    # Una cartera de estrategia promovida tiene su snapshot: el análisis
+    # guardado con la corrida, o uno al vuelo desde sus curvas. Una curada se
+    # analiza al vuelo sobre la curva de sus miembros. Ninguno se guarda acá.
+    analisis = (robustness_service.for_run(s, p.source_run_id)
+                if p.source_run_id else None)
+    if analisis is None:
+        curva = pbs.curated_equity_from_members(
+            s, resolve_membership(s, p.id) or [])
+        if curva is None:
+            raise ValueError("la cartera no tiene curva que analizar "
+                             "(sin miembros con precios cargados).")
+        analisis = {**robustness_service.analyze(
+            curva["dates"], {"cartera": curva["equity"]}), "stored": False}
+
+    return {
+        "portfolio_id": p.id, "name": p.name,
+        "guardado": analisis.pop("stored"),
+        **_redondear(analisis),
+        "como_leerlo": (
+            "Las bandas dicen entre qué valores cayó el 90 % de las historias "
+            "alternativas: una banda de CAGR que cruza el cero es una cartera "
+            "que con otro orden de los mismos meses pudo haber perdido. "
+            "`prob_beats_benchmark` por debajo de 0,8 es un resultado que no "
+            "se distingue con claridad de comprar todo. `trades.prob_skill` "
+            "es la fracción de juegos de entradas al azar (mismos activos y "
+            "duraciones) que las reglas superaron: cerca de 0,5 es azar. Esto "
+            "mide la suerte del camino, NO el sobreajuste de haber elegido "
+            "entre muchas variantes — eso sigue contando aparte."),
+    }
+
+
 @tool(
     name="simulate_portfolio",
     familia="carteras",
+    pesada=True,
     description=(
         "Simula una cartera hipotética a partir de una lista de tickers y "
         "pesos, y devuelve cómo habría andado: retorno, CAGR, volatilidad, "
@@ -89,9 +89,57 @@ def list_signals(caller: AiCaller, limit: int | None = None) -> dict:
     }
 
 
+@tool(
+    name="search_catalog",
+    familia="catalogo",
+    description=(
+        "Busca por texto en el catálogo: indicadores, señales y estrategias "
+        "que podés ver, y países, mercados, tipos de instrumento, sectores e "
+        "industrias (también por sus aliases). No distingue acentos ni "
+        "mayúsculas y cada palabra vale como prefijo; entre comillas busca la "
+        "frase exacta. Usalo en vez de get_catalog cuando sabés qué buscás."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "Qué buscar."},
+            "kinds": {
+                "type": "array",
+                "items": {"type": "string",
+                          "enum": ["indicator", "signal", "strategy", "country",
+                                   "market", "instrument_type", "sector",
+                                   "industry"]},
+                "description": "Restringe a esos tipos. Por omisión, todos.",
+            },
+            "limit": {"type": "integer", "minimum": 1,
+                      "description": "Máximo de resultados. Tope 50."},
+        },
+        "required": ["query"],
+        "additionalProperties": False,
+    },
+    max_rows=50,
+)
+def search_catalog(caller: AiCaller, query: str, kinds: list | None = None,
+                   limit: int | None = None) -> dict:
+    from app.services import catalog_search
+
+    user_id, is_admin = caller.viewer()
+    hits = catalog_search.search(query, user_id=user_id, is_admin=is_admin,
+                                 kinds=tuple(kinds) if kinds else None,
+                                 limit=limite(limit, 50))
+    return {
+        "query": query,
+        "resultados": [
+            {"tipo": e.kind, "id": e.id, "name": e.name, "code": e.code}
+            for e in hits
+        ],
+    }
+
+
 @tool(
     name="indicator_distribution",
     familia="indicadores",
+    cache=True,
     description=(
         "Cómo se reparte un indicador entre TODOS los activos en una fecha: "
         "percentiles, mínimo, máximo y cobertura (cuántos activos tienen el "
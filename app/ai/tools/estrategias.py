@@ -107,6 +107,7 @@ def list_strategies(caller: AiCaller, limit: int | None = None) -> dict:
 @tool(
     name="strategy_ranking",
     familia="ranking",
+    cache=True,
     description=(
         "El ranking de una estrategia en una fecha: los activos ordenados por "
         "su puntaje, del mejor al peor. Sin fecha usa la última calculada. El "
@@ -168,6 +169,7 @@ def strategy_ranking(caller: AiCaller, strategy_id: int,
 @tool(
     name="strategy_score_history",
     familia="ranking",
+    cache=True,
     description=(
         "Cómo evolucionó el puntaje de una estrategia para uno o más activos. "
         "Sirve para ver si un activo viene mejorando o deteriorándose. Acotá "
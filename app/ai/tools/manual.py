@@ -58,10 +58,8 @@ def _nivel(caller: AiCaller) -> int:
 def search_manual(caller: AiCaller, query: str, limit: int | None = None) -> dict:
     from app.services import manual_service
 
-    secciones = manual_service.visible(manual_service.load_sections(),
-                                       _nivel(caller))
     tope = limite(limit, _TOPE)
-    hits = manual_service.search(secciones, query, limit=tope)
+    hits = manual_service.search_visible(query, _nivel(caller), limit=tope)
     return {
         "query": query,
         "resultados": [
@@ -129,6 +129,7 @@ def get_pack_spec(caller: AiCaller, seccion: str | None = None) -> dict:
 @tool(
     name="preview_pack",
     familia="packs",
+    pesada=True,
     description=(
         "Ensaya un pack contra ESTA instalación sin escribir nada, igual que "
         "el paso previo a importarlo en la pantalla. Devuelve los errores que "
@@ -10,7 +10,7 @@ logger = logging.getLogger(__name__)
 # Sin anonymous_user custom: el modo invitado (GuestUser con acceso público
 # que operaba como admin) se ELIMINÓ a pedido del usuario (jul-2026) — siempre
 # hay que loguearse con un usuario real. El anónimo default de Flask-Login
-# tiene is_authenticated=False, así que before_request (app/__init__.py)
+# tiene is_authenticated=False, así que before_request (app/web.py)
 # redirige toda ruta no pública al login.
 login_manager = LoginManager()
 login_manager.login_view = "/login"
@@ -1 +1 @@
-# Los callbacks se importan explícitamente en app/__init__.py.
+# Los callbacks se importan explícitamente en app/web.py.
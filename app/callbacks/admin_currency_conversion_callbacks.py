@@ -300,7 +300,7 @@ def start_sync(_):
     pre_msg, pre_color = "Sincronizando…", "info"
 
     def _run():
-        def _progress(cur, tot):
+        def _progress(cur, tot, _label=None):
             _sync_state["current"] = cur
             _sync_state["total"]   = tot
         try:
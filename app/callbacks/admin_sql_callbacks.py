@@ -5,21 +5,22 @@ Estado de sesión: dict server-side keyed por UUID (dcc.Store).
 Cada sesión mantiene una conexión SQLAlchemy con una transacción abierta
 mientras hay DML pendiente.
 """
-import io
 import re
 import threading
 import uuid
 from datetime import datetime, timedelta
 
-from dash import Input, Output, State, callback, dcc, no_update
+from dash import Input, Output, State, callback, no_update
 import dash_ag_grid as dag
 import dash_bootstrap_components as dbc
 from sqlalchemy import text
 
+from app.components.export_trigger import export_url, register_export_trigger
 from app.components.grids import (
     DEFAULT_COL_DEF, THEME_CLASS, grid_options, to_column_defs,
 )
 from app.components.ui_constants import COLOR_POSITIVE, COLOR_WARNING, COLOR_NEGATIVE
+from app.services import export_service
 
 # ── Estado server-side ────────────────────────────────────────────────────────
 _lock     = threading.Lock()
@@ -227,37 +228,81 @@ def rollback_tx(_, session_id):
         return f"Error en rollback: {exc}", _style("danger"), False, False
 
 
-# ── Exportar CSV ──────────────────────────────────────────────────────────────
+# ── Exportar (CSV / Excel por streaming) ──────────────────────────────────────
+# El callback solo registra la exportación; las filas salen de /export/<token>
+# con un cursor del lado del servidor, en una conexión propia (export_service).
+# Antes: fetchall() + StringIO + dcc.send_string — el resultado entero en el
+# worker y, en base64, en el JSON del callback.
+register_export_trigger("sql-export-url")
+
+
 @callback(
-    Output("sql-download", "data"),
-    Input("sql-btn-export", "n_clicks"),
-    State("sql-input",      "value"),
-    State("sql-session-id", "data"),
+    Output("sql-export-url",  "data"),
+    Output("sql-export-job",  "data"),
+    Output("sql-export-poll", "disabled"),
+    Output("sql-status",      "children", allow_duplicate=True),
+    Output("sql-status",      "style",    allow_duplicate=True),
+    Input("sql-btn-export",   "n_clicks"),
+    State("sql-input",        "value"),
+    State("sql-session-id",   "data"),
+    State("sql-export-fmt",   "value"),
+    State("sql-export-nocap", "value"),
+    State("sql-export-bg",    "value"),
     prevent_initial_call=True,
 )
-def export_csv(_, sql, session_id):
+def export_result(_, sql, session_id, fmt, nocap, background):
     from flask_login import current_user
+    skip = (no_update,) * 5
     if not current_user.is_authenticated or not current_user.is_admin:
-        return no_update
+        return skip
     if not sql or not sql.strip():
-        return no_update
+        return skip
 
     stmt = sql.strip().rstrip(";")
     if not _is_read_only(stmt):
-        return no_update
+        return skip
+    # La exportación corre en OTRA conexión: no vería el DML sin commitear de
+    # esta sesión, y exportar algo distinto de lo que muestra la grilla es
+    # peor que pedir que se cierre la transacción.
+    if _has_pending(session_id):
+        return (no_update, no_update, no_update,
+                "Hacé Commit o Rollback antes de exportar.", _style("warning"))
+
+    token = export_service.register(
+        export_service.sql_source(stmt), fmt or "csv", "sql_export",
+        user_id=current_user.id,
+        max_rows=None if nocap else export_service.MAX_ROWS,
+        background=bool(background))
+    if background:
+        return (no_update, token, False,
+                "Exportando en segundo plano…", _style("warning"))
+    return export_url(token), None, True, no_update, no_update
 
-    try:
-        conn   = _get_conn(session_id)
-        result = conn.execute(text(stmt))
-        rows   = result.fetchall()
-        cols   = list(result.keys())
-        buf    = io.StringIO()
-        buf.write(",".join(cols) + "\n")
-        for row in rows:
-            buf.write(",".join(_csv_val(v) for v in row) + "\n")
-        return dcc.send_string(buf.getvalue(), filename="sql_export.csv")
-    except Exception:
-        return no_update
+
+@callback(
+    Output("sql-export-url",  "data",     allow_duplicate=True),
+    Output("sql-export-poll", "disabled", allow_duplicate=True),
+    Output("sql-status",      "children", allow_duplicate=True),
+    Output("sql-status",      "style",    allow_duplicate=True),
+    Input("sql-export-poll",  "n_intervals"),
+    State("sql-export-job",   "data"),
+    prevent_initial_call=True,
+)
+def poll_export(_, token):
+    from flask_login import current_user
+    if not token or not current_user.is_authenticated:
+        return no_update, True, no_update, no_update
+    st = export_service.status(token, current_user.id)
+    if st is None:
+        return no_update, True, "La exportación venció.", _style("danger")
+    if st["state"] == "error":
+        return no_update, True, f"Error al exportar: {st['error']}", _style("danger")
+    if st["state"] != "done":
+        return (no_update, False, f"Exportando en segundo plano… "
+                f"{st['rows']:,} filas", _style("warning"))
+    note = "  ·  tope alcanzado" if st["truncated"] else ""
+    return (export_url(token), True,
+            f"Exportación lista: {st['rows']:,} filas{note}", _style("ok"))
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -267,13 +312,6 @@ def _fmt(v):
     return str(v)
 
 
-def _csv_val(v):
-    s = "" if v is None else str(v)
-    if "," in s or '"' in s or "\n" in s:
-        s = '"' + s.replace('"', '""') + '"'
-    return s
-
-
 def _style(kind: str) -> dict:
     colors = {
         "ok":      {"color": COLOR_POSITIVE},
@@ -45,6 +45,9 @@ _SLOTS = {
     "pricepos":   (1, []),   # price_position_52w
     "rvol":       (1, []),   # rvol_daily
 }
+# Códigos de esos paneles (los lee _pipeline_points)
+_PIPELINE_CODES = ("relative_strength_52w", "adx_daily", "price_position_52w",
+                   "rvol_daily")
 _COLLAPSIBLE = {"sma", "ema", "bollinger", "rsi", "macd", "stochastic", "atr"}  # tienen params div
 
 # Genera listas de IDs y args JS en orden canónico
@@ -158,10 +161,9 @@ def load_chart_data(asset_id, current_data):
         for row in df.itertuples(index=False)
     ]
 
-    import sqlalchemy as sa
     from app.database import get_session
     from app.models import Asset, RegimeConfig
-    from app.models.indicator_store import get_ind_table, CurrentIndicatorValue
+    from app.models.indicator_store import CurrentIndicatorValue
 
     db = get_session()
     asset = db.query(Asset).filter(Asset.id == int(asset_id)).first()
@@ -196,24 +198,21 @@ def load_chart_data(asset_id, current_data):
     best_ma: dict = {"D": {}, "W": {}, "M": {}}
 
     aid = int(asset_id)
+    # Una lectura por tabla de cadencia (ind_daily/weekly/monthly) para los seis
+    # códigos, en vez de una query por código. Con tablas anchas se suman las
+    # columnas de los paneles del pipeline: quedan en el caché del lector y
+    # prender un panel después no vuelve a la base.
+    from app.models.indicator_store import use_wide_ind_tables
+    from app.services.asset_history_reader import ind_key, read_asset_history
+    extra = _PIPELINE_CODES if use_wide_ind_tables() else ()
+    hist = read_asset_history(aid, codes=(*_str_codes, *extra))
     for code, (group, key) in _str_codes.items():
-        try:
-            t   = get_ind_table(code)
-            row = db.execute(
-                sa.select(t.c.value)
-                .where(t.c.asset_id == aid)
-                .where(t.c.value.isnot(None))  # tabla ancha: saltear filas NULL
-                                               # de códigos hermanos; no-op per-código
-                .order_by(t.c.date.desc())
-                .limit(1)
-            ).fetchone()
-            if row is not None:
-                if group == "regime_current":
-                    regime_current[key] = row[0]
-                else:
-                    vol_current[key] = row[0]
-        except Exception:
-            pass
+        value = hist.last(ind_key(code))
+        if value is not None:
+            if group == "regime_current":
+                regime_current[key] = value
+            else:
+                vol_current[key] = value
 
     # best_ma desde current_indicator_values
     _bm_map = {
@@ -252,6 +251,8 @@ def load_chart_data(asset_id, current_data):
 
 
 # ─── Callbacks lazy: calculan overlays solo cuando el toggle se activa ────────
+# Las zonas salen de chart_zones (las persiste el pipeline) y se calculan en el
+# momento solo si faltan o quedaron viejas — ver chart_zone_store.
 
 @callback(
     Output("chart-regime-data", "data"),
@@ -262,12 +263,9 @@ def load_chart_data(asset_id, current_data):
 def load_regime_overlay(enabled, asset_id):
     if not enabled or not asset_id:
         return no_update
-    from app.services.price_service import get_prices_df as _gpdf
-    from app.services.technical_service import get_regime_zones_for_chart
-    df = _gpdf(int(asset_id))
-    if df.empty:
-        return no_update
-    return get_regime_zones_for_chart(df)
+    from app.services.chart_zone_store import regime_zones
+    out = regime_zones(int(asset_id))
+    return no_update if out is None else out
 
 
 @callback(
@@ -279,12 +277,9 @@ def load_regime_overlay(enabled, asset_id):
 def load_vol_overlay(enabled, asset_id):
     if not enabled or not asset_id:
         return no_update
-    from app.services.price_service import get_prices_df as _gpdf
-    from app.services.technical_service import get_vol_zones_for_chart
-    df = _gpdf(int(asset_id))
-    if df.empty:
-        return no_update
-    return get_vol_zones_for_chart(df)
+    from app.services.chart_zone_store import vol_zones
+    out = vol_zones(int(asset_id))
+    return no_update if out is None else out
 
 
 @callback(
@@ -296,12 +291,9 @@ def load_vol_overlay(enabled, asset_id):
 def load_dd_overlay(enabled, asset_id):
     if not enabled or not asset_id:
         return no_update
-    from app.services.price_service import get_prices_df as _gpdf
-    from app.services.technical_service import get_dd_events_for_chart
-    df = _gpdf(int(asset_id))
-    if df.empty:
-        return no_update
-    return get_dd_events_for_chart(df)
+    from app.services.chart_zone_store import dd_events
+    out = dd_events(int(asset_id))
+    return no_update if out is None else out
 
 
 # ─── Paneles alimentados por el pipeline (no se calculan en el browser) ──────
@@ -319,26 +311,16 @@ def _pipeline_points(code: str, asset_id):
     valores (historia insuficiente para la ventana del indicador, sin benchmark
     configurado, sintéticos sin volumen en rvol_daily) o tabla/columna ausente
     en una base todavía sin migrar."""
-    import sqlalchemy as sa
-
-    from app.database import get_session
-    from app.models.indicator_store import get_ind_table
+    from app.services.asset_history_reader import ind_key, read_asset_history
 
-    db = get_session()
-    try:
-        t = get_ind_table(code)
-        rows = db.execute(
-            sa.select(t.c.date, t.c.value)
-            .where(t.c.asset_id == int(asset_id))
-            .where(t.c.value.isnot(None))  # tabla ancha: saltear las filas de
-                                           # los códigos hermanos de ind_daily
-            .order_by(t.c.date)
-        ).all()
-    except Exception:  # tabla/columna ausente (base sin poblar o sin migrar)
-        return None
+    # Con tablas anchas la columna ya vino en la lectura de ind_daily que hizo
+    # load_chart_data al elegir el activo: sale del caché del lector.
+    hist = read_asset_history(int(asset_id), codes=(code,))
+    if ind_key(code) in hist.missing:  # tabla/columna ausente (base sin
+        return None                    # poblar o sin migrar)
 
     return {"asset_id": int(asset_id),
-            "points": [[_t(d), float(v)] for d, v in rows]}
+            "points": [[_t(d), float(v)] for d, v in hist.indicator(code)]}
 
 
 @callback(
@@ -434,9 +416,9 @@ def load_strategy_overlay(enabled, strategy_id, asset_id):
     consultar la base)."""
     if not enabled or not strategy_id or not asset_id:
         return no_update
-    import sqlalchemy as sa
-
-    from app.models import signal_store
+    from app.services.asset_history_reader import (
+        pct_key, read_asset_history, strat_key,
+    )
     from app.services.strategy_service import get_strategy_by_id
     from app.services.visibility import can_view, current_viewer
 
@@ -446,24 +428,20 @@ def load_strategy_overlay(enabled, strategy_id, asset_id):
                                      user_id, is_admin):
         return no_update
 
-    from app.database import get_session
-    db = get_session()
     # score y pct (percentil 0..100 en la cross-section, precalculado por el
-    # pipeline — migración 0071) salen de la misma query indexada. pct puede
-    # ser NULL en historia previa a la migración: el modo percentil del
-    # simulador simplemente no ve esas fechas hasta un "Recalcular completo".
-    rt = signal_store.read_strat_table(db, int(strategy_id))
-    rows = db.execute(
-        sa.select(rt.c.date, rt.c.score, rt.c.pct)
-        .where(rt.c.asset_id == int(asset_id), rt.c.score.isnot(None))
-        .order_by(rt.c.date)).all()
+    # pipeline — migración 0071) salen de la misma lectura. pct puede ser NULL
+    # en historia previa a la migración: el modo percentil del simulador
+    # simplemente no ve esas fechas hasta un "Recalcular completo".
+    hist = read_asset_history(int(asset_id), strategies=(int(strategy_id),))
 
     return {
         "asset_id":    int(asset_id),
         "strategy_id": int(strategy_id),
         "name":        strat.name,
-        "scores":      [[_t(d), float(sc)] for d, sc, _ in rows if sc is not None],
-        "percentiles": [[_t(d), float(p)] for d, _, p in rows if p is not None],
+        "scores":      [[_t(d), float(sc)]
+                        for d, sc in hist.series(strat_key(strategy_id))],
+        "percentiles": [[_t(d), float(p)]
+                        for d, p in hist.series(pct_key(strategy_id))],
     }
 
 
@@ -8,6 +8,7 @@ from app.models import (
     FundamentalUpdateLog, PriceUpdateLog,
     SyntheticFormula,
 )
+from app.services import query_stats_service as _qs
 from app.services import run_history_service as _rh
 from app.services import run_lock_service as _rl
 from app.services import write_stats_service as _ws
@@ -241,6 +242,7 @@ def _run(op_id, service_fn, lock_token=_rl.NO_LOCK):
     # arranque la marca 'aborted'. start_run nunca levanta.
     _hist_id = _rh.start_run(op_id, scope=getattr(service_fn, "__name__", None))
     result = None
+    _rec = None
 
     def _cb(cur, tot, label=""):
         st["current"] = cur
@@ -331,7 +333,10 @@ def _run(op_id, service_fn, lock_token=_rl.NO_LOCK):
         # heartbeating late el lock persistido mientras corre (así otro
         # proceso lo ve vivo) y lo LIBERA al salir — el guard de _start lo
         # tomó y pasó su token. Con NO_LOCK (fail-open pre-migración) es no-op.
-        with _rl.heartbeating(_rl.HEAVY_WRITE, lock_token):
+        # recording(): sentencias/filas/base vs Python por fase (ver
+        # query_stats_service) — el agregado va a run_history.
+        with _rl.heartbeating(_rl.HEAVY_WRITE, lock_token), \
+                _qs.recording() as _rec:
             result = service_fn(progress_cb=_cb)
         errs   = result.get("errors", [])
         total  = result.get("total", 0)
@@ -368,7 +373,8 @@ def _run(op_id, service_fn, lock_token=_rl.NO_LOCK):
         _rh.finish_run(
             _hist_id, "error" if st.get("error") else "ok",
             total=_res.get("total"), unit=_res.get("unit"),
-            ok=_res.get("success"), first_error=_ferr)
+            ok=_res.get("success"), first_error=_ferr,
+            query_stats=_rec.summary() if _rec is not None else None)
         _ScopedSession.remove()
 
 
@@ -813,6 +819,31 @@ def _history_blocks(mono):
                    "fontWeight": "bold" if r["status"] == "aborted" else "normal"}))
         if r["status"] in ("error", "aborted") and r["first_error"]:
             out.append(html.Div(f"    {r['first_error'][:120]}", style=mono))
+        out.extend(_query_stats_lines(r.get("query_stats"), mono))
+    return out
+
+
+_QS_TOP_PHASES = 4
+
+
+def _query_stats_lines(qs, mono):
+    """Desglose por fase de la corrida (query_stats_service): las fases más
+    caras con sentencias, filas leídas/escritas y segundos en base vs Python."""
+    if not qs or not qs.get("phases"):
+        return []
+    tot = qs.get("totals") or {}
+    out = [html.Div(
+        f"    SQL {tot.get('statements', 0)} sent. · "
+        f"{tot.get('rows_fetched', 0)} filas leídas · "
+        f"{tot.get('rows_written', 0)} escritas · base {tot.get('db_s', 0):.1f}s",
+        style={**mono, "color": TEXT_MUTED})]
+    for p in qs["phases"][:_QS_TOP_PHASES]:
+        py = "—" if p.get("py_s") is None else f"{p['py_s']:.1f}s"
+        out.append(html.Div(
+            f"      {p['phase']:<18} {p['statements']:>7} sent. "
+            f"{p['rows_fetched']:>9} ↓ {p['rows_written']:>9} ↑ "
+            f"base {p['db_s']:>6.1f}s  py {py:>6}",
+            style={**mono, "color": TEXT_FAINT}))
     return out
 
 
@@ -27,8 +27,8 @@ def buscar_en_manual(query, active_slug):
     Se recalcula la visibilidad en cada llamada en vez de confiar en lo que
     llegó del cliente: el filtrado por rol no puede depender del navegador.
     """
-    visibles = ms.visible(ms.load_sections(), ms.level_of(current_role()))
+    nivel = ms.level_of(current_role())
     q = (query or "").strip()
     if len(q) < _MIN_QUERY:
-        return toc_children(visibles, active_slug)
-    return search_children(ms.search(visibles, q), q)
+        return toc_children(ms.visible(ms.load_sections(), nivel), active_slug)
+    return search_children(ms.search_visible(q, nivel), q)
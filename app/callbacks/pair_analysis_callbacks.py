@@ -1,13 +1,17 @@
 from collections import defaultdict
 from datetime import date as _date
 
-from dash import Input, Output, State, callback, clientside_callback, no_update
+from dash import ALL, Input, Output, State, callback, clientside_callback, ctx, no_update
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 
+import app.services.correlation_service as corr_svc
 import app.services.pair_analysis_service as svc
+import app.services.pair_scan_service as scan_svc
 import app.services.scatter_service as scatter_svc
 from app.services.asset_service import get_assets
+from app.components.correlation_neighbours import neighbours_list
+from app.components.pair_scan import pair_scan_table
 from app.utils import safe_callback
 from app.components.ui_constants import BG_CARD, BG_DEEP, COLOR_WARNING, TEXT_BODY, TEXT_FAINT
 
@@ -52,6 +56,10 @@ clientside_callback(
 )
 
 
+_ROLLING_WINDOW = 60     # ruedas de la correlación móvil del pie
+_NEIGHBOURS = 10         # vecinos que se listan del Activo 1
+
+
 # ── Scatter data store (se recalcula al cambiar activos o eventos) ────────────
 
 def _scatter_error(exc):
@@ -139,6 +147,14 @@ def store_scatter_data(asset1_id, asset2_id, show_events_opt,
         + (f"  ·  Correlación (retornos diarios): {corr:.3f}"
            if corr is not None else "")
     )
+    roll = corr_svc.rolling_correlation(
+        asset1_id, asset2_id, _ROLLING_WINDOW,
+        date_from=_date.fromisoformat(date_from) if date_from else None,
+        date_to=_date.fromisoformat(date_to) if date_to else None,
+    )
+    if len(roll):
+        stats += (f"  ·  Móvil {_ROLLING_WINDOW} ruedas: {roll.iloc[-1]:.3f} "
+                  f"(mín {roll.min():.3f} · máx {roll.max():.3f})")
 
     data = {
         "xs":           xs,
@@ -156,6 +172,96 @@ def store_scatter_data(asset1_id, asset2_id, show_events_opt,
     return data, stats
 
 
+# ── Vecinos del Activo 1 en el universo (matriz por bloques, cacheada) ───────
+
+@callback(
+    Output("pair-neighbours",  "children"),
+    Input("pair-asset1",       "value"),
+    Input("pair-nb-scope",     "value"),
+    Input("pair-btn-analizar", "n_clicks"),
+    State("pair-date-from",    "date"),
+    State("pair-date-to",      "date"),
+)
+@safe_callback(lambda exc: dbc.Alert(f"Error al calcular correlaciones: {exc}",
+                                     color="danger", className="mt-2 py-1",
+                                     style={"fontSize": "0.82rem"}))
+def load_neighbours(asset1_id, scope, _n_clicks, date_from, date_to):
+    if not asset1_id:
+        return ""
+    rows = corr_svc.neighbours(
+        asset1_id, scope or "sector",
+        date_from=_date.fromisoformat(date_from) if date_from else None,
+        date_to=_date.fromisoformat(date_to) if date_to else None,
+        k=_NEIGHBOURS,
+    )
+    return neighbours_list("pair", rows)
+
+
+@callback(
+    Output("pair-asset2", "value", allow_duplicate=True),
+    Input({"type": "pair-nb", "index": ALL}, "n_clicks"),
+    prevent_initial_call=True,
+)
+def pick_neighbour(n_clicks_list):
+    if not any(n for n in n_clicks_list if n):
+        return no_update
+    return ctx.triggered_id["index"]
+
+
+# ── Escáner de pares del grupo ───────────────────────────────────────────────
+
+@callback(
+    Output("pair-scan-group", "options"),
+    Output("pair-scan-group", "value"),
+    Input("pair-scan-scope", "value"),
+)
+def load_scan_groups(scope):
+    return scan_svc.group_options(scope or "sector"), None
+
+
+@callback(
+    Output("pair-scan-table", "children"),
+    Input("pair-scan-btn",    "n_clicks"),
+    Input("pair-scan-group",  "value"),
+    State("pair-scan-scope",  "value"),
+    State("pair-date-from",   "date"),
+    State("pair-date-to",     "date"),
+    prevent_initial_call=True,
+)
+@safe_callback(lambda exc: dbc.Alert(f"Error al escanear pares: {exc}",
+                                     color="danger", className="mt-2 py-1",
+                                     style={"fontSize": "0.82rem"}))
+def show_scan(_n_clicks, group_id, scope, date_from, date_to):
+    if group_id is None:
+        return ""
+    scope = scope or "sector"
+    # Elegir el grupo muestra el último ranking guardado; el botón reescanea.
+    if ctx.triggered_id != "pair-scan-btn":
+        return pair_scan_table(scan_svc.ranked(scope, group_id))
+    return pair_scan_table(scan_svc.scan(
+        scope, group_id,
+        date_from=_date.fromisoformat(date_from) if date_from else None,
+        date_to=_date.fromisoformat(date_to) if date_to else None,
+    ))
+
+
+@callback(
+    Output("pair-asset1",       "value",     allow_duplicate=True),
+    Output("pair-asset2",       "value",     allow_duplicate=True),
+    Output("pair-tabs",         "active_tab"),
+    Output("pair-btn-analizar", "n_clicks"),
+    Input({"type": "pair-scan-open", "index": ALL}, "n_clicks"),
+    State("pair-btn-analizar",  "n_clicks"),
+    prevent_initial_call=True,
+)
+def open_scanned_pair(n_clicks_list, n_analizar):
+    if not any(n for n in n_clicks_list if n):
+        return no_update, no_update, no_update, no_update
+    a1, a2 = (int(x) for x in ctx.triggered_id["index"].split("-"))
+    # Sumar un click a Analizar dispara los gráficos con el par ya cargado.
+    return a1, a2, "tab-ratio", (n_analizar or 0) + 1
+
+
 # ── Render clientside del gráfico de correlación ──────────────────────────────
 
 clientside_callback(
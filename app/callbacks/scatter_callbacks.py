@@ -1,10 +1,12 @@
 from collections import defaultdict
 from datetime import date as _date
 
-from dash import Input, Output, State, callback, clientside_callback, no_update
+from dash import ALL, Input, Output, State, callback, clientside_callback, ctx, no_update
 import dash_bootstrap_components as dbc
 
+import app.services.correlation_service as corr_svc
 import app.services.scatter_service as svc
+from app.components.correlation_neighbours import neighbours_list
 from app.utils import safe_callback
 from app.components.ui_constants import BG_CARD, BG_DEEP, COLOR_WARNING, TEXT_BODY, TEXT_FAINT
 
@@ -137,6 +139,35 @@ def store_scatter_data(asset1_id, asset2_id, show_events_opt):
     return data, stats
 
 
+# ── Vecinos del Activo 1 (último año: la pantalla no tiene fechas) ───────────
+@callback(
+    Output("scatter-neighbours", "children"),
+    Input("scatter-asset1",      "value"),
+    Input("scatter-nb-scope",    "value"),
+)
+@safe_callback(lambda exc: dbc.Alert(f"Error al calcular correlaciones: {exc}",
+                                     color="danger", className="mt-2 py-1",
+                                     style={"fontSize": "0.82rem"}))
+def load_neighbours(asset1_id, scope):
+    if not asset1_id:
+        return ""
+    rows = corr_svc.neighbours(asset1_id, scope or "sector", k=10)
+    return neighbours_list(
+        "scatter", rows,
+        note=f"(retornos diarios, últimos {corr_svc.DEFAULT_WINDOW_DAYS} días)")
+
+
+@callback(
+    Output("scatter-asset2", "value", allow_duplicate=True),
+    Input({"type": "scatter-nb", "index": ALL}, "n_clicks"),
+    prevent_initial_call=True,
+)
+def pick_neighbour(n_clicks_list):
+    if not any(n for n in n_clicks_list if n):
+        return no_update
+    return ctx.triggered_id["index"]
+
+
 # ── Clientside: tendencia + escala logarítmica sin round-trip ─────────────────
 _JS_RENDER = """
 function(scatterData, trendType, polyDegree, logScale) {
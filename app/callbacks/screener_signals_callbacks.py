@@ -1,8 +1,10 @@
-from dash import Input, Output, State, callback, html, no_update
+from dash import (Input, Output, State, callback, clientside_callback, html,
+                  no_update)
 
 import app.services.strategy_service as svc
 # Directo del origen y no vía app.pages.screener_signals: importar la página
 # dispara su register_page, que exige la app ya instanciada.
+from app.components.export_trigger import export_url, register_export_trigger
 from app.components.grids import score_col, text_col, ticker_col
 from app.components.ui_constants import COLOR_WARNING
 
@@ -65,9 +67,10 @@ def _result_label(shown: int, total: int) -> tuple[str, bool]:
 
 
 @callback(
-    Output("ss-results-store", "data"),
+    Output("ss-grid",          "columnDefs"),
     Output("ss-comp-meta",     "data"),
     Output("ss-query-store",   "data"),
+    Output("ss-cursors",       "data"),
     Output("ss-result-count",  "children"),
     Output("ss-btn-export",    "disabled"),
     Input("ss-btn-search",     "n_clicks"),
@@ -79,55 +82,53 @@ def _result_label(shown: int, total: int) -> tuple[str, bool]:
     prevent_initial_call=True,
 )
 def do_search(_, strategy_id, date_str, sector_id, market_id, limit):
+    """Arma las columnas y congela la consulta; las FILAS no viajan acá: las
+    pide la grilla de a bloques (fetch_block) a medida que se scrollea."""
     if not strategy_id or not date_str:
-        return None, [], None, "", True
+        return [], [], None, {}, "", True
 
     from datetime import date as dt_date
     target_date = dt_date.fromisoformat(date_str)
 
-    rows_data, comp_meta, total = svc.get_strategy_results_with_breakdown(
+    # El primer bloque, con el resumen recalculado (una búsqueda nueva nunca
+    # reusa un total viejo). La grilla lo va a volver a pedir: es barato y
+    # deja a fetch_block como único camino de las filas.
+    first = svc.get_strategy_ranking_page(
         strategy_id, target_date,
         sector_id=sector_id or None,
         market_id=market_id or None,
-        limit=int(limit or 0) or None,     # "Todos" viaja como 0
+        page_size=1, refresh=True,
     )
+    if not first["total"]:
+        return [], [], None, {}, "0 activos", True
 
-    if not rows_data:
-        return None, [], None, "0 activos", True
-
-    # La consulta que se mostró, congelada: el export saca de acá y no de los
-    # filtros vivos, que el usuario pudo tocar sin volver a buscar.
+    # La consulta que se mostró, congelada: los bloques y el export salen de
+    # acá y no de los filtros vivos, que el usuario pudo tocar sin volver a
+    # buscar.
+    cap = int(limit or 0) or None     # "Todos" viaja como 0
     query = {"strategy_id": strategy_id, "date": date_str,
-             "sector_id": sector_id or None, "market_id": market_id or None}
+             "sector_id": sector_id or None, "market_id": market_id or None,
+             "limit": cap}
 
-    label, truncated = _result_label(len(rows_data), total)
+    total = first["total"]
+    label, truncated = _result_label(min(total, cap or total), total)
     count = html.Span(label, style={"color": COLOR_WARNING} if truncated else None)
-    return rows_data, comp_meta, query, count, False
+    comp_meta = first["components"]
+    return (_column_defs(comp_meta, max(first["max_abs"], 1.0), first["comp_max"]),
+            comp_meta, query, {}, count, False)
 
 
 # ── Armar la grilla (columnas + filas) ────────────────────────────────────────
 
-def _maximos(rows_data: list[dict]) -> tuple[float, dict[str, float]]:
-    """Mayor valor absoluto del score total y de cada componente, en una sola
-    pasada. Es contra esto que se normaliza cada barra, así que la barra queda
-    relativa a lo que estás viendo (y las de una columna, comparables entre sí).
-    """
-    max_total = 1.0
-    por_comp: dict[str, float] = {}
-    for r in rows_data:
-        if r.get("score") is not None:
-            max_total = max(max_total, abs(r["score"]))
-        for key, sc in (r.get("comp_scores") or {}).items():
-            if sc is not None:
-                por_comp[key] = max(por_comp.get(key, 0.0), abs(sc))
-    return max_total, por_comp
-
-
 def _column_defs(comp_meta: list[dict], max_total: float,
                  comp_max: dict[str, float]) -> list[dict]:
     """Columnas fijas + una por señal de la estrategia. El peso va en la
     cabecera (×2) como antes, y también en el tooltip para cuando el nombre de
-    la señal no entra."""
+    la señal no entra.
+
+    Las barras se normalizan con los máximos del ranking COMPLETO (los calcula
+    el servidor en el resumen): con la carga por bloques, la grilla nunca
+    tiene todas las filas para medirlos ella."""
     cols = [
         ticker_col("/activo?asset_id={id}", "/historial-senales?asset_id={id}"),
         text_col("name", "Nombre", width=190, muted=True),
@@ -166,25 +167,75 @@ def _row_data(rows_data: list[dict], comp_meta: list[dict]) -> list[dict]:
     return filas
 
 
+def _block(query: dict, start: int, end: int, cursors: dict) -> tuple[dict, dict]:
+    """(getRowsResponse, cursores) de un bloque [start, end) del ranking.
+
+    `cursors` guarda la clave (score, asset_id) con la que arranca cada
+    bloque ya visto: {"200": [81.5, 4312]}. Scrolleando en orden, cada bloque
+    sale por clave; si la barra de scroll salta a uno cuya clave no se
+    conoce, ese va por offset y el siguiente ya vuelve a tener clave.
+    """
+    from datetime import date as dt_date
+
+    cap = query.get("limit")
+    if cap:
+        end = min(end, cap)
+    if end <= start:
+        return {"rowData": [], "rowCount": cap}, cursors
+
+    after = cursors.get(str(start))
+    page = svc.get_strategy_ranking_page(
+        query["strategy_id"], dt_date.fromisoformat(query["date"]),
+        sector_id=query.get("sector_id"), market_id=query.get("market_id"),
+        after=after, offset=0 if after else start, page_size=end - start,
+    )
+    total = min(page["total"], cap) if cap else page["total"]
+    if page["next"] is not None:
+        cursors = {**cursors, str(end): page["next"]}
+    return ({"rowData": _row_data(page["rows"], page["components"]),
+             "rowCount": total}, cursors)
+
+
 @callback(
-    Output("ss-grid", "columnDefs"),
-    Output("ss-grid", "rowData"),
-    Input("ss-results-store",    "data"),
-    Input("ss-comp-meta",        "data"),
+    Output("ss-grid",        "getRowsResponse"),
+    Output("ss-cursors",     "data", allow_duplicate=True),
+    Input("ss-grid",         "getRowsRequest"),
+    State("ss-query-store",  "data"),
+    State("ss-cursors",      "data"),
+    prevent_initial_call=True,
+)
+def fetch_block(request, query, cursors):
+    if not request or not query:
+        return {"rowData": [], "rowCount": 0}, no_update
+    return _block(query, int(request.get("startRow") or 0),
+                  int(request.get("endRow") or 0), cursors or {})
+
+
+# Búsqueda nueva → la grilla descarta los bloques que tenía y vuelve a pedir
+# desde el principio. El datasource del Infinite Row Model se arma una sola
+# vez (al montar la grilla): sin este purge seguiría mostrando la consulta
+# anterior.
+clientside_callback(
+    """function(query) {
+        if (query && window.dash_ag_grid) {
+            window.dash_ag_grid.getApiAsync("ss-grid")
+                .then(function(api) { api.purgeInfiniteCache(); });
+        }
+        return {"rowIndex": 0};
+    }""",
+    Output("ss-grid", "scrollTo"),
+    Input("ss-query-store", "data"),
+    prevent_initial_call=True,
 )
-def render_grid(rows_data, comp_meta):
-    if not rows_data:
-        return [], []
-
-    max_total, comp_max = _maximos(rows_data)
-    return (_column_defs(comp_meta or [], max_total, comp_max),
-            _row_data(rows_data, comp_meta or []))
 
 
 # ── Exportar a Excel ──────────────────────────────────────────────────────────
 
+register_export_trigger("ss-export-url")
+
+
 @callback(
-    Output("ss-download",      "data"),
+    Output("ss-export-url",    "data"),
     Input("ss-btn-export",     "n_clicks"),
     State("ss-query-store",    "data"),
     State("ss-comp-meta",      "data"),
@@ -197,6 +248,8 @@ def export_excel(_, query, comp_meta):
     # El Excel lleva el ranking COMPLETO: el tope es de la pantalla (para no
     # colgar el navegador), no del archivo.
     from datetime import date as dt_date
+    from flask_login import current_user
+    from app.services import export_service
     rows_data, _meta, _total = svc.get_strategy_results_with_breakdown(
         query["strategy_id"], dt_date.fromisoformat(query["date"]),
         sector_id=query.get("sector_id"),
@@ -205,27 +258,19 @@ def export_excel(_, query, comp_meta):
     if not rows_data:
         return no_update
 
-    import io
-    import openpyxl
-    from dash import dcc as _dcc
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Resultados"
-
     comp_keys  = [c["signal_key"]  for c in (comp_meta or [])]
     comp_names = [c["signal_name"] for c in (comp_meta or [])]
 
-    ws.append(["Ticker", "Nombre", "Score", "Δ Score"] + comp_names)
-
-    for r in rows_data:
-        comp_vals = [(r.get("comp_scores") or {}).get(k) for k in comp_keys]
-        ws.append([
-            r["ticker"], r["name"], r["score"], r.get("delta_score"),
-        ] + comp_vals)
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-
-    return _dcc.send_bytes(buf.read(), filename="screener_senales.xlsx")
+    # Las filas se arman al escribir el archivo (write-only, por streaming
+    # desde /export), no un workbook entero en memoria dentro del callback.
+    rows = (
+        [r["ticker"], r["name"], r["score"], r.get("delta_score")]
+        + [(r.get("comp_scores") or {}).get(k) for k in comp_keys]
+        for r in rows_data
+    )
+    token = export_service.register(
+        export_service.rows_source(
+            ["Ticker", "Nombre", "Score", "Δ Score"] + comp_names, rows),
+        "xlsx", "screener_senales", user_id=current_user.id,
+        max_rows=None, sheet="Resultados")
+    return export_url(token)
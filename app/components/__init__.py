@@ -1,4 +1,14 @@
-from app.components.navbar import build_navbar
-from app.components.abm import make_abm_layout
+# build_navbar/make_abm_layout se resuelven al pedirlos (PEP 562): importarlos
+# acá arrastraba Dash a cualquiera que solo quisiera ui_constants — p.ej. un
+# servicio importado por el worker o por un hijo del ProcessPool (app.core).
+_LAZY = {"build_navbar": "app.components.navbar",
+         "make_abm_layout": "app.components.abm"}
 
 __all__ = ["build_navbar", "make_abm_layout"]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,53 @@
+"""
+Panel «Más correlacionados con el Activo 1», compartido por Análisis de Pares
+(solapa Correlación) y Correlación de Precios (/scatter).
+
+Cada vecino es un botón con id {"type": f"{prefijo}-nb", "index": asset_id}:
+el callback de la pantalla lo escucha con ALL y lo carga como Activo 2. Los
+datos salen de correlation_service.neighbours (matriz del universo por
+bloques, cacheada).
+"""
+import dash_bootstrap_components as dbc
+from dash import html
+
+from app.components.ui_constants import COLOR_NEGATIVE, COLOR_POSITIVE
+
+
+def neighbours_panel(prefix: str, scope: str = "sector"):
+    """Selector de universo + lista de vecinos (vacía hasta elegir activo)."""
+    from app.services.correlation_service import UNIVERSE_SCOPES
+    return html.Div([
+        dbc.Row([
+            dbc.Col(html.Small("Más correlacionados con el Activo 1",
+                               className="text-muted"), width="auto"),
+            dbc.Col(dbc.Select(
+                id=f"{prefix}-nb-scope",
+                options=[{"label": label, "value": key}
+                         for key, (label, _) in UNIVERSE_SCOPES.items()],
+                value=scope, size="sm", style={"width": "160px"},
+            ), width="auto"),
+        ], className="g-2 align-items-center mb-1"),
+        html.Div(id=f"{prefix}-neighbours"),
+    ], className="mt-3")
+
+
+def neighbours_list(prefix: str, rows: list[dict], note: str = ""):
+    """Botones de los vecinos, de mayor a menor correlación."""
+    if not rows:
+        return html.Small("Sin activos con suficientes retornos en común en "
+                          "ese universo.", className="text-muted")
+    buttons = [
+        dbc.Button(
+            [r["ticker"], " ",
+             html.Span(f"{r['corr']:+.2f}",
+                       style={"color": COLOR_POSITIVE if r["corr"] >= 0
+                              else COLOR_NEGATIVE})],
+            id={"type": f"{prefix}-nb", "index": r["asset_id"]},
+            color="secondary", outline=True, size="sm",
+            className="me-1 mb-1", title=r["name"] or r["ticker"],
+            style={"fontSize": "0.78rem"},
+        )
+        for r in rows
+    ]
+    return html.Div(buttons + ([html.Small(note, className="text-muted ms-1")]
+                               if note else []))
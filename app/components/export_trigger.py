@@ -0,0 +1,28 @@
+"""
+Disparador de las descargas servidas por /export/<token> (export_service).
+
+El callback de la pantalla escribe la URL en el Store; un callback del lado
+del cliente la abre. La respuesta es un adjunto, así que el navegador la baja
+sin salir de la página — y sin que el archivo pase por el JSON de Dash, que es
+lo que hacía `dcc.Download`.
+"""
+from dash import Input, Output, clientside_callback, dcc, html
+
+
+def export_trigger(id_: str):
+    """Store de la URL + un span oculto que recibe la salida del cliente."""
+    return html.Div([dcc.Store(id=id_), html.Span(id=f"{id_}-sink", hidden=True)])
+
+
+def register_export_trigger(id_: str) -> None:
+    """Registra el callback de cliente que abre la URL (una vez por id)."""
+    clientside_callback(
+        "function(url){ if(url){ window.location.assign(url); } return ''; }",
+        Output(f"{id_}-sink", "children"),
+        Input(id_, "data"),
+        prevent_initial_call=True,
+    )
+
+
+def export_url(token: str) -> str:
+    return f"/export/{token}"
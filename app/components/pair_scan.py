@@ -0,0 +1,83 @@
+"""
+Solapa «Escáner» de Análisis de Pares: ranking de pares de un grupo.
+
+El ranking sale de pair_scan_service (todos los pares del grupo en una
+pasada, guardado en pair_scan_result). Cada fila tiene un botón con id
+{"type": "pair-scan-open", "index": "<activo1>-<activo2>"}: el callback de la
+pantalla lo escucha con ALL, carga el par en los controles y abre la solapa
+Ratio.
+"""
+import dash_bootstrap_components as dbc
+from dash import dcc, html
+
+from app.components.ui_constants import (COLOR_NEGATIVE, COLOR_POSITIVE, TD,
+                                         TEXT_BODY, TH_NOWRAP)
+
+
+def pair_scan_panel():
+    """Selector de grupo + botón Escanear + tabla (vacía hasta elegir grupo)."""
+    from app.services.pair_scan_service import SCAN_SCOPES
+    return html.Div([
+        dbc.Row([
+            dbc.Col(dbc.Select(
+                id="pair-scan-scope",
+                options=[{"label": label, "value": key}
+                         for key, (label, _) in SCAN_SCOPES.items()],
+                value="sector", size="sm", style={"width": "140px"},
+            ), width="auto"),
+            dbc.Col(dcc.Dropdown(id="pair-scan-group", placeholder="Grupo...",
+                                 style={"fontSize": "0.85rem"}), md=3),
+            dbc.Col(dbc.Button("Escanear", id="pair-scan-btn", color="primary",
+                               size="sm"), width="auto"),
+            dbc.Col(html.Small("Usa el rango de fechas de arriba. El ranking "
+                               "queda guardado por grupo.",
+                               className="text-muted"), width="auto"),
+        ], className="g-2 align-items-center mt-2 mb-2"),
+        dcc.Loading(html.Div(id="pair-scan-table"), type="circle",
+                    color=TEXT_BODY),
+    ])
+
+
+def _fmt(v, spec):
+    return format(v, spec) if v is not None else "—"
+
+
+def pair_scan_table(result: dict | None):
+    """Tabla del ranking (`pair_scan_service.ranked`)."""
+    if result is None:
+        return html.Small("Este grupo todavía no se escaneó.",
+                          className="text-muted")
+    if not result["rows"]:
+        return html.Small("Ningún par del grupo pasa los filtros (revierte, "
+                          "correlación suficiente y fechas en común).",
+                          className="text-muted")
+    head = html.Thead(html.Tr([html.Th(h, style=TH_NOWRAP) for h in (
+        "#", "Par", "z ratio", "Vida media", "Corr.", "Desvío corr.", "Obs.", "")]))
+    body = html.Tbody([
+        html.Tr([
+            html.Td(r["rank"], style=TD),
+            html.Td(f"{r['ticker_1']} / {r['ticker_2']}", style=TD),
+            html.Td(f"{r['zscore']:+.2f}", style={
+                **TD, "color": COLOR_POSITIVE if r["zscore"] < 0 else COLOR_NEGATIVE}),
+            html.Td(_fmt(r["half_life"], ".1f"), style=TD),
+            html.Td(_fmt(r["corr"], ".2f"), style=TD),
+            html.Td(_fmt(r["corr_std"], ".2f"), style=TD),
+            html.Td(r["n_obs"], style=TD),
+            html.Td(dbc.Button(
+                "Abrir",
+                id={"type": "pair-scan-open",
+                    "index": f"{r['asset_id_1']}-{r['asset_id_2']}"},
+                color="secondary", outline=True, size="sm",
+                style={"fontSize": "0.75rem", "padding": "0 6px"}), style=TD),
+        ])
+        for r in result["rows"]
+    ])
+    when = result["computed_at"].strftime("%Y-%m-%d %H:%M")
+    span = (f"{result['date_from']} → {result['date_to']}"
+            if result["date_from"] else "toda la historia")
+    return html.Div([
+        html.Small(f"Escaneado {when} (UTC) · ventana {span} · z del log-ratio "
+                   f"activo 1 / activo 2; vida media en ruedas.",
+                   className="text-muted d-block mb-1"),
+        html.Table([head, body], style={"width": "100%"}),
+    ])
@@ -0,0 +1,105 @@
+"""
+Arranque HEADLESS de la aplicación: lo que todo proceso de larga vida hace
+al levantar, sin importar Dash, Plotly ni las páginas.
+
+Lo usan la fábrica web (app.web.create_app, pasos 10–11) y el worker del
+scheduler (worker.py), que antes llamaba a create_app() entero —registrando
+~50 páginas y sus callbacks— solo para correr APScheduler. El servidor MCP y
+los hijos del ProcessPool no llaman a `bootstrap`: importan los servicios que
+usan y nada más, y lo único que piden es que ese import no arrastre la web
+(ver tests/test_headless_imports.py).
+
+Regla para los servicios: un helper de UI (app.components, plotly) se importa
+DENTRO de la función que arma la figura, no arriba del módulo —
+app/components/__init__.py importa la navbar y con ella Dash entero.
+"""
+import logging
+
+from app.config import Config
+from app.logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def bootstrap() -> None:
+    """Logging, datos integrados y limpieza de arranque. Cada paso es
+    best-effort: una base a medio migrar no impide levantar el proceso."""
+    configure_logging()
+
+    from app.services.startup_service import ensure_builtin_data
+    try:
+        ensure_builtin_data()
+    except Exception as exc:
+        logger.warning("No se pudo inicializar datos de arranque: %s", exc)
+
+    # Limpia locks de corrida que dejó un proceso anterior caído a mitad de
+    # una operación (reciclado de mod_wsgi): sin esto, el heartbeat viejo
+    # quedaría hasta cumplir el umbral de obsolescencia. Best-effort — si la
+    # tabla no existe todavía (migración 0076 pendiente), no pasa nada.
+    try:
+        from app.services.run_lock_service import clear_stale
+        n = clear_stale()
+        if n:
+            logger.info("Locks de corrida muertos limpiados al arranque: %d", n)
+    except Exception as exc:
+        logger.warning("No se pudieron limpiar locks de corrida: %s", exc)
+
+    # Bitácora de corridas (M1/M2): marcar 'aborted' las corridas que quedaron
+    # 'running' de un proceso anterior caído a mitad, y podar las viejas por
+    # retención. Best-effort — si falta la migración 0096, no pasa nada.
+    try:
+        from app.services import run_history_service as _rh
+        n_ab = _rh.abort_orphans()
+        if n_ab:
+            logger.info("Corridas marcadas como abortadas al arranque: %d", n_ab)
+        n_pr = _rh.prune_old()
+        if n_pr:
+            logger.info("Corridas viejas purgadas (retención): %d", n_pr)
+    except Exception as exc:
+        logger.warning("No se pudo limpiar la bitácora de corridas: %s", exc)
+
+    # Purgas de historia que un proceso anterior dejó a mitad (purge_job
+    # 'running' con el lock muerto): se retoman en segundo plano desde las
+    # tablas que faltaban. Best-effort — si falta la migración 0110, nada.
+    try:
+        from app.services import purge_service as _pg
+        n_pg = _pg.resume_interrupted()
+        if n_pg:
+            logger.info("Purgas interrumpidas retomadas al arranque: %d", n_pg)
+        _pg.prune_old()
+    except Exception as exc:
+        logger.warning("No se pudieron retomar las purgas interrumpidas: %s", exc)
+
+    # Backtests guardados viejos: cada corrida deja una fila por fecha ×
+    # horizonte en backtest_ic_point (miles), así que sin retención la tabla
+    # crece para siempre. Mismo criterio que la bitácora.
+    try:
+        from app.services import backtest_service as _bt
+        n_bt = _bt.prune_old()
+        if n_bt:
+            logger.info("Backtests viejos purgados (retención): %d", n_bt)
+    except Exception as exc:
+        logger.warning("No se pudieron purgar backtests viejos: %s", exc)
+
+    # Índices de búsqueda del manual y del catálogo: se arman acá para que la
+    # primera consulta (el buscador de /manual, la IA) no pague la
+    # tokenización entera. Best-effort — sin ellos se arman al primer uso.
+    try:
+        from app.services import catalog_search, manual_service
+        manual_service.warm_index()
+        catalog_search.warm_index()
+    except Exception as exc:
+        logger.warning("No se pudieron armar los índices de búsqueda: %s", exc)
+
+
+def start_scheduler() -> None:
+    """Arranca APScheduler donde RUN_SCHEDULER está activo: en un deploy
+    multi-proceso (gunicorn/réplicas) va en un worker dedicado (worker.py),
+    no en cada web worker. En dev/Codespace (proceso único, default 1)
+    arranca en el web como siempre."""
+    from app.services.scheduler_service import start_if_enabled
+    if Config.RUN_SCHEDULER:
+        start_if_enabled()
+    else:
+        logger.info("APScheduler no arranca en este proceso (RUN_SCHEDULER=0);"
+                    " lo corre el proceso worker dedicado")
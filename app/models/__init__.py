@@ -2,11 +2,12 @@ from app.models.asset import Asset
 from app.models.catalog_alias import CatalogAlias
 from app.models.country import Country
 from app.models.currency import Currency
-from app.models.import_log import ImportLog
+from app.models.import_log import ImportJob, ImportLog
 from app.models.industry import Industry
 from app.models.instrument_type import InstrumentType
 from app.models.market import Market
 from app.models.price import Price
+from app.models.price_bar import PriceMonthly, PriceWeekly
 from app.models.price_source import PriceSource
 from app.models.price_update_log import PriceUpdateLog
 from app.models.indicator_update_log import IndicatorUpdateLog
@@ -30,14 +31,21 @@ from app.models.indicator_store import CurrentIndicatorValue, IndAssetMeta
 from app.models.pnf_config import PnfConfig
 from app.models.signal_definition import SignalDefinition
 from app.models.signal_eval_log import SignalEvalLog
+from app.models.signal_dirty_range import SignalDirtyRange
 from app.models import signal_store
 from app.models.strategy import Strategy
 from app.models.strategy_component import StrategyComponent
 from app.models.asset_verification_flag import AssetVerificationFlag
 from app.models.verification_run_log import VerificationRunLog
-from app.models.backtest import BacktestRun, BacktestQuantileStat, BacktestIcPoint
+from app.models.backtest import (BacktestRun, BacktestQuantileStat, BacktestIcPoint,
+                                 BacktestForwardPanel)
+from app.models.chart_zone import ChartZone
+from app.models.pair_scan import PairScanResult
+from app.models.purge_job import PurgeJob
+from app.models.bootstrap_state import BootstrapState
 from app.models.portfolio import (Portfolio, PortfolioMember, PortfolioRun,
-                                  PortfolioRunPoint, PortfolioTransaction)
+                                  PortfolioRunPoint, PortfolioRunRobustness,
+                                  PortfolioTransaction)
 from app.models.oauth import OAuthClient, OAuthGrant
 
 __all__ = [
@@ -52,9 +60,12 @@ __all__ = [
     "Asset",
     "CatalogAlias",
     "Price",
+    "PriceWeekly",
+    "PriceMonthly",
     "PriceUpdateLog",
     "IndicatorUpdateLog",
     "ImportLog",
+    "ImportJob",
     "MarketEvent",
     "DrawdownConfig",
     "RegimeConfig",
@@ -75,6 +86,7 @@ __all__ = [
     "PnfConfig",
     "SignalDefinition",
     "SignalEvalLog",
+    "SignalDirtyRange",
     "signal_store",
     "Strategy",
     "StrategyComponent",
@@ -83,11 +95,17 @@ __all__ = [
     "BacktestRun",
     "BacktestQuantileStat",
     "BacktestIcPoint",
+    "BacktestForwardPanel",
+    "ChartZone",
+    "PairScanResult",
+    "PurgeJob",
+    "BootstrapState",
     "Portfolio",
     "PortfolioTransaction",
     "PortfolioMember",
     "PortfolioRun",
     "PortfolioRunPoint",
+    "PortfolioRunRobustness",
     "OAuthClient",
     "OAuthGrant",
 ]
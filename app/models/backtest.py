@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from sqlalchemy import (Column, Date, DateTime, Float, ForeignKey, Integer,
-                        String, Text)
+                        LargeBinary, String, Text)
 from app.database import Base
 
 
@@ -62,3 +62,34 @@ class BacktestIcPoint(Base):
     ic       = Column(Float)
     spread   = Column(Float)
     n_assets = Column(Integer, nullable=False)
+
+
+# Tope del blob: MEDIUMBLOB en MySQL (el BLOB a secas corta en 64 KB, y 50 años
+# de ruedas en float64 son ~100 KB). En PG/sqlite el largo se ignora.
+PANEL_BLOB_BYTES = 16 * 1024 * 1024 - 1
+
+
+class BacktestForwardPanel(Base):
+    """Retornos forward de un activo para un (lag, horizonte), en forma
+    columnar: caché DERIVADO de `prices` que comparten todos los backtests de
+    cuantiles (ver app/services/forward_return_store.py).
+
+    `dates` y `returns` son arrays de numpy comprimidos (ordinales int32 y
+    float64, NaN = sin retorno) sobre la historia COMPLETA del activo. La
+    marca de agua (n_prices, last_date, close_sum) es la de `prices` al
+    armarlo: si cambia, el panel del activo se rehace.
+    """
+
+    __tablename__ = "backtest_forward_panel"
+
+    asset_id   = Column(Integer, ForeignKey("assets.id", ondelete="CASCADE"),
+                        primary_key=True)
+    lag        = Column(Integer, primary_key=True)
+    horizon    = Column(Integer, primary_key=True)   # ruedas propias
+    n_prices   = Column(Integer, nullable=False)
+    last_date  = Column(Date,    nullable=False)
+    close_sum  = Column(Float,   nullable=False)
+    dates      = Column(LargeBinary(PANEL_BLOB_BYTES), nullable=False)
+    returns    = Column(LargeBinary(PANEL_BLOB_BYTES), nullable=False)
+    build_seconds = Column(Float)                    # costo de recalcularlo
+    built_at   = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, String
+
+from app.database import Base
+
+
+class BootstrapState(Base):
+    """Huella del último arranque que reconcilió los datos integrados (ver
+    app/services/startup_service.py::ensure_builtin_data).
+
+    El manifiesto de datos integrados (fuentes, activos e indicadores de
+    fábrica) solo cambia con un deploy. Cada proceso que arranca calcula su
+    hash y, si coincide con el guardado acá, saltea la reconciliación entera.
+    Se escribe al final de una reconciliación exitosa, nunca antes: un
+    arranque que falla a mitad deja la huella vieja y el próximo reintenta.
+
+    Vive en la misma base que los datos que describe, así que un restore o un
+    reinicio a fábrica (que vacía la tabla) no pueden dejarla desfasada.
+    """
+
+    __tablename__ = "bootstrap_state"
+
+    name          = Column(String(50), primary_key=True)   # 'builtin_data'
+    manifest_hash = Column(String(64), nullable=False)     # sha256 hex
+    applied_at    = Column(DateTime, nullable=False)
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import (Column, Date, DateTime, Float, ForeignKey, Integer,
+                        LargeBinary, String)
+from app.database import Base
+from app.models.backtest import PANEL_BLOB_BYTES
+
+
+class ChartZone(Base):
+    """Zonas de un overlay del gráfico (régimen, volatilidad, drawdowns) de un
+    activo, tal como las calculó el pipeline: caché DERIVADO de `prices` y de
+    la config de la familia (ver app/services/chart_zone_store.py).
+
+    `payload` es la lista de zonas en JSON compacto (una lista por zona, en el
+    orden de campos de la familia) comprimida con zlib. `config_checksum`
+    identifica los parámetros con que se calculó; la marca de agua (n_prices,
+    last_date, close_sum) es la de `prices` al calcularla. Si cualquiera de
+    las dos cambia, la fila se recalcula.
+    """
+
+    __tablename__ = "chart_zones"
+
+    asset_id   = Column(Integer, ForeignKey("assets.id", ondelete="CASCADE"),
+                        primary_key=True)
+    code       = Column(String(40), primary_key=True)   # trend_daily, ...
+    config_checksum = Column(String(64), nullable=False)
+    n_prices   = Column(Integer, nullable=False)
+    last_date  = Column(Date,    nullable=False)
+    close_sum  = Column(Float,   nullable=False)
+    payload    = Column(LargeBinary(PANEL_BLOB_BYTES), nullable=False)
+    built_at   = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -19,3 +19,30 @@ class ImportLog(Base):
     )
     detail = Column(Text)
     attempted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ImportJob(Base):
+    """Import masivo en curso o terminado, con su cursor (ver
+    import_service.import_from_excel).
+
+    El archivo se identifica por el hash de su contenido: volver a subir el
+    MISMO archivo con un job en 'running' (el proceso murió a mitad) retoma
+    desde `next_row`, la primera fila de datos sin commitear. Los benchmarks
+    se asignan al final, con todo el archivo dado de alta: los pendientes de
+    los chunks ya commiteados viajan en `pending_benchmarks` (JSON).
+    """
+
+    __tablename__ = "import_job"
+
+    id = Column(Integer, primary_key=True)
+    file_hash = Column(String(64), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="running")  # running|done
+    total_rows = Column(Integer, nullable=False, default=0)
+    next_row = Column(Integer, nullable=False, default=0)
+    n_imported = Column(Integer, nullable=False, default=0)
+    n_skipped = Column(Integer, nullable=False, default=0)
+    n_error = Column(Integer, nullable=False, default=0)
+    pending_benchmarks = Column(Text)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime)
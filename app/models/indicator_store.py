@@ -242,6 +242,49 @@ def ensure_wide_ind_tables(bind=None) -> None:
             Index(f"ix_{table_name}_date", "date"),
         )
         tmp.create_all(b, tables=[t])
+        if table_name in PARTITIONED_IND_TABLES:
+            _with_conn(b, lambda c, n=table_name: _partition_new(c, n))
+
+
+# ── Partición anual (opcional, solo PostgreSQL) ───────────────────────────────
+# Con WIDE_TABLE_PARTITIONS=1 (migración 0102) ind_daily es una tabla
+# particionada por RANGE (date), una partición por año: las lecturas acotadas
+# por fecha (as-of, ventanas de backtest) leen solo los años que tocan y el
+# rebuild vacía particiones enteras. ind_weekly/ind_monthly son 5×/20× más
+# chicas y no lo justifican. MySQL y sqlite quedan con la tabla única; los
+# helpers son no-op ahí (ver db_compat, sección de particiones).
+PARTITIONED_IND_TABLES = ("ind_daily",)
+
+
+def _with_conn(bind, fn):
+    """Corre fn(conn) en una transacción propia si bind es un Engine, o sobre
+    la Connection/Session del llamador (que controla el commit)."""
+    import sqlalchemy as sa
+    if isinstance(bind, sa.engine.Engine):
+        with bind.begin() as conn:
+            return fn(conn)
+    return fn(bind)
+
+
+def _partition_new(conn, table_name: str) -> None:
+    from app.services import db_compat
+    if db_compat.use_wide_partitions():
+        db_compat.partition_by_year(conn, table_name)
+
+
+def ensure_ind_partitions(bind=None) -> list[int]:
+    """Particiones anuales que falten en las anchas particionadas (año en curso,
+    el siguiente y los que hayan caído en la DEFAULT). Se llama en el arranque
+    y al empezar cada backfill. Devuelve los años creados."""
+    from app.services import db_compat
+
+    def _run(conn):
+        created = []
+        for name in PARTITIONED_IND_TABLES:
+            created += db_compat.maintain_year_partitions(conn, name)
+        return created
+
+    return _with_conn(bind or engine, _run)
 
 
 # Lookup "as-of": máxima antigüedad aceptada del último valor. Los
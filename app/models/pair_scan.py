@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, String
+
+from app.database import Base
+
+
+class PairScanResult(Base):
+    """Ranking de pares de un grupo (sector, industria, mercado o miembros de
+    un benchmark) tal como lo dejó el último escaneo: caché DERIVADO de
+    `prices` (ver app/services/pair_scan_service.py). Un escaneo reemplaza
+    todas las filas de su (scope, group_id).
+
+    `zscore` es el del log-ratio activo 1 / activo 2 en la ventana corta;
+    `half_life`, la vida media (en ruedas) de la reversión del log-spread;
+    `corr` y `corr_std`, la correlación de retornos de toda la ventana y su
+    dispersión entre tramos (estabilidad). La pantalla de pares abre el par
+    directamente desde una fila.
+    """
+
+    __tablename__ = "pair_scan_result"
+
+    scope      = Column(String(16), primary_key=True)   # sector, market, ...
+    group_id   = Column(Integer, primary_key=True)
+    rank       = Column(Integer, primary_key=True)      # 1 = mejor
+    asset_id_1 = Column(Integer, ForeignKey("assets.id", ondelete="CASCADE"),
+                        nullable=False)
+    asset_id_2 = Column(Integer, ForeignKey("assets.id", ondelete="CASCADE"),
+                        nullable=False)
+    zscore     = Column(Float, nullable=False)
+    half_life  = Column(Float, nullable=True)
+    corr       = Column(Float, nullable=True)
+    corr_std   = Column(Float, nullable=True)
+    n_obs      = Column(Integer, nullable=False)
+    date_from  = Column(Date, nullable=True)
+    date_to    = Column(Date, nullable=True)
+    computed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -137,3 +137,23 @@ class PortfolioRunPoint(Base):
     submode = Column(String(12))
     date    = Column(Date, nullable=False)
     value   = Column(Float)
+
+
+class PortfolioRunRobustness(Base):
+    """Análisis de robustez de una corrida guardada (bootstrap por bloques,
+    permutación de trades, entradas al azar — ver
+    app/services/robustness_service.py). Una fila por corrida: el resultado
+    completo va en `result` como JSON; n_paths/block/seed dicen cómo se
+    remuestreó, así que el número se puede reproducir."""
+
+    __tablename__ = "portfolio_run_robustness"
+
+    run_id     = Column(Integer,
+                        ForeignKey("portfolio_run.id", ondelete="CASCADE"),
+                        primary_key=True)
+    n_paths    = Column(Integer, nullable=False)
+    block      = Column(Integer, nullable=False)
+    seed       = Column(Integer, nullable=False)
+    result     = Column(Text, nullable=False)
+    duration_seconds = Column(Float)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
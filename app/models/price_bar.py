@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer
+from sqlalchemy.orm import declared_attr
+
+from app.database import Base
+
+
+class _PriceBarColumns:
+    """Barra OHLC agregada de `prices`: caché DERIVADO que mantiene
+    app/services/price_bar_store.py (las escrituras de precios reescriben la
+    barra abierta y las posteriores al punto de escritura).
+
+    `date` es la etiqueta de la barra, la misma que pone _resample_ohlc
+    (domingo de la semana / último día del mes), y close/high/low son los
+    suyos. n_days, close_sum y last_day resumen los closes diarios de la
+    barra: sumados por activo dan la marca de agua de `prices` (cantidad de
+    closes, última fecha, suma), con la que el lector verifica que las barras
+    siguen al día sin releer la historia diaria.
+    """
+
+    @declared_attr
+    def asset_id(cls):
+        return Column(Integer, ForeignKey("assets.id", ondelete="CASCADE"),
+                      primary_key=True)
+
+    date      = Column(Date, primary_key=True)
+    close     = Column(Float, nullable=False)
+    high      = Column(Float)
+    low       = Column(Float)
+    n_days    = Column(Integer, nullable=False)
+    close_sum = Column(Float, nullable=False)
+    last_day  = Column(Date, nullable=False)
+
+
+class PriceWeekly(_PriceBarColumns, Base):
+    __tablename__ = "prices_weekly"
+
+
+class PriceMonthly(_PriceBarColumns, Base):
+    __tablename__ = "prices_monthly"
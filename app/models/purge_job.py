@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text
+
+from app.database import Base
+
+
+class PurgeJob(Base):
+    """Avance PERSISTIDO de una purga de historia por activo (ver
+    app/services/purge_service.py).
+
+    Borrar muchos sintéticos o un mercado entero recorre cientos de tablas
+    (precios, anchas, ind_*, sig_*, strat_res_*) y puede tardar minutos. La
+    purga commitea por lote, así que si el proceso muere a mitad la historia
+    queda borrada a medias y la fila de `assets` todavía viva. Con esta fila
+    el próximo arranque la retoma: `tables_done` dice qué tablas ya quedaron
+    limpias y solo se recorren las que faltan.
+
+    Ciclo: se inserta 'running' al empezar, cada tabla terminada se agrega a
+    `tables_done` y un final limpio deja 'done' o 'error'. Un 'running'
+    remanente con su lock de corrida muerto (op `purge:<id>`) es una purga
+    interrumpida. `kind` distingue el borrado de activos ('assets', termina
+    con el DELETE de `assets`) del barrido de huérfanos ('orphans', filas de
+    tablas dinámicas cuyo asset_id ya no existe).
+    """
+
+    __tablename__ = "purge_job"
+
+    id           = Column(Integer, primary_key=True, autoincrement=True)
+    kind         = Column(String(16), nullable=False)   # assets | orphans
+    status       = Column(String(12), nullable=False)   # running|done|error
+    asset_ids    = Column(Text, nullable=False)          # JSON: [ids]
+    tables_total = Column(Integer, nullable=False, default=0)
+    tables_done  = Column(Text, nullable=True)           # JSON: [tablas]
+    rows_deleted = Column(BigInteger, nullable=False, default=0)
+    started_at   = Column(DateTime, nullable=False, default=datetime.utcnow,
+                          index=True)                     # ix_purge_job_started_at
+    updated_at   = Column(DateTime, nullable=True)
+    finished_at  = Column(DateTime, nullable=True)
+    error        = Column(Text, nullable=True)
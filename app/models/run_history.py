@@ -43,3 +43,6 @@ class RunHistory(Base):
     first_error = Column(Text, nullable=True)
     pid         = Column(Integer, nullable=True)
     host        = Column(String(255), nullable=True)
+    # JSON del agregado por fase de query_stats_service (sentencias, filas,
+    # base vs Python) — NULL en corridas sin grabación (migración 0103)
+    query_stats = Column(Text, nullable=True)
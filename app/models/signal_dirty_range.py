@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer
+
+from app.database import Base
+
+
+class SignalDirtyRange(Base):
+    """Desde qué fecha la historia de señales de un activo quedó vieja por
+    datos que llegaron tarde (ver app/services/signal_dirty_range.py).
+
+    Una fila por activo con dato genuinamente nuevo (fechas posteriores a su
+    último precio/valor anterior) desde el último delta de señales:
+    `min_dirty_date` acumula el mínimo de lo marcado. `seq` sube en cada
+    marca — el delta borra solo las filas que leyó tal cual (mismo seq), así
+    una marca que entra mientras corre sobrevive para el próximo.
+    """
+
+    __tablename__ = "signal_dirty_range"
+
+    asset_id       = Column(Integer, ForeignKey("assets.id", ondelete="CASCADE"),
+                            primary_key=True)
+    min_dirty_date = Column(Date,     nullable=False)
+    seq            = Column(Integer,  nullable=False, default=1)
+    updated_at     = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -266,6 +266,49 @@ def ensure_wide_signal_tables(bind=None) -> None:
             Index(f"ix_{name}_asset_date", "asset_id", "date"),
         )
         tmp.create_all(b, tables=[t])
+        _on_conn(b, lambda c, n=name: _partition_new(c, n))
+
+
+# Partición anual opcional de las anchas (WIDE_TABLE_PARTITIONS=1, migración
+# 0102, solo PostgreSQL): mismo esquema que indicator_store.
+# PARTITIONED_IND_TABLES. La PK (date, asset_id) ya lleva la clave de
+# partición. El rebuild con horizonte vacía las particiones que cubre enteras
+# (truncate_wide_range) en vez de NULLear sus columnas fila por fila.
+def _on_conn(bind, fn):
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            return fn(conn)
+    return fn(bind)
+
+
+def _partition_new(conn, table: str) -> None:
+    from app.services import db_compat
+    if db_compat.use_wide_partitions():
+        db_compat.partition_by_year(conn, table)
+
+
+def ensure_wide_signal_partitions(bind=None) -> list[int]:
+    """Particiones anuales que falten en las dos anchas (no-op si no están
+    particionadas). Devuelve los años creados."""
+    from app.services import db_compat
+
+    def _run(conn):
+        created = []
+        for name in (SIG_WIDE_TABLE, STRAT_WIDE_TABLE):
+            created += db_compat.maintain_year_partitions(conn, name)
+        return created
+
+    return _on_conn(bind or engine, _run)
+
+
+def truncate_wide_range(session, table: str, d0, d1) -> list[str]:
+    """Vacía las particiones de `table` cuyas filas caen todas en [d0, d1]. SOLO
+    para un rebuild que reescribe TODAS las columnas de la fila (alcance total):
+    con alcance parcial borraría valores de otras señales/estrategias. Lo que
+    queda fuera (el año del borde) sigue por wide_null_columns_ranges, que en
+    las particiones ya vacías no encuentra filas. [] sin particiones."""
+    from app.services import db_compat
+    return db_compat.truncate_covered_partitions(session, table, d0, d1)
 
 
 def _wide_columns(bind, table: str) -> set[str]:
@@ -373,16 +416,21 @@ def _q(bind, name: str) -> str:
     return quote_ident(bind, name)
 
 
-def wide_null_columns(session, table: str, columns, dates) -> None:
+def wide_null_columns(session, table: str, columns, dates,
+                      asset_ids=None) -> None:
     """UPDATE table SET col=NULL,... WHERE date IN (dates). Equivalente por
-    columna al DELETE de fila del camino per-entidad en el delta."""
+    columna al DELETE de fila del camino per-entidad en el delta. asset_ids
+    acota a esas celdas (refresco dirigido de signal_dirty_range)."""
     columns = list(columns)
     if not columns or not dates:
         return
     sets = ", ".join(f"{_q(session, c)} = NULL" for c in columns)
     dates_in = ", ".join(f"'{d}'" for d in dates)
+    where = f"date IN ({dates_in})"
+    if asset_ids is not None:
+        where += f" AND asset_id IN ({', '.join(str(int(a)) for a in asset_ids)})"
     session.execute(sa.text(
-        f"UPDATE {_q(session, table)} SET {sets} WHERE date IN ({dates_in})"))
+        f"UPDATE {_q(session, table)} SET {sets} WHERE {where}"))
 
 
 def wide_null_columns_ranges(session, table: str, columns, windows) -> None:
@@ -531,14 +579,27 @@ def _sig_view(sig_id: int):
             .subquery(SIG_WIDE_TABLE))
 
 
+def sig_wide_view(signal_ids):
+    """sa.table TIPADO de signal_values_wide con las columnas de VARIAS señales
+    a la vez (`.c.sig_{id}`), para leer todos los componentes de una estrategia
+    en una sola query. SIN filtro NULL horneado: la fila trae las columnas de
+    todas las señales y cada lector decide qué hacer con las vacías."""
+    return sa.table(SIG_WIDE_TABLE,
+                    sa.column("asset_id", Integer),
+                    sa.column("date", Date),
+                    *(sa.column(sig_column_name(sid), Float) for sid in signal_ids))
+
+
 def _strat_view(strategy_id: int):
-    """Ídem para una estrategia: expone score y pct (filtra por score no-NULL)."""
+    """Ídem para una estrategia: expone score y pct (filtra por score no-NULL).
+    Con el tipo real de las columnas (precisión simple): la clave del ranking
+    por bloques castea el cursor a ese tipo."""
     sc, pc = strat_score_column(strategy_id), strat_pct_column(strategy_id)
     t = sa.table(STRAT_WIDE_TABLE,
                  sa.column("asset_id", Integer),
                  sa.column("date", Date),
-                 sa.column(sc, Float),
-                 sa.column(pc, Float))
+                 sa.column(sc, Float(precision=24)),
+                 sa.column(pc, Float(precision=24)))
     return (sa.select(t.c.asset_id, t.c.date,
                       t.c[sc].label("score"), t.c[pc].label("pct"))
             .where(t.c[sc].isnot(None))
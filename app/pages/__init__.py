@@ -1 +1 @@
-# Las páginas se importan explícitamente en app/__init__.py para registrarlas.
+# Las páginas se importan explícitamente en app/web.py para registrarlas.
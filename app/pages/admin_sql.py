@@ -2,6 +2,7 @@ import dash
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+from app.components.export_trigger import export_trigger
 from app.components.help import page_header
 
 # Consulta inicial: monitor de queries en ejecución (útil para diagnosticar
@@ -27,6 +28,11 @@ def _default_query() -> str:
     return _MYSQL_DEFAULT_QUERY
 
 
+def _cap_label() -> str:
+    from app.services.export_service import MAX_ROWS
+    return f"{MAX_ROWS:,}".replace(",", ".")
+
+
 def layout(**kwargs):
     from flask_login import current_user
     if not current_user.is_authenticated or not current_user.is_admin:
@@ -34,7 +40,9 @@ def layout(**kwargs):
 
     return html.Div([
         dcc.Store(id="sql-session-id"),
-        dcc.Download(id="sql-download"),
+        dcc.Store(id="sql-export-job"),
+        dcc.Interval(id="sql-export-poll", interval=2000, disabled=True),
+        export_trigger("sql-export-url"),
 
         page_header("Consola SQL", "consola-sql", className="mb-3"),
 
@@ -53,7 +61,22 @@ def layout(**kwargs):
                 dbc.Button("Ejecutar",  id="sql-btn-exec",     color="primary",        size="sm", className="me-2"),
                 dbc.Button("Commit",    id="sql-btn-commit",   color="success",        size="sm", className="me-2", disabled=True),
                 dbc.Button("Rollback",  id="sql-btn-rollback", color="warning",        size="sm", className="me-2", disabled=True),
-                dbc.Button("Exportar CSV", id="sql-btn-export", color="secondary",     size="sm", disabled=True),
+                dbc.Button("Exportar",  id="sql-btn-export",   color="secondary",      size="sm", className="me-2", disabled=True),
+            ], width="auto"),
+            # Exportación: por streaming desde /export (ver export_service)
+            dbc.Col([
+                dbc.Select(id="sql-export-fmt", value="csv", size="sm",
+                           options=[{"label": "CSV", "value": "csv"},
+                                    {"label": "Excel", "value": "xlsx"}],
+                           style={"width": "90px"}),
+            ], width="auto"),
+            dbc.Col([
+                dbc.Checkbox(id="sql-export-nocap", value=False,
+                             label=f"Sin tope ({_cap_label()} filas)",
+                             style={"fontSize": "0.82rem"}),
+                dbc.Checkbox(id="sql-export-bg", value=False,
+                             label="En segundo plano",
+                             style={"fontSize": "0.82rem"}),
             ], width="auto"),
             dbc.Col([
                 html.Span(id="sql-status", className="text-muted",
@@ -3,7 +3,7 @@ Brochure público — /acerca.
 
 Página de presentación del sitio: qué hace el sistema y para quién es.
 Es la única página Dash accesible SIN login (está en _PUBLIC_PATHS de
-app/__init__.py): es el destino del link "¿Qué es este sistema?" de la
+app/web.py): es el destino del link "¿Qué es este sistema?" de la
 pantalla de login y del item "Acerca de" de la navbar.
 
 El contenido es 100% estático a propósito — sin callbacks ni consultas a
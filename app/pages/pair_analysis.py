@@ -4,7 +4,9 @@ import dash
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+from app.components.correlation_neighbours import neighbours_panel
 from app.components.help import help_link
+from app.components.pair_scan import pair_scan_panel
 from app.components.ui_constants import BG_DEEP, BG_INPUT, TEXT_BODY
 
 _radio_sm = {"fontSize": "0.80rem"}
@@ -168,8 +170,12 @@ def layout(**kwargs):
                 ),
                 html.Div(id="pair-scatter-stats", className="mt-2 text-muted",
                          style={"fontSize": "0.78rem"}),
+                neighbours_panel("pair"),
             ], label="Correlación", tab_id="tab-corr"),
 
+            # — Escáner de pares del grupo —
+            dbc.Tab(pair_scan_panel(), label="Escáner", tab_id="tab-scan"),
+
         ], id="pair-tabs", active_tab="tab-comp", className="mb-2"),
 
     ], style={"padding": "0 8px"})
@@ -2,6 +2,7 @@ import dash
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+from app.components.correlation_neighbours import neighbours_panel
 from app.components.help import help_link
 from app.components.ui_constants import TEXT_BODY
 
@@ -117,6 +118,7 @@ def layout(**kwargs):
 
         html.Div(id="scatter-stats", className="mt-2 text-muted",
                  style={"fontSize": "0.78rem"}),
+        neighbours_panel("scatter"),
 
     ], style={"padding": "0 8px"})
 
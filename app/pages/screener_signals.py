@@ -3,6 +3,7 @@ import dash_ag_grid as dag
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+from app.components.export_trigger import export_trigger
 from app.components.grids import DEFAULT_COL_DEF, THEME_CLASS, grid_options
 from app.components.help import page_header
 
@@ -10,10 +11,10 @@ from app.components.ui_constants import (
     CARD_STYLE, COLOR_NEUTRAL, TEXT_BODY
 )
 
-# Tope de filas traídas del servidor. La grilla virtualiza (dibuja solo lo
-# visible), así que el tope ya no es para que el navegador no se trabe
-# dibujando: es para no mandar un catálogo entero por la red ni cargarlo en
-# memoria del cliente. El corte es por score, o sea por el ranking mismo.
+# Hasta dónde llega el ranking en la grilla. Las filas viajan de a bloques
+# (Infinite Row Model) a medida que se scrollea, así que el tope ya no protege
+# la red ni la memoria del cliente: es para acotar la lista a la cabeza del
+# ranking cuando eso es lo que interesa. El corte es por score.
 _LIMIT_OPTS = [
     {"label": "Top 100",   "value": 100},
     {"label": "Top 500",   "value": 500},
@@ -23,6 +24,9 @@ _LIMIT_OPTS = [
 ]
 _DEFAULT_LIMIT = 500
 
+# Filas por bloque del Infinite Row Model
+_BLOCK_SIZE = 200
+
 
 def layout(**kwargs):
     from flask_login import current_user
@@ -31,9 +35,11 @@ def layout(**kwargs):
 
     return html.Div([
         dcc.Store(id="ss-comp-meta",    data=[]),
-        dcc.Store(id="ss-results-store", data=None),
         dcc.Store(id="ss-query-store",   data=None),
-        dcc.Download(id="ss-download"),
+        # Clave (score, asset_id) con la que arranca cada bloque ya pedido:
+        # el siguiente se lee por clave y no por OFFSET.
+        dcc.Store(id="ss-cursors",       data={}),
+        export_trigger("ss-export-url"),
 
         dbc.Row([
             dbc.Col(page_header("Screener de Señales", "screener-de-senales", className="mb-0"), width="auto"),
@@ -81,17 +87,17 @@ def layout(**kwargs):
             ], className="g-2 mb-2"),
 
             # ── Segunda fila: tope + exportar ────────────────────────────────
-            # El "Ordenar por" se fue con la migración a grilla: ahora se ordena
-            # clickeando cualquier cabecera, incluidas las columnas de señal
-            # (que antes no se podían ordenar de ninguna manera).
+            # El orden de la grilla ES el ranking (score desc): con la carga
+            # por bloques el cliente nunca tiene todas las filas, así que no
+            # puede reordenarlas él.
             dbc.Row([
                 dbc.Col(html.Div([
                     dbc.Label("Mostrar", style={"fontSize": "0.82rem"}),
                     dcc.Dropdown(id="ss-limit", options=_LIMIT_OPTS,
                                  value=_DEFAULT_LIMIT, clearable=False,
                                  style={"fontSize": "0.83rem"}),
-                ], title="Cuántos activos del ranking se traen. Ordenar la "
-                         "grilla reordena solo los traídos."), md=2),
+                ], title="Hasta qué puesto del ranking se muestra. Las filas "
+                         "se traen de a bloques al scrollear."), md=2),
                 dbc.Col([
                     dbc.Label(" ", style={"fontSize": "0.82rem"}),
                     dbc.Button("Exportar Excel", id="ss-btn-export", color="secondary",
@@ -106,14 +112,22 @@ def layout(**kwargs):
         dag.AgGrid(
             id="ss-grid",
             columnDefs=[],
-            rowData=[],
             className=THEME_CLASS,
             style={"height": "calc(100vh - 260px)", "width": "100%"},
-            defaultColDef=DEFAULT_COL_DEF,
-            # Sin paginación: la grilla virtualiza y el ranking se recorre
-            # scrolleando. Las filas van más compactas que el default para que
-            # entren más activos en pantalla, como en la tabla anterior.
-            dashGridOptions=grid_options(rowHeight=28),
+            # Sin orden ni filtro del lado del cliente: en el Infinite Row
+            # Model solo operarían sobre los bloques ya traídos.
+            defaultColDef={**DEFAULT_COL_DEF, "sortable": False,
+                           "filter": False, "floatingFilter": False},
+            # Infinite Row Model: la grilla pide bloques de _BLOCK_SIZE filas
+            # al scrollear (callback fetch_block), de a uno por vez para que
+            # cada bloque encuentre la clave que dejó el anterior. Las filas
+            # van más compactas que el default para que entren más activos en
+            # pantalla, como en la tabla anterior.
+            rowModelType="infinite",
+            dashGridOptions=grid_options(
+                rowHeight=28, cacheBlockSize=_BLOCK_SIZE,
+                maxConcurrentDatasourceRequests=1, maxBlocksInCache=20,
+                infiniteInitialRowCount=1),
         ),
 
     ], style={"padding": "0 8px"})
@@ -0,0 +1,307 @@
+"""
+Lector unificado de la historia de UN activo: indicadores, señales y
+estrategias en una sola pasada por tabla.
+
+Antes cada pantalla leía código por código: el gráfico de Análisis de Activo
+hacía una query por cada tendencia/volatilidad vigente (seis) y otra por cada
+panel del pipeline que se prendía, la evolución de señales una por señal y el
+explorador de datos una por consulta. Con las tablas anchas todo eso vive en
+pocas tablas físicas (ind_daily/ind_weekly/ind_monthly/…, signal_values_wide,
+strategy_results_wide), así que acá se agrupa lo pedido por tabla física y se
+hace UN `SELECT date, col1, col2, … WHERE asset_id = :a` por tabla. Con los
+flags anchos apagados (bases sin migrar, la suite) cada código/señal es su
+propia tabla y el agrupamiento degenera en una query por tabla, igual que antes.
+
+Lo leído se guarda en un LRU chico del proceso web por (activo, tabla). Un
+acierto no va a la base: el caché no se valida al leer, se invalida desde la
+escritura —
+- los precios de un activo (price_service._upsert_prices y el camino común de
+  los sintéticos, los mismos que marcan signal_dirty_range y ponen al día
+  price_bar_store) y su cálculo de vigentes descartan ese activo al
+  commitear (`invalidate_on_commit`);
+- el cierre de una corrida del pipeline (run_history_service.finish_run), que
+  es lo que reescribe valores sobre fechas existentes, descarta todo;
+- y vence a los `TTL_SECONDS`, para lo que escriba otro proceso o SQL crudo.
+Guarda la historia COMPLETA del activo en las columnas pedidas: el rango de
+fechas se recorta al devolver, así que cambiar el rango no vuelve a la base.
+Si se pide una columna que el bloque cacheado no tiene, se relee la tabla con
+la unión.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import sqlalchemy as sa
+from sqlalchemy import Date, Float, Integer, event
+from sqlalchemy.orm import Session
+
+from app.database import get_session
+from app.models import signal_store
+from app.models.indicator_store import (
+    _WIDE, _get_wide_table, get_ind_table, use_wide_ind_tables,
+)
+
+logger = logging.getLogger(__name__)
+
+_CACHE_SIZE = 64   # bloques (activo, tabla); uno diario con ~8k filas pesa poco
+TTL_SECONDS = 300  # lo que escribe otro proceso o SQL crudo
+_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+_generation = 0    # una lectura que cruzó una invalidación no se guarda
+_DIRTY = "asset_history_dirty"
+
+
+def invalidate(asset_ids=None) -> None:
+    """Descarta lo cacheado de esos activos (de todos, sin argumento)."""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        if asset_ids is None:
+            _cache.clear()
+            return
+        ids = {int(a) for a in asset_ids}
+        for key in [k for k in _cache if k[0] in ids]:
+            del _cache[key]
+
+
+def clear_cache() -> None:
+    invalidate()
+
+
+def invalidate_on_commit(session, asset_ids) -> None:
+    """Anota en la sesión los activos cuya historia cambia: se descartan
+    cuando la transacción commitea (antes, una lectura concurrente volvería a
+    cachear lo viejo). Un rollback descarta la anotación."""
+    session.info.setdefault(_DIRTY, set()).update(int(a) for a in asset_ids)
+
+
+def _on_commit(session) -> None:
+    if session.in_nested_transaction():
+        return                      # soltar un savepoint no es el commit
+    ids = session.info.pop(_DIRTY, None)
+    if ids:
+        invalidate(ids)
+
+
+def _on_transaction_end(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_DIRTY, None)
+
+
+event.listen(Session, "after_commit", _on_commit)
+event.listen(Session, "after_transaction_end", _on_transaction_end)
+
+
+# ── Resultado ─────────────────────────────────────────────────────────────────
+
+def ind_key(code: str) -> tuple:
+    return ("ind", code)
+
+
+def sig_key(signal_id: int) -> tuple:
+    return ("sig", int(signal_id))
+
+
+def strat_key(strategy_id: int) -> tuple:
+    return ("strat", int(strategy_id))
+
+
+def pct_key(strategy_id: int) -> tuple:
+    return ("pct", int(strategy_id))
+
+
+@dataclass
+class AssetHistory:
+    """Columnas alineadas sobre la unión de fechas de lo pedido.
+
+    `values[key]` es paralela a `dates`, con None donde esa serie no tiene
+    valor. `missing` son las claves cuya tabla o columna no existe en la base
+    (indicador sin historia, base sin migrar): no es lo mismo que una serie
+    vacía, y hay pantallas que lo distinguen."""
+
+    asset_id: int
+    dates: list = field(default_factory=list)
+    values: dict = field(default_factory=dict)
+    missing: frozenset = frozenset()
+
+    def series(self, key) -> list[tuple]:
+        """[(fecha, valor)] sin los huecos, en orden de fecha."""
+        col = self.values.get(key)
+        if col is None:
+            return []
+        return [(d, v) for d, v in zip(self.dates, col) if v is not None]
+
+    def last(self, key):
+        """Último valor no nulo de la serie, o None."""
+        col = self.values.get(key) or []
+        for v in reversed(col):
+            if v is not None:
+                return v
+        return None
+
+    def indicator(self, code: str) -> list[tuple]:
+        return self.series(ind_key(code))
+
+    def signal(self, signal_id: int) -> list[tuple]:
+        return self.series(sig_key(signal_id))
+
+    def strategy(self, strategy_id: int) -> list[tuple]:
+        return self.series(strat_key(strategy_id))
+
+
+@dataclass
+class _Block:
+    """Historia completa de un activo en una tabla física, columnas paralelas
+    a `dates` (ordenadas)."""
+
+    dates: list
+    cols: dict
+
+
+# ── Plan: qué columnas de qué tabla física ────────────────────────────────────
+
+def _plan(s, codes, signals, strategies):
+    """({nombre_tabla: (tabla, {clave: columna})}, claves_ausentes)."""
+    plan: dict[str, tuple] = {}
+    missing: set = set()
+
+    def _add(table, key, column):
+        entry = plan.setdefault(table.name, (table, {}))
+        entry[1][key] = column
+
+    wide_ind = use_wide_ind_tables()
+    for code in dict.fromkeys(codes):
+        try:
+            if wide_ind and code in _WIDE:
+                table_name, column, _cad = _WIDE[code]
+                t = _get_wide_table(table_name)
+                t.c[column]                 # base sin migrar: columna ausente
+                _add(t, ind_key(code), column)
+            else:
+                _add(get_ind_table(code), ind_key(code), "value")
+        except Exception:
+            missing.add(ind_key(code))
+
+    signals = list(dict.fromkeys(int(x) for x in signals))
+    strategies = list(dict.fromkeys(int(x) for x in strategies))
+    if signal_store.use_wide_signal_tables():
+        if signals:
+            t = signal_store.sig_wide_view(signals)
+            for sid in signals:
+                _add(t, sig_key(sid), signal_store.sig_column_name(sid))
+        if strategies:
+            cols = {}
+            for sid in strategies:
+                cols[strat_key(sid)] = signal_store.strat_score_column(sid)
+                cols[pct_key(sid)] = signal_store.strat_pct_column(sid)
+            t = sa.table(signal_store.STRAT_WIDE_TABLE,
+                         sa.column("asset_id", Integer), sa.column("date", Date),
+                         *(sa.column(c, Float) for c in cols.values()))
+            for key, c in cols.items():
+                _add(t, key, c)
+    else:
+        for sid in signals:
+            _add(signal_store.ensure_sig_table(sid, bind=s.connection()),
+                 sig_key(sid), "score")
+        for sid in strategies:
+            t = signal_store.ensure_strat_table(sid, bind=s.connection())
+            _add(t, strat_key(sid), "score")
+            _add(t, pct_key(sid), "pct")
+    return plan, missing
+
+
+# ── Lectura ───────────────────────────────────────────────────────────────────
+
+def _fetch(s, t, asset_id, columns) -> _Block:
+    if not isinstance(t, sa.Table):
+        # vista tipada de una ancha de señales: se rearma con las columnas a
+        # leer, que pueden incluir las de un bloque cacheado previo
+        t = sa.table(t.name, sa.column("asset_id", Integer),
+                     sa.column("date", Date),
+                     *(sa.column(c, Float) for c in columns))
+    cols = [t.c[c] for c in columns]
+    rows = s.execute(
+        sa.select(t.c.date, *cols)
+        .where(t.c.asset_id == asset_id)
+        # tabla ancha: saltear las filas donde ninguna columna pedida tiene
+        # valor (fechas de códigos hermanos); no-op en las per-código
+        .where(sa.or_(*(c.isnot(None) for c in cols)))
+        .order_by(t.c.date)).all()
+    dates = [r[0] for r in rows]
+    return _Block(dates, {c: [r[i + 1] for r in rows]
+                          for i, c in enumerate(columns)})
+
+
+def _block(s, t, asset_id, columns) -> _Block:
+    key = (asset_id, t.name)
+    with _cache_lock:
+        gen = _generation
+        hit = _cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < TTL_SECONDS:
+            _cache.move_to_end(key)
+            if set(columns) <= hit[1].cols.keys():
+                return hit[1]
+            columns = list(dict.fromkeys([*hit[1].cols, *columns]))
+    try:
+        block = _fetch(s, t, asset_id, columns)
+    except Exception:
+        with _cache_lock:
+            _cache.pop(key, None)   # p.ej. una columna cacheada que se dropeó
+        raise
+    with _cache_lock:
+        if gen == _generation:
+            _cache[key] = (time.monotonic(), block)
+            _cache.move_to_end(key)
+            while len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+    return block
+
+
+def _window(dates, date_from, date_to) -> tuple[int, int]:
+    i = bisect_left(dates, date_from) if date_from is not None else 0
+    j = bisect_right(dates, date_to) if date_to is not None else len(dates)
+    return i, j
+
+
+def read_asset_history(asset_id: int, *, codes=(), signals=(), strategies=(),
+                       date_from=None, date_to=None) -> AssetHistory:
+    """Historia del activo para los indicadores (`codes`), señales y
+    estrategias pedidos, con una query por tabla física. Las estrategias traen
+    score (strat_key) y percentil (pct_key). Una tabla que falla al leerse
+    (columna dropeada entre el plan y la query) deja sus claves en `missing`
+    sin tirar abajo el resto."""
+    s = get_session()
+    asset_id = int(asset_id)
+    plan, missing = _plan(s, codes, signals, strategies)
+
+    parts = []   # (fechas recortadas, {clave: valores recortados})
+    for name, (t, keys) in plan.items():
+        try:
+            block = _block(s, t, asset_id, list(dict.fromkeys(keys.values())))
+        except Exception as exc:
+            s.rollback()
+            logger.warning("Historia del activo %s: no se pudo leer %s: %s",
+                           asset_id, name, exc)
+            missing.update(keys)
+            continue
+        i, j = _window(block.dates, date_from, date_to)
+        parts.append((block.dates[i:j],
+                      {k: block.cols[c][i:j] for k, c in keys.items()}))
+
+    if len(parts) == 1:
+        dates, values = parts[0]
+        return AssetHistory(asset_id, dates, values, frozenset(missing))
+    dates = sorted({d for ds, _ in parts for d in ds})
+    pos = {d: i for i, d in enumerate(dates)}
+    values = {}
+    for ds, cols in parts:
+        idx = [pos[d] for d in ds]
+        for k, col in cols.items():
+            out = [None] * len(dates)
+            for p, v in zip(idx, col):
+                out[p] = v
+            values[k] = out
+    return AssetHistory(asset_id, dates, values, frozenset(missing))
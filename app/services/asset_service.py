@@ -5,12 +5,10 @@ Incluye autocompletado desde la fuente de precios y validación de tickers.
 import logging
 from typing import Optional
 
-from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
 from app.database import get_session
 from app.models import Asset, PriceSource, SyntheticComponent, SyntheticFormula
-from app.services import db_compat
 from app.sources.registry import get_source
 
 logger = logging.getLogger(__name__)
@@ -23,7 +21,6 @@ logger = logging.getLogger(__name__)
 _HIGH_VOLUME_ASSET_TABLES = (
     "current_indicator_values", "fundamental_quarterly", "prices",
 )
-_DELETE_BATCH = 5000
 
 
 def tablas_de_historia_por_activo(s) -> tuple[str, ...]:
@@ -90,17 +87,20 @@ def purge_assets(s, asset_ids, progress_cb=None) -> int:
     """Borra los activos indicados y TODA su historia. Devuelve cuántos ids se
     pidieron borrar.
 
-    En MySQL/MariaDB: SQL crudo por lotes — DELETE por tabla de alto volumen con
-    `asset_id IN (...) LIMIT`, commit por lote (locks acotados), y al final un
-    `DELETE FROM assets WHERE id IN (...)` que deja el resto al ON DELETE CASCADE.
-    NO usa `s.delete()` del ORM a propósito: con commits intermedios que expiran
-    los objetos, el ORM dispara un lazy-load de cascada frágil y lento, y tira
-    ObjectDeletedError si otra transacción ya borró la fila. Acepta un conjunto
-    de ids para borrar muchos sintéticos de una (round-trips = tablas × lotes,
-    no activos × tablas × lotes).
+    El borrado lo hace purge_service: DELETE por lotes con commit por lote
+    (locks y WAL acotados), repartido entre tablas en varias conexiones, con
+    el avance persistido en purge_job para retomarlo si el proceso muere, y al
+    final un `DELETE FROM assets WHERE id IN (...)` que deja el resto al ON
+    DELETE CASCADE. NO usa `s.delete()` del ORM a propósito: con commits
+    intermedios que expiran los objetos, el ORM dispara un lazy-load de
+    cascada frágil y lento, y tira ObjectDeletedError si otra transacción ya
+    borró la fila. Acepta un conjunto de ids para borrar muchos sintéticos de
+    una (round-trips = tablas × lotes, no activos × tablas × lotes).
 
     progress_cb(tablas_hechas, tablas_total, tabla_actual): opcional, para que
     la UI muestre avance (borrar muchos activos puede tardar minutos)."""
+    from app.services import purge_service
+
     ids = [int(a) for a in asset_ids]
     if not ids:
         return 0
@@ -114,64 +114,7 @@ def purge_assets(s, asset_ids, progress_cb=None) -> int:
     # sí está permitido.
     _bloquear_si_es_componente(s, ids)
 
-    if db_compat.is_mysql(s):
-        # ids validados a int → seguro interpolarlos (IN con N valores); LIMIT
-        # inline porque algunos drivers no aceptan placeholder ahí
-        id_list = ", ".join(str(i) for i in ids)
-        # ind_{code}/ind_fundamental_{code}/ind_asset_meta: dinámicas por
-        # indicador (ver get_ind_table); sig_{id}/strat_res_{id}: dinámicas
-        # por señal/estrategia (ver signal_store). Descubiertas desde
-        # information_schema.
-        dyn = [r[0] for r in s.execute(text(
-            "SELECT table_name FROM information_schema.tables "
-            "WHERE table_schema = DATABASE() AND (table_name LIKE 'ind\\_%' "
-            "OR table_name LIKE 'sig\\_%' "
-            "OR table_name LIKE 'strat\\_res\\_%')")).all()]
-        tables = (*tablas_de_historia_por_activo(s), *dyn)
-        total  = len(tables) + 1  # +1: el DELETE final de assets (cascade)
-        for i, tbl in enumerate(tables):
-            if progress_cb:
-                progress_cb(i, total, tbl)
-            while True:
-                res = s.execute(text(
-                    f"DELETE FROM `{tbl}` WHERE asset_id IN ({id_list}) "
-                    f"LIMIT {_DELETE_BATCH}"))
-                s.commit()
-                if res.rowcount < _DELETE_BATCH:
-                    break
-        if progress_cb:
-            progress_cb(len(tables), total, "assets")
-        s.execute(text(f"DELETE FROM assets WHERE id IN ({id_list})"))
-        s.commit()
-        if progress_cb:
-            progress_cb(total, total, "")
-    elif db_compat.is_postgres(s):
-        # PostgreSQL: mismas tablas que la rama MySQL (las dinámicas NO
-        # tienen FK a assets — sin esta limpieza explícita quedarían filas
-        # huérfanas). Sin LIMIT (no existe en DELETE de PG) y sin lotes: en
-        # MVCC un DELETE por tabla no bloquea lectores, y el commit por
-        # tabla acota la transacción igual que los lotes en InnoDB.
-        id_list = ", ".join(str(i) for i in ids)
-        dyn = db_compat.list_tables_by_prefix(s, "ind_", "sig_", "strat_res_")
-        tables = (*tablas_de_historia_por_activo(s), *dyn)
-        total  = len(tables) + 1
-        for i, tbl in enumerate(tables):
-            if progress_cb:
-                progress_cb(i, total, tbl)
-            s.execute(text(
-                f"DELETE FROM {db_compat.quote_ident(s, tbl)} "
-                f"WHERE asset_id IN ({id_list})"))
-            s.commit()
-        if progress_cb:
-            progress_cb(len(tables), total, "assets")
-        s.execute(text(f"DELETE FROM assets WHERE id IN ({id_list})"))
-        s.commit()
-        if progress_cb:
-            progress_cb(total, total, "")
-    else:
-        # sqlite (tests): borrado en bloque, sin cascade lazy-load del ORM
-        s.query(Asset).filter(Asset.id.in_(ids)).delete(synchronize_session=False)
-        s.commit()
+    purge_service.purge(s, ids, progress_cb=progress_cb)
     return len(ids)
 
 
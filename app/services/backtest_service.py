@@ -22,9 +22,10 @@ import sqlalchemy as sa
 
 from app.database import get_session
 from app.models import (BacktestIcPoint, BacktestQuantileStat, BacktestRun,
-                        Price, signal_store)
+                        signal_store)
 from app.services import backtest_engine as eng
-from app.services import db_compat
+from app.services import db_compat, forward_return_store
+from app.services import query_stats_service as qs
 
 logger = logging.getLogger(__name__)
 
@@ -37,8 +38,6 @@ DEFAULT_CONFIG = {
     "date_to":     None,
 }
 
-_ASSET_BATCH = 200  # activos por query de precios (acota memoria a 10k activos)
-
 
 def a_fecha(valor):
     """ISO ('2024-01-31') → date. None/'' → None. Ya-date → tal cual.
@@ -106,12 +105,19 @@ def compute_backtest(strategy_id: int, config=None, progress_cb=None) -> dict:
 
     Devuelve dicts planos, no objetos ORM: el resultado puede viajar (a la UI,
     a una herramienta MCP, a un JSON) sin arrastrar una sesión de base.
+
+    (Lo único que puede escribir es el panel de retornos forward, que es caché
+    derivado de `prices` y no un resultado: ver forward_return_store.)
     """
     cfg = normalize_config(config)
     s = get_session()
     t0 = time.time()
-    datos = _computar(s, int(strategy_id), cfg, progress_cb)
+    # Grabación propia (o la del Centro de Datos, si corre adentro de una):
+    # el desglose por fase viaja con el resultado, no se persiste con el run.
+    with qs.recording() as rec:
+        datos = _computar(s, int(strategy_id), cfg, progress_cb)
     datos["duration_seconds"] = time.time() - t0
+    datos["query_stats"] = rec.summary()
     return datos
 
 
@@ -427,12 +433,13 @@ def compute_variant_backtest(strategy_id: int, components: list[dict],
     s = get_session()
     t0 = time.time()
 
-    base_rows = leer_scores(s, strategy_id, cfg)
-    pesos = resolver_componentes(s, components)
+    with qs.phase("bt:scores"):
+        base_rows = leer_scores(s, strategy_id, cfg)
+        pesos = resolver_componentes(s, components)
 
-    d0 = min(d for d, _a, _s in base_rows)
-    d1 = max(d for d, _a, _s in base_rows)
-    por_par = leer_valores_de_senales(s, pesos, d0, d1)
+        d0 = min(d for d, _a, _s in base_rows)
+        d1 = max(d for d, _a, _s in base_rows)
+        por_par = leer_valores_de_senales(s, pesos, d0, d1)
 
     # Solo los pares que la base tiene puntuados: ahí está su elegibilidad.
     variante_rows = combinar_componentes(
@@ -444,16 +451,19 @@ def compute_variant_backtest(strategy_id: int, components: list[dict],
             "estrategia. Revisá que las señales tengan historia calculada.")
 
     # Un solo panel de precios para los dos: es la parte cara.
-    fwd = _retornos_forward(s, base_rows, cfg, progress_cb)
+    with qs.phase("bt:panel"):
+        fwd, informe = _retornos_forward(s, base_rows, cfg, progress_cb)
 
     def _resultado(filas):
-        datos = _agregar(_por_fecha(filas, fwd, cfg), cfg, None)
+        with qs.phase("bt:agregación"):
+            datos = _agregar(_por_fecha(filas, fwd, cfg), cfg, None)
         datos["config"] = cfg
         return datos
 
     return {
         "config": cfg,
         "duration_seconds": time.time() - t0,
+        "forward_panel": informe,
         "base": _resultado(base_rows),
         "variante": _resultado(variante_rows),
     }
@@ -474,11 +484,6 @@ def _persistir(s, run_id: int, datos: dict) -> None:
                 run_id, datos["n_dates"], len(datos["config"]["horizons"]))
 
 
-def _chunks(lst, n):
-    for i in range(0, len(lst), n):
-        yield lst[i:i + n]
-
-
 def leer_scores(s, strategy_id, cfg) -> list[tuple]:
     """[(date, asset_id, score)] de una estrategia MATERIALIZADA, en el período.
 
@@ -515,55 +520,42 @@ def _computar(s, strategy_id, cfg, progress_cb, score_rows=None) -> dict:
     horizons = cfg["horizons"]
 
     if score_rows is None:
-        score_rows = leer_scores(s, strategy_id, cfg)
-
-    per_date = _por_fecha(score_rows,
-                          _retornos_forward(s, score_rows, cfg, progress_cb),
-                          cfg)
-    return _agregar(per_date, cfg, progress_cb)
+        with qs.phase("bt:scores"):
+            score_rows = leer_scores(s, strategy_id, cfg)
+
+    with qs.phase("bt:panel"):
+        fwd, informe = _retornos_forward(s, score_rows, cfg, progress_cb)
+    with qs.phase("bt:agregación"):
+        datos = _agregar(_por_fecha(score_rows, fwd, cfg), cfg, progress_cb)
+    datos["forward_panel"] = informe
+    return datos
 
 
-def _retornos_forward(s, score_rows, cfg, progress_cb) -> dict:
-    """{asset_id: (posición_por_fecha, retornos_forward)} — la parte CARA.
+def _retornos_forward(s, score_rows, cfg, progress_cb) -> tuple[dict, dict]:
+    """({asset_id: (posición_por_fecha, retornos_forward)}, informe) — la
+    parte CARA.
 
     Está separada porque es lo único que depende de los precios y no de los
     puntajes: así se puede evaluar más de un juego de scores sobre el mismo
     panel sin volver a leer millones de filas de `prices`. Es lo que hace
     viable comparar una estrategia con una variante en una sola pasada.
+
+    Y entre corridas, el panel se persiste (forward_return_store): cada
+    backtest reusa lo de los activos cuyos precios no cambiaron y recalcula
+    solo el resto. El informe dice cuánto se reusó y el tiempo ahorrado.
+
+    PISO SÍ, TECHO NO — y la asimetría es la parte importante. Los retornos
+    son FORWARD: ningún precio anterior a date_from se usa jamás, así que
+    recortar la cabeza no puede cambiar un resultado (medido: sin esto, una
+    corrida acotada a 2025 recorría 50 años de precios para usar 1,6). Un
+    techo, en cambio, truncaría en silencio la ventana futura del horizonte
+    más largo: el retorno a 60 días de la última fecha necesita precios
+    POSTERIORES a date_to.
     """
-    horizons = cfg["horizons"]
     asset_ids = sorted({aid for _d, aid, _sc in score_rows})
-    salida: dict = {}
-    done = 0
-    for batch in _chunks(asset_ids, _ASSET_BATCH):
-        q = (s.query(Price.asset_id, Price.date, Price.close)
-             .filter(Price.asset_id.in_(batch), Price.close.isnot(None)))
-        # PISO SÍ, TECHO NO — y la asimetría es la parte importante. Los
-        # retornos son FORWARD: ningún precio anterior a date_from se usa
-        # jamás, así que recortar la cabeza no puede cambiar un resultado
-        # (medido: sin esto, una corrida acotada a 2025 leía 50 años de
-        # precios para usar 1,6). Un techo, en cambio, truncaría en silencio
-        # la ventana futura del horizonte más largo: el retorno a 60 días de
-        # la última fecha necesita precios POSTERIORES a date_to.
-        if cfg["date_from"]:
-            q = q.filter(Price.date >= a_fecha(cfg["date_from"]))
-        price_rows = q.order_by(Price.asset_id, Price.date).all()
-        prices_by_asset = defaultdict(list)
-        for aid, d, c in price_rows:
-            prices_by_asset[aid].append((d, float(c)))
-
-        for aid in batch:
-            series = prices_by_asset.get(aid)
-            if not series:
-                continue
-            closes = [c for _, c in series]
-            salida[aid] = ({d: i for i, (d, _) in enumerate(series)},
-                           eng.forward_returns_for_series(closes, horizons,
-                                                          cfg["lag"]))
-        done += len(batch)
-        if progress_cb:
-            progress_cb(done, len(asset_ids), "activos")
-    return salida
+    return forward_return_store.load_panel(
+        s, asset_ids, cfg["horizons"], cfg["lag"],
+        date_from=a_fecha(cfg["date_from"]), progress_cb=progress_cb)
 
 
 def _por_fecha(score_rows, fwd_por_activo, cfg) -> dict:
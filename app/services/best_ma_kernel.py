@@ -0,0 +1,226 @@
+"""
+Kernel vectorizado de la media móvil "óptima" (best_sma_* / best_ema_*).
+
+Lógica pura (sin BD, sin Dash). La regla es la de siempre — para cada período
+de MA_PERIODS con historia suficiente (>= 2·período barras) y al menos 5
+toques (low <= MA <= high), score = toques que "aguantaron" / toques, donde
+aguantar es que el cierre previo y el actual queden del mismo lado de la MA;
+gana el score más alto y, ante empate, el período más corto (el primero de la
+lista) —, pero en vez de un loop por período con Series de pandas, todas las
+MAs salen como UNA matriz (barras × activos × períodos):
+
+- SMA: las 16 ventanas desde UNA suma acumulada (diferencia de prefijos).
+- EMA: la recursión y_t = (1-a)·y_{t-1} + a·x_t resuelta por bloques de
+  _EMA_BLOCK barras con una matriz de Toeplitz por período: una pasada para
+  todos los períodos (y todos los activos del lote) a la vez.
+- Toques y rebotes: reducciones booleanas sobre la matriz.
+
+Paridad EXACTA con el loop de pandas (tests/test_best_ma_kernel.py guarda la
+versión anterior como oráculo): la suma acumulada y la forma por bloques
+difieren de rolling()/ewm() en el último bit, y una comparación low <= MA que
+cae justo en el borde podría cambiar de lado. Por eso cada columna
+(activo, período) que tenga alguna comparación a menos de _AMBIGUOUS_REL del
+borde se recalcula con el cálculo de pandas de siempre antes de contar. En
+series reales eso pasa casi solo en tramos planos (high == low == close
+durante más de un período), que son justamente los que el redondeo decide.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MA_PERIODS = [5, 8, 10, 13, 15, 21, 25, 30, 34, 50, 55, 89, 100, 144, 200, 233]
+
+# Toques mínimos para que un período compita (regla histórica)
+_MIN_TOUCHES = 5
+
+# Barras por bloque de la EMA: medido en scripts/profile_best_ma.py, 32-64 es el
+# punto dulce (bloques más grandes pagan el producto B² de la Toeplitz).
+_EMA_BLOCK = 32
+
+# Distancia relativa (sobre el máximo |close| del activo) por debajo de la cual
+# una comparación contra la MA aproximada se considera ambigua. El error de la
+# suma acumulada es ~eps·n·max|close|/período (≈1e-12 relativo a 20.000 barras)
+# y el de la EMA por bloques ~1e-15: 1e-9 deja varios órdenes de margen.
+_AMBIGUOUS_REL = 1e-9
+
+# Tope de celdas (barras × activos × períodos) de la matriz por sub-lote en
+# best_ma_batch: ~32 MB de float64 por matriz intermedia.
+_MAX_CELLS = 4_000_000
+
+
+def _sma_matrix(x: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    """(n, k) → (n, k, P). NaN en las primeras período-1 barras (como rolling)."""
+    n, k = x.shape
+    cs = np.zeros((n + 1, k))
+    np.cumsum(x, axis=0, out=cs[1:])
+    out = np.full((n, k, len(periods)), np.nan)
+    for j, p in enumerate(periods):
+        if p <= n:
+            out[p - 1:, :, j] = (cs[p:] - cs[:-p]) / p
+    return out
+
+
+@lru_cache(maxsize=8)
+def _ema_operators(periods: tuple) -> tuple[np.ndarray, np.ndarray]:
+    """(Toeplitz (P, B, B), arrastre (P, B)) de un juego de períodos. Se arma
+    una vez por proceso: rehacerla por llamada costaba más que la EMA misma
+    en las series mensuales (~100 barras)."""
+    a = 2.0 / (np.asarray(periods) + 1.0)
+    b = 1.0 - a
+    j = np.arange(_EMA_BLOCK)
+    lag = j[:, None] - j[None, :]
+    # T[p, i, l] = a·b^(i-l) para l <= i: el aporte de x_{s+l} a y_{s+i}
+    toeplitz = np.where(lag >= 0,
+                        a[:, None, None] * b[:, None, None] ** np.maximum(lag, 0), 0.0)
+    carry = b[:, None] ** (j + 1)[None, :]           # (P, B): peso de y_{s-1}
+    return toeplitz, carry
+
+
+def _ema_matrix(x: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    """(n, k) → (n, k, P). ewm(span=p, adjust=False): arranca en x_0."""
+    n, k = x.shape
+    toeplitz, carry = _ema_operators(tuple(int(p) for p in periods))
+    out = np.empty((len(periods), n, k))
+    y = np.repeat(x[:1], len(periods), axis=0)       # y_{-1} = x_0 → y_0 = x_0
+    for s in range(0, n, _EMA_BLOCK):
+        xb = x[s:s + _EMA_BLOCK]
+        L = len(xb)
+        blk = toeplitz[:, :L, :L] @ xb + carry[:, :L, None] * y[:, None, :]
+        out[:, s:s + L] = blk
+        y = blk[:, -1]
+    return out.transpose(1, 2, 0)
+
+
+def _exact_ma(close: np.ndarray, period: int, kind: str) -> np.ndarray:
+    """La MA de una columna con el cálculo de pandas de siempre (el fallback
+    para las columnas ambiguas)."""
+    s = pd.Series(close)
+    ma = s.rolling(period).mean() if kind == "sma" \
+        else s.ewm(span=period, adjust=False).mean()
+    return ma.to_numpy(dtype=float)
+
+
+def _counts(ma: np.ndarray, close: np.ndarray, prev: np.ndarray,
+            high: np.ndarray, low: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(toques, rebotes que aguantaron) por columna. ma: (n, ...) con close/
+    prev/high/low broadcasteables. NaN nunca cuenta (las comparaciones dan
+    False), igual que las Series de pandas."""
+    touched = (low <= ma) & (ma <= high)
+    bounce  = ((prev >= ma) & (close >= ma)) | ((prev <= ma) & (close <= ma))
+    return touched.sum(axis=0), (touched & bounce).sum(axis=0)
+
+
+def _pick(touches: np.ndarray, held: np.ndarray, eligible: np.ndarray,
+          periods: np.ndarray) -> int | None:
+    """El período ganador de un activo: score más alto entre los elegibles,
+    el primero de la lista ante empate (argmax devuelve la primera
+    ocurrencia, como el `>` estricto del loop original)."""
+    ok = eligible & (touches >= _MIN_TOUCHES)
+    if not ok.any():
+        return None
+    score = np.where(ok, held / np.maximum(touches, 1), -1.0)
+    return int(periods[int(np.argmax(score))])
+
+
+def _as_array(v) -> np.ndarray:
+    return v.to_numpy(dtype=float) if isinstance(v, pd.Series) \
+        else np.asarray(v, dtype=float)
+
+
+def _batch(series: list[tuple[np.ndarray, np.ndarray, np.ndarray]], kind: str,
+           periods: np.ndarray) -> list[int | None]:
+    """Un sub-lote: arma la matriz con las series alineadas al inicio (relleno
+    NaN al final, que no toca ninguna comparación) y resuelve todo junto."""
+    lengths = np.array([len(c) for c, _, _ in series])
+    n, k = int(lengths.max()), len(series)
+    close = np.full((n, k), np.nan)
+    high  = np.full((n, k), np.nan)
+    low   = np.full((n, k), np.nan)
+    for i, (c, h, lo) in enumerate(series):
+        close[:len(c), i], high[:len(c), i], low[:len(c), i] = c, h, lo
+    prev = np.vstack([np.full((1, k), np.nan), close[:-1]])
+
+    # Las MAs se calculan sobre el close con el relleno en 0, no en NaN: en la
+    # Toeplitz de la EMA un NaN futuro contaminaría el bloque entero (0·NaN).
+    # Más allá del final de cada serie la MA no existe: se enmascara.
+    padded = np.nan_to_num(close, nan=0.0)
+    ma = _sma_matrix(padded, periods) if kind == "sma" else _ema_matrix(padded, periods)
+    ma[np.arange(n)[:, None] >= lengths[None, :]] = np.nan
+
+    c3, p3, h3, l3 = (v[:, :, None] for v in (close, prev, high, low))
+    scale = np.nanmax(np.abs(close), axis=0, initial=0.0)[None, :, None]
+    tol = _AMBIGUOUS_REL * np.maximum(scale, 1.0)
+    near = np.zeros(ma.shape[1:], dtype=bool)
+    for v in (c3, p3, h3, l3):
+        near |= (np.abs(ma - v) <= tol).any(axis=0)
+
+    touches, held = _counts(ma, c3, p3, h3, l3)
+    eligible = lengths[:, None] >= 2 * periods[None, :]
+
+    out = []
+    for i, (c, h, lo) in enumerate(series):
+        t_i, h_i = touches[i].copy(), held[i].copy()
+        for j in np.flatnonzero(near[i] & eligible[i]):
+            exact = _exact_ma(c, int(periods[j]), kind)
+            pv = np.concatenate([[np.nan], c[:-1]])
+            t_i[j], h_i[j] = _counts(exact, c, pv, h, lo)
+        out.append(_pick(t_i, h_i, eligible[i], periods))
+    return out
+
+
+def best_ma_batch(series: list, kind: str = "sma",
+                  periods: list[int] | None = None) -> list[int | None]:
+    """Período óptimo de MUCHOS activos a la vez. series: [(close, high, low)]
+    (Series o arrays) → [período | None] en el mismo orden.
+
+    Los activos se agrupan en sub-lotes de a lo sumo _MAX_CELLS celdas,
+    ordenados por largo para que el relleno sea mínimo. Una serie con NaN en
+    el close (el prefijo acumulado lo propagaría) va sola por el fallback de
+    pandas: mismo resultado, sin atajo."""
+    periods = np.asarray(periods or MA_PERIODS, dtype=np.int64)
+    arrays = [(_as_array(c), _as_array(h), _as_array(lo)) for c, h, lo in series]
+    result: list[int | None] = [None] * len(arrays)
+
+    vector_idx = []
+    for i, (c, _, _) in enumerate(arrays):
+        if len(c) == 0:
+            continue
+        if np.isnan(c).any():
+            result[i] = _reference(arrays[i], kind, periods)
+        else:
+            vector_idx.append(i)
+
+    vector_idx.sort(key=lambda i: len(arrays[i][0]))
+    chunks, cur = [], []
+    for i in vector_idx:
+        # Orden ascendente por largo: la serie que entra es la más larga del
+        # sub-lote y fija el alto de la matriz.
+        if cur and len(arrays[i][0]) * (len(cur) + 1) * len(periods) > _MAX_CELLS:
+            chunks.append(cur)
+            cur = []
+        cur.append(i)
+    if cur:
+        chunks.append(cur)
+    for chunk in chunks:
+        for i, best in zip(chunk, _batch([arrays[j] for j in chunk], kind, periods)):
+            result[i] = best
+    return result
+
+
+def best_ma(close, high, low, kind: str = "sma",
+            periods: list[int] | None = None) -> int | None:
+    """Período óptimo de un activo (la forma de un elemento de best_ma_batch)."""
+    return best_ma_batch([(close, high, low)], kind, periods)[0]
+
+
+def _reference(arrays: tuple, kind: str, periods: np.ndarray) -> int | None:
+    """Columna por columna con pandas: el camino para series con huecos."""
+    c, h, lo = arrays
+    pv = np.concatenate([[np.nan], c[:-1]])
+    touches = np.zeros(len(periods), dtype=np.int64)
+    held    = np.zeros(len(periods), dtype=np.int64)
+    eligible = len(c) >= 2 * periods
+    for j in np.flatnonzero(eligible):
+        touches[j], held[j] = _counts(_exact_ma(c, int(periods[j]), kind), c, pv, h, lo)
+    return _pick(touches, held, eligible, periods)
@@ -0,0 +1,218 @@
+"""
+Búsqueda sobre el catálogo: indicadores, señales, estrategias y las entidades
+de referencia (países, mercados, tipos de instrumento, sectores, industrias)
+con sus aliases.
+
+Usa el mismo índice invertido que el manual (search_index): plegado de
+acentos, prefijos, frases y BM25. Lo consultan la herramienta de IA
+`search_catalog` —que antes solo podía LISTAR el catálogo entero y filtrarlo
+ella— y reference_service, que resuelve con `resolve_entity` los nombres que
+solo difieren en acentos ("Tecnologia" → "Tecnología") en vez de crear un
+duplicado.
+
+El índice se arma con una pasada de SELECTs al primer uso y se invalida:
+- al COMMITEAR un cambio ORM de cualquiera de los modelos indexados, en este
+  proceso: `after_flush` lo anota en la sesión y `after_commit` invalida —
+  invalidar en el flush dejaba que un armado concurrente leyera el estado
+  commiteado viejo y lo guardara como vigente hasta el TTL;
+- por vencimiento (`TTL_SECONDS`), para lo que cambie otro proceso o SQL
+  crudo.
+
+La visibilidad de señales y estrategias (visibility.can_view) se filtra en
+cada consulta sobre los candidatos: un único índice sirve a todos los
+usuarios.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models import (CatalogAlias, Country, IndicatorDefinition, Industry,
+                        InstrumentType, Market, Sector, SignalDefinition,
+                        Strategy)
+from app.services.search_index import SearchIndex, fold
+from app.services.visibility import can_view
+
+logger = logging.getLogger(__name__)
+
+TTL_SECONDS = 300
+
+# Entidades de referencia: mismo entity_type que catalog_aliases.
+_REFERENCE = {
+    "country":         Country,
+    "market":          Market,
+    "instrument_type": InstrumentType,
+    "sector":          Sector,
+    "industry":        Industry,
+}
+KINDS = ("indicator", "signal", "strategy", *_REFERENCE)
+
+_WATCHED = (IndicatorDefinition, SignalDefinition, Strategy, CatalogAlias,
+            *_REFERENCE.values())
+
+
+@dataclass(frozen=True)
+class Entry:
+    kind: str
+    id: int
+    name: str
+    code: str | None = None          # code del indicador / key de la señal
+    owner_id: int | None = None
+    is_public: bool = True           # lo que no es señal ni estrategia es público
+
+
+@dataclass(frozen=True)
+class _Built:
+    index: SearchIndex
+    names: dict                      # (kind, nombre plegado) → id; None si ambiguo
+    at: float
+
+
+_lock = threading.Lock()
+_built: _Built | None = None
+_generation = 0      # un armado que cruzó una invalidación no se guarda
+
+
+def invalidate() -> None:
+    global _built, _generation
+    _generation += 1
+    _built = None
+
+
+_DIRTY = "catalog_search_dirty"
+
+
+def _on_flush(session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _WATCHED):
+            session.info[_DIRTY] = True
+            return
+
+
+def _on_commit(session) -> None:
+    if session.in_nested_transaction():
+        return                      # soltar un savepoint no es el commit
+    if session.info.pop(_DIRTY, False):
+        invalidate()
+
+
+def _on_transaction_end(session, transaction) -> None:
+    if transaction.parent is None:          # rollback de la transacción raíz
+        session.info.pop(_DIRTY, None)
+
+
+event.listen(Session, "after_flush", _on_flush)
+event.listen(Session, "after_commit", _on_commit)
+event.listen(Session, "after_transaction_end", _on_transaction_end)
+
+
+def _docs(conn, alias_rows) -> list[tuple[Entry, str, str]]:
+    aliases: dict[tuple[str, int], list[str]] = {}
+    for et, src, eid in alias_rows:
+        aliases.setdefault((et, eid), []).append(src)
+
+    docs = []
+    for r in conn.execute(sa.select(
+            IndicatorDefinition.id, IndicatorDefinition.code,
+            IndicatorDefinition.name, IndicatorDefinition.category,
+            IndicatorDefinition.description)):
+        docs.append((Entry("indicator", r.id, r.name, r.code),
+                     f"{r.name} {r.code}",
+                     f"{r.category or ''}\n{r.description or ''}"))
+    for r in conn.execute(sa.select(
+            SignalDefinition.id, SignalDefinition.key, SignalDefinition.name,
+            SignalDefinition.description, SignalDefinition.indicator_key,
+            SignalDefinition.owner_id, SignalDefinition.is_public)):
+        docs.append((Entry("signal", r.id, r.name, r.key, r.owner_id,
+                           bool(r.is_public)),
+                     f"{r.name} {r.key}",
+                     f"{r.indicator_key or ''}\n{r.description or ''}"))
+    for r in conn.execute(sa.select(
+            Strategy.id, Strategy.name, Strategy.description,
+            Strategy.owner_id, Strategy.is_public)):
+        docs.append((Entry("strategy", r.id, r.name, None, r.owner_id,
+                           bool(r.is_public)),
+                     r.name, r.description or ""))
+    for kind, Model in _REFERENCE.items():
+        for r in conn.execute(sa.select(Model.id, Model.name)):
+            docs.append((Entry(kind, r.id, r.name), r.name,
+                         "\n".join(aliases.get((kind, r.id), []))))
+    return docs
+
+
+def _names(docs, alias_rows) -> dict:
+    """(kind, nombre plegado) → id, con los nombres y los aliases. Un nombre
+    que pliega igual para dos entidades distintas queda en None: ambiguo, no
+    se resuelve."""
+    out: dict = {}
+
+    def put(kind, value, eid):
+        k = (kind, fold(value).strip())
+        out[k] = eid if out.get(k, eid) == eid else None
+
+    for e, _t, _b in docs:
+        if e.kind in _REFERENCE:
+            put(e.kind, e.name, e.id)
+    for kind, value, eid in alias_rows:
+        if kind in _REFERENCE:
+            put(kind, value, eid)
+    return out
+
+
+def _get() -> _Built:
+    global _built
+    built = _built
+    if built is not None and time.monotonic() - built.at < TTL_SECONDS:
+        return built
+    with _lock:
+        built = _built
+        if built is not None and time.monotonic() - built.at < TTL_SECONDS:
+            return built
+        gen = _generation
+        with engine.connect() as conn:
+            alias_rows = conn.execute(sa.select(
+                CatalogAlias.entity_type, CatalogAlias.source_value,
+                CatalogAlias.entity_id)).all()
+            docs = _docs(conn, alias_rows)
+        built = _Built(SearchIndex(docs), _names(docs, alias_rows),
+                       time.monotonic())
+        if gen == _generation:
+            _built = built
+        logger.debug("Índice del catálogo armado: %d entradas", len(built.index))
+        return built
+
+
+def warm_index() -> int:
+    """Arma el índice de antemano (arranque). Devuelve las entradas."""
+    return len(_get().index)
+
+
+def search(query: str, *, user_id: int | None = None, is_admin: bool = False,
+           kinds: tuple[str, ...] | None = None,
+           limit: int | None = 50) -> list[Entry]:
+    """Entradas del catálogo que matchean, visibles para ese usuario."""
+    if len(fold(query or "").strip()) < 2:
+        return []
+    wanted = set(kinds) if kinds else None
+
+    def accept(e: Entry) -> bool:
+        if wanted is not None and e.kind not in wanted:
+            return False
+        return can_view(e.owner_id, e.is_public, user_id, is_admin)
+
+    return [m.key for m in _get().index.search(query, limit=limit, accept=accept)]
+
+
+def resolve_entity(entity_type: str, value: str) -> int | None:
+    """Id de la entidad de referencia cuyo nombre o alias coincide con
+    `value` salvo mayúsculas y acentos; None si no hay o es ambiguo."""
+    if entity_type not in _REFERENCE or not (value or "").strip():
+        return None
+    return _get().names.get((entity_type, fold(value).strip()))
@@ -0,0 +1,299 @@
+"""
+Zonas persistidas de los overlays del gráfico: régimen, volatilidad y drawdowns.
+
+Los callbacks del gráfico (chart_callbacks.load_*_overlay) leían TODOS los
+precios del activo y recalculaban las zonas de las tres temporalidades sobre
+la historia completa cada vez que el usuario cambiaba de activo con el
+overlay prendido — el mismo cálculo que el pipeline ya había hecho esa noche
+para trend_*, volatility_* y drawdown_pct_daily, y que tiraba después de
+convertirlo en serie.
+
+Ahora `backfill_indicator` le pasa esas zonas a un `ZoneCollector`, que las
+guarda en `chart_zones`: una fila por (activo, código) con las zonas en JSON
+compacto comprimido, el checksum de la config de la familia con que se
+calcularon y la marca de agua de `prices` — la misma de
+forward_return_store: (cantidad de closes, última fecha, suma de closes). La
+marca del pipeline sale del DataFrame que ya tiene en memoria, sin query; lo
+que ya está al día (mismo checksum, misma marca) no se reescribe, así que un
+delta sin precios nuevos no toca la tabla.
+
+El overlay lee la fila si la marca y el checksum coinciden con los de ahora
+(una query agregada + una de lectura); si no —activo sin procesar, precios
+nuevos desde la última corrida, config cambiada— calcula como siempre y
+persiste lo calculado.
+
+Límite conocido: la marca mira solo los closes. Una corrección que toca solo
+high/low (que entran en el ATR de volatilidad) no se detecta hasta el próximo
+close nuevo; el "Recalcular completo" del pipeline reescribe todo igual.
+
+Es caché derivado: si no se puede leer o escribir (migración pendiente, base
+de solo lectura) el gráfico calcula en memoria y el pipeline sigue sin él.
+"""
+import hashlib
+import json
+import logging
+import zlib
+from datetime import date, datetime
+
+import pandas as pd
+import sqlalchemy as sa
+
+from app.models import ChartZone
+from app.services import db_compat
+from app.services.forward_return_store import _fresh, price_watermarks
+
+logger = logging.getLogger(__name__)
+
+# Entra en el checksum: subirla cuando cambie el cálculo de las zonas o la
+# codificación invalida todo lo persistido sin migración.
+_VERSION = 1
+
+# Campos de cada familia, en el orden en que se codifican.
+_FIELDS = {
+    "regime": ("start", "end", "regime", "regime_detail"),
+    "vol":    ("start", "end", "vol_regime", "atr_pct", "dur_regime"),
+    "dd":     ("start", "trough", "end", "depth"),
+}
+
+# Parámetros de la config de cada familia que cambian las zonas.
+_CFG_ATTRS = {
+    "regime": ("ema_period_d", "ema_period_w", "ema_period_m",
+               "slope_lookback", "slope_threshold_pct", "confirm_bars",
+               "nascent_bars", "strong_slope_multiplier"),
+    "vol":    ("atr_period", "confirm_bars", "pct_low", "pct_high",
+               "pct_extreme", "dur_short_pct", "dur_long_pct"),
+    "dd":     ("min_depth_pct",),
+}
+
+DD_CODE = "drawdown_events"
+
+# Código del pipeline que calcula las zonas → (familia, código de la fila).
+SOURCES = {
+    "trend_daily":        ("regime", "trend_daily"),
+    "trend_weekly":       ("regime", "trend_weekly"),
+    "trend_monthly":      ("regime", "trend_monthly"),
+    "volatility_daily":   ("vol", "volatility_daily"),
+    "volatility_weekly":  ("vol", "volatility_weekly"),
+    "volatility_monthly": ("vol", "volatility_monthly"),
+    "drawdown_pct_daily": ("dd", DD_CODE),
+}
+
+# Temporalidad del store del gráfico → código de la fila.
+_REGIME_TF = {"D": "trend_daily", "W": "trend_weekly", "M": "trend_monthly"}
+_VOL_TF = {"D": "volatility_daily", "W": "volatility_weekly",
+           "M": "volatility_monthly"}
+
+
+# ── Codificación ──────────────────────────────────────────────────────────────
+
+def config_checksum(kind: str, cfg) -> str:
+    vals = [getattr(cfg, a) for a in _CFG_ATTRS[kind]]
+    raw = json.dumps([_VERSION, kind, vals], default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def encode(kind: str, zones: list) -> bytes:
+    fields = _FIELDS[kind]
+    rows = [[z.get(f) for f in fields] for z in zones]
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), 6)
+
+
+def decode(kind: str, blob: bytes) -> list[dict]:
+    fields = _FIELDS[kind]
+    return [dict(zip(fields, r)) for r in json.loads(zlib.decompress(blob))]
+
+
+def _as_date(v) -> date:
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    return pd.Timestamp(v).date()
+
+
+def mark_from_df(df: pd.DataFrame) -> tuple | None:
+    """La marca de agua de price_watermarks, sacada del DataFrame de precios
+    que el pipeline ya tiene en memoria. None sin closes."""
+    closes = df["close"]
+    ok = closes.notna()
+    n = int(ok.sum())
+    if not n:
+        return None
+    return n, _as_date(df["date"][ok].max()), float(closes[ok].sum())
+
+
+def _row(asset_id, code, checksum, mark, kind, zones, now) -> dict:
+    n, last, total = mark
+    return {"asset_id": asset_id, "code": code, "config_checksum": checksum,
+            "n_prices": n, "last_date": last, "close_sum": total,
+            "payload": encode(kind, zones), "built_at": now}
+
+
+def _save(s, rows: list[dict]) -> bool:
+    if not rows:
+        return True
+    cols = ("config_checksum", "n_prices", "last_date", "close_sum",
+            "payload", "built_at")
+    try:
+        s.execute(db_compat.upsert(s, ChartZone, rows,
+                                   {c: db_compat.INSERTED for c in cols}))
+        s.commit()
+        return True
+    except Exception as exc:
+        s.rollback()
+        logger.warning("No se pudieron persistir zonas del gráfico (%d filas): %s",
+                       len(rows), exc)
+        return False
+
+
+# ── Escritura desde el pipeline ───────────────────────────────────────────────
+
+class ZoneCollector:
+    """Junta las zonas que calcula una pasada de backfill_indicator y las
+    persiste por chunk de activos, salteando las que ya están al día.
+
+    Uso: begin_chunk(ids) al abrir el chunk (una query con lo guardado),
+    add() por activo y flush() después del commit del chunk. Un error de la
+    tabla lo apaga para el resto de la pasada: el indicador no se entera.
+    """
+
+    def __init__(self, session, source_code: str, cfg):
+        self.kind, self.code = SOURCES[source_code]
+        self.checksum = config_checksum(self.kind, cfg)
+        self.enabled = True
+        self.written = self.skipped = 0
+        self._s = session
+        self._stored: dict = {}
+        self._rows: list[dict] = []
+
+    def begin_chunk(self, asset_ids) -> None:
+        self._stored = {}
+        if not self.enabled:
+            return
+        t = ChartZone
+        try:
+            rows = self._s.execute(
+                sa.select(t.asset_id, t.config_checksum, t.n_prices,
+                          t.last_date, t.close_sum)
+                .where(t.code == self.code, t.asset_id.in_(list(asset_ids)))).all()
+        except Exception as exc:
+            self._s.rollback()
+            self._disable(exc)
+            return
+        self._stored = {r.asset_id: r for r in rows}
+
+    def add(self, asset_id: int, df: pd.DataFrame, zones) -> None:
+        if not self.enabled or zones is None:
+            return
+        mark = mark_from_df(df)
+        if mark is None:
+            return
+        old = self._stored.get(asset_id)
+        if old is not None and old.config_checksum == self.checksum \
+                and _fresh(old, mark):
+            self.skipped += 1
+            return
+        self._rows.append(_row(asset_id, self.code, self.checksum, mark,
+                               self.kind, zones, datetime.utcnow()))
+
+    def flush(self) -> None:
+        rows, self._rows = self._rows, []
+        if not self.enabled or not rows:
+            return
+        if _save(self._s, rows):
+            self.written += len(rows)
+        else:
+            self.enabled = False
+
+    def _disable(self, exc) -> None:
+        self.enabled = False
+        logger.warning("Zonas del gráfico de %s sin persistir en esta pasada: %s",
+                       self.code, exc)
+
+
+def collector(session, source_code: str, *, regime_cfg=None, vol_cfg=None,
+              dd_cfg=None) -> ZoneCollector | None:
+    """El colector del código del pipeline, o None si no calcula zonas (o
+    falta la config de su familia)."""
+    src = SOURCES.get(source_code)
+    if src is None:
+        return None
+    cfg = {"regime": regime_cfg, "vol": vol_cfg, "dd": dd_cfg}[src[0]]
+    return ZoneCollector(session, source_code, cfg) if cfg is not None else None
+
+
+# ── Lectura para los overlays ─────────────────────────────────────────────────
+
+def _overlay(asset_id: int, kind: str, codes: list[str], cfg, compute):
+    """{código: zonas} persistidas si están al día; si no, compute(df) →
+    {código: zonas}, que se persiste. None si el activo no tiene precios."""
+    from app.database import get_session
+    from app.services.price_service import get_prices_df
+
+    s = get_session()
+    checksum = config_checksum(kind, cfg)
+    mark = None
+    try:
+        mark = price_watermarks(s, [asset_id]).get(asset_id)
+        t = ChartZone
+        rows = s.execute(
+            sa.select(t.code, t.config_checksum, t.n_prices, t.last_date,
+                      t.close_sum, t.payload)
+            .where(t.asset_id == asset_id, t.code.in_(codes))).all()
+        got = {r.code: r for r in rows
+               if mark is not None and r.config_checksum == checksum
+               and _fresh(r, mark)}
+        if len(got) == len(codes):
+            return {c: decode(kind, got[c].payload) for c in codes}
+    except Exception as exc:
+        s.rollback()
+        logger.debug("Zonas persistidas no disponibles (%s): %s", kind, exc)
+
+    df = get_prices_df(asset_id)
+    if df.empty:
+        return None
+    out = compute(df)
+    mark = mark or mark_from_df(df)
+    if mark is not None:
+        now = datetime.utcnow()
+        _save(s, [_row(asset_id, c, checksum, mark, kind, out[c], now)
+                  for c in codes])
+    return out
+
+
+def regime_zones(asset_id: int) -> dict | None:
+    """{"D"|"W"|"M": zonas de régimen}, lo que espera chart-regime-data."""
+    from app.services import technical_service as ts
+
+    cfg = ts._get_regime_config()
+
+    def compute(df):
+        z = ts.get_regime_zones_for_chart(df, cfg)
+        return {code: z[tf] for tf, code in _REGIME_TF.items()}
+
+    out = _overlay(asset_id, "regime", list(_REGIME_TF.values()), cfg, compute)
+    return None if out is None else {tf: out[c] for tf, c in _REGIME_TF.items()}
+
+
+def vol_zones(asset_id: int) -> dict | None:
+    """{"D"|"W"|"M": zonas de volatilidad}, lo que espera chart-vol-data."""
+    from app.services import technical_service as ts
+
+    cfg = ts._get_volatility_config()
+
+    def compute(df):
+        z = ts.get_vol_zones_for_chart(df, cfg)
+        return {code: z[tf] for tf, code in _VOL_TF.items()}
+
+    out = _overlay(asset_id, "vol", list(_VOL_TF.values()), cfg, compute)
+    return None if out is None else {tf: out[c] for tf, c in _VOL_TF.items()}
+
+
+def dd_events(asset_id: int) -> list | None:
+    """Eventos de drawdown, lo que espera chart-dd-data."""
+    from app.services import technical_service as ts
+
+    cfg = ts._get_drawdown_config()
+    out = _overlay(asset_id, "dd", [DD_CODE], cfg,
+                   lambda df: {DD_CODE: ts.get_dd_events_for_chart(df, cfg)})
+    return None if out is None else out[DD_CODE]
@@ -69,11 +69,15 @@ _LEAF_TABLES = [
     # Crítico limpiarla junto con las tablas de señales: si quedaran markers
     # de fechas "ya evaluadas", el delta SALTEARÍA las fechas recién limpiadas.
     "signal_eval_log",
+    # Marcas de datos tardíos para el delta (se rearman con la próxima
+    # escritura de precios): sin señales que refrescar no significan nada.
+    "signal_dirty_range",
     # ── Logs y registros de corrida ──
     "indicator_update_log",
     "fundamental_update_log",
     "price_update_log",
     "import_log",
+    "import_job",
     "verification_run_log",
     "asset_verification_flag",
     # Historial de corridas (0096). Quedó afuera de esta lista hasta ago-2026
@@ -86,13 +90,26 @@ _LEAF_TABLES = [
     # Locks persistidos de corridas: un lock huérfano deja trabado el botón
     # del Centro de Datos, así que la limpieza también lo destraba.
     "run_lock",
+    # Avance de purgas de historia: tras la limpieza no queda historia que
+    # purgar, y una purga 'running' se retomaría contra tablas vacías.
+    "purge_job",
     # ── Eventos y aliases (se redescargan / reimportan) ──
     "market_event",
     "catalog_aliases",
+    # ── Caché de retornos forward del backtest (se rearma solo) ──
+    "backtest_forward_panel",
+    # ── Zonas de los overlays del gráfico (se rearman solas) ──
+    "chart_zones",
+    # ── Barras semanales/mensuales de `prices` (se rearman solas) ──
+    "prices_weekly",
+    "prices_monthly",
+    # ── Ranking del escáner de pares (se rearma con el próximo escaneo) ──
+    "pair_scan_result",
     # ── Hijas de los snapshots: van ANTES que sus padres (ver abajo) ──
     "backtest_ic_point",
     "backtest_quantile_stat",
     "portfolio_run_point",
+    "portfolio_run_robustness",
 ]
 
 # Tablas referenciadas por una FK desde otra tabla. Van al final (sus hijas ya
@@ -154,6 +171,9 @@ _PRESERVED_TABLES = {
     "portfolio":             "cartera",
     "portfolio_member":      "composición de la cartera",
     "portfolio_transaction": "registro de operaciones, cargado a mano",
+    # ── Arranque ──
+    "bootstrap_state": "huella de los datos integrados: describe filas que "
+                       "la limpieza conserva (indicadores, fuentes)",
     # ── Acceso ──
     "users":        "usuarios y sus roles",
     "oauth_client": "conector MCP autorizado: borrarlo cortaría el acceso de "
@@ -175,7 +195,7 @@ TABLES_INFO = [
     ("catalog_aliases",           "Aliases del catálogo"),
     ("run_lock",                  "Locks de corridas"),
     ("run_history",               "Historial de corridas"),
-    ("*_update_log / *_eval_log / import_log",
+    ("*_update_log / *_eval_log / import_log / import_job",
      "Logs de actualización, evaluación e importación"),
     ("asset_verification_flag / verification_run_log",
      "Flags y logs de verificación de activos"),
@@ -351,8 +371,10 @@ def reset_to_fresh_install(bind=None) -> dict:
 
     # Resembrar lo integrado (fuentes, RIESGO_PAIS_AR, indicadores + tablas
     # ind_*) y reconciliar dinámicas (dropea las sig_/strat_res_ huérfanas).
+    # `force`: la huella del arranque se vació con todo lo demás, pero el
+    # reinicio no depende de eso.
     from app.services.startup_service import ensure_builtin_data
-    ensure_builtin_data()
+    ensure_builtin_data(force=True)
 
     # Usuario admin de fábrica (la tabla de usuarios quedó vacía arriba).
     _recreate_admin_user()
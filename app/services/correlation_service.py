@@ -0,0 +1,438 @@
+"""
+Matriz de correlación de un universo de activos, calculada por bloques.
+
+La correlación de siempre es de a un par: `scatter_service.get_paired_prices`
+hace dos queries y un join, y `returns_correlation` saca un Pearson. Para
+preguntar "qué activos de este universo se mueven con éste" hacían falta N
+round-trips por activo y N² para el universo entero.
+
+Acá el universo se carga UNA vez para la ventana pedida: una query por tanda
+de activos arma la matriz de cierres (fechas × activos) sobre el calendario
+común — la unión de las fechas de todos —, y de ahí los retornos simples
+r_t = c_t / c_{t-1} − 1, definidos solo cuando el activo cotiza en ambas
+fechas consecutivas del calendario y el cierre previo es positivo (la misma
+regla que returns_correlation). La correlación es "pairwise-complete": cada
+par usa solo las fechas en que ambos tienen retorno, y con menos de
+`min_periods` observaciones en común queda indefinida (NaN), igual que
+`DataFrame.corr(min_periods=...)` — test_correlation_service lo usa de oráculo.
+
+Las sumas de cada par salen de productos de matrices con máscara (cantidad,
+Σx, Σy, Σx², Σy², Σxy de las fechas en común) por bloques de filas de a lo
+sumo _MAX_CELLS celdas: la memoria intermedia no crece con N². La matriz
+final sí (float32: ~16 MB para 2.000 activos, ~400 MB para 10.000), así que
+`get_matrix` tiene un tope de universo (_MAX_MATRIX_ASSETS) y los vecinos de
+UN activo (`neighbours`) no la arman: calculan solo su fila (1 × N) sobre los
+retornos del universo, que son los que se cachean (fechas × N, ~20 MB para
+10.000 activos en un año).
+
+Matrices y retornos se guardan en un caché LRU por (universo, ventana) y se
+validan con la marca de agua de los precios del universo EN la ventana
+(cantidad, última fecha y suma de closes, una query agregada): un precio nuevo
+o corregido dentro de la ventana la mueve y la entrada se rehace; uno fuera de
+la ventana no la toca. El shrinkage hacia la correlación media (λ) se aplica
+al leer, así que no multiplica las entradas del caché.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+from app.database import get_session
+from app.models import Asset, Price
+
+logger = logging.getLogger(__name__)
+
+_ASSET_BATCH = 200          # activos por query de precios / marca de agua
+
+# Tope de celdas (activos del bloque × activos del universo) de cada matriz
+# intermedia: seis de float64 a la vez → ~100 MB en el peor bloque.
+_MAX_CELLS = 2_000_000
+
+# Observaciones en común mínimas por defecto para que un par tenga correlación
+MIN_PERIODS = 20
+
+# Ventana por defecto cuando la pantalla no tiene selector de fechas (/scatter)
+DEFAULT_WINDOW_DAYS = 365
+
+# Una columna cuya varianza centrada queda por debajo de (eps·amplitud)² por
+# observación es constante salvo redondeo: correlación indefinida, como la
+# serie plana de returns_correlation.
+_VAR_EPS = 1e-9
+
+# Tope de activos de la matriz completa: float32 N×N → ~64 MB con 4.000.
+_MAX_MATRIX_ASSETS = 4000
+
+_CACHE_SIZE = 4             # matrices / retornos en memoria
+_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Universos que ofrecen las pantallas para buscar vecinos de un activo
+UNIVERSE_SCOPES = {
+    "sector":   ("Mismo sector",    Asset.sector_id),
+    "industry": ("Misma industria", Asset.industry_id),
+    "market":   ("Mismo mercado",   Asset.market_id),
+    "all":      ("Todos",           None),
+}
+
+
+@dataclass
+class CorrelationMatrix:
+    """Correlaciones de un universo en una ventana. `corr[i, j]` es NaN si el
+    par no llega a min_periods retornos en común (o alguno es constante)."""
+    asset_ids: list[int]
+    corr: np.ndarray                        # (N, N) float32
+    n_dates: int                            # fechas del calendario común
+    min_periods: int
+    seconds: float = 0.0
+    index: dict = field(init=False, repr=False)
+    _mean: float | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.index = {aid: i for i, aid in enumerate(self.asset_ids)}
+
+    def row(self, asset_id: int, shrinkage: float = 0.0) -> np.ndarray | None:
+        """Correlaciones de un activo contra todo el universo (float64), con el
+        shrinkage aplicado. None si el activo no está en la matriz."""
+        i = self.index.get(asset_id)
+        if i is None:
+            return None
+        r = self.corr[i].astype(float)
+        if shrinkage:
+            r = shrink(r, self.mean_offdiag(), shrinkage)
+            r[i] = 1.0 if not math.isnan(self.corr[i, i]) else np.nan
+        return r
+
+    def mean_offdiag(self) -> float:
+        """Correlación media fuera de la diagonal: el blanco del shrinkage."""
+        if self._mean is None:
+            c = self.corr.astype(float)
+            np.fill_diagonal(c, np.nan)
+            self._mean = float(np.nanmean(c)) if np.isfinite(c).any() else 0.0
+        return self._mean
+
+
+@dataclass
+class UniverseReturns:
+    """Retornos de un universo en una ventana (fechas × activos): de acá
+    salen filas sueltas de la matriz sin armarla entera."""
+    asset_ids: list[int]
+    values: np.ndarray                      # (T, N) float64, NaN = sin dato
+    index: dict = field(init=False, repr=False)
+    _means: dict = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self.index = {aid: i for i, aid in enumerate(self.asset_ids)}
+
+    def row(self, asset_id: int, min_periods: int = MIN_PERIODS,
+            shrinkage: float = 0.0) -> np.ndarray | None:
+        """Lo mismo que CorrelationMatrix.row, calculando solo la fila del
+        activo. None si el activo no tiene retornos en la ventana."""
+        i = self.index.get(asset_id)
+        if i is None:
+            return None
+        (_s0, block), = correlation_blocks(self.values, min_periods,
+                                           rows=(i, i + 1))
+        r = block[0].astype(np.float32).astype(float)   # como la matriz
+        diag = 1.0 if np.isfinite(r[i]) else np.nan
+        if shrinkage:
+            r = shrink(r, self.mean_offdiag(min_periods), shrinkage)
+        r[i] = diag
+        return r
+
+    def mean_offdiag(self, min_periods: int = MIN_PERIODS) -> float:
+        """CorrelationMatrix.mean_offdiag acumulada bloque a bloque (sin
+        guardar la matriz); se calcula una vez por min_periods."""
+        m = self._means.get(min_periods)
+        if m is None:
+            total, count = 0.0, 0
+            for s0, block in correlation_blocks(self.values, min_periods):
+                b = block.astype(np.float32).astype(float)
+                k = np.arange(len(b))
+                b[k, s0 + k] = np.nan
+                ok = np.isfinite(b)
+                total += float(b[ok].sum())
+                count += int(ok.sum())
+            m = self._means[min_periods] = total / count if count else 0.0
+        return m
+
+
+def shrink(corr: np.ndarray, target: float, lam: float) -> np.ndarray:
+    """(1−λ)·C + λ·ρ̄: encoge las correlaciones hacia la media del universo
+    (el blanco de correlación constante). Con ventanas cortas corrige el ruido
+    de los pares extremos sin cambiar su orden relativo."""
+    lam = min(max(float(lam), 0.0), 1.0)
+    return (1.0 - lam) * corr + lam * target
+
+
+# ── Carga ─────────────────────────────────────────────────────────────────────
+
+def universe_ids(asset_id: int | None, scope: str) -> list[int]:
+    """Activos del universo `scope` relativo a asset_id (mismo sector, mismo
+    mercado, …). Si el activo no tiene ese dato, el universo es solo él."""
+    s = get_session()
+    _, col = UNIVERSE_SCOPES.get(scope, UNIVERSE_SCOPES["all"])
+    q = s.query(Asset.id)
+    if col is not None:
+        val = (s.query(col).filter(Asset.id == asset_id).scalar()
+               if asset_id else None)
+        if val is None:
+            return [asset_id] if asset_id else []
+        q = q.filter(col == val)
+    return sorted(r[0] for r in q.all())
+
+
+def window_watermark(s, asset_ids, date_from, date_to) -> tuple:
+    """(cantidad, última fecha, suma de closes) de los precios del universo en
+    la ventana: una query agregada por tanda de activos."""
+    n, last, total = 0, None, 0.0
+    for i in range(0, len(asset_ids), _ASSET_BATCH):
+        batch = asset_ids[i:i + _ASSET_BATCH]
+        q = (sa.select(sa.func.count(Price.close), sa.func.max(Price.date),
+                       sa.func.sum(Price.close))
+             .where(Price.asset_id.in_(batch), Price.close.isnot(None)))
+        if date_from:
+            q = q.where(Price.date >= date_from)
+        if date_to:
+            q = q.where(Price.date <= date_to)
+        cnt, mx, sm = s.execute(q).one()
+        n += int(cnt or 0)
+        total += float(sm or 0.0)
+        if mx is not None and (last is None or mx > last):
+            last = mx
+    return n, last, total
+
+
+def _same_mark(a: tuple, b: tuple) -> bool:
+    return (a[0] == b[0] and a[1] == b[1]
+            and math.isclose(a[2], b[2], rel_tol=1e-12, abs_tol=1e-9))
+
+
+def load_closes(s, asset_ids, date_from=None, date_to=None) -> pd.DataFrame:
+    """Cierres (fechas × activos) sobre el calendario común — la unión de las
+    fechas de todos —, NaN donde el activo no cotiza. Una query de columnas
+    (sin hidratar objetos Price) por tanda de activos; los activos sin
+    precios en la ventana no tienen columna."""
+    by_asset = defaultdict(list)
+    for i in range(0, len(asset_ids), _ASSET_BATCH):
+        batch = asset_ids[i:i + _ASSET_BATCH]
+        q = (s.query(Price.asset_id, Price.date, Price.close)
+             .filter(Price.asset_id.in_(batch), Price.close.isnot(None)))
+        if date_from:
+            q = q.filter(Price.date >= date_from)
+        if date_to:
+            q = q.filter(Price.date <= date_to)
+        for aid, d, c in q.all():
+            by_asset[aid].append((d.toordinal(), float(c)))
+
+    cols = [aid for aid in asset_ids if aid in by_asset]
+    if not cols:
+        return pd.DataFrame()
+    ords = np.unique(np.concatenate(
+        [np.fromiter((o for o, _ in by_asset[a]), dtype=np.int64) for a in cols]))
+    closes = np.full((len(ords), len(cols)), np.nan)
+    for j, aid in enumerate(cols):
+        pts = by_asset[aid]
+        pos = np.searchsorted(ords, [o for o, _ in pts])
+        closes[pos, j] = [c for _, c in pts]
+    index = [date.fromordinal(int(o)) for o in ords]
+    return pd.DataFrame(closes, index=index, columns=cols)
+
+
+def load_returns(s, asset_ids, date_from=None, date_to=None) -> pd.DataFrame:
+    """Retornos simples (fechas × activos) sobre el calendario común. NaN
+    donde el activo no cotiza en la fecha o en la anterior del calendario, o
+    donde el cierre previo no es positivo."""
+    frame = load_closes(s, asset_ids, date_from, date_to)
+    if frame.empty:
+        return frame
+    closes = frame.to_numpy()
+    prev, cur = closes[:-1], closes[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets = np.where(prev > 0, cur / prev - 1.0, np.nan)
+    return pd.DataFrame(rets, index=frame.index[1:], columns=frame.columns)
+
+
+# ── Kernel por bloques ────────────────────────────────────────────────────────
+
+def correlation_blocks(rets: np.ndarray, min_periods: int = MIN_PERIODS,
+                       max_cells: int = _MAX_CELLS, rows: tuple | None = None):
+    """Genera (inicio, bloque) con las filas [inicio, inicio+b) de la matriz de
+    correlación pairwise-complete de `rets` (T × N, NaN = sin dato).
+    `rows` = (desde, hasta): solo esas filas (todas, por defecto).
+
+    Cada columna se centra antes por su propia media: las sumas de cada par
+    quedan chicas y la resta Σxy − ΣxΣy/n no pierde dígitos.
+    """
+    t, n = rets.shape
+    mask = np.isfinite(rets)
+    m = mask.astype(float)
+    cnt = m.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(cnt > 0, np.nansum(rets, axis=0) / np.maximum(cnt, 1), 0.0)
+    x = np.where(mask, rets - mean, 0.0)
+    x2 = x * x
+    amp = np.nanmax(np.abs(np.where(mask, rets, np.nan)), axis=0, initial=0.0) \
+        if n else np.zeros(0)
+    floor = (_VAR_EPS * amp) ** 2           # varianza "cero" por observación
+
+    r0, r1 = rows if rows is not None else (0, n)
+    bs = max(1, min(n, max_cells // max(n, 1)))
+    for s0 in range(r0, r1, bs):
+        sl = slice(s0, min(s0 + bs, r1))
+        mi, xi, x2i = m[:, sl], x[:, sl], x2[:, sl]
+        cnt_ij = mi.T @ m
+        sx = xi.T @ m
+        sy = mi.T @ x
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vx = x2i.T @ m - sx * sx / cnt_ij
+            vy = mi.T @ x2 - sy * sy / cnt_ij
+            cov = xi.T @ x - sx * sy / cnt_ij
+            ok = ((cnt_ij >= min_periods)
+                  & (vx > cnt_ij * floor[sl, None])
+                  & (vy > cnt_ij * floor[None, :]))
+            corr = np.where(ok, cov / np.sqrt(np.where(ok, vx * vy, 1.0)), np.nan)
+        np.clip(corr, -1.0, 1.0, out=corr)
+        yield s0, corr
+
+
+def compute_matrix(rets: pd.DataFrame, min_periods: int = MIN_PERIODS) -> CorrelationMatrix:
+    t0 = time.perf_counter()
+    values = rets.to_numpy(dtype=float)
+    n = values.shape[1]
+    out = np.full((n, n), np.nan, dtype=np.float32)
+    for s0, block in correlation_blocks(values, min_periods):
+        out[s0:s0 + len(block)] = block
+    valid = np.isfinite(np.diagonal(out))
+    np.fill_diagonal(out, np.where(valid, 1.0, np.nan))
+    return CorrelationMatrix(list(rets.columns), out, len(rets), min_periods,
+                             seconds=time.perf_counter() - t0)
+
+
+def _cached(key, mark, build):
+    """La entrada `key` del caché si su marca de agua sigue siendo `mark`; si
+    no, `build()` y se guarda (LRU)."""
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None and _same_mark(hit[0], mark):
+            _cache.move_to_end(key)
+            return hit[1]
+    value = build()
+    with _cache_lock:
+        _cache[key] = (mark, value)
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
+
+
+def get_matrix(asset_ids, date_from=None, date_to=None,
+               min_periods: int = MIN_PERIODS) -> CorrelationMatrix:
+    """La matriz del universo en la ventana, desde el caché si la marca de agua
+    de los precios no cambió. ValueError con más de _MAX_MATRIX_ASSETS
+    activos (para un activo solo, `neighbours` no arma la matriz)."""
+    s = get_session()
+    ids = sorted(set(asset_ids))
+    if len(ids) > _MAX_MATRIX_ASSETS:
+        raise ValueError(f"Universo demasiado grande para la matriz completa: "
+                         f"{len(ids)} activos (máximo {_MAX_MATRIX_ASSETS}).")
+
+    def _build():
+        matrix = compute_matrix(load_returns(s, ids, date_from, date_to),
+                                min_periods)
+        logger.info("Matriz de correlación: %d activos × %d fechas en %.2fs",
+                    len(matrix.asset_ids), matrix.n_dates, matrix.seconds)
+        return matrix
+
+    return _cached(("matrix", tuple(ids), date_from, date_to, min_periods),
+                   window_watermark(s, ids, date_from, date_to), _build)
+
+
+def get_returns(asset_ids, date_from=None, date_to=None) -> UniverseReturns:
+    """Los retornos del universo en la ventana, desde el caché si la marca de
+    agua de los precios no cambió."""
+    s = get_session()
+    ids = sorted(set(asset_ids))
+
+    def _build():
+        rets = load_returns(s, ids, date_from, date_to)
+        return UniverseReturns(list(rets.columns), rets.to_numpy(dtype=float))
+
+    return _cached(("returns", tuple(ids), date_from, date_to),
+                   window_watermark(s, ids, date_from, date_to), _build)
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+# ── Consultas ─────────────────────────────────────────────────────────────────
+
+def _top(row: np.ndarray, skip: int, k: int) -> list[int]:
+    """Índices de las k correlaciones más altas (sin NaN ni el propio)."""
+    vals = np.where(np.isfinite(row), row, -np.inf)
+    vals[skip] = -np.inf
+    k = min(k, int(np.isfinite(vals).sum()))
+    if k <= 0:
+        return []
+    idx = np.argpartition(-vals, k - 1)[:k]
+    return sorted(idx.tolist(), key=lambda j: (-vals[j], j))
+
+
+def top_neighbours(matrix: CorrelationMatrix, k: int = 10,
+                   shrinkage: float = 0.0) -> dict[int, list[tuple[int, float]]]:
+    """{asset_id: [(vecino, corr)]} con los k más correlacionados de CADA
+    activo del universo."""
+    out = {}
+    for aid, i in matrix.index.items():
+        row = matrix.row(aid, shrinkage)
+        out[aid] = [(matrix.asset_ids[j], float(row[j])) for j in _top(row, i, k)]
+    return out
+
+
+def neighbours(asset_id: int, scope: str = "sector", date_from=None,
+               date_to=None, k: int = 10, shrinkage: float = 0.0,
+               min_periods: int = MIN_PERIODS) -> list[dict]:
+    """Los k activos del universo más correlacionados con asset_id en la
+    ventana: [{asset_id, ticker, name, corr}], de mayor a menor. Solo la fila
+    del activo, sin la matriz N×N del universo."""
+    if date_to is None and date_from is None:
+        date_to = date.today()
+        date_from = date_to - timedelta(days=DEFAULT_WINDOW_DAYS)
+    ids = universe_ids(asset_id, scope)
+    if asset_id not in ids or len(ids) < 2:
+        return []
+    rets = get_returns(ids, date_from, date_to)
+    row = rets.row(asset_id, min_periods, shrinkage)
+    if row is None:
+        return []
+    top = [(rets.asset_ids[j], float(row[j]))
+           for j in _top(row, rets.index[asset_id], k)]
+    s = get_session()
+    info = {a.id: a for a in s.query(Asset).filter(
+        Asset.id.in_([aid for aid, _ in top])).all()} if top else {}
+    return [{"asset_id": aid, "ticker": info[aid].ticker if aid in info else str(aid),
+             "name": info[aid].name if aid in info else "", "corr": c}
+            for aid, c in top]
+
+
+def rolling_correlation(asset1_id: int, asset2_id: int, window: int = 60,
+                        date_from=None, date_to=None) -> pd.Series:
+    """Correlación móvil del par sobre las últimas `window` observaciones en
+    común (mismos retornos que la matriz). Vacía si no alcanzan."""
+    s = get_session()
+    rets = load_returns(s, [asset1_id, asset2_id], date_from, date_to)
+    if rets.shape[1] < 2:
+        return pd.Series(dtype=float)
+    both = rets.dropna()
+    if len(both) < window:
+        return pd.Series(dtype=float)
+    a, b = both[asset1_id], both[asset2_id]
+    return a.rolling(window).corr(b).dropna()
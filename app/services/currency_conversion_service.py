@@ -10,13 +10,26 @@ cuyo precio representa el activo valorizado en la moneda del divisor.
 """
 import logging
 
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+
 from app.database import get_session
-from app.models import Asset, SyntheticComponent, SyntheticFormula
+from app.models import Asset, Price, SyntheticComponent, SyntheticFormula
 from app.models.currency_conversion import CurrencyConversionDivisor
 from app.models.price_source import PriceSource
 
 logger = logging.getLogger(__name__)
 
+# Activos base por tanda en el modo bulk de sync_all: una query de precios por
+# tanda (la matriz fechas × bases) y un commit por tanda. Acota la memoria de la
+# matriz a ~_SYNC_CHUNK columnas × historia, y da el grano del progreso.
+_SYNC_CHUNK = 200
+
+# Tamaño de las listas IN al resolver ids recién insertados (mismo criterio que
+# los prefetch chuncados de technical_service)
+_IN_CHUNK = 1000
+
 
 # ── helpers internos ──────────────────────────────────────────────────────────
 
@@ -294,11 +307,20 @@ def sync_for_asset(asset_id: int) -> dict:
     return {"created": created, "already_existed": already_existed, "errors": errors}
 
 
-def sync_all(progress_cb=None) -> dict:
+def sync_all(progress_cb=None, *, bulk: bool = True) -> dict:
     """
     Para cada par (moneda, divisor) × cada activo en esa moneda: garantiza que
     existe el sintético y calcula sus precios si fue recién creado.
+
+    bulk=True (default) va por _sync_all_bulk: altas en UNA transacción,
+    precios de todas las bases ÷ divisor por matriz y un solo delta de
+    indicadores al final. bulk=False es el camino par por par de siempre
+    (ORM + compute_synthetic_prices por sintético); queda como referencia y
+    para diagnosticar un par puntual.
     """
+    if bulk:
+        return _sync_all_bulk(progress_cb)
+
     from app.services.synthetic_service import _load_price_frame, compute_synthetic_prices
 
     all_divisors = get_divisors()
@@ -359,3 +381,296 @@ def sync_all(progress_cb=None) -> dict:
         "computed":        computed,
         "errors":          errors,
     }
+
+
+# ── sincronización en bloque ──────────────────────────────────────────────────
+
+def _pending_pairs(cal_id: int) -> tuple[list, list]:
+    """(pares faltantes, pares existentes) de todas las monedas configuradas.
+    Cada par es (base, divisor). La existencia se resuelve con queries IN por
+    lotes sobre los tickers esperados, no con un SELECT por par."""
+    by_currency: dict = {}
+    for d in get_divisors():
+        by_currency.setdefault(d.currency_id, []).append(d)
+
+    pairs = []
+    for currency_id, divisors in by_currency.items():
+        for base in get_base_assets_for_currency(currency_id, cal_id=cal_id):
+            for div in divisors:
+                if base.id != div.divisor_asset_id:
+                    pairs.append((base, div))
+
+    s = get_session()
+    tickers = [_syn_ticker(b.ticker, d.divisor_asset.ticker) for b, d in pairs]
+    existing: set[str] = set()
+    for i in range(0, len(tickers), _IN_CHUNK):
+        existing.update(r[0] for r in s.query(Asset.ticker)
+                        .filter(Asset.ticker.in_(tickers[i:i + _IN_CHUNK])).all())
+    missing = [p for p, tk in zip(pairs, tickers) if tk not in existing]
+    present = [p for p, tk in zip(pairs, tickers) if tk in existing]
+    return missing, present
+
+
+def _create_synthetics_bulk(s, pairs: list, cal_id: int
+                            ) -> tuple[list[tuple[int, int, int, str]], list[dict]]:
+    """Da de alta Asset + SyntheticFormula + los dos SyntheticComponent de cada
+    par: por tandas de _IN_CHUNK pares, tres INSERT multi-fila (uno por tabla)
+    en un savepoint, y las ids recién creadas se resuelven por ticker/asset_id
+    con IN — portable a los tres motores, sin depender de RETURNING. Si una
+    tanda falla (un ticker dado de alta por otro proceso, un valor inválido)
+    se reintenta par por par, cada uno en su savepoint: el par culpable queda
+    como error y el resto entra, igual que import_service._insert_assets. Un
+    solo commit al final.
+
+    Devuelve ([(syn_id, base_id, divisor_asset_id, ticker)] de los creados en
+    el orden de pairs, [{"ticker", "error"}] de los que no entraron)."""
+    if not pairs:
+        return [], []
+    items = []
+    for base, div in pairs:
+        div_asset = div.divisor_asset
+        items.append((base, div, {
+            "ticker":             _syn_ticker(base.ticker, div_asset.ticker),
+            "name":               _syn_name(base.name or base.ticker, div_asset.ticker),
+            "price_source_id":    cal_id,
+            "country_id":         base.country_id,
+            "market_id":          base.market_id,
+            "instrument_type_id": base.instrument_type_id,
+            "currency_id":        div_asset.currency_id,
+            "sector_id":          base.sector_id,
+            "industry_id":        base.industry_id,
+            "benchmark_id":       None,
+        }))
+
+    created: list[tuple[int, int, int, str]] = []
+    errors:  list[dict] = []
+    try:
+        for i in range(0, len(items), _IN_CHUNK):
+            chunk = items[i:i + _IN_CHUNK]
+            try:
+                with s.begin_nested():
+                    created.extend(_insert_synthetics(s, chunk))
+                continue
+            except Exception as exc:
+                logger.warning("Alta en bloque de %d sintéticos falló (%s): se "
+                               "reintenta par por par", len(chunk), exc)
+            for item in chunk:
+                try:
+                    with s.begin_nested():
+                        created.extend(_insert_synthetics(s, [item]))
+                except Exception as exc:
+                    ticker = item[2]["ticker"]
+                    logger.warning("Error creando sintético %s: %s", ticker, exc)
+                    errors.append({"ticker": ticker, "error": str(exc)})
+        s.commit()
+    except Exception:
+        s.rollback()
+        raise
+
+    logger.info("Sintéticos de conversión creados en bloque: %d", len(created))
+    return created, errors
+
+
+def _insert_synthetics(s, items: list) -> list[tuple[int, int, int, str]]:
+    """Los tres INSERT de _create_synthetics_bulk para `items` [(base, div,
+    fila de Asset)], sin commit."""
+    tickers = [row["ticker"] for _, _, row in items]
+    s.execute(insert(Asset), [row for _, _, row in items])
+    id_by_ticker: dict[str, int] = dict(
+        (tk, aid) for aid, tk in s.query(Asset.id, Asset.ticker)
+        .filter(Asset.ticker.in_(tickers)).all())
+    syn_ids = [id_by_ticker[tk] for tk in tickers]
+
+    s.execute(insert(SyntheticFormula),
+              [{"asset_id": sid, "formula_type": "ratio"} for sid in syn_ids])
+    formula_by_asset: dict[int, int] = dict(
+        (aid, fid) for fid, aid in
+        s.query(SyntheticFormula.id, SyntheticFormula.asset_id)
+        .filter(SyntheticFormula.asset_id.in_(syn_ids)).all())
+
+    comp_rows = []
+    for sid, (base, div, _row) in zip(syn_ids, items):
+        fid = formula_by_asset[sid]
+        comp_rows.append({"formula_id": fid, "asset_id": base.id,
+                          "role": "numerator", "weight": 1.0})
+        comp_rows.append({"formula_id": fid, "asset_id": div.divisor_asset_id,
+                          "role": "denominator", "weight": 1.0})
+    s.execute(insert(SyntheticComponent), comp_rows)
+    return [(sid, base.id, div.divisor_asset_id, tk)
+            for sid, (base, div, _row), tk in zip(syn_ids, items, tickers)]
+
+
+def _load_price_matrix(s, asset_ids: list[int]) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """(close, eff_open, presente) como matrices fechas × activo, en UNA query.
+    eff_open sigue la regla de synthetic_service._load_price_frame (open nulo
+    o cero → close de la misma fecha). `presente` marca las fechas con fila en
+    prices aunque close sea NULL: _common_index del camino escalar alinea por
+    el índice de fechas, no por el valor, y la matriz tiene que respetarlo."""
+    rows = (s.query(Price.asset_id, Price.date, Price.open, Price.close)
+             .filter(Price.asset_id.in_(asset_ids)).all())
+    if not rows:
+        empty = pd.DataFrame(columns=asset_ids, dtype=float)
+        return empty, empty, empty.astype(bool)
+    df = pd.DataFrame(rows, columns=["asset_id", "date", "open", "close"])
+    df["open"]     = df["open"].astype(float)
+    df["close"]    = df["close"].astype(float)
+    df["eff_open"] = df["open"].where(df["open"].notna() & (df["open"] != 0), df["close"])
+    df["present"]  = 1.0
+    wide = df.pivot(index="date", columns="asset_id",
+                    values=["close", "eff_open", "present"]).sort_index()
+    return wide["close"], wide["eff_open"], wide["present"].notna()
+
+
+def _ratio_matrix(close: pd.DataFrame, eff_open: pd.DataFrame, present: pd.DataFrame,
+                  divisor: pd.DataFrame) -> dict[int, tuple[list, np.ndarray, np.ndarray]]:
+    """base ÷ divisor para TODAS las columnas de la matriz de una vez.
+
+    Misma semántica que synthetic_service._compute_by_type para un ratio con
+    un numerador y un denominador de peso 1 (paridad en
+    tests/test_currency_conversion_bulk.py): fechas en común entre base y
+    divisor, se descartan las de close del divisor == 0 y el open cae al close
+    cuando el eff_open del divisor es 0.
+
+    divisor: frame de _load_price_frame (índice fecha, close/eff_open).
+    Devuelve {base_id: (fechas, open, close)} solo con las bases que tienen
+    al menos una fecha válida."""
+    if close.empty or divisor.empty:
+        return {}
+    idx     = close.index
+    den_c   = divisor["close"].reindex(idx).to_numpy(dtype=float)
+    den_o   = divisor["eff_open"].reindex(idx).to_numpy(dtype=float)
+    in_div  = idx.isin(divisor.index)
+    valid   = present.to_numpy() & (in_div & (den_c != 0))[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c = close.to_numpy(dtype=float) / den_c[:, None]
+        o = np.where((den_o != 0)[:, None],
+                     eff_open.to_numpy(dtype=float) / den_o[:, None], c)
+    dates = idx.tolist()
+    out = {}
+    for j, base_id in enumerate(close.columns):
+        rows = np.flatnonzero(valid[:, j])
+        if rows.size:
+            out[int(base_id)] = ([dates[i] for i in rows], o[rows, j], c[rows, j])
+    return out
+
+
+def _ratio_price_rows(syn_id: int, dates: list, open_: np.ndarray,
+                      close: np.ndarray) -> list[dict]:
+    """Filas de `prices` con el mismo redondeo y el mismo high/low que
+    synthetic_service._bulk_insert_synthetic_prices."""
+    high = np.maximum(open_, close)
+    low  = np.minimum(open_, close)
+    return [
+        {"asset_id": syn_id, "date": d,
+         "open":  round(float(open_[i]), 8), "high": round(float(high[i]), 8),
+         "low":   round(float(low[i]),   8), "close": round(float(close[i]), 8),
+         "volume": None}
+        for i, d in enumerate(dates)
+    ]
+
+
+def _compute_new_ratios(created: list[tuple[int, int, int, str]], divisor_frames: dict,
+                        progress_cb=None) -> tuple[list[int], list[dict]]:
+    """Precios de los sintéticos recién creados, por tandas de _SYNC_CHUNK
+    bases: una query para la matriz de la tanda, un cálculo matricial por
+    divisor y un único camino de escritura (_bulk_insert_price_rows) con las
+    filas de todos los sintéticos de la tanda mezcladas en los mismos lotes.
+    Commit por tanda: un fallo solo pierde esa tanda (se reporta cada ticker
+    como error) y las anteriores ya quedaron firmes.
+
+    Devuelve (ids de sintéticos con precios, errores)."""
+    from app.services.synthetic_service import _bulk_insert_price_rows
+
+    s = get_session()
+    by_base: dict[int, list[tuple[int, int, str]]] = {}
+    for syn_id, base_id, div_id, ticker in created:
+        by_base.setdefault(base_id, []).append((syn_id, div_id, ticker))
+    base_ids = list(by_base)
+    total    = len(created)
+    done     = 0
+    computed: list[int] = []
+    errors:   list[dict] = []
+    if progress_cb:
+        progress_cb(0, total)
+
+    for i in range(0, len(base_ids), _SYNC_CHUNK):
+        chunk  = base_ids[i:i + _SYNC_CHUNK]
+        n_syn  = sum(len(by_base[b]) for b in chunk)
+        ok_ids: list[int] = []
+        try:
+            close, eff_open, present = _load_price_matrix(s, chunk)
+            rows: list[dict] = []
+            for div_id in {d for b in chunk for _, d, _ in by_base[b]}:
+                series = _ratio_matrix(close, eff_open, present, divisor_frames[div_id])
+                for b in chunk:
+                    for syn_id, d, ticker in by_base[b]:
+                        if d != div_id:
+                            continue
+                        if b not in series:
+                            errors.append({"ticker": ticker,
+                                           "error": "sin fechas en común con el divisor"})
+                            continue
+                        rows.extend(_ratio_price_rows(syn_id, *series[b]))
+                        ok_ids.append(syn_id)
+            # sintéticos recién creados: las filas son su historia entera
+            _bulk_insert_price_rows(s, rows, complete=True)
+            s.commit()
+            computed.extend(ok_ids)
+        except Exception as exc:
+            s.rollback()
+            logger.warning("Error calculando la tanda de sintéticos %d-%d: %s",
+                           i, i + len(chunk), exc)
+            errors.extend({"ticker": tk, "error": str(exc)}
+                          for b in chunk for _, _, tk in by_base[b])
+        done += n_syn
+        if progress_cb:
+            progress_cb(done, total)
+    return computed, errors
+
+
+def _sync_all_bulk(progress_cb=None) -> dict:
+    """Modo bulk de sync_all. Tres fases:
+
+    1. Altas: todos los Asset/SyntheticFormula/SyntheticComponent faltantes en
+       una transacción, un par fallido no frena al resto
+       (_create_synthetics_bulk).
+    2. Precios: base ÷ divisor alineando la matriz de bases contra el frame
+       compartido de cada divisor (_compute_new_ratios), avance por tanda.
+    3. Indicadores: UN delta (update_indicator_history) acotado a los
+       sintéticos con precios nuevos — el camino par por par hacía current +
+       backfill por activo, que a miles de sintéticos era la mayor parte del
+       tiempo. Deja el indicator_update_log de cada uno, como aquél.
+
+    Mismo dict de resultado que el camino par por par."""
+    from app.services.synthetic_service import _load_price_frame
+
+    result = {"created": 0, "already_existed": 0, "computed": 0, "errors": []}
+    cal_id = _calculado_source_id()
+    if not cal_id:
+        return result
+
+    missing, present = _pending_pairs(cal_id)
+    result["already_existed"] = len(present)
+    if not missing:
+        return result
+
+    if progress_cb:
+        progress_cb(0, len(missing), "Creando sintéticos...")
+    s = get_session()
+    created, errors = _create_synthetics_bulk(s, missing, cal_id)
+    result["created"] = len(created)
+    result["errors"].extend(errors)
+
+    divisor_frames = {div_id: _load_price_frame(div_id, None)
+                      for div_id in {d for _, _, d, _ in created}}
+    computed, errors = _compute_new_ratios(created, divisor_frames, progress_cb)
+    result["computed"] = len(computed)
+    result["errors"].extend(errors)
+
+    if computed:
+        from app.services.technical_service import update_indicator_history
+        if progress_cb:
+            progress_cb(0, 1, "Precios de sintéticos listos. Calculando indicadores...")
+        ind = update_indicator_history(progress_cb=progress_cb, asset_ids=computed)
+        result["errors"].extend(ind.get("errors", []))
+    return result
@@ -10,10 +10,9 @@ from __future__ import annotations
 
 import datetime
 
-import sqlalchemy as sa
-
 from app.database import get_session
 from app.models.indicator_store import CurrentIndicatorValue, get_ind_table
+from app.services.asset_history_reader import read_asset_history
 
 # Tope defensivo de filas por consulta (las series históricas pueden ser largas)
 MAX_ROWS = 5000
@@ -44,20 +43,12 @@ def _fmt(v):
 
 def indicator_history(code: str, asset_id: int):
     """Serie histórica de un indicador para un activo, desde ind_{code}."""
-    s = get_session()
     tbl = get_ind_table(code)  # puede lanzar si la tabla no existe (indicador
                                # sin historia calculada) — lo maneja el callback
-    cols = [c for c in tbl.c if c.name != "asset_id"]
-    names = [c.name for c in cols]
-    rows = s.execute(
-        sa.select(*cols)
-        .where(tbl.c.asset_id == asset_id)
-        .where(tbl.c.value.isnot(None))  # tabla ancha: no mostrar filas donde
-                                         # esta columna es NULL (fila de un
-                                         # código hermano); no-op en per-código
-        .order_by(tbl.c.date)
-        .limit(MAX_ROWS)
-    ).all()
+    names = [tbl.c.date.name, tbl.c.value.name]
+    # series() ya saltea las fechas donde esta columna es NULL (fila de un
+    # código hermano en la tabla ancha)
+    rows = read_asset_history(asset_id, codes=(code,)).indicator(code)[:MAX_ROWS]
     records = [{n: _fmt(v) for n, v in zip(names, row)} for row in rows]
     return f"ind_{code}", names, records
 
@@ -102,31 +93,25 @@ def fundamentals(asset_id: int):
 # ── Scores (señales, grupos, estrategias) ─────────────────────────────────────
 
 def signal_asset(signal_id: int, asset_id: int):
-    import sqlalchemy as sa
     from app.models import signal_store
 
-    s = get_session()
-    t = signal_store.read_sig_table(s, signal_id)
-    rows = s.execute(
-        sa.select(t.c.date, t.c.score)
-        .where(t.c.asset_id == asset_id, t.c.score.isnot(None))
-        .order_by(t.c.date).limit(MAX_ROWS)).all()
-    return t.name, ["date", "score"], \
-        [{"date": str(d), "score": sc} for d, sc in rows]
+    rows = read_asset_history(asset_id, signals=(signal_id,)) \
+        .signal(signal_id)
+    table = (signal_store.SIG_WIDE_TABLE if signal_store.use_wide_signal_tables()
+             else signal_store.sig_table_name(signal_id))
+    return table, ["date", "score"], \
+        [{"date": str(d), "score": sc} for d, sc in rows[:MAX_ROWS]]
 
 
 def strategy_result(strategy_id: int, asset_id: int):
-    import sqlalchemy as sa
     from app.models import signal_store
 
-    s = get_session()
-    t = signal_store.read_strat_table(s, strategy_id)
-    rows = s.execute(
-        sa.select(t.c.date, t.c.score)
-        .where(t.c.asset_id == asset_id, t.c.score.isnot(None))
-        .order_by(t.c.date).limit(MAX_ROWS)).all()
-    return t.name, ["date", "score"], \
-        [{"date": str(d), "score": sc} for d, sc in rows]
+    rows = read_asset_history(asset_id, strategies=(strategy_id,)) \
+        .strategy(strategy_id)
+    table = (signal_store.STRAT_WIDE_TABLE if signal_store.use_wide_signal_tables()
+             else signal_store.strat_table_name(strategy_id))
+    return table, ["date", "score"], \
+        [{"date": str(d), "score": sc} for d, sc in rows[:MAX_ROWS]]
 
 
 # ── Despacho ──────────────────────────────────────────────────────────────────
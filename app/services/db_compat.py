@@ -13,6 +13,7 @@ un stub sqlite); su rama replica la semántica, no la performance. PG nunca
 debe caer al camino de sqlite: es un motor de producción, con rama propia.
 """
 import sqlalchemy as sa
+from sqlalchemy.orm import Session
 from sqlalchemy.dialects.mysql import insert as _mysql_insert
 from sqlalchemy.dialects.postgresql import insert as _pg_insert
 from sqlalchemy.dialects.sqlite import insert as _sqlite_insert
@@ -250,8 +251,11 @@ def list_tables_by_prefix(bind, *prefixes: str) -> list[str]:
     vía inspector de SQLAlchemy — portable, reemplaza los SELECT a
     information_schema con DATABASE() (MySQL-only)."""
     insp = sa.inspect(_bind(bind))
+    # Las particiones anuales (ind_daily_y2024, …) no son tablas propias: se
+    # vacían, compactan y purgan a través de la madre.
+    children = partition_children(bind)
     return sorted(n for n in insp.get_table_names()
-                  if any(n.startswith(p) for p in prefixes))
+                  if any(n.startswith(p) for p in prefixes) and n not in children)
 
 
 def approx_table_rows(session, prefix: str) -> dict[str, int]:
@@ -296,3 +300,217 @@ def table_write_stats(session) -> dict[str, tuple[int, int, int]] | None:
         " FROM pg_stat_user_tables")).fetchall()
     return {r[0]: (int(r[1] or 0), int(r[2] or 0), int(r[3] or 0))
             for r in rows}
+
+
+# ── Particiones por año (solo PostgreSQL) ─────────────────────────────────────
+# Opcional (WIDE_TABLE_PARTITIONS=1, ver migración 0102): las tablas anchas
+# ind_daily / signal_values_wide / strategy_results_wide pasan a ser tablas
+# particionadas por RANGE (date) con una partición por año `{tabla}_y{año}` y
+# una DEFAULT `{tabla}_ydefault` que atrapa cualquier fecha sin partición propia
+# (nunca falla un INSERT). MySQL/MariaDB y sqlite conservan la tabla única:
+# todas estas funciones son no-op fuera de PG o sobre una tabla no particionada.
+
+PARTITION_DEFAULT_SUFFIX = "_ydefault"
+
+
+def use_wide_partitions() -> bool:
+    """Flag de instalación: crear/convertir las anchas como particionadas."""
+    import os
+    return os.environ.get("WIDE_TABLE_PARTITIONS", "0").strip().lower() in (
+        "1", "true", "yes", "on")
+
+
+def year_partition_name(table: str, year: int) -> str:
+    return f"{table}_y{year}"
+
+
+def is_partitioned(conn, table: str) -> bool:
+    if not is_postgres(conn):
+        return False
+    return conn.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table p"
+        " JOIN pg_class c ON c.oid = p.partrelid"
+        " JOIN pg_namespace n ON n.oid = c.relnamespace"
+        " WHERE n.nspname = current_schema() AND c.relname = :t"),
+        {"t": table}).first() is not None
+
+
+def partition_children(conn) -> set[str]:
+    """Nombres de todas las particiones del esquema (vacío fuera de PG). Los
+    listados por prefijo las excluyen: se llega a ellas por la tabla madre."""
+    if not is_postgres(conn):
+        return set()
+    if isinstance(conn, sa.engine.Engine):
+        with conn.connect() as c:
+            return partition_children(c)
+    rows = conn.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i"
+        " JOIN pg_class c ON c.oid = i.inhrelid"
+        " JOIN pg_class p ON p.oid = i.inhparent"
+        " JOIN pg_namespace n ON n.oid = p.relnamespace"
+        " WHERE n.nspname = current_schema() AND p.relkind = 'p'")).fetchall()
+    return {r[0] for r in rows}
+
+
+def year_partitions(conn, table: str) -> dict:
+    """{año: partición} de una tabla particionada, con None → la DEFAULT."""
+    if not is_partitioned(conn, table):
+        return {}
+    rows = conn.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i"
+        " JOIN pg_class c ON c.oid = i.inhrelid"
+        " JOIN pg_class p ON p.oid = i.inhparent"
+        " JOIN pg_namespace n ON n.oid = p.relnamespace"
+        " WHERE n.nspname = current_schema() AND p.relname = :t"),
+        {"t": table}).fetchall()
+    out: dict = {}
+    for (name,) in rows:
+        suffix = name[len(table):]
+        if suffix == PARTITION_DEFAULT_SUFFIX:
+            out[None] = name
+        elif suffix.startswith("_y") and suffix[2:].isdigit():
+            out[int(suffix[2:])] = name
+    return out
+
+
+def _year_bounds(year: int) -> tuple[str, str]:
+    return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+
+
+def ensure_year_partitions(conn, table: str, years) -> list[int]:
+    """Crea las particiones anuales que falten. Si la DEFAULT ya guarda filas de
+    ese año (llegaron antes que la partición), se desengancha, se crea la
+    partición, se mudan las filas y se vuelve a enganchar — PostgreSQL no deja
+    crear una partición cuyo rango tiene filas en la DEFAULT. Devuelve los años
+    creados. No-op si la tabla no está particionada."""
+    parts = year_partitions(conn, table)
+    if not parts and not is_partitioned(conn, table):
+        return []
+    q = quote_ident(conn, table)
+    default = parts.get(None)
+    created = []
+    for year in sorted({int(y) for y in years} - set(parts)):
+        lo, hi = _year_bounds(year)
+        name = quote_ident(conn, year_partition_name(table, year))
+        moved = default is not None and conn.execute(sa.text(
+            f"SELECT 1 FROM {quote_ident(conn, default)}"
+            f" WHERE date >= '{lo}' AND date < '{hi}' LIMIT 1")).first()
+        if moved:
+            qd = quote_ident(conn, default)
+            conn.execute(sa.text(f"ALTER TABLE {q} DETACH PARTITION {qd}"))
+        conn.execute(sa.text(
+            f"CREATE TABLE {name} PARTITION OF {q}"
+            f" FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+        if moved:
+            conn.execute(sa.text(
+                f"INSERT INTO {q} SELECT * FROM {qd}"
+                f" WHERE date >= '{lo}' AND date < '{hi}'"))
+            conn.execute(sa.text(
+                f"DELETE FROM {qd} WHERE date >= '{lo}' AND date < '{hi}'"))
+            conn.execute(sa.text(f"ALTER TABLE {q} ATTACH PARTITION {qd} DEFAULT"))
+        created.append(year)
+    return created
+
+
+def maintain_year_partitions(conn, table: str) -> list[int]:
+    """Particiones del año en curso y del siguiente, más las de los años que
+    hayan caído en la DEFAULT (historia vieja de un activo nuevo, p.ej.). Se
+    llama en el arranque y antes de cada corrida que escribe la tabla."""
+    parts = year_partitions(conn, table)
+    if not parts:
+        return []
+    from datetime import date as _date
+    this_year = _date.today().year
+    years = {this_year, this_year + 1}
+    if None in parts:
+        rows = conn.execute(sa.text(
+            "SELECT DISTINCT CAST(EXTRACT(YEAR FROM date) AS INTEGER)"
+            f" FROM {quote_ident(conn, parts[None])}")).fetchall()
+        years |= {int(r[0]) for r in rows}
+    return ensure_year_partitions(conn, table, years)
+
+
+def partition_by_year(conn, table: str) -> bool:
+    """Convierte `table` en particionada por año (misma lógica que la migración
+    0102): tabla nueva LIKE la vieja PARTITION BY RANGE (date), una partición
+    por año desde el primero con datos hasta el siguiente al actual más la
+    DEFAULT, copia, DROP de la vieja y RENAME, conservando PK, FKs e índices
+    con sus nombres.
+    Con la tabla vacía (base nueva) es instantáneo; con historia reescribe la
+    tabla entera: correrlo con el pipeline detenido. False si no aplica (otro
+    motor o ya particionada)."""
+    if not is_postgres(conn) or is_partitioned(conn, table):
+        return False
+    from datetime import date as _date
+
+    # Session → su Connection: el inspector tiene que ver la MISMA transacción
+    insp = sa.inspect(conn.connection() if isinstance(conn, Session) else conn)
+    pk = insp.get_pk_constraint(table)
+    fks = insp.get_foreign_keys(table)
+    indexes = insp.get_indexes(table)
+    q, tmp = quote_ident(conn, table), quote_ident(conn, f"{table}__part")
+    lo, hi = conn.execute(sa.text(
+        f"SELECT MIN(date), MAX(date) FROM {q}")).one()
+    this_year = _date.today().year
+    years = range(min(lo.year if lo else this_year, this_year),
+                  max(hi.year if hi else this_year, this_year + 1) + 1)
+
+    conn.execute(sa.text(
+        f"CREATE TABLE {tmp} (LIKE {q} INCLUDING DEFAULTS INCLUDING CONSTRAINTS"
+        f" INCLUDING STORAGE) PARTITION BY RANGE (date)"))
+    for year in sorted(years):
+        a, b = _year_bounds(year)
+        conn.execute(sa.text(
+            f"CREATE TABLE {quote_ident(conn, year_partition_name(table, year))}"
+            f" PARTITION OF {tmp} FOR VALUES FROM ('{a}') TO ('{b}')"))
+    conn.execute(sa.text(
+        f"CREATE TABLE {quote_ident(conn, table + PARTITION_DEFAULT_SUFFIX)}"
+        f" PARTITION OF {tmp} DEFAULT"))
+    conn.execute(sa.text(f"INSERT INTO {tmp} SELECT * FROM {q}"))
+    conn.execute(sa.text(f"DROP TABLE {q}"))
+    conn.execute(sa.text(f"ALTER TABLE {tmp} RENAME TO {q}"))
+
+    cols = ", ".join(quote_ident(conn, c) for c in pk["constrained_columns"])
+    pk_name = quote_ident(conn, pk.get("name") or f"{table}_pkey")
+    conn.execute(sa.text(
+        f"ALTER TABLE {q} ADD CONSTRAINT {pk_name} PRIMARY KEY ({cols})"))
+    for fk in fks:
+        src = ", ".join(quote_ident(conn, c) for c in fk["constrained_columns"])
+        dst = ", ".join(quote_ident(conn, c) for c in fk["referred_columns"])
+        ondelete = (fk.get("options") or {}).get("ondelete")
+        conn.execute(sa.text(
+            f"ALTER TABLE {q} ADD CONSTRAINT {quote_ident(conn, fk['name'])}"
+            f" FOREIGN KEY ({src})"
+            f" REFERENCES {quote_ident(conn, fk['referred_table'])} ({dst})"
+            + (f" ON DELETE {ondelete}" if ondelete else "")))
+    for ix in indexes:
+        icols = ", ".join(quote_ident(conn, c) for c in ix["column_names"])
+        conn.execute(sa.text(
+            f"CREATE {'UNIQUE ' if ix.get('unique') else ''}INDEX"
+            f" {quote_ident(conn, ix['name'])} ON {q} ({icols})"))
+    return True
+
+
+def truncate_covered_partitions(conn, table: str, d0, d1) -> list[str]:
+    """TRUNCATE de las particiones de `table` cuyas filas caen TODAS dentro de
+    [d0, d1] (fechas ISO o date): para un rebuild con horizonte que reescribe
+    la fila entera, vaciar la partición es instantáneo y no deja tuplas
+    muertas, a diferencia del UPDATE ... SET col = NULL por ventanas. Una
+    partición con alguna fila fuera del rango no se toca (la resuelve el
+    caller por filas). Devuelve las particiones vaciadas."""
+    done = []
+    for year, name in sorted(year_partitions(conn, table).items(),
+                             key=lambda kv: (kv[0] is None, kv[0] or 0)):
+        qp = quote_ident(conn, name)
+        if year is not None:
+            lo, hi = _year_bounds(year)
+            if str(hi) <= str(d0) or str(lo) > str(d1):
+                continue                    # la partición no toca el rango
+        outside = conn.execute(sa.text(
+            f"SELECT 1 FROM {qp} WHERE date < '{d0}' OR date > '{d1}'"
+            " LIMIT 1")).first()
+        if outside is not None:
+            continue
+        conn.execute(sa.text(f"TRUNCATE TABLE {qp}"))
+        done.append(name)
+    return done
@@ -0,0 +1,176 @@
+"""
+Kernel vectorizado de drawdowns: la serie underwater y los EPISODIOS
+(pico → valle → recuperación) de muchas series a la vez.
+
+Lógica pura (sin BD, sin Dash). Un episodio es la racha máxima de barras por
+debajo del máximo acumulado: empieza en la primera barra que cae bajo el pico
+y termina en la primera que lo iguala o supera (la recuperación), o sigue
+abierto al final de la serie. Es la regla del loop histórico de
+technical_service._compute_dd_events, pero sin recorrer barra por barra:
+
+- el pico sale de UN máximo acumulado (np.fmax.accumulate) por fila;
+- las rachas, de los flancos de la máscara "por debajo del pico" (np.diff);
+- el valle de cada racha, de una reducción por segmentos (np.minimum.reduceat)
+  sobre la matriz aplanada: las rachas de distintas filas nunca se tocan.
+
+Las series van apiladas en una matriz (series × barras) rellenada con NaN a
+la derecha (`stack`); un NaN intermedio (feriado sin cierre) se trata como
+"sin cambio", igual que arrastrar el último cierre. Un pico <= 0 no define
+drawdown (misma guarda que el loop histórico de
+portfolio_metrics.drawdown_series).
+
+Lo usan el overlay de drawdowns del gráfico y drawdown_max1/2/3
+(technical_service) y las métricas de cartera (portfolio_metrics,
+portfolio_metrics_matrix). Paridad con los loops anteriores fijada en
+tests/test_drawdown_kernel.py, que los guarda como oráculo.
+"""
+import numpy as np
+
+# Tope de celdas (series × barras) por sub-lote en worst_batch: ~32 MB por
+# matriz intermedia de float64.
+_MAX_CELLS = 4_000_000
+
+_FIELDS = ("series", "peak", "start", "trough", "recovery", "depth", "duration")
+
+
+def stack(series) -> np.ndarray:
+    """Lista de arrays 1-D → matriz (len(series), máx largo) con NaN a la
+    derecha."""
+    width = max((len(s) for s in series), default=0)
+    X = np.full((len(series), width), np.nan)
+    for i, s in enumerate(series):
+        X[i, :len(s)] = s
+    return X
+
+
+def _as_matrix(X) -> np.ndarray:
+    X = np.asarray(X, dtype=float)
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+
+def underwater(X) -> np.ndarray:
+    """valor/máximo_acumulado − 1 en cada barra (<= 0); 0 si el pico no es
+    positivo y NaN donde la serie es NaN. Misma forma que la entrada."""
+    X = np.asarray(X, dtype=float)
+    peak = np.fmax.accumulate(X, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dd = np.where(peak > 0, X / peak - 1, 0.0)
+    return np.where(np.isnan(X), np.nan, dd)
+
+
+def _ffill(X: np.ndarray) -> np.ndarray:
+    """Arrastra el último valor sobre los NaN (los iniciales quedan NaN)."""
+    idx = np.where(~np.isnan(X), np.arange(X.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return np.take_along_axis(X, idx, axis=1)
+
+
+def _empty() -> dict:
+    ints = np.zeros(0, dtype=np.int64)
+    return {"series": ints, "peak": ints, "start": ints, "trough": ints,
+            "recovery": ints, "depth": np.zeros(0), "duration": ints}
+
+
+def episodes(X, min_depth: float = 0.0) -> dict:
+    """Tabla de episodios de drawdown de cada fila de X, como columnas numpy
+    ordenadas por (series, start):
+
+    - series:   fila de X.
+    - peak:     primera barra en que se alcanzó el pico del episodio.
+    - start:    primera barra por debajo del pico.
+    - trough:   barra del valle (la primera, si el mínimo se repite).
+    - recovery: primera barra que iguala o supera el pico; -1 si sigue abierto.
+    - depth:    (valle − pico) / pico, <= 0.
+    - duration: barras de pico a recuperación (a la última barra, si abierto).
+
+    `min_depth` (fracción positiva, 0.2 = 20%) descarta los episodios menos
+    profundos.
+    """
+    X = _as_matrix(X)
+    k, m = X.shape
+    if not k or not m:
+        return _empty()
+    F = _ffill(X)
+    peak = np.fmax.accumulate(F, axis=1)
+    with np.errstate(invalid="ignore"):
+        below = (F < peak) & (peak > 0)
+
+    edges = np.zeros((k, m + 2), dtype=np.int8)
+    edges[:, 1:m + 1] = below
+    d = np.diff(edges, axis=1)
+    rows, start = np.nonzero(d == 1)
+    _r, end = np.nonzero(d == -1)            # exclusivo; == m si sigue abierto
+    if not len(rows):
+        return _empty()
+
+    # Valle: mínimo por segmento sobre la matriz aplanada. Las rachas de una
+    # fila arrancan después de la barra 0 (la primera nunca está bajo su
+    # propio pico), así que los límites [start, end) quedan estrictamente
+    # crecientes también entre filas; el centinela cubre el end == k·m final.
+    flat = np.append(F.ravel(), np.inf)
+    f_start, f_end = rows * m + start, rows * m + end
+    bounds = np.empty(2 * len(rows), dtype=np.int64)
+    bounds[0::2], bounds[1::2] = f_start, f_end
+    mins = np.minimum.reduceat(flat, bounds)[0::2]
+    lengths = end - start
+    seg = np.repeat(np.arange(len(rows)), lengths)
+    pos = np.repeat(f_start - np.cumsum(np.r_[0, lengths[:-1]]), lengths) \
+        + np.arange(lengths.sum())
+    hit = flat[pos] == mins[seg]
+    _u, first = np.unique(seg[hit], return_index=True)
+    trough = pos[hit][first] - rows * m
+
+    # Primera barra en que el máximo acumulado llegó al valor del pico.
+    rose = np.ones((k, m), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        rose[:, 1:] = (peak[:, 1:] > peak[:, :-1]) | (
+            np.isnan(peak[:, :-1]) & ~np.isnan(peak[:, 1:]))
+    since = np.where(rose, np.arange(m), 0)
+    np.maximum.accumulate(since, axis=1, out=since)
+    peak_idx = since[rows, start]
+
+    ath = peak[rows, start]
+    depth = (F[rows, trough] - ath) / ath
+    valid = ~np.isnan(X)
+    last = m - 1 - np.argmax(valid[:, ::-1], axis=1)
+    recovery = np.where(end < m, end, -1)
+    duration = np.where(end < m, end, last[rows]) - peak_idx
+
+    keep = depth <= -min_depth if min_depth > 0 else slice(None)
+    cols = (rows, peak_idx, start, trough, recovery, depth, duration)
+    return {f: np.asarray(c)[keep] for f, c in zip(_FIELDS, cols)}
+
+
+def worst(X, n: int = 3) -> np.ndarray:
+    """(series, n): las `n` profundidades más hondas de cada fila, de la peor
+    a la menos mala, UNA por episodio; NaN donde la fila tiene menos."""
+    X = _as_matrix(X)
+    out = np.full((len(X), n), np.nan)
+    ep = episodes(X)
+    if not len(ep["series"]):
+        return out
+    order = np.lexsort((ep["depth"], ep["series"]))
+    rows, depth = ep["series"][order], ep["depth"][order]
+    first = np.searchsorted(rows, rows, side="left")
+    rank = np.arange(len(rows)) - first
+    sel = rank < n
+    out[rows[sel], rank[sel]] = depth[sel]
+    return out
+
+
+def worst_batch(series, n: int = 3) -> list[np.ndarray]:
+    """`worst` de una lista de series de largos distintos, apiladas por
+    sub-lotes de a lo sumo _MAX_CELLS celdas. Una fila (n,) por serie."""
+    out: list = []
+    i = 0
+    while i < len(series):
+        width = len(series[i])
+        j = i + 1
+        while j < len(series):
+            w = max(width, len(series[j]))
+            if w * (j + 1 - i) > _MAX_CELLS:
+                break
+            width, j = w, j + 1
+        out.extend(worst(stack(series[i:j]), n))
+        i = j
+    return out
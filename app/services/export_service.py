@@ -0,0 +1,309 @@
+"""
+Exportaciones grandes (CSV / XLSX) servidas por streaming.
+
+Las descargas de Dash (`dcc.send_string` / `send_bytes`) viajan DENTRO de la
+respuesta del callback: el archivo entero se arma en memoria, se codifica en
+base64 y pasa por el JSON del callback. Para un `SELECT *` de la consola SQL
+sobre una tabla grande eso agota el worker web mucho antes de llegar al
+navegador.
+
+Acá el callback solo REGISTRA la exportación (`register`: de dónde salen las
+filas, formato, nombre, usuario) y le devuelve al navegador una URL de un solo
+uso, `/export/<token>` (la ruta Flask está en app/web.py). Esa ruta abre las
+filas recién ahí y las manda por partes:
+
+- **CSV**: se genera de a `CHUNK` filas directo sobre la respuesta — con un
+  cursor del lado del servidor (`stream_results` / `yield_per`) la base
+  tampoco materializa el resultado en el proceso.
+- **XLSX**: openpyxl en modo write-only (las filas van a disco a medida que
+  llegan, sin el árbol de celdas en memoria) sobre un archivo temporal, que
+  se sirve por partes y se borra al terminar.
+- **Segundo plano** (`background=True`): el mismo archivo se escribe en un
+  thread mientras la pantalla consulta `status`; la URL sirve el archivo
+  terminado. Para resultados que tardan más que un request razonable.
+
+Tope: `MAX_ROWS` filas por exportación salvo que el llamador pase
+`max_rows=None` explícitamente (la casilla «Sin tope» de la consola). El
+estado vive en memoria del proceso, como las sesiones de la consola SQL: los
+tokens vencen a los `_TTL_MIN` minutos y con ellos sus archivos.
+"""
+import csv
+import io
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as _time, timedelta
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+MAX_ROWS = 1_000_000         # tope por defecto de una exportación
+CHUNK = 5_000                # filas por vuelta del cursor / bloque de CSV
+FORMATS = {
+    "csv":  ("text/csv; charset=utf-8", ".csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+             ".xlsx"),
+}
+
+_TTL_MIN = 30
+_lock = threading.Lock()
+_jobs: dict[str, "ExportJob"] = {}
+
+
+@dataclass
+class ExportJob:
+    token: str
+    user_id: int | None
+    source: object                   # () -> context manager de (cols, filas)
+    fmt: str
+    filename: str
+    max_rows: int | None
+    background: bool = False
+    sheet: str = "Datos"             # hoja del XLSX
+    state: str = "pending"           # pending | running | done | error
+    rows: int = 0
+    truncated: bool = False
+    error: str | None = None
+    path: str | None = None
+    created: datetime = field(default_factory=datetime.utcnow)
+
+
+# ── Fuentes de filas ──────────────────────────────────────────────────────────
+
+def sql_source(sql: str, params: dict | None = None, chunk: int = CHUNK):
+    """Fuente de una consulta de lectura, en una conexión PROPIA con cursor
+    del lado del servidor (PG: cursor con nombre; MySQL: SSCursor)."""
+    from sqlalchemy import text
+
+    @contextmanager
+    def _open():
+        from app.database import engine
+        with engine.connect() as conn:
+            result = (conn.execution_options(stream_results=True,
+                                             yield_per=chunk)
+                      .execute(text(sql), params or {}))
+            try:
+                yield list(result.keys()), _batched(result, chunk)
+            finally:
+                result.close()
+                conn.rollback()
+    return _open
+
+
+def rows_source(columns, rows):
+    """Fuente de filas ya calculadas (iterable de secuencias)."""
+    @contextmanager
+    def _open():
+        yield list(columns), iter(rows)
+    return _open
+
+
+def _batched(result, chunk):
+    while True:
+        batch = result.fetchmany(chunk)
+        if not batch:
+            return
+        yield from batch
+
+
+def _capped(job, rows):
+    """Las filas hasta el tope; marca `truncated` si quedaron afuera."""
+    for row in rows:
+        if job.max_rows is not None and job.rows >= job.max_rows:
+            job.truncated = True
+            return
+        job.rows += 1
+        yield row
+
+
+# ── Escritura ─────────────────────────────────────────────────────────────────
+
+def _csv_text(v):
+    return "" if v is None else str(v)
+
+
+def csv_chunks(columns, rows, chunk: int = CHUNK):
+    """El CSV por bloques de `chunk` filas (str). Comillas solo donde hacen
+    falta; None → vacío."""
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(columns)
+    n = 0
+    for row in rows:
+        w.writerow([_csv_text(v) for v in row])
+        n += 1
+        if n % chunk == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def _xlsx_value(v):
+    """Lo que openpyxl escribe tal cual; el resto (intervalos, fechas con zona,
+    binarios) como texto, sin los caracteres de control que Excel rechaza."""
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    if v is None or isinstance(v, (bool, int, float, Decimal)):
+        return v
+    if isinstance(v, (datetime, _time)) and v.tzinfo is not None:
+        return v.isoformat()
+    if isinstance(v, (date, datetime, _time)):
+        return v
+    if isinstance(v, (bytes, bytearray, memoryview)):
+        return bytes(v).hex()
+    return ILLEGAL_CHARACTERS_RE.sub("", str(v))
+
+
+def write_xlsx(path, columns, rows, sheet: str = "Datos") -> None:
+    """XLSX en modo write-only: memoria constante en la cantidad de filas."""
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(sheet[:31])
+    ws.append([str(c) for c in columns])
+    for row in rows:
+        ws.append([_xlsx_value(v) for v in row])
+    wb.save(path)
+
+
+def write_file(job: ExportJob, path: str) -> None:
+    with job.source() as (cols, rows):
+        rows = _capped(job, rows)
+        if job.fmt == "xlsx":
+            write_xlsx(path, cols, rows, job.sheet)
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as fh:
+                for part in csv_chunks(cols, rows):
+                    fh.write(part)
+
+
+def _temp_path(fmt: str) -> str:
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=FORMATS[fmt][1])
+    os.close(fd)
+    return path
+
+
+# ── Registro y descarga ───────────────────────────────────────────────────────
+
+def register(source, fmt: str, filename: str, *, user_id=None,
+             max_rows: int | None = MAX_ROWS, background: bool = False,
+             sheet: str = "Datos") -> str:
+    """Registra una exportación y devuelve su token (URL: /export/<token>).
+    `max_rows=None` la deja sin tope. En segundo plano arranca ya."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportación desconocido: {fmt}")
+    purge_stale()
+    stem = filename.rsplit(".", 1)[0] if "." in filename else filename
+    job = ExportJob(token=uuid.uuid4().hex, user_id=user_id, source=source,
+                    fmt=fmt, filename=stem + FORMATS[fmt][1],
+                    max_rows=max_rows, background=background, sheet=sheet)
+    with _lock:
+        _jobs[job.token] = job
+    if background:
+        threading.Thread(target=_run_background, args=(job,), daemon=True,
+                         name=f"export-{job.token[:8]}").start()
+    return job.token
+
+
+def _run_background(job: ExportJob) -> None:
+    job.state = "running"
+    path = _temp_path(job.fmt)
+    try:
+        write_file(job, path)
+        job.path, job.state = path, "done"
+        logger.info("Exportación %s: %d filas%s → %s", job.filename, job.rows,
+                    " (tope)" if job.truncated else "", path)
+    except Exception as exc:                                # noqa: BLE001
+        _remove(path)
+        job.state, job.error = "error", str(exc)
+        logger.warning("Exportación %s falló: %s", job.filename, exc)
+
+
+def _owned(token: str, user_id) -> ExportJob | None:
+    with _lock:
+        job = _jobs.get(token)
+    if job is None or job.user_id != user_id:
+        return None
+    return job
+
+
+def status(token: str, user_id=None) -> dict | None:
+    """{state, rows, truncated, error, filename} de la exportación, o None si
+    no existe (o no es de ese usuario)."""
+    job = _owned(token, user_id)
+    if job is None:
+        return None
+    return {"state": job.state, "rows": job.rows, "truncated": job.truncated,
+            "error": job.error, "filename": job.filename}
+
+
+def open_download(token: str, user_id=None):
+    """(filename, mimetype, partes) para la ruta /export/<token>, o None.
+
+    `partes` es un generador de bytes. Las exportaciones en primer plano son
+    de un solo uso (el token se consume acá); las de segundo plano sirven su
+    archivo hasta que vencen."""
+    job = _owned(token, user_id)
+    if job is None:
+        return None
+    mimetype = FORMATS[job.fmt][0]
+    if job.background:
+        if job.state != "done":
+            return None
+        return job.filename, mimetype, _file_parts(job.path, delete=False)
+    with _lock:
+        _jobs.pop(token, None)
+    if job.fmt == "csv":
+        return job.filename, mimetype, _csv_parts(job)
+    path = _temp_path(job.fmt)
+    try:
+        write_file(job, path)
+    except Exception:
+        _remove(path)
+        raise
+    return job.filename, mimetype, _file_parts(path, delete=True)
+
+
+def _csv_parts(job):
+    with job.source() as (cols, rows):
+        for part in csv_chunks(cols, _capped(job, rows)):
+            yield part.encode("utf-8")
+    if job.truncated:
+        logger.info("Exportación %s cortada en el tope de %d filas",
+                    job.filename, job.max_rows)
+
+
+def _file_parts(path, delete: bool, size: int = 1 << 20):
+    try:
+        with open(path, "rb") as fh:
+            while True:
+                block = fh.read(size)
+                if not block:
+                    return
+                yield block
+    finally:
+        if delete:
+            _remove(path)
+
+
+def _remove(path) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def purge_stale() -> None:
+    """Olvida las exportaciones vencidas y borra sus archivos."""
+    cutoff = datetime.utcnow() - timedelta(minutes=_TTL_MIN)
+    with _lock:
+        stale = [t for t, j in _jobs.items()
+                 if j.created < cutoff and j.state != "running"]
+        jobs = [_jobs.pop(t) for t in stale]
+    for job in jobs:
+        if job.path:
+            _remove(job.path)
@@ -0,0 +1,264 @@
+"""
+Panel persistido de retornos forward para el backtest de cuantiles.
+
+`backtest_service._retornos_forward` era la parte cara de cada backtest:
+releía `prices` de todo el universo y recalculaba, activo por activo, los
+retornos forward de cada horizonte. Comparar varias estrategias —o una
+estrategia con sus variantes, que es lo que hace la herramienta de IA
+`backtest_strategy_variant`— repetía exactamente ese trabajo, aunque los
+precios no hubieran cambiado.
+
+Acá ese panel vive en `backtest_forward_panel`, una fila por (activo, lag,
+horizonte) con las fechas y los retornos como arrays comprimidos sobre la
+historia COMPLETA del activo. Cada fila lleva la marca de agua de `prices` con
+la que se armó — (cantidad de closes, última fecha, suma de closes) —, que se
+compara con una sola query agregada por tanda de activos: solo los activos
+cuya marca cambió (o a los que les falta algún horizonte) vuelven a leer
+precios. Una corrección de un precio viejo mueve la suma; un precio nuevo
+mueve la cantidad y la fecha.
+
+Mismos números que el cálculo de siempre (backtest_engine.
+forward_returns_for_series): close[i+lag+h] / close[i+lag] − 1 con la misma
+aritmética de float64, vectorizada. El piso `date_from` se aplica al
+DEVOLVER el panel, no al armarlo: los retornos miran hacia adelante, así que
+recortar la cabeza no cambia ningún valor (test_backtest_service lo fija).
+
+Es caché derivado: si no se puede escribir (base de solo lectura, conflicto),
+el backtest sigue con lo calculado en memoria y lo reintenta la próxima vez.
+"""
+import logging
+import math
+import time
+import zlib
+from collections import defaultdict
+from datetime import date, datetime
+
+import numpy as np
+import sqlalchemy as sa
+
+from app.models import BacktestForwardPanel, Price
+from app.services import db_compat
+
+logger = logging.getLogger(__name__)
+
+_ASSET_BATCH = 200  # activos por query (precios, marcas y paneles)
+
+# Tolerancia relativa al comparar la suma de closes: el orden de la suma en el
+# motor puede variar entre planes y mover el último bit. Una corrección real
+# de precio está órdenes de magnitud por encima.
+_SUM_REL_TOL = 1e-12
+
+
+# ── Codificación columnar ─────────────────────────────────────────────────────
+
+def _pack(arr: np.ndarray) -> bytes:
+    return zlib.compress(np.ascontiguousarray(arr).tobytes(), 1)
+
+
+def _unpack(blob: bytes, dtype) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(blob), dtype=dtype)
+
+
+def forward_columns(closes: np.ndarray, horizons, lag: int) -> dict[int, np.ndarray]:
+    """{h: array paralelo a closes} con NaN donde no hay retorno. Misma regla
+    que backtest_engine.forward_returns_for_series: hace falta la barra
+    i+lag+h y un close de entrada positivo."""
+    n = len(closes)
+    out = {}
+    for h in horizons:
+        col = np.full(n, np.nan)
+        m = n - lag - h                     # posiciones con barra de salida
+        if m > 0:
+            entry = closes[lag:lag + m]
+            exit_ = closes[lag + h:lag + h + m]
+            ok = entry > 0
+            col[:m][ok] = exit_[ok] / entry[ok] - 1
+        out[h] = col
+    return out
+
+
+class ForwardColumns:
+    """Retornos forward de un activo con la forma que espera
+    backtest_service._por_fecha: `fwd[i]` → {h: ret | None}.
+
+    Guarda las columnas como arrays y arma el dict solo para las posiciones
+    que se consultan (las puntuadas), en vez de uno por barra de historia.
+    """
+
+    __slots__ = ("_cols", "_offset", "_n")
+
+    def __init__(self, cols: dict[int, np.ndarray], offset: int = 0):
+        self._cols = cols
+        self._offset = offset
+        self._n = len(next(iter(cols.values()))) - offset if cols else 0
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i: int) -> dict:
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        j = i + self._offset
+        out = {}
+        for h, col in self._cols.items():
+            v = col[j]
+            out[h] = None if v != v else float(v)
+        return out
+
+
+# ── Marcas de agua ────────────────────────────────────────────────────────────
+
+def price_watermarks(s, asset_ids) -> dict[int, tuple]:
+    """{asset_id: (n_prices, last_date, close_sum)} de los closes no nulos.
+    Los activos sin precios no aparecen."""
+    out = {}
+    for i in range(0, len(asset_ids), _ASSET_BATCH):
+        batch = asset_ids[i:i + _ASSET_BATCH]
+        rows = s.execute(
+            sa.select(Price.asset_id, sa.func.count(Price.close),
+                      sa.func.max(Price.date), sa.func.sum(Price.close))
+            .where(Price.asset_id.in_(batch), Price.close.isnot(None))
+            .group_by(Price.asset_id)).all()
+        for aid, n, last, total in rows:
+            if n:
+                out[aid] = (int(n), last, float(total))
+    return out
+
+
+def _fresh(row, mark) -> bool:
+    n, last, total = mark
+    return (row.n_prices == n and row.last_date == last
+            and math.isclose(row.close_sum, total, rel_tol=_SUM_REL_TOL,
+                             abs_tol=1e-9))
+
+
+# ── Carga / refresco ──────────────────────────────────────────────────────────
+
+def _stored(s, batch, lag, horizons) -> dict[int, dict]:
+    """{asset_id: {h: fila}} de lo que ya está persistido para esta tanda."""
+    t = BacktestForwardPanel
+    rows = s.execute(
+        sa.select(t.asset_id, t.horizon, t.n_prices, t.last_date, t.close_sum,
+                  t.dates, t.returns, t.build_seconds)
+        .where(t.asset_id.in_(batch), t.lag == lag,
+               t.horizon.in_(list(horizons)))).all()
+    out = defaultdict(dict)
+    for r in rows:
+        out[r.asset_id][r.horizon] = r
+    return out
+
+
+def _read_closes(s, batch) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+    """{asset_id: (ordinales, closes)} con la historia completa."""
+    rows = (s.query(Price.asset_id, Price.date, Price.close)
+            .filter(Price.asset_id.in_(batch), Price.close.isnot(None))
+            .order_by(Price.asset_id, Price.date).all())
+    by_asset = defaultdict(list)
+    for aid, d, c in rows:
+        by_asset[aid].append((d.toordinal(), float(c)))
+    return {aid: (np.array([o for o, _ in v], dtype=np.int32),
+                  np.array([c for _, c in v], dtype=float))
+            for aid, v in by_asset.items()}
+
+
+def _save(s, rows: list[dict]) -> None:
+    if not rows:
+        return
+    cols = ("n_prices", "last_date", "close_sum", "dates", "returns",
+            "build_seconds", "built_at")
+    try:
+        s.execute(db_compat.upsert(s, BacktestForwardPanel, rows,
+                                   {c: db_compat.INSERTED for c in cols}))
+        s.commit()
+    except Exception as exc:
+        s.rollback()
+        logger.warning("No se pudo persistir el panel forward (%d filas): %s",
+                       len(rows), exc)
+
+
+def _positions(ords: np.ndarray, floor: int | None) -> tuple[dict, int]:
+    """({fecha: posición}, offset) desde el piso: la posición 0 es la primera
+    fecha >= floor, y offset es cuántas barras de la cabeza se saltearon."""
+    start = int(np.searchsorted(ords, floor)) if floor is not None else 0
+    pos = {date.fromordinal(int(o)): i for i, o in enumerate(ords[start:].tolist())}
+    return pos, start
+
+
+def load_panel(s, asset_ids, horizons, lag: int, date_from=None,
+               progress_cb=None) -> tuple[dict, dict]:
+    """({asset_id: (posición_por_fecha, ForwardColumns)}, informe).
+
+    Reusa lo persistido si la marca de agua de precios coincide y rehace (y
+    persiste) solo los activos que cambiaron o a los que les falta algún
+    horizonte. El informe cuenta activos reusados/recalculados, el tiempo
+    real y el ahorro estimado: lo que habría costado recalcular lo reusado,
+    según el `build_seconds` con que se armó, menos lo que costó leerlo.
+    """
+    t0 = time.perf_counter()
+    horizons = list(horizons)
+    asset_ids = sorted(asset_ids)
+    floor = date_from.toordinal() if date_from else None
+    salida: dict = {}
+    reused = refreshed = 0
+    costo_reusado = 0.0
+    t_reuse = 0.0
+    done = 0
+    for i in range(0, len(asset_ids), _ASSET_BATCH):
+        batch = asset_ids[i:i + _ASSET_BATCH]
+        tb = time.perf_counter()
+        marks = price_watermarks(s, batch)
+        stored = _stored(s, batch, lag, horizons)
+        stale = []
+        for aid in batch:
+            mark = marks.get(aid)
+            if mark is None:
+                continue                    # sin precios: sin retornos
+            rows = stored.get(aid, {})
+            if len(rows) == len(horizons) and all(_fresh(r, mark) for r in rows.values()):
+                first = rows[horizons[0]]
+                ords = _unpack(first.dates, np.int32)
+                cols = {h: _unpack(rows[h].returns, np.float64) for h in horizons}
+                pos, off = _positions(ords, floor)
+                salida[aid] = (pos, ForwardColumns(cols, off))
+                costo_reusado += sum(r.build_seconds or 0.0 for r in rows.values())
+                reused += 1
+            else:
+                stale.append(aid)
+        t_reuse += time.perf_counter() - tb
+
+        if stale:
+            tb = time.perf_counter()
+            series = _read_closes(s, stale)
+            built = {}
+            for aid, (ords, closes) in series.items():
+                built[aid] = (ords, forward_columns(closes, horizons, lag))
+            costo = (time.perf_counter() - tb) / max(len(series), 1) / len(horizons)
+            now = datetime.utcnow()
+            to_save = []
+            for aid, (ords, cols) in built.items():
+                n, last, total = marks[aid]
+                dates_blob = _pack(ords)
+                for h, col in cols.items():
+                    to_save.append({"asset_id": aid, "lag": lag, "horizon": h,
+                                    "n_prices": n, "last_date": last,
+                                    "close_sum": total, "dates": dates_blob,
+                                    "returns": _pack(col),
+                                    "build_seconds": costo, "built_at": now})
+                pos, off = _positions(ords, floor)
+                salida[aid] = (pos, ForwardColumns(cols, off))
+            _save(s, to_save)
+            refreshed += len(built)
+
+        done += len(batch)
+        if progress_cb:
+            progress_cb(done, len(asset_ids), "activos")
+
+    elapsed = time.perf_counter() - t0
+    informe = {"assets": len(salida), "reused": reused, "refreshed": refreshed,
+               "seconds": round(elapsed, 3),
+               "seconds_saved": round(max(costo_reusado - t_reuse, 0.0), 3)}
+    logger.info("Panel forward (lag %s, h %s): %d activos, %d reusados, "
+                "%d recalculados en %.2fs — ahorro estimado %.2fs",
+                lag, horizons, informe["assets"], reused, refreshed, elapsed,
+                informe["seconds_saved"])
+    return salida, informe
@@ -1,16 +1,19 @@
 """
 Servicio de importación masiva de activos desde Excel.
 """
+import hashlib
+import json
 import logging
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from io import BytesIO
 import openpyxl
-import pandas as pd
+import sqlalchemy as sa
 
 from app.database import get_session
-from app.models import Asset, FundamentalSource, ImportLog, PriceSource
+from app.models import Asset, FundamentalSource, ImportJob, ImportLog, PriceSource
+from app.services import db_compat
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +50,12 @@ _VALIDATE_WORKERS = 6
 _VALIDATE_RETRIES = 2    # reintentos ante error transitorio (rate-limit/red)
 _BACKOFF_BASE_S   = 2.0  # espera del primer reintento; exponencial (2s, 4s…)
 
+# Filas por chunk del alta: cada chunk es una validación en paralelo, un
+# INSERT multi-fila de activos, un upsert de logs y UN commit (con el cursor
+# del job). El commit por ticker de antes era la mitad del tiempo de un
+# import grande; un chunk es la nueva unidad de durabilidad.
+_CHUNK_ROWS = 500
+
 # Campos del Excel que la metadata de la fuente puede autocompletar. Si la
 # fila ya los trae todos (caso típico: re-import de una planilla exportada),
 # no hace falta pedir metadata — alcanza el chequeo barato de existencia.
@@ -188,213 +197,365 @@ def generate_template() -> bytes:
     return buf.getvalue()
 
 
-def import_from_excel(file_bytes: bytes, progress_cb=None) -> list[dict]:
+def _cell_str(v) -> str:
+    """Celda como texto, con la conversión de pd.read_excel(dtype=str): un
+    número entero guardado como float ("7203.0") vuelve como "7203"; una
+    celda vacía, como "" (pandas daba NaN — los helpers tratan igual a ambos).
     """
-    Procesa el archivo Excel y devuelve una lista de resultados por ticker.
-    Cada elemento tiene: ticker, status ("imported"|"skipped"|"error"), detail.
-    Persiste el resultado en import_log (upsert por ticker).
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
 
-    Dos fases: primero la validación contra la fuente en paralelo (la parte
-    lenta — ver _prefetch_validations), después el alta en BD secuencial.
-    progress_cb(actual, total, mensaje) se reinicia al cambiar de fase.
-    """
+
+def _stream_rows(file_bytes: bytes):
+    """(iterador de filas como dict {columna: texto}, cantidad de filas de
+    datos según la dimensión de la hoja). Lee la primera hoja en modo
+    read_only: las filas se parsean a medida que se consumen, sin cargar el
+    archivo entero en un DataFrame."""
     try:
-        df = pd.read_excel(BytesIO(file_bytes), dtype=str)
+        wb = openpyxl.load_workbook(BytesIO(file_bytes), read_only=True,
+                                    data_only=True)
+        ws = wb.worksheets[0]
+        it = ws.iter_rows(values_only=True)
+        header = next(it, None) or ()
     except Exception as exc:
         raise ValueError(f"Error leyendo el archivo Excel: {exc}") from exc
 
-    df.columns = [c.strip().lower() for c in df.columns]
-
+    columns = [str(c).strip().lower() if c is not None else "" for c in header]
     required = {"ticker", "fuente_precios"}
-    missing = required - set(df.columns)
+    missing = required - set(columns)
     if missing:
+        wb.close()
         raise ValueError(f"Columnas obligatorias faltantes en el archivo: {missing}")
+    total = max((ws.max_row or 1) - 1, 0)
+
+    def rows():
+        try:
+            for values in it:
+                yield {c: _cell_str(v) for c, v in zip(columns, values) if c}
+        finally:
+            wb.close()
+
+    return rows(), total
+
+
+def _open_job(s, file_hash: str, total: int) -> ImportJob:
+    """El job a continuar (mismo archivo, quedó en 'running') o uno nuevo.
+    Los jobs terminados del mismo archivo se descartan: su resultado ya
+    está en import_log."""
+    job = (s.query(ImportJob)
+           .filter(ImportJob.file_hash == file_hash, ImportJob.status == "running")
+           .order_by(ImportJob.id.desc()).first())
+    if job is not None:
+        logger.info("Import: se retoma el job %s desde la fila %d de %d",
+                    job.id, job.next_row, job.total_rows)
+        return job
+    s.query(ImportJob).filter(ImportJob.file_hash == file_hash,
+                              ImportJob.status != "running").delete(
+        synchronize_session=False)
+    job = ImportJob(file_hash=file_hash, status="running", total_rows=total,
+                    next_row=0, n_imported=0, n_skipped=0, n_error=0,
+                    pending_benchmarks="[]")
+    s.add(job)
+    s.commit()
+    return job
+
+
+def import_from_excel(file_bytes: bytes, progress_cb=None) -> list[dict]:
+    """
+    Procesa el archivo Excel y devuelve una lista de resultados por ticker.
+    Cada elemento tiene: ticker, status ("imported"|"skipped"|"error"), detail.
+    Persiste el resultado en import_log (upsert por ticker).
+
+    Por chunks de _CHUNK_ROWS filas leídas en streaming (ver _stream_rows):
+    cada chunk valida contra la fuente en paralelo (la parte lenta — ver
+    _prefetch_validations) y después da de alta sus activos y sus logs en
+    lote, con UN commit por chunk que también avanza el cursor del job
+    (import_job). Si el proceso muere a mitad, volver a subir el mismo
+    archivo retoma desde el primer chunk sin commitear; los resultados
+    devueltos son los de las filas procesadas en esta llamada. Los
+    benchmarks se asignan al final, con todo el archivo dado de alta.
+    progress_cb(actual, total, mensaje) sobre el total de filas.
+    """
+    rows_iter, total = _stream_rows(file_bytes)
 
-    results = []
     s = get_session()
-    total = len(df)
+    job = _open_job(s, hashlib.sha256(file_bytes).hexdigest(), total)
+    start_row = job.next_row
 
-    # Pre-cargar fuentes y tickers existentes (evita N+1 queries por fila)
+    # Pre-cargar fuentes y tickers existentes (evita N+1 queries por fila).
+    # Al retomar, los activos de los chunks ya commiteados están acá: sus
+    # filas repetidas más abajo se saltean como duplicadas, como siempre.
     price_sources = {ps.name: ps for ps in s.query(PriceSource).all()}
     fund_sources  = {fs.name: fs for fs in s.query(FundamentalSource).all()}
     existing_tickers = {t for (t,) in s.query(Asset.ticker).all()}
 
-    # Logs precargados en un mapa (1 query) — antes había un SELECT por fila.
-    # El commit por fila se conserva: es la durabilidad del log ante un
-    # error a mitad de archivo.
-    logs_by_ticker = {l.ticker: l for l in s.query(ImportLog).all()}
-
     # Caché por corrida de los resolvers de referencia (país/mercado/moneda/
     # tipo/sector/industria) — ver _cached_resolve.
     resolve_cache: dict = {}
+    # Validaciones ya resueltas: un ticker repetido en otro chunk no vuelve
+    # a la red.
+    val_results: dict = {}
+    results: list[dict] = []
+
+    row_idx = 0
+    chunk: list[dict] = []
+    for row in rows_iter:
+        if row_idx >= start_row:
+            chunk.append(row)
+        row_idx += 1
+        if len(chunk) >= _CHUNK_ROWS:
+            results += _import_chunk(
+                s, job, chunk, row_idx, price_sources, fund_sources,
+                existing_tickers, resolve_cache, val_results, progress_cb)
+            chunk = []
+    if chunk:
+        results += _import_chunk(
+            s, job, chunk, row_idx, price_sources, fund_sources,
+            existing_tickers, resolve_cache, val_results, progress_cb)
+
+    _assign_benchmarks(s, job, results)
+    return results
 
-    # benchmark_ticker de cada fila, para la segunda pasada
-    pending_benchmarks: list[tuple[str, str]] = []  # [(ticker, benchmark_ticker)]
 
-    rows_list = df.to_dict("records")
+def _import_chunk(s, job, chunk, end_row, price_sources, fund_sources,
+                  existing_tickers, resolve_cache, val_results,
+                  progress_cb) -> list[dict]:
+    """Valida y da de alta un chunk; commitea activos, logs y cursor juntos."""
+    base = end_row - len(chunk)
+    total = max(job.total_rows, end_row)
 
     # ── Fase 1: validación de red en paralelo ────────────────────────────
-    val_results = _prefetch_validations(
-        rows_list, price_sources, existing_tickers, progress_cb)
-
-    # ── Fase 2: alta en BD (secuencial, hilo principal) ──────────────────
-    for i, row in enumerate(rows_list):
+    todo = [r for r in chunk
+            if (str(r.get("fuente_precios", "")).strip(), _row_ticker(r))
+            not in val_results]
+    chunk_cb = None
+    if progress_cb:
+        def chunk_cb(done, n, msg):
+            progress_cb(base + int(done / max(n, 1) * len(chunk)), total, msg)
+    val_results.update(_prefetch_validations(
+        todo, price_sources, existing_tickers, chunk_cb))
+
+    # ── Fase 2: armado de filas (hilo principal) ─────────────────────────
+    results: list[dict] = []
+    new_assets: list[dict] = []
+    benchmarks: list[tuple[str, str]] = []
+    for i, row in enumerate(chunk):
         if progress_cb:
-            progress_cb(i + 1, total, "Importando...")
+            progress_cb(base + i + 1, total, "Importando...")
         ticker = _row_ticker(row)
         if not ticker:
             continue
-
         source_name = str(row.get("fuente_precios", "")).strip()
         status = "error"
         detail = ""
-
         try:
-            # Validar fuente (precargada)
-            source_obj = price_sources.get(source_name)
-            if source_obj is None:
-                raise ValueError(f"Fuente '{source_name}' no encontrada")
-
-            # Verificar duplicado (precargado)
-            if ticker in existing_tickers:
-                status = "skipped"
-                detail = "Ticker ya existe en la base de datos"
-                raise _Skipped(detail)
-
-            # Resultado de la validación prefetcheada. El prefetch cubre toda
-            # fila con fuente conocida y ticker nuevo; cae acá el caso de una
-            # fuente que está en PriceSource pero no en el registry (ver
-            # _prefetch_validations): get_source lanza y esta fila queda en
-            # error sin voltear el resto del archivo.
-            val_result = val_results.get((source_name, ticker))
-            if val_result is None:
-                from app.sources.registry import get_source
-                val_result = _validate_with_retry(
-                    get_source(source_name), ticker, _needs_metadata(row))
-            if not val_result.valid:
-                raise ValueError(f"Ticker inválido: {val_result.error}")
-
-            meta = val_result.metadata
-
-            # Resolver campos opcionales del Excel (tienen prioridad sobre autocompletado)
-            name = _first_nonempty(row.get("nombre"), getattr(meta, "name", None), ticker)
-
-            # Resolver FKs — Excel tiene prioridad, meta de la fuente como fallback
-            country_val  = _first_nonempty(row.get("pais_iso"),         getattr(meta, "country",       None))
-            market_val   = _first_nonempty(row.get("mercado"),           getattr(meta, "exchange_name", None), getattr(meta, "exchange", None))
-            currency_val = row.get("moneda", "")
-            currency_iso = getattr(meta, "currency_iso", None)
-            itype_val    = _first_nonempty(row.get("tipo_instrumento"),  getattr(meta, "quote_type",    None))
-            sector_val   = _first_nonempty(row.get("sector"),            getattr(meta, "sector",        None))
-            industry_val = _first_nonempty(row.get("industria"),         getattr(meta, "industry",      None))
-
-            country_id  = _cached_resolve(resolve_cache, "country", country_val, _resolve_country)
-            market_id   = _cached_resolve(resolve_cache, "market", market_val, _resolve_market)
-            currency_id = _cached_resolve(resolve_cache, "currency", currency_val, _resolve_currency, currency_iso)
-            itype_id    = _cached_resolve(resolve_cache, "itype", itype_val, _resolve_instrument_type)
-            sector_id   = _cached_resolve(resolve_cache, "sector", sector_val, _resolve_sector)
-            industry_id = _cached_resolve(resolve_cache, "industry", industry_val, _resolve_industry, sector_id)
-
-            # _first_nonempty y no str(...) directo: una celda vacía del Excel
-            # llega como NaN y str(NaN) es "nan" — disparaba la advertencia
-            # de fuente inexistente en toda fila sin fundamentales.
-            fund_source_name = _first_nonempty(row.get("fuente_fundamentales"))
-            fund_source_id   = fund_sources[fund_source_name].id if fund_source_name in fund_sources else None
-            # A diferencia de fuente_precios (que da error), un nombre de fuente
-            # de fundamentales que no matchea dejaba el activo sin fuente y sin
-            # avisar. La fila se importa igual, pero se anota la advertencia.
-            fund_warn = (f"Fuente de fundamentales '{fund_source_name}' no "
-                         f"encontrada: el activo queda sin fundamentales."
-                         if fund_source_name and fund_source_id is None else None)
-
-            asset = Asset(
-                ticker=ticker,
-                name=name,
-                country_id=country_id,
-                market_id=market_id,
-                instrument_type_id=itype_id,
-                currency_id=currency_id,
-                price_source_id=source_obj.id,
-                sector_id=sector_id,
-                industry_id=industry_id,
-                fundamental_source_id=fund_source_id,
-            )
-            s.add(asset)
-            s.flush()
+            values, detail = _asset_values(
+                row, ticker, source_name, price_sources, fund_sources,
+                existing_tickers, resolve_cache, val_results)
+            new_assets.append(values)
             existing_tickers.add(ticker)  # evita duplicados dentro del mismo archivo
             status = "imported"
-            detail = ("Importado correctamente" if not fund_warn
-                      else f"Importado con advertencia: {fund_warn}")
-
             bm_ticker = _first_nonempty(row.get("benchmark_ticker"))
             if bm_ticker:
-                pending_benchmarks.append((ticker, bm_ticker))
-
-        except _Skipped:
-            pass
+                benchmarks.append((ticker, bm_ticker))
+        except _Skipped as skip:
+            status = "skipped"
+            detail = str(skip)
         except Exception as exc:
             s.rollback()
             status = "error"
             detail = str(exc)
             logger.warning("Import error para ticker %s: %s", ticker, exc)
+        results.append({"ticker": ticker, "status": status, "detail": detail})
 
-        # Upsert en import_log y commit por ticker para que los errores
-        # de un ticker no anulen los logs de los anteriores.
-        log_created = False
-        try:
-            log = logs_by_ticker.get(ticker)
-            if log is None:
-                log = ImportLog(ticker=ticker, status=status, detail=detail)
-                s.add(log)
-                logs_by_ticker[ticker] = log
-                log_created = True
-            else:
-                log.status = status
-                log.detail = detail
-                log.attempted_at = datetime.utcnow()
-            s.commit()
-        except Exception as log_exc:
-            s.rollback()
-            if log_created:
-                # el add se deshizo — que otra fila del mismo ticker lo recree
-                logs_by_ticker.pop(ticker, None)
-            logger.warning("Error guardando log para %s: %s", ticker, log_exc)
+    # ── Fase 3: alta en lote + logs + cursor, un solo commit ─────────────
+    failed = _insert_assets(s, new_assets)
+    if failed:
+        for r in results:
+            if r["status"] == "imported" and r["ticker"] in failed:
+                r["status"], r["detail"] = "error", failed[r["ticker"]]
+                existing_tickers.discard(r["ticker"])
+        benchmarks = [b for b in benchmarks if b[0] not in failed]
+
+    now = datetime.utcnow()
+    # El log guarda el ÚLTIMO intento por ticker: upsert con la última fila
+    # del chunk ganando (ver db_compat._dedupe_last).
+    log_rows = [{"ticker": r["ticker"], "status": r["status"],
+                 "detail": r["detail"], "attempted_at": now} for r in results]
+    try:
+        if log_rows:
+            s.execute(db_compat.upsert(s, ImportLog, log_rows, {
+                "status": db_compat.INSERTED, "detail": db_compat.INSERTED,
+                "attempted_at": db_compat.INSERTED}))
+        for st in ("imported", "skipped", "error"):
+            n = sum(1 for r in results if r["status"] == st)
+            setattr(job, f"n_{st}", (getattr(job, f"n_{st}") or 0) + n)
+        if benchmarks:
+            pending = json.loads(job.pending_benchmarks or "[]")
+            job.pending_benchmarks = json.dumps(pending + [list(b) for b in benchmarks])
+        job.next_row = end_row
+        job.updated_at = now
+        s.commit()
+    except Exception as exc:
+        s.rollback()
+        raise RuntimeError(
+            f"Error guardando el chunk de filas {base + 1}–{end_row}: {exc}. "
+            f"Volver a subir el archivo retoma desde esa fila.") from exc
+    return results
 
-        results.append({"ticker": ticker, "status": status, "detail": detail})
 
-    # Segunda pasada: asignar benchmarks una vez que todos los activos están
-    # creados — mapa ticker→id precargado (1 query) y un solo commit, en vez
-    # de 2 SELECTs + commit por cada benchmark.
-    if pending_benchmarks:
-        result_map = {r["ticker"]: r for r in results}
-        ids_by_ticker = {t: i for (t, i) in s.query(Asset.ticker, Asset.id).all()}
-        updates = []
-        for ticker, bm_ticker in pending_benchmarks:
-            asset_id = ids_by_ticker.get(ticker)
-            if asset_id is None:
-                continue
-            # Normalizado como se almacenan los tickers (el lookup exacto de
-            # antes dependía de la collation case-insensitive de MySQL)
-            bm_id = ids_by_ticker.get(bm_ticker.strip().upper())
-            if bm_id is None:
-                detail = result_map[ticker]["detail"]
-                result_map[ticker]["detail"] = f"{detail} (benchmark '{bm_ticker}' no encontrado)"
-                log = logs_by_ticker.get(ticker)
-                if log is not None:
-                    log.status = result_map[ticker]["status"]
-                    log.detail = result_map[ticker]["detail"]
-                    log.attempted_at = datetime.utcnow()
-            else:
-                updates.append({"id": asset_id, "benchmark_id": bm_id})
+def _asset_values(row, ticker, source_name, price_sources, fund_sources,
+                  existing_tickers, resolve_cache, val_results) -> tuple[dict, str]:
+    """(columnas del Asset a insertar, detalle) de una fila. Lanza _Skipped
+    para un ticker que ya existe y cualquier otra excepción para un error."""
+    # Validar fuente (precargada)
+    source_obj = price_sources.get(source_name)
+    if source_obj is None:
+        raise ValueError(f"Fuente '{source_name}' no encontrada")
+
+    # Verificar duplicado (precargado)
+    if ticker in existing_tickers:
+        raise _Skipped("Ticker ya existe en la base de datos")
+
+    # Resultado de la validación prefetcheada. El prefetch cubre toda fila con
+    # fuente conocida y ticker nuevo; cae acá el caso de una fuente que está
+    # en PriceSource pero no en el registry (ver _prefetch_validations):
+    # get_source lanza y esta fila queda en error sin voltear el resto.
+    val_result = val_results.get((source_name, ticker))
+    if val_result is None:
+        from app.sources.registry import get_source
+        val_result = _validate_with_retry(
+            get_source(source_name), ticker, _needs_metadata(row))
+    if not val_result.valid:
+        raise ValueError(f"Ticker inválido: {val_result.error}")
+
+    meta = val_result.metadata
+
+    # Resolver campos opcionales del Excel (tienen prioridad sobre autocompletado)
+    name = _first_nonempty(row.get("nombre"), getattr(meta, "name", None), ticker)
+
+    # Resolver FKs — Excel tiene prioridad, meta de la fuente como fallback
+    country_val  = _first_nonempty(row.get("pais_iso"),         getattr(meta, "country",       None))
+    market_val   = _first_nonempty(row.get("mercado"),           getattr(meta, "exchange_name", None), getattr(meta, "exchange", None))
+    currency_val = row.get("moneda", "")
+    currency_iso = getattr(meta, "currency_iso", None)
+    itype_val    = _first_nonempty(row.get("tipo_instrumento"),  getattr(meta, "quote_type",    None))
+    sector_val   = _first_nonempty(row.get("sector"),            getattr(meta, "sector",        None))
+    industry_val = _first_nonempty(row.get("industria"),         getattr(meta, "industry",      None))
+
+    country_id  = _cached_resolve(resolve_cache, "country", country_val, _resolve_country)
+    market_id   = _cached_resolve(resolve_cache, "market", market_val, _resolve_market)
+    currency_id = _cached_resolve(resolve_cache, "currency", currency_val, _resolve_currency, currency_iso)
+    itype_id    = _cached_resolve(resolve_cache, "itype", itype_val, _resolve_instrument_type)
+    sector_id   = _cached_resolve(resolve_cache, "sector", sector_val, _resolve_sector)
+    industry_id = _cached_resolve(resolve_cache, "industry", industry_val, _resolve_industry, sector_id)
+
+    # _first_nonempty y no str(...) directo: una celda vacía del Excel no es
+    # un nombre de fuente — disparaba la advertencia de fuente inexistente en
+    # toda fila sin fundamentales.
+    fund_source_name = _first_nonempty(row.get("fuente_fundamentales"))
+    fund_source_id   = fund_sources[fund_source_name].id if fund_source_name in fund_sources else None
+    # A diferencia de fuente_precios (que da error), un nombre de fuente de
+    # fundamentales que no matchea dejaba el activo sin fuente y sin avisar.
+    # La fila se importa igual, pero se anota la advertencia.
+    fund_warn = (f"Fuente de fundamentales '{fund_source_name}' no "
+                 f"encontrada: el activo queda sin fundamentales."
+                 if fund_source_name and fund_source_id is None else None)
+
+    values = {
+        "ticker": ticker,
+        "name": name,
+        "country_id": country_id,
+        "market_id": market_id,
+        "instrument_type_id": itype_id,
+        "currency_id": currency_id,
+        "price_source_id": source_obj.id,
+        "sector_id": sector_id,
+        "industry_id": industry_id,
+        "fundamental_source_id": fund_source_id,
+    }
+    detail = ("Importado correctamente" if not fund_warn
+              else f"Importado con advertencia: {fund_warn}")
+    return values, detail
+
+
+def _insert_assets(s, new_assets: list[dict]) -> dict[str, str]:
+    """INSERT multi-fila de los activos del chunk (sin commit). Si el lote
+    falla (p.ej. un ticker dado de alta por otro proceso entre el prefetch y
+    acá), reintenta fila por fila con savepoint para aislar las culpables.
+    Devuelve {ticker: error} de las que no entraron."""
+    if not new_assets:
+        return {}
+    try:
+        with s.begin_nested():
+            s.execute(sa.insert(Asset), new_assets)
+        return {}
+    except Exception as exc:
+        logger.warning("Alta en lote de %d activos falló (%s): se reintenta "
+                       "fila por fila", len(new_assets), exc)
+    failed = {}
+    for values in new_assets:
         try:
+            with s.begin_nested():
+                s.execute(sa.insert(Asset), [values])
+        except Exception as exc:
+            failed[values["ticker"]] = str(exc)
+            logger.warning("Import error para ticker %s: %s", values["ticker"], exc)
+    return failed
+
+
+def _assign_benchmarks(s, job, results: list[dict]) -> None:
+    """Segunda pasada: asignar benchmarks una vez que todos los activos están
+    creados — mapa ticker→id precargado (1 query) y un solo commit, que
+    también cierra el job. Incluye los pendientes de los chunks de una
+    corrida anterior del mismo archivo (ver ImportJob)."""
+    pending = [tuple(b) for b in json.loads(job.pending_benchmarks or "[]")]
+    now = datetime.utcnow()
+    try:
+        if pending:
+            result_map = {r["ticker"]: r for r in results}
+            ids_by_ticker = {t: i for (t, i) in s.query(Asset.ticker, Asset.id).all()}
+            updates = []
+            log_rows = []
+            for ticker, bm_ticker in pending:
+                asset_id = ids_by_ticker.get(ticker)
+                if asset_id is None:
+                    continue
+                # Normalizado como se almacenan los tickers (el lookup exacto
+                # de antes dependía de la collation case-insensitive de MySQL)
+                bm_id = ids_by_ticker.get(bm_ticker.strip().upper())
+                if bm_id is not None:
+                    updates.append({"id": asset_id, "benchmark_id": bm_id})
+                    continue
+                warn = f" (benchmark '{bm_ticker}' no encontrado)"
+                r = result_map.get(ticker)
+                if r is not None:
+                    r["detail"] = f"{r['detail']}{warn}"
+                    log_rows.append({"ticker": ticker, "status": r["status"],
+                                     "detail": r["detail"], "attempted_at": now})
+                else:
+                    # de un chunk de la corrida anterior: el log ya está en
+                    # la base, se le suma la advertencia ahí
+                    log = s.query(ImportLog).filter_by(ticker=ticker).first()
+                    if log is not None:
+                        log.detail = f"{log.detail or ''}{warn}"
+                        log.attempted_at = now
             if updates:
                 s.bulk_update_mappings(Asset, updates)
-            s.commit()
-        except Exception as exc:
-            s.rollback()
-            logger.warning("Error asignando benchmarks en batch: %s", exc)
-
-    return results
+            if log_rows:
+                s.execute(db_compat.upsert(s, ImportLog, log_rows, {
+                    "status": db_compat.INSERTED, "detail": db_compat.INSERTED,
+                    "attempted_at": db_compat.INSERTED}))
+        job.status = "done"
+        job.pending_benchmarks = "[]"
+        job.finished_at = job.updated_at = now
+        s.commit()
+    except Exception as exc:
+        s.rollback()
+        logger.warning("Error asignando benchmarks en batch: %s", exc)
 
 
 def get_import_logs() -> list[ImportLog]:
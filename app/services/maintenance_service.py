@@ -12,6 +12,7 @@ Notas:
 - sqlite (tests) no compacta por tabla: VACUUM es de toda la base.
 """
 import logging
+import re
 
 import sqlalchemy as sa
 
@@ -117,15 +118,18 @@ def classify_table(name: str) -> str:
     """Familia a la que pertenece una tabla, para el desglose de espacio.
     Puro (testeable): fija que ind_dist_sma50 → Indicadores, sig_3 → Señales,
     strat_res_2 → Estrategias, etc. El orden de los chequeos importa."""
-    n = name.lower()
-    if n == "prices":
+    # Una partición anual (signal_values_wide_y2024, ver db_compat) es de la
+    # familia de su tabla madre.
+    n = re.sub(r"_y(\d{4}|default)$", "", name.lower())
+    if n in ("prices", "prices_weekly", "prices_monthly"):
         return "Precios"
     if n.startswith("ind_") or n in (
             "current_indicator_values", "indicator_definitions",
-            "indicator_update_log"):
+            "indicator_update_log", "chart_zones"):
         return "Indicadores"
     if n.startswith("sig_") or n in (
-            "signal", "signal_eval_log", "signal_values_wide"):
+            "signal", "signal_eval_log", "signal_values_wide",
+            "signal_dirty_range"):
         return "Señales"
     if n.startswith("strat_res_") or n in (
             "strategy", "strategy_component", "strategy_results_wide"):
@@ -35,10 +35,11 @@ from __future__ import annotations
 
 import logging
 import re
-import unicodedata
 from dataclasses import dataclass
 from pathlib import Path
 
+from app.services.search_index import SearchIndex, fold
+
 logger = logging.getLogger(__name__)
 
 MANUAL_DIR = Path(__file__).resolve().parent.parent.parent / "docs" / "manual"
@@ -210,8 +211,7 @@ def neighbors(sections: list[Section],
 
 def normalize(text: str) -> str:
     """Minúsculas sin acentos — buscar 'analisis' tiene que encontrar 'Análisis'."""
-    desc = unicodedata.normalize("NFD", text.lower())
-    return "".join(c for c in desc if unicodedata.category(c) != "Mn")
+    return fold(text)
 
 
 @dataclass(frozen=True)
@@ -234,14 +234,14 @@ _VACIAS = frozenset("""
 
 
 def search(sections: list[Section], query: str, limit: int = 40) -> list[Hit]:
-    """Búsqueda de texto sobre título y cuerpo, en dos pasadas.
-
-    Sin ranking sofisticado a propósito: el manual son decenas de secciones,
-    no miles de documentos. Ordena por coincidencia en el título primero.
+    """Búsqueda de texto sobre título y cuerpo, en dos pasadas, con el índice
+    invertido de search_index (ver `search_visible` para la versión cacheada).
 
-    La primera pasada es la frase LITERAL. Es lo que escribe una persona en el
-    buscador ("backtest", "walk forward") y da los resultados más precisos, así
-    que manda: mientras encuentre algo, la segunda ni corre.
+    La primera pasada es la FRASE: los términos consecutivos, cada uno como
+    prefijo ("walk forw" ya encuentra "walk forward"); entre comillas, exacta.
+    Es lo que escribe una persona en el buscador y da los resultados más
+    precisos, así que manda: mientras encuentre algo, la segunda ni corre.
+    Ordena por coincidencia en el título primero y después por BM25.
 
     La segunda existe por la capa de IA, que consulta este mismo servicio. Un
     modelo no busca palabras sueltas: busca frases ("qué formato tiene un pack
@@ -253,56 +253,32 @@ def search(sections: list[Section], query: str, limit: int = 40) -> list[Hit]:
     manual no dice nada del tema y contesta de conocimiento general.
 
     Por eso la segunda pasada no exige que estén TODOS los términos: ordena por
-    cuántos aparecen. Con el AND estricto, una sola palabra ajena a la sección
-    ("querría", "explicame") tira abajo la consulta entera, que es el mismo
-    problema con otra cara.
+    cuántos aparecen (y a igualdad por BM25). Con el AND estricto, una sola
+    palabra ajena a la sección ("querría", "explicame") tira abajo la consulta
+    entera, que es el mismo problema con otra cara.
+
+    Los términos matchean por PREFIJO de palabra, no como subcadena suelta:
+    "test" ya no encuentra "backtest". Es el precio del índice, y el que se
+    paga en cualquier buscador.
     """
-    q = normalize(query or "").strip()
-    if len(q) < 2:
+    return _hits(SearchIndex((s, s.title, s.body) for s in sections),
+                 query, limit, None)
+
+
+def search_visible(query: str, level: int, limit: int = 40) -> list[Hit]:
+    """`search` sobre el manual de disco filtrado por nivel, con el índice
+    cacheado: se arma una vez y se rearma solo cuando `load_sections` relee
+    los archivos. El filtro por rol corre sobre los candidatos, así que un
+    solo índice sirve a todos los roles."""
+    return _hits(_index(), query, limit, lambda s: s.min_level <= level)
+
+
+def _hits(index: SearchIndex, query: str, limit: int, accept) -> list[Hit]:
+    if len(normalize(query or "").strip()) < 2:
         return []
-    hits = _por_frase(sections, q)
-    if not hits:
-        hits = _por_terminos(sections, q)
-    return hits[:limit]
-
-
-def _por_frase(sections: list[Section], q: str) -> list[Hit]:
-    resultados: list[tuple[tuple, Hit]] = []
-    for s in sections:
-        titulo_norm = normalize(s.title)
-        cuerpo_norm = normalize(s.body)
-        en_titulo = q in titulo_norm
-        pos = cuerpo_norm.find(q)
-        if not en_titulo and pos < 0:
-            continue
-        resultados.append(((0 if en_titulo else 1, s.order),
-                           Hit(s, _snippet(s.body, pos))))
-    resultados.sort(key=lambda t: t[0])
-    return [hit for _, hit in resultados]
-
-
-def _por_terminos(sections: list[Section], q: str) -> list[Hit]:
-    """Las secciones que contienen alguno de los términos, las que más primero."""
-    terminos = {t for t in q.split()
-                if len(t) >= _TERMINO_MINIMO and t not in _VACIAS}
-    if not terminos or terminos == {q}:
-        return []                      # nada nuevo que probar: ya fue la frase
-
-    resultados: list[tuple[tuple, Hit]] = []
-    for s in sections:
-        titulo_norm = normalize(s.title)
-        cuerpo_norm = normalize(s.body)
-        presentes = {t for t in terminos
-                     if t in titulo_norm or t in cuerpo_norm}
-        if not presentes:
-            continue
-        en_titulo = any(t in titulo_norm for t in presentes)
-        posiciones = [p for p in (cuerpo_norm.find(t) for t in presentes) if p >= 0]
-        resultados.append(
-            ((-len(presentes), 0 if en_titulo else 1, s.order),
-             Hit(s, _snippet(s.body, min(posiciones) if posiciones else -1))))
-    resultados.sort(key=lambda t: t[0])
-    return [hit for _, hit in resultados]
+    return [Hit(m.key, _snippet(m.key.body, m.offset))
+            for m in index.search(query, limit=limit, accept=accept,
+                                  stopwords=_VACIAS, min_term=_TERMINO_MINIMO)]
 
 
 def _snippet(body: str, pos: int, radio: int = 90) -> str:
@@ -319,6 +295,9 @@ def _snippet(body: str, pos: int, radio: int = 90) -> str:
 
 _cache: list[Section] | None = None
 _cache_stamp: tuple[int, float] | None = None
+# El índice de búsqueda va atado a la lista que lo originó: si load_sections
+# devuelve otra (se releyó el disco), se rearma.
+_index_cache: tuple[list[Section], SearchIndex] | None = None
 
 
 def _stamp(directory: Path) -> tuple[int, float]:
@@ -374,7 +353,23 @@ def load_sections(directory: Path | None = None,
     return secciones
 
 
+def _index() -> SearchIndex:
+    global _index_cache
+    secciones = load_sections()
+    cached = _index_cache
+    if cached is None or cached[0] is not secciones:
+        cached = (secciones, SearchIndex((s, s.title, s.body) for s in secciones))
+        _index_cache = cached
+    return cached[1]
+
+
+def warm_index() -> int:
+    """Arma el índice de antemano (arranque) — la primera búsqueda no paga
+    la tokenización del manual entero. Devuelve las secciones indexadas."""
+    return len(_index())
+
+
 def clear_cache() -> None:
     """Invalida el cache (tests, o recarga manual tras editar el manual)."""
-    global _cache, _cache_stamp
-    _cache, _cache_stamp = None, None
+    global _cache, _cache_stamp, _index_cache
+    _cache, _cache_stamp, _index_cache = None, None, None
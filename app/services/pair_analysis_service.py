@@ -2,9 +2,6 @@ import numpy as np
 import pandas as pd
 from datetime import date as _date
 
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
 from app.components.ui_constants import PLOTLY_DARK as _DARK, PLOTLY_AXIS as _AXIS
 
 _C1 = "#60a5fa"
@@ -26,30 +23,29 @@ def get_pair_data(
     error:   str con mensaje o None si todo OK.
     """
     from app.database import get_session
-    from app.models import Asset, Price
+    from app.models import Asset
+    from app.services.correlation_service import load_closes
 
     s = get_session()
+    ids = list(dict.fromkeys((asset_id_1, asset_id_2)))
+    info = {aid: (tk, name) for aid, tk, name in
+            s.query(Asset.id, Asset.ticker, Asset.name).filter(Asset.id.in_(ids))}
+    # Una query de columnas para los dos (sin hidratar objetos Price): los
+    # cierres quedan alineados sobre la unión de fechas, NaN donde no cotiza.
+    closes = load_closes(s, ids, from_date, to_date)
 
     def _load(aid):
-        a = s.get(Asset, aid)
-        if not a:
+        if aid not in info:
             return None, None, None
-        label = f"{a.ticker}" + (f" — {a.name}" if a.name else "")
-        q = (
-            s.query(Price)
-            .filter(Price.asset_id == aid, Price.close.isnot(None))
-        )
-        if from_date:
-            q = q.filter(Price.date >= from_date)
-        if to_date:
-            q = q.filter(Price.date <= to_date)
-        rows = q.order_by(Price.date).all()
-        if not rows:
-            return label, a.ticker, None
-        df = pd.DataFrame({"date": [r.date for r in rows], "close": [r.close for r in rows]})
-        df["date"] = pd.to_datetime(df["date"])
-        df.set_index("date", inplace=True)
-        return label, a.ticker, df
+        ticker, name = info[aid]
+        label = f"{ticker}" + (f" — {name}" if name else "")
+        if aid not in closes.columns:
+            return label, ticker, None
+        col = closes[aid].dropna()
+        df = pd.DataFrame({"close": col.to_numpy()},
+                          index=pd.DatetimeIndex(pd.to_datetime(col.index),
+                                                 name="date"))
+        return label, ticker, df
 
     label1, ticker1, df1 = _load(asset_id_1)
     label2, ticker2, df2 = _load(asset_id_2)
@@ -71,8 +67,12 @@ def get_pair_data(
 
 
 def build_comparison_fig(df1: pd.DataFrame, df2: pd.DataFrame,
-                         label1: str, label2: str, log_scale: bool = False) -> go.Figure:
+                         label1: str, label2: str, log_scale: bool = False) -> "go.Figure":
     """Dos activos en el mismo gráfico con doble eje Y."""
+    # plotly adentro (ver app.core): el módulo lo importan procesos sin web
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     fig = make_subplots(specs=[[{"secondary_y": True}]])
 
     fig.add_trace(
@@ -104,8 +104,10 @@ def build_comparison_fig(df1: pd.DataFrame, df2: pd.DataFrame,
 
 
 def build_ratio_fig(merged: pd.DataFrame, label1: str, label2: str,
-                    log_scale: bool = False) -> go.Figure:
+                    log_scale: bool = False) -> "go.Figure":
     """Ratio (activo1 / activo2) en el tiempo con regresión lineal."""
+    import plotly.graph_objects as go
+
     ratio = merged["close_1"] / merged["close_2"]
 
     x_idx = np.arange(len(ratio))
@@ -0,0 +1,322 @@
+"""
+Escáner de pares de un grupo: todos contra todos en una pasada.
+
+La pantalla de pares analiza UN par elegido a mano; para encontrar candidatos
+en un sector había que probarlos de a uno. Acá el grupo (sector, industria,
+mercado o los miembros de un benchmark) se carga UNA vez como matriz densa de
+cierres — `correlation_service.load_closes`: fechas × activos sobre el
+calendario común — y cada estadística sale para todos los pares a la vez:
+
+- **z-score del ratio**: log(c1/c2) en la última fecha contra la media y el
+  desvío (muestral) del log-ratio en las últimas `z_window` fechas del
+  calendario. En log el par es simétrico: (B, A) da el z de (A, B) con el
+  signo cambiado.
+- **vida media del log-spread**: regresión AR(1) Δs_t = α + β·s_{t−1} sobre
+  toda la ventana; vida media = −ln 2 / ln(1 + β) ruedas si −1 < β < 0 (el
+  spread revierte), indefinida (NaN) si no.
+- **correlación y su estabilidad**: la de los log-retornos en toda la ventana
+  (`correlation_service.correlation_blocks`) y el desvío de esa misma
+  correlación entre `n_blocks` tramos consecutivos — un par que se movió
+  junto en un solo tramo tiene desvío alto.
+
+Huecos: los feriados de otra plaza dejan NaN en el calendario común y se
+rellenan con el último cierre hasta `FFILL_LIMIT` fechas. Huecos más largos
+quedan sin dato y cada par usa solo las fechas en que ambos tienen valor
+(pairwise-complete, como la matriz de correlación).
+
+Las sumas de cada par salen de productos de matrices con máscara, por bloques
+de filas de a lo sumo `_MAX_CELLS` celdas: con s_ij = a_i − a_j,
+Σ s_ij = Σ m_j·a_i − Σ m_i·a_j, y lo mismo con cuadrados y productos
+cruzados. Cada columna se centra antes por su propia media (el spread se
+corre una constante: ni el z ni la pendiente cambian). La memoria no crece
+con N²: `rank_pairs` se queda solo con los candidatos de cada bloque.
+tests/test_pair_scan_service.py lo compara con pandas par por par.
+
+El ranking deja los pares que revierten (vida media ≤ `MAX_HALF_LIFE`) con
+correlación ≥ `MIN_CORR`, ordenados por |z| — los más estirados primero —, y
+`scan` guarda los `TOP` mejores en pair_scan_result, de donde los lee la
+pantalla de pares.
+"""
+import logging
+import math
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.database import get_session
+from app.models import Asset, PairScanResult
+from app.services import correlation_service as cs
+
+logger = logging.getLogger(__name__)
+
+Z_WINDOW = 60            # fechas del z-score del ratio
+STABILITY_BLOCKS = 4     # tramos de la estabilidad de la correlación
+FFILL_LIMIT = 5          # fechas de hueco que se rellenan con el último cierre
+MIN_OBS = 60             # fechas en común mínimas para rankear un par
+MIN_CORR = 0.5           # correlación mínima de los log-retornos
+MAX_HALF_LIFE = 60.0     # vida media máxima (ruedas) para rankear
+TOP = 100                # pares que se guardan por grupo
+
+# Tope de celdas (activos del bloque × activos del grupo) de cada matriz
+# intermedia, como en correlation_service.
+_MAX_CELLS = cs._MAX_CELLS
+
+# Un spread cuya varianza queda por debajo de _VAR_EPS × (la de sus dos
+# patas) es el mismo activo salvo redondeo (p. ej. una clase de acciones y su
+# ADR a ratio fijo): z y vida media indefinidos.
+_VAR_EPS = 1e-12
+
+# Grupos que ofrece el escáner. "benchmark": los activos que lo tienen como
+# benchmark, directo o vía su mercado (evolution_service).
+SCAN_SCOPES = {
+    "sector":    ("Sector",    Asset.sector_id),
+    "industry":  ("Industria", Asset.industry_id),
+    "market":    ("Mercado",   Asset.market_id),
+    "benchmark": ("Benchmark", None),
+}
+
+
+# ── Grupos ────────────────────────────────────────────────────────────────────
+
+def group_ids(scope: str, group_id: int) -> list[int]:
+    """Activos del grupo, ordenados por id."""
+    if scope == "benchmark":
+        from app.services.evolution_service import get_assets_for_benchmark
+        return sorted(r["asset_id"] for r in get_assets_for_benchmark(group_id))
+    _, col = SCAN_SCOPES[scope]
+    s = get_session()
+    return sorted(r[0] for r in s.query(Asset.id).filter(col == group_id).all())
+
+
+def group_options(scope: str) -> list[dict]:
+    """Opciones {label, value} del selector de grupo de `scope`."""
+    if scope == "benchmark":
+        from app.services.evolution_service import get_benchmark_assets_options
+        return get_benchmark_assets_options()
+    from app.services import reference_service as ref
+    getter = {"sector": ref.get_sectors, "industry": ref.get_industries,
+              "market": ref.get_markets}[scope]
+    return [{"label": o.name, "value": o.id}
+            for o in sorted(getter(), key=lambda o: o.name or "")]
+
+
+# ── Kernel por bloques ────────────────────────────────────────────────────────
+
+def _centered(X):
+    """(X centrada por columna en sus valores válidos y 0 fuera, máscara en
+    float)."""
+    mask = np.isfinite(X)
+    m = mask.astype(float)
+    cnt = m.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(cnt > 0, np.nansum(X, axis=0) / np.maximum(cnt, 1), 0.0)
+    return np.where(mask, X - mean, 0.0), m
+
+
+def _diff_sum(X, Q, sl):
+    """Σ (x_i − x_j) de cada par (i en el bloque, j en todo el grupo) sobre
+    las filas donde ambos valen (X en 0 fuera de la máscara Q)."""
+    return X[:, sl].T @ Q - Q[:, sl].T @ X
+
+
+def _diff_cross(X, Y, XY, Q, sl):
+    """Σ (x_i − x_j)(y_i − y_j) de cada par, con XY = X·Y precalculado."""
+    return (XY[:, sl].T @ Q + Q[:, sl].T @ XY
+            - X[:, sl].T @ Y - Y[:, sl].T @ X)
+
+
+def _log_closes(closes):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(closes > 0, np.log(np.where(closes > 0, closes, 1.0)),
+                        np.nan)
+
+
+def pair_blocks(closes: np.ndarray, z_window: int = Z_WINDOW,
+                n_blocks: int = STABILITY_BLOCKS,
+                min_periods: int = cs.MIN_PERIODS, max_cells: int = _MAX_CELLS):
+    """Genera (inicio, {n_obs, zscore, half_life, corr, corr_std}) con las
+    filas [inicio, inicio+b) de cada matriz de pares de `closes` (T × N,
+    NaN = sin dato; ya alineados y rellenados). La fila i es el activo 1 del
+    par: zscore[i, j] es el de log(c_i / c_j)."""
+    t, n = closes.shape
+    L = _log_closes(closes)
+    bs = max(1, min(n, max_cells // max(n, 1)))
+
+    # Cantidad de fechas en común de toda la ventana
+    m_all = np.isfinite(L).astype(float)
+
+    # z-score: la ventana corta centrada por su cuenta
+    zw = max(1, min(int(z_window), t))
+    a_w, m_w = _centered(L[t - zw:])
+    a_w2 = a_w * a_w
+    v_w = a_w2.sum(axis=0) / np.maximum(m_w.sum(axis=0), 1)
+    last_ok = m_w[-1] > 0
+    min_z = max(3, zw // 2)
+
+    # AR(1) del spread: x = s_{t−1}, y = Δs_t, donde ambos cotizan en t y t−1
+    a, m = _centered(L)
+    q = m[1:] * m[:-1]
+    X = np.where(q > 0, a[:-1], 0.0)
+    Y = np.where(q > 0, a[1:] - a[:-1], 0.0)
+    XX, XY = X * X, X * Y
+    v_x = XX.sum(axis=0) / np.maximum(q.sum(axis=0), 1)
+
+    # Correlación de log-retornos: toda la ventana y por tramos
+    R = L[1:] - L[:-1]
+    cells = bs * n
+    full = cs.correlation_blocks(R, min_periods, max_cells=cells)
+    parts = [cs.correlation_blocks(Rk, max(3, min_periods // n_blocks),
+                                   max_cells=cells)
+             for Rk in np.array_split(R, max(1, int(n_blocks))) if len(Rk)]
+
+    ln2 = math.log(2.0)
+    for s0 in range(0, n, bs):
+        sl = slice(s0, min(s0 + bs, n))
+        n_obs = m_all[:, sl].T @ m_all
+
+        cnt = m_w[:, sl].T @ m_w
+        s1 = _diff_sum(a_w, m_w, sl)
+        s2 = _diff_cross(a_w, a_w, a_w2, m_w, sl)
+        last = a_w[-1, sl][:, None] - a_w[-1][None, :]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = s1 / cnt
+            var = (s2 - s1 * mean) / (cnt - 1)
+            sd = np.sqrt(np.maximum(var, 0.0))
+            floor = _VAR_EPS * (v_w[sl, None] + v_w[None, :])
+            ok = ((cnt >= min_z) & (var > floor)
+                  & last_ok[sl][:, None] & last_ok[None, :])
+            z = np.where(ok, (last - mean) / np.where(ok, sd, 1.0), np.nan)
+
+        nq = q[:, sl].T @ q
+        sx = _diff_sum(X, q, sl)
+        sy = _diff_sum(Y, q, sl)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cxx = _diff_cross(X, X, XX, q, sl) - sx * sx / nq
+            cxy = _diff_cross(X, Y, XY, q, sl) - sx * sy / nq
+            floor = _VAR_EPS * (v_x[sl, None] + v_x[None, :])
+            beta = np.where((nq >= 3) & (cxx > nq * floor),
+                            cxy / np.where(cxx > 0, cxx, 1.0), np.nan)
+            rev = (beta > -1) & (beta < 0)
+            hl = np.where(rev, -ln2 / np.log1p(np.where(rev, beta, -0.5)),
+                          np.nan)
+
+        _, corr = next(full)
+        corr_std = _spread(np.stack([next(p)[1] for p in parts])) \
+            if parts else np.full_like(corr, np.nan)
+
+        yield s0, {"n_obs": n_obs, "zscore": z, "half_life": hl,
+                   "corr": corr, "corr_std": corr_std}
+
+
+def _spread(blocks):
+    """Desvío (poblacional) entre tramos de cada par, con al menos dos tramos
+    con correlación; NaN si no."""
+    fin = np.isfinite(blocks)
+    cnt = fin.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mu = np.where(fin, blocks, 0.0).sum(axis=0) / cnt
+        dev = np.where(fin, blocks - mu, 0.0)
+        sd = np.sqrt((dev * dev).sum(axis=0) / cnt)
+    return np.where(cnt >= 2, sd, np.nan)
+
+
+def align(closes: pd.DataFrame) -> pd.DataFrame:
+    """Rellena los huecos cortos del calendario común (hasta FFILL_LIMIT
+    fechas) con el último cierre de cada activo."""
+    return closes.ffill(limit=FFILL_LIMIT)
+
+
+def rank_pairs(closes: pd.DataFrame, top: int = TOP, **kw) -> list[dict]:
+    """Los `top` mejores pares de la matriz de cierres (fechas × activos, ya
+    alineada): [{asset_id_1, asset_id_2, zscore, half_life, corr, corr_std,
+    n_obs}] de mayor a menor |z|. Cada par aparece una vez, con el activo de
+    menor posición como activo 1."""
+    ids = list(closes.columns)
+    n = len(ids)
+    if n < 2:
+        return []
+    found = []
+    for s0, b in pair_blocks(closes.to_numpy(dtype=float), **kw):
+        rows = np.arange(s0, s0 + len(b["zscore"]))[:, None]
+        keep = ((np.arange(n)[None, :] > rows)
+                & np.isfinite(b["zscore"]) & (b["n_obs"] >= MIN_OBS)
+                & (b["half_life"] <= MAX_HALF_LIFE)
+                & (b["corr"] >= MIN_CORR))
+        for i, j in zip(*np.nonzero(keep)):
+            found.append((s0 + int(i), int(j),
+                          {k: float(v[i, j]) for k, v in b.items()}))
+    found.sort(key=lambda f: (-abs(f[2]["zscore"]), -f[2]["corr"], f[0], f[1]))
+    return [{"asset_id_1": ids[i], "asset_id_2": ids[j],
+             "zscore": st["zscore"], "half_life": st["half_life"],
+             "corr": st["corr"],
+             "corr_std": st["corr_std"] if math.isfinite(st["corr_std"]) else None,
+             "n_obs": int(st["n_obs"])}
+            for i, j, st in found[:top]]
+
+
+# ── Escaneo y persistencia ────────────────────────────────────────────────────
+
+def scan(scope: str, group_id: int, date_from=None, date_to=None,
+         top: int = TOP) -> dict | None:
+    """Escanea el grupo en la ventana (por defecto el último año), reemplaza
+    su ranking guardado y lo devuelve como `ranked` (rows=[] si ningún par
+    pasó los filtros)."""
+    if date_to is None and date_from is None:
+        date_to = date.today()
+        date_from = date_to - timedelta(days=cs.DEFAULT_WINDOW_DAYS)
+    t0 = time.perf_counter()
+    s = get_session()
+    ids = group_ids(scope, group_id)
+    closes = align(cs.load_closes(s, ids, date_from, date_to))
+    rows = rank_pairs(closes, top=top)
+    logger.info("Escáner de pares %s=%s: %d activos × %d fechas → %d pares "
+                "en %.2fs", scope, group_id, closes.shape[1], closes.shape[0],
+                len(rows), time.perf_counter() - t0)
+    save(s, scope, group_id, rows, date_from, date_to)
+    return ranked(scope, group_id) or {
+        "computed_at": datetime.utcnow(), "date_from": date_from,
+        "date_to": date_to, "rows": []}
+
+
+def save(s, scope, group_id, rows, date_from=None, date_to=None) -> None:
+    """Reemplaza el ranking guardado del grupo. Commitea."""
+    s.query(PairScanResult).filter(PairScanResult.scope == scope,
+                                   PairScanResult.group_id == group_id) \
+        .delete(synchronize_session=False)
+    now = datetime.utcnow()
+    s.add_all([PairScanResult(scope=scope, group_id=group_id, rank=k,
+                              date_from=date_from, date_to=date_to,
+                              computed_at=now, **row)
+               for k, row in enumerate(rows, start=1)])
+    s.commit()
+
+
+def ranked(scope: str, group_id: int) -> dict | None:
+    """El último ranking guardado del grupo: {computed_at, date_from,
+    date_to, rows: [{rank, asset_id_1, ticker_1, asset_id_2, ticker_2, …}]}.
+    None si no hay (nunca se escaneó o el escaneo no dejó pares)."""
+    s = get_session()
+    rows = (s.query(PairScanResult)
+            .filter(PairScanResult.scope == scope,
+                    PairScanResult.group_id == group_id)
+            .order_by(PairScanResult.rank).all())
+    if not rows:
+        return None
+    ids = {r.asset_id_1 for r in rows} | {r.asset_id_2 for r in rows}
+    tickers = dict(s.query(Asset.id, Asset.ticker).filter(Asset.id.in_(ids)))
+    first = rows[0]
+    return {
+        "computed_at": first.computed_at,
+        "date_from": first.date_from,
+        "date_to": first.date_to,
+        "rows": [{"rank": r.rank,
+                  "asset_id_1": r.asset_id_1,
+                  "ticker_1": tickers.get(r.asset_id_1, str(r.asset_id_1)),
+                  "asset_id_2": r.asset_id_2,
+                  "ticker_2": tickers.get(r.asset_id_2, str(r.asset_id_2)),
+                  "zscore": r.zscore, "half_life": r.half_life,
+                  "corr": r.corr, "corr_std": r.corr_std, "n_obs": r.n_obs}
+                 for r in rows],
+    }
@@ -135,54 +135,64 @@ def run_portfolio_backtest(strategy_id, spec, *, top_n, rebalance_every=1,
                            cost_bps=0.0, progress_cb=None):
     """Corre el backtest de cartera (nivel C) sobre el universo de la estrategia.
 
-    Devuelve {'dates', 'ranking', 'gated', 'benchmark_ew'}, donde cada sub-modo
-    trae {'equity': [...], **métricas de portfolio_metrics.summary}. `spec` son
-    las reglas del simulador (para la elegibilidad del sub-modo gated).
+    Devuelve {'dates', 'ranking', 'gated', 'benchmark_ew', 'rules'}, donde
+    cada sub-modo trae {'equity': [...], **métricas de
+    portfolio_metrics.summary} y 'rules' los trades cerrados de las reglas por
+    activo (para robustness_service). `spec` son las reglas del simulador
+    (para la elegibilidad del sub-modo gated).
     """
     import sqlalchemy as sa
 
     from app.database import get_session
     from app.models import signal_store
-    from app.services import portfolio_metrics as pm
     from app.services import portfolio_sim_engine as eng
+    from app.services import query_stats_service as qs
     from app.services.trade_simulator import simulate_trades
 
     s = get_session()
-    rt = signal_store.read_strat_table(s, strategy_id)
-    asset_ids = sorted(r[0] for r in s.execute(
-        sa.select(rt.c.asset_id).where(rt.c.score.isnot(None)).distinct()).all())
-    if not asset_ids:
-        raise ValueError(
-            "La estrategia no tiene historia calculada. Corré 'Recalcular "
-            "completo' en Centro de Datos → Señales y Estrategias.")
-
-    raw = _load_raw(s, rt, asset_ids, progress_cb=progress_cb)
-    per_asset = {}
-    for aid, r in raw.items():
-        trades = simulate_trades(r["closes"], r["scores"], spec,
-                                 percentiles=r["pcts"])
-        per_asset[aid] = {"dates": r["dates"], "closes": r["closes"],
-                          "scores": r["scores"],
-                          "in_position": _in_position(trades, len(r["closes"]))}
-
-    dates, scores_by_date, rets_by_date, eligible_by_date = build_panels(per_asset)
-
-    ranking = eng.simulate_topn(dates, scores_by_date, rets_by_date,
-                                top_n=top_n, rebalance_every=rebalance_every,
-                                cost_bps=cost_bps)
-    gated = eng.simulate_gated(dates, scores_by_date, eligible_by_date,
-                               rets_by_date, top_n=top_n,
-                               rebalance_every=rebalance_every, cost_bps=cost_bps)
-    bench = eng.simulate_topn(dates, scores_by_date, rets_by_date,
-                              top_n=10 ** 9, rebalance_every=rebalance_every,
-                              cost_bps=0.0)
-
-    def _pack(res):
-        return {"equity": res["equity"],
-                **pm.summary(res["equity"], dates=dates)}
-
-    return {"dates": dates, "ranking": _pack(ranking), "gated": _pack(gated),
-            "benchmark_ew": _pack(bench)}
+    with qs.phase("bt:scores"):
+        rt = signal_store.read_strat_table(s, strategy_id)
+        asset_ids = sorted(r[0] for r in s.execute(
+            sa.select(rt.c.asset_id).where(rt.c.score.isnot(None)).distinct()).all())
+        if not asset_ids:
+            raise ValueError(
+                "La estrategia no tiene historia calculada. Corré 'Recalcular "
+                "completo' en Centro de Datos → Señales y Estrategias.")
+
+        raw = _load_raw(s, rt, asset_ids, progress_cb=progress_cb)
+    with qs.phase("bt:simulación"):
+        per_asset = {}
+        rules = {"closes": [], "trades": []}
+        for aid, r in raw.items():
+            trades = simulate_trades(r["closes"], r["scores"], spec,
+                                     percentiles=r["pcts"])
+            per_asset[aid] = {"dates": r["dates"], "closes": r["closes"],
+                              "scores": r["scores"],
+                              "in_position": _in_position(trades, len(r["closes"]))}
+            # Los trades de las reglas, para el análisis de robustez al
+            # guardar (robustness_service): (activo, entrada, salida, ret,
+            # fecha de entrada) — la fecha ordena la secuencia cronológica.
+            k = len(rules["closes"])
+            rules["closes"].append(r["closes"])
+            rules["trades"].extend((k, t["entry_idx"], t["exit_idx"], t["ret"],
+                                    r["dates"][t["entry_idx"]])
+                                   for t in trades if t["exit_idx"] is not None)
+
+        dates, scores_by_date, rets_by_date, eligible_by_date = build_panels(per_asset)
+
+        ranking = eng.simulate_topn(dates, scores_by_date, rets_by_date,
+                                    top_n=top_n, rebalance_every=rebalance_every,
+                                    cost_bps=cost_bps)
+        gated = eng.simulate_gated(dates, scores_by_date, eligible_by_date,
+                                   rets_by_date, top_n=top_n,
+                                   rebalance_every=rebalance_every, cost_bps=cost_bps)
+        bench = eng.simulate_topn(dates, scores_by_date, rets_by_date,
+                                  top_n=10 ** 9, rebalance_every=rebalance_every,
+                                  cost_bps=0.0)
+
+        ranking, gated, bench = _pack(dates, ranking, gated, bench)
+        return {"dates": dates, "ranking": ranking, "gated": gated,
+                "benchmark_ew": bench, "rules": rules}
 
 
 def run_draft_portfolio_backtest(score_rows, *, top_n, rebalance_every=1,
@@ -203,7 +213,6 @@ def run_draft_portfolio_backtest(score_rows, *, top_n, rebalance_every=1,
 
     from app.database import get_session
     from app.models import Price
-    from app.services import portfolio_metrics as pm
     from app.services import portfolio_sim_engine as eng
 
     filas = list(score_rows)
@@ -270,12 +279,19 @@ def run_draft_portfolio_backtest(score_rows, *, top_n, rebalance_every=1,
                               top_n=10 ** 9, rebalance_every=rebalance_every,
                               cost_bps=0.0)
 
-    def _pack(res):
-        return {"equity": res["equity"],
-                **pm.summary(res["equity"], dates=dates)}
+    ranking, bench = _pack(dates, ranking, bench)
+    return {"dates": dates, "ranking": ranking, "benchmark_ew": bench}
+
 
-    return {"dates": dates, "ranking": _pack(ranking),
-            "benchmark_ew": _pack(bench)}
+def _pack(dates, *results):
+    """{equity, **KPIs} de cada curva del motor. Comparten `dates` → se
+    resumen juntas en una pasada matricial (== pm.summary de cada una)."""
+    from app.services import portfolio_metrics_matrix as pmm
+    equities = [res["equity"] for res in results]
+    E, mask = pmm.stack(equities)
+    dts = dates if E.shape[1] == len(dates) else None
+    return [{"equity": eq, **kpis}
+            for eq, kpis in zip(equities, pmm.summary_many(E, dts, mask))]
 
 
 def curated_equity_series(session, portfolio_id):
@@ -375,10 +391,13 @@ _SUBMODES = (("gated", "gated"), ("ranking", "ranking"),
 def save_portfolio_run(session, owner_id, strategy_id, name, config, result):
     """Persiste una corrida de cartera (result de run_portfolio_backtest) como
     snapshot inmutable: portfolio_run (config + KPIs) + puntos de equity por
-    sub-modo. Devuelve el PortfolioRun."""
+    sub-modo. El análisis de robustez (robustness_service, fail-open) queda
+    corriendo en un thread de fondo: no cuelga el guardado.
+    Devuelve el PortfolioRun."""
     import json
 
     from app.models import PortfolioRun, PortfolioRunPoint
+    from app.services import robustness_service
 
     def _kpis(d):
         return {k: d.get(k) for k in ("total_return", "cagr", "sharpe",
@@ -395,6 +414,7 @@ def save_portfolio_run(session, owner_id, strategy_id, name, config, result):
     if points:
         session.bulk_insert_mappings(PortfolioRunPoint, points)
     session.commit()
+    robustness_service.start_for_run(session, run.id, result)
     return run
 
 
@@ -529,11 +549,18 @@ def _wf_score(equity):
     consistencia, no sólo retorno crudo — que favorece la config más suelta que
     montó la mayor tendencia, sin mirar el riesgo. Equity vacía/degenerada (o vol
     cero → Sharpe indefinido) → -inf (nunca elegida)."""
+    return _wf_scores([equity])[0]
+
+
+def _wf_scores(equities):
+    """_wf_score de toda la grilla de una ventana en una pasada matricial
+    (portfolio_metrics_matrix): las curvas comparten fechas, así que es una
+    matriz configs × ruedas."""
     from app.services import portfolio_metrics as pm
-    if not equity or len(equity) < 2:
-        return float("-inf")
-    sh = pm.sharpe(pm.returns_from_equity(equity), 0.0, pm.TRADING_DAYS)
-    return sh if sh is not None else float("-inf")
+    from app.services import portfolio_metrics_matrix as pmm
+    E, mask = pmm.stack(equities)
+    return [sh if sh is not None else float("-inf")
+            for sh in pmm.sharpe_many(E, mask, 0.0, pm.TRADING_DAYS)]
 
 
 def _load_raw(session, rt, asset_ids, progress_cb=None):
@@ -637,7 +664,7 @@ def walk_forward(session, strategy_id, base_spec, *, topn_grid=(10, 20, 30),
         # se recomputa por trailing. top_n se varía con simulate_gated (barato).
         base = _range_slice(per_asset_raw, tr_from, tr_to)
         dts, scores_bd, rets_bd = _score_ret_panels(base)
-        best = None   # (obj, top_n, trailing, train_eq, train_dates)
+        grid = []     # (top_n, trailing, train_eq), en orden de la grilla
         for trail in trail_grid:
             spec = _spec_with_trailing(base_spec, trail)
             elig_bd = _eligible_for_spec(base, spec, dts)
@@ -645,10 +672,13 @@ def walk_forward(session, strategy_id, base_spec, *, topn_grid=(10, 20, 30),
                 res = eng.simulate_gated(
                     dts, scores_bd, elig_bd, rets_bd, top_n=tn,
                     rebalance_every=rebalance_every, cost_bps=cost_bps)
-                eq = res["equity"]
-                obj = _wf_score(eq)          # Sharpe del train (risk-adjusted)
-                if best is None or obj > best[0]:
-                    best = (obj, tn, trail, eq, dts)
+                grid.append((tn, trail, res["equity"]))
+        # Sharpe del train (risk-adjusted) de toda la grilla junta; ante empate
+        # gana la primera config, como con el loop escalar.
+        best = None   # (obj, top_n, trailing, train_eq, train_dates)
+        for obj, (tn, trail, eq) in zip(_wf_scores([g[2] for g in grid]), grid):
+            if best is None or obj > best[0]:
+                best = (obj, tn, trail, eq, dts)
         _obj, tn, trail, tr_eq, tr_dts = best
         spec = _spec_with_trailing(base_spec, trail)
         td, teq = _gated_equity_range(per_asset_raw, spec, tn, te_from, te_to,
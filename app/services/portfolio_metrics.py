@@ -22,6 +22,8 @@ aplican aguas arriba (en el servicio que arma la serie o los trades), no acá.
 from math import sqrt
 from statistics import mean, stdev
 
+from app.services import drawdown_kernel
+
 TRADING_DAYS = 252  # ruedas por año (anualización por defecto)
 
 
@@ -122,13 +124,7 @@ def sortino(returns, risk_free=0.0, periods_per_year=TRADING_DAYS):
 
 def drawdown_series(equity):
     """Serie underwater: en cada punto, valor/pico_hasta_ahora − 1 (<= 0)."""
-    out = []
-    peak = None
-    for v in equity:
-        if peak is None or v > peak:
-            peak = v
-        out.append(v / peak - 1 if peak and peak > 0 else 0.0)
-    return out
+    return drawdown_kernel.underwater(equity).tolist()
 
 
 def max_drawdown(equity):
@@ -140,23 +136,30 @@ def max_drawdown(equity):
     - trough_idx: índice del valle (mdd).
     - recovery_idx: primer índice tras el valle que recupera el pico (o None si
       no se recuperó dentro de la serie).
+
+    Sale del episodio más hondo de drawdown_kernel.episodes; sin episodios la
+    curva nunca cae bajo su pico y el "valle" es el primer punto.
     """
     if len(equity) < 2:
         return None
-    dd = drawdown_series(equity)
-    trough_idx = min(range(len(dd)), key=lambda i: dd[i])
-    peak_idx = max(range(trough_idx + 1), key=lambda i: equity[i])
-    peak_val = equity[peak_idx]
-    recovery_idx = None
-    for i in range(trough_idx + 1, len(equity)):
-        if equity[i] >= peak_val:
-            recovery_idx = i
-            break
+    ep = drawdown_kernel.episodes(equity)
+    dd = [equity[t] / equity[p] - 1 for p, t in zip(ep["peak"], ep["trough"])]
+    if not dd or min(dd) >= 0:
+        first = equity[0]
+        return {
+            "mdd": 0.0,
+            "peak_idx": 0,
+            "trough_idx": 0,
+            "recovery_idx": next((i for i in range(1, len(equity))
+                                  if equity[i] >= first), None),
+        }
+    j = dd.index(min(dd))
+    recovery = int(ep["recovery"][j])
     return {
-        "mdd": dd[trough_idx],
-        "peak_idx": peak_idx,
-        "trough_idx": trough_idx,
-        "recovery_idx": recovery_idx,
+        "mdd": dd[j],
+        "peak_idx": int(ep["peak"][j]),
+        "trough_idx": int(ep["trough"][j]),
+        "recovery_idx": recovery if recovery >= 0 else None,
     }
 
 
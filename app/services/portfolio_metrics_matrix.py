@@ -0,0 +1,232 @@
+"""
+Métricas de cartera para muchas curvas de equity a la vez.
+
+portfolio_metrics resuelve UNA curva con loops de Python sobre listas; el
+walk-forward (la grilla top_n × trailing de cada ventana), el nivel C (tres
+curvas sobre las mismas fechas) y los KPIs por tramo de la IA
+(app/ai/tools/cartera._por_tramos) lo llaman muchas veces por pedido. Acá la
+entrada es una matriz curvas × fechas y cada métrica sale para todas las
+curvas en una pasada de numpy.
+
+`mask` (mismo shape, opcional) marca qué puntos pertenecen a cada curva —
+tramos de una misma grilla de fechas, curvas de largo distinto (ver
+`stack`). Cada fila se comprime a sus puntos válidos, en orden, y el
+resultado es el de portfolio_metrics sobre esa lista:
+
+    summary_many(E, dates, mask)[i] == pm.summary(list(E[i][mask[i]]),
+                                                  dates=list(dates[mask[i]]))
+
+Lo elemento a elemento (retornos, drawdown, total_return, CAGR, la matriz
+mensual, los índices del máximo drawdown) da los MISMOS floats. Las medias y
+desvíos difieren a lo sumo en el último bit: statistics.mean/stdev suman con
+aritmética exacta y numpy no; los casos de borde (desvío exactamente 0, sin
+retornos negativos) se deciden igual que en la versión escalar.
+tests/test_portfolio_metrics_matrix.py la guarda como oráculo.
+
+Misma convención que portfolio_metrics: lo no computable es None, nunca inf
+ni NaN. Sin trades: las métricas de operaciones siguen siendo escalares.
+"""
+from math import sqrt
+
+import numpy as np
+
+from app.services import drawdown_kernel
+from app.services.portfolio_metrics import TRADING_DAYS
+
+
+# ── Entrada ───────────────────────────────────────────────────────────────────
+
+def stack(curves) -> tuple[np.ndarray, np.ndarray]:
+    """Curvas de largo distinto → (matriz alineada a izquierda con NaN de
+    relleno, máscara de puntos válidos)."""
+    n = max((len(c) for c in curves), default=0)
+    E = np.full((len(curves), n), np.nan)
+    mask = np.zeros((len(curves), n), dtype=bool)
+    for i, c in enumerate(curves):
+        E[i, :len(c)] = c
+        mask[i, :len(c)] = True
+    return E, mask
+
+
+def _compress(equity, mask):
+    """(E, pos, lens): cada fila con sus puntos válidos corridos a la
+    izquierda (NaN de relleno), las columnas originales de cada uno y el
+    largo de cada curva."""
+    E = np.atleast_2d(np.asarray(equity, dtype=float))
+    k, n = E.shape
+    if mask is None:
+        return E, np.broadcast_to(np.arange(n), (k, n)), np.full(k, n)
+    mask = np.atleast_2d(np.asarray(mask, dtype=bool))
+    pos = np.argsort(~mask, axis=1, kind="stable")
+    lens = mask.sum(axis=1)
+    E = np.take_along_axis(E, pos, axis=1)
+    E[np.arange(n) >= lens[:, None]] = np.nan
+    return E, pos, lens
+
+
+def _returns(E, lens):
+    """(R, ok): retornos período a período y dónde existen — dentro de la
+    curva y con denominador no nulo (returns_from_equity da None ahí)."""
+    n = E.shape[1]
+    if n < 2:
+        return np.empty((len(E), 0)), np.zeros((len(E), 0), dtype=bool)
+    prev, cur = E[:, :-1], E[:, 1:]
+    ok = (np.arange(1, n) < lens[:, None]) & (prev != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        R = np.where(ok, cur / np.where(ok, prev, 1.0) - 1, np.nan)
+    return R, ok
+
+
+def _col(v, ok) -> list:
+    return [float(x) if good else None for x, good in zip(v, ok)]
+
+
+# ── Riesgo / retorno ──────────────────────────────────────────────────────────
+
+def _moments(R, ok, risk_free, periods_per_year):
+    """(excess, cnt, mean, constante) de los retornos válidos."""
+    excess = np.where(ok, R - risk_free / periods_per_year, np.nan)
+    cnt = ok.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mu = np.nansum(excess, axis=1) / cnt
+    # Desvío exactamente 0 ⇔ todos iguales: se decide sin pasar por la suma.
+    hi = np.where(ok, excess, -np.inf).max(axis=1, initial=-np.inf)
+    lo = np.where(ok, excess, np.inf).min(axis=1, initial=np.inf)
+    return excess, cnt, mu, hi == lo
+
+
+def _stdev(excess, cnt, mu):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dev = np.where(np.isnan(excess), 0.0, excess - mu[:, None])
+        return np.sqrt((dev * dev).sum(axis=1) / (cnt - 1))
+
+
+def _risk(R, ok, risk_free, periods_per_year) -> dict:
+    ann = sqrt(periods_per_year)
+    enough = ok.sum(axis=1) >= 2
+    # volatilidad: sin risk_free (annualized_volatility)
+    raw, cnt, mu0, flat0 = _moments(R, ok, 0.0, periods_per_year)
+    vol = np.where(flat0, 0.0, _stdev(raw, cnt, mu0) * ann)
+    excess, cnt, mu, flat = _moments(R, ok, risk_free, periods_per_year)
+    sd = _stdev(excess, cnt, mu)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sh = mu / sd * ann
+        neg = np.where(excess < 0, excess, 0.0)
+        has_neg = (excess < 0).any(axis=1)
+        dd = np.sqrt((neg * neg).sum(axis=1) / cnt)
+        so = mu / dd * ann
+    return {
+        "volatility": _col(vol, enough),
+        "sharpe": _col(sh, enough & ~flat),
+        "sortino": _col(so, enough & has_neg & (dd != 0)),
+    }
+
+
+def sharpe_many(equity, mask=None, risk_free=0.0,
+                periods_per_year=TRADING_DAYS) -> list:
+    """pm.sharpe(pm.returns_from_equity(curva)) de cada fila."""
+    E, _pos, lens = _compress(equity, mask)
+    R, ok = _returns(E, lens)
+    return _risk(R, ok, risk_free, periods_per_year)["sharpe"]
+
+
+# ── Drawdown ──────────────────────────────────────────────────────────────────
+
+def drawdown_many(equity, mask=None) -> np.ndarray:
+    """drawdown_series de cada fila (comprimida; NaN fuera de la curva)."""
+    E, _pos, lens = _compress(equity, mask)
+    return _drawdown(E, lens)
+
+
+def _drawdown(E, lens):
+    inside = np.arange(E.shape[1]) < lens[:, None]
+    return np.where(inside, drawdown_kernel.underwater(E), np.nan)
+
+
+def max_drawdown_many(equity, mask=None) -> list:
+    """max_drawdown de cada fila: {mdd, peak_idx, trough_idx, recovery_idx}
+    (índices dentro de la curva comprimida) o None con <2 puntos."""
+    E, _pos, lens = _compress(equity, mask)
+    return _max_drawdown(E, lens, _drawdown(E, lens))
+
+
+def _max_drawdown(E, lens, dd) -> list:
+    n = E.shape[1]
+    idx = np.arange(n)
+    trough = np.argmin(np.where(np.isnan(dd), np.inf, dd), axis=1)
+    before = idx <= trough[:, None]
+    peak = np.argmax(np.where(before, E, -np.inf), axis=1)
+    peak_val = E[np.arange(len(E)), peak]
+    after = ((idx > trough[:, None]) & (idx < lens[:, None])
+             & (E >= peak_val[:, None]))
+    rec = np.argmax(after, axis=1)
+    out = []
+    for i in range(len(E)):
+        if lens[i] < 2:
+            out.append(None)
+            continue
+        out.append({"mdd": float(dd[i, trough[i]]), "peak_idx": int(peak[i]),
+                    "trough_idx": int(trough[i]),
+                    "recovery_idx": int(rec[i]) if after[i].any() else None})
+    return out
+
+
+# ── Matriz mensual ────────────────────────────────────────────────────────────
+
+def _monthly(R, ok, pos, dates) -> list:
+    """monthly_return_matrix de cada fila: producto secuencial por mes (mismo
+    orden de multiplicación que la versión escalar, así que mismos floats)."""
+    keys = np.array([d.year * 12 + d.month - 1 for d in dates], dtype=np.int64)
+    out = []
+    for i in range(len(R)):
+        sel = ok[i]
+        if not sel.any():
+            out.append({})
+            continue
+        k = keys[pos[i, 1:][sel]]
+        f = 1 + R[i][sel]
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        prods = np.multiply.reduceat(f, starts)
+        matrix: dict = {}
+        for key, p in zip(k[starts], prods):
+            matrix.setdefault(int(key // 12), {})[int(key % 12) + 1] = float(p - 1)
+        out.append(matrix)
+    return out
+
+
+# ── Resumen ───────────────────────────────────────────────────────────────────
+
+def summary_many(equity, dates=None, mask=None, periods_per_year=TRADING_DAYS,
+                 risk_free=0.0) -> list[dict]:
+    """pm.summary (sin trades) de cada fila. `dates`: una por columna."""
+    E, pos, lens = _compress(equity, mask)
+    dated = dates is not None and len(dates) == E.shape[1]
+    if E.shape[1] == 0:
+        E, pos = np.full((len(E), 1), np.nan), np.zeros((len(E), 1), dtype=int)
+    R, ok = _returns(E, lens)
+    risk = _risk(R, ok, risk_free, periods_per_year)
+    mdd = _max_drawdown(E, lens, _drawdown(E, lens))
+    monthly = _monthly(R, ok, pos, dates) if dated else None
+    first = E[:, 0]
+    last = E[np.arange(len(E)), np.maximum(lens - 1, 0)]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tr = last / first - 1
+    tr_ok = (lens >= 2) & (first != 0)
+    out = []
+    for i in range(len(E)):
+        total = float(tr[i]) if tr_ok[i] else None
+        years = None
+        if dated and lens[i] >= 2:
+            days = (dates[pos[i, lens[i] - 1]] - dates[pos[i, 0]]).days
+            years = days / 365.25 if days > 0 else None
+        g = None
+        if total is not None and years is not None and (1 + total) > 0:
+            g = (1 + total) ** (1.0 / years) - 1
+        row = {"total_return": total, "cagr": g,
+               "volatility": risk["volatility"][i], "sharpe": risk["sharpe"][i],
+               "sortino": risk["sortino"][i],
+               "max_drawdown": mdd[i]["mdd"] if mdd[i] else None}
+        if dated and lens[i]:
+            row["monthly_returns"] = monthly[i] if lens[i] >= 2 else None
+        out.append(row)
+    return out
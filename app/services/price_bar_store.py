@@ -0,0 +1,359 @@
+"""
+Barras semanales y mensuales persistidas (prices_weekly / prices_monthly).
+
+El pipeline de indicadores (backfill y vigentes), backfill_asset_history, la
+verificación y el RRG resampleaban la historia diaria COMPLETA de cada activo
+a W y M en cada corrida (technical_service._resample_ohlc) — a 10.000 activos
+con décadas de historia, un `resample` de pandas por activo y temporalidad
+que daba siempre lo mismo salvo en la última barra.
+
+Ahora las barras se guardan:
+
+- las escrituras de precios (price_service._upsert_prices y el camino común
+  de los sintéticos) llaman a `refresh_from` / `refresh_rows` con la
+  primera fecha escrita: se reescriben solo la barra que la contiene (la
+  abierta, en el delta diario) y las posteriores, leyendo de `prices` desde
+  el inicio de esa barra — para muchos activos, por tandas: una lectura, un
+  DELETE por temporalidad y un INSERT multi-fila por tanda. Una historia
+  reemplazada o recién creada entera se resamplea de las filas escritas, sin
+  releer;
+- los lectores (`load` para un lote, `bars_for` para un activo) verifican
+  cada activo contra la marca de agua de sus precios — (cantidad de closes,
+  última fecha, suma de closes), la de forward_return_store — que en las
+  barras es la suma de n_days/close_sum y el máximo de last_day. Lo que no
+  coincide (activo nunca guardado, precios escritos por fuera de los caminos
+  de arriba, una barra vieja que sobró) se resamplea del diario y se
+  reescribe entero: la tabla se arma y se corrige sola. La marca no mira
+  high/low: una edición por fuera de esos caminos que cambie SOLO high o low
+  (SQL a mano) deja las barras viejas hasta el próximo `rebuild` o la
+  próxima escritura del activo;
+- `rebuild` la rearma desde `prices` (mismo resultado que leer con la tabla
+  vacía), y el "Recalcular completo" de indicadores la reescribe con los
+  frames que ya tiene en memoria (load(rebuild=True)).
+
+close/high/low y la etiqueta de cada barra son EXACTAMENTE los de
+_resample_ohlc (tests/test_price_bar_store.py la guarda como oráculo). Los
+vigentes usan la ventana reciente del diario (_derive_recent_caches), cuyo
+resample tiene la primera barra recortada: `window` recalcula solo esa barra
+y toma el resto de lo guardado.
+
+Fuera de alcance: el modo quick de compute_current_indicators (resamplea una
+cola corta que ya leyó, sin historia para verificar la marca) y los gráficos,
+que resamplean en el navegador y cuyos overlays ya están persistidos
+(chart_zone_store).
+
+Es caché derivado: si la tabla no se puede leer o escribir (migración
+pendiente) todo se resamplea del diario como antes, con un warning.
+
+Nunca commitea ni hace rollback de la sesión del llamador — los lectores
+corren dentro de su transacción, con filas suyas todavía sin commitear (el
+backfill de indicadores escribe de a _COMMIT_ROWS). Lecturas y reparaciones
+van en savepoints: una que falla se deshace sola, y lo reparado se persiste
+con el próximo commit del llamador.
+"""
+import logging
+from datetime import date
+from types import SimpleNamespace
+
+import pandas as pd
+import sqlalchemy as sa
+
+from app.models import Price, PriceMonthly, PriceWeekly
+from app.services.chart_zone_store import mark_from_df
+from app.services.forward_return_store import _fresh, price_watermarks
+
+logger = logging.getLogger(__name__)
+
+FREQS = ("W", "M")
+_MODELS = {"W": PriceWeekly, "M": PriceMonthly}
+
+# Columnas de _resample_ohlc, en su orden
+_COLS = ["date", "close", "high", "low"]
+_META = ["n_days", "close_sum", "last_day"]
+
+_IN_CHUNK = 500       # activos por query de lectura (IN acotado)
+_WRITE_BATCH = 5000   # filas por executemany
+
+
+# ── Cálculo ───────────────────────────────────────────────────────────────────
+
+def _rule(freq: str) -> str:
+    return "W" if freq == "W" else "ME"
+
+
+def label(d, freq: str) -> pd.Timestamp:
+    """Etiqueta de la barra que contiene `d` (domingo / fin de mes)."""
+    ts = pd.Timestamp(d).normalize()
+    off = pd.offsets.Week(weekday=6) if freq == "W" else pd.offsets.MonthEnd()
+    return off.rollforward(ts)
+
+
+def _start(d, freq: str) -> date:
+    end = label(d, freq)
+    first = end - pd.Timedelta(days=6) if freq == "W" else end.replace(day=1)
+    return first.date()
+
+
+def resample(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Barras de `df` (diario: date/close/high/low): las columnas de
+    _resample_ohlc más n_days/close_sum/last_day de los closes no nulos."""
+    tmp = df[["date", "close", "high", "low"]].copy()
+    tmp["date"] = pd.to_datetime(tmp["date"])
+    tmp = tmp.set_index("date")
+    tmp["day"] = tmp.index.where(tmp["close"].notna())
+    bars = tmp.resample(_rule(freq)).agg(
+        close=("close", "last"), high=("high", "max"), low=("low", "min"),
+        n_days=("close", "count"), close_sum=("close", "sum"),
+        last_day=("day", "max"))
+    bars = bars.dropna(subset=["close"])
+    bars.index.name = "date"
+    return bars.reset_index()
+
+
+def window(bars: pd.DataFrame, daily: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """_resample_ohlc(daily, freq) cuando `daily` es una cola de la historia
+    cuyas barras (completas) son `bars`: la primera barra de la ventana sale
+    recortada, así que se recalcula de las filas de `daily` que caen en ella;
+    las siguientes son las guardadas."""
+    if daily.empty:
+        return resample(daily, freq)[_COLS]
+    end = label(daily["date"].iloc[0], freq)
+    head = resample(daily[pd.to_datetime(daily["date"]) <= end], freq)[_COLS]
+    tail = bars[bars["date"] > end]
+    return pd.concat([head, tail], ignore_index=True)
+
+
+def _rows(asset_id: int, bars: pd.DataFrame) -> list[dict]:
+    return [{"asset_id": asset_id, "date": b.date.date(), "close": float(b.close),
+             "high": None if pd.isna(b.high) else float(b.high),
+             "low": None if pd.isna(b.low) else float(b.low),
+             "n_days": int(b.n_days), "close_sum": float(b.close_sum),
+             "last_day": b.last_day.date()}
+            for b in bars.itertuples(index=False)]
+
+
+def _mark(g: pd.DataFrame):
+    """La marca de agua de las barras guardadas de un activo, con la forma de
+    fila que espera forward_return_store._fresh."""
+    return SimpleNamespace(n_prices=int(g["n_days"].sum()),
+                           last_date=max(g["last_day"]),
+                           close_sum=float(g["close_sum"].sum()))
+
+
+def _frame(g: pd.DataFrame, dtype) -> pd.DataFrame:
+    """Barras guardadas → el DataFrame que devuelve _resample_ohlc."""
+    return pd.DataFrame({
+        "date": pd.to_datetime(pd.Series(list(g["date"]))).astype(dtype),
+        "close": g["close"].to_numpy(dtype=float),
+        "high": g["high"].astype(float).to_numpy(),
+        "low": g["low"].astype(float).to_numpy(),
+    })
+
+
+# ── Escritura ─────────────────────────────────────────────────────────────────
+
+def _insert(s, freq: str, rows: list[dict]) -> None:
+    t = _MODELS[freq].__table__
+    for i in range(0, len(rows), _WRITE_BATCH):
+        s.execute(t.insert(), rows[i:i + _WRITE_BATCH])
+
+
+def _replace(s, by_asset: dict) -> None:
+    """Reescribe enteras las barras de {asset_id: {freq: barras}}."""
+    ids = list(by_asset)
+    for freq in FREQS:
+        t = _MODELS[freq].__table__
+        for i in range(0, len(ids), _IN_CHUNK):
+            s.execute(t.delete().where(t.c.asset_id.in_(ids[i:i + _IN_CHUNK])))
+        _insert(s, freq, [r for aid in ids
+                          for r in _rows(aid, by_asset[aid][freq])])
+
+
+def _refresh_since(s, asset_ids: list, since) -> None:
+    """Reescribe, para todos `asset_ids`, la barra que contiene `since` y las
+    posteriores, recalculadas de `prices`: una lectura y, por temporalidad,
+    un DELETE y un INSERT multi-fila. Sin savepoint (lo pone el llamador)."""
+    first = min(_start(since, f) for f in FREQS)
+    sel = (sa.select(Price.asset_id, Price.date, Price.close, Price.high,
+                     Price.low)
+           .where(Price.asset_id.in_(asset_ids), Price.date >= first)
+           .order_by(Price.asset_id, Price.date))
+    daily = pd.DataFrame(s.execute(sel).all(),
+                         columns=["asset_id", "date", "close", "high", "low"])
+    days = pd.to_datetime(daily["date"])
+    for freq in FREQS:
+        t = _MODELS[freq].__table__
+        s.execute(t.delete().where(t.c.asset_id.in_(asset_ids),
+                                   t.c.date >= label(since, freq).date()))
+        part = daily[days >= pd.Timestamp(_start(since, freq))]
+        _insert(s, freq, [r for aid, g in part.groupby("asset_id")
+                          for r in _rows(int(aid), resample(g, freq))])
+
+
+def refresh_from(s, asset_id: int, since, written: pd.DataFrame | None = None) -> None:
+    """Pone al día las barras de un activo después de escribir sus precios
+    desde `since`: borra la barra que contiene `since` y las posteriores y las
+    recalcula de `prices`. since=None: la historia se reemplazó entera y es
+    `written` — se resamplea de ahí, sin releer.
+
+    NO commitea (va en la transacción de los precios) y corre en un savepoint:
+    si la tabla falla, la escritura de precios sigue intacta."""
+    try:
+        with s.begin_nested():
+            if since is None:
+                _replace(s, {asset_id: {f: resample(written, f) for f in FREQS}})
+            else:
+                _refresh_since(s, [asset_id], since)
+    except Exception as exc:
+        logger.warning("No se pudieron actualizar las barras W/M de asset_id=%d: "
+                       "%s", asset_id, exc)
+
+
+def refresh_rows(s, rows: list[dict], *, complete: bool = False) -> None:
+    """refresh_from para filas de `prices` de muchos activos (el camino común
+    de los sintéticos), por tandas de _IN_CHUNK activos con un savepoint cada
+    una — no un savepoint y tres round-trips por activo.
+
+    complete=True: las filas son la historia ENTERA de cada activo (sintéticos
+    recién creados): las barras se resamplean de ellas, sin releer `prices`.
+    Si no, cada tanda se recalcula desde la primera fecha escrita de
+    cualquiera de sus activos (a alguno le recalcula de más barras que las
+    que cambiaron, nunca de menos). NO commitea."""
+    if not rows:
+        return
+    df = pd.DataFrame(rows, columns=["asset_id", "date", "close", "high", "low"])
+    groups = {int(aid): g for aid, g in df.groupby("asset_id")}
+    ids = sorted(groups)
+    for i in range(0, len(ids), _IN_CHUNK):
+        part = ids[i:i + _IN_CHUNK]
+        try:
+            with s.begin_nested():
+                if complete:
+                    _replace(s, {aid: {f: resample(groups[aid], f) for f in FREQS}
+                                 for aid in part})
+                else:
+                    _refresh_since(s, part,
+                                   min(groups[aid]["date"].min() for aid in part))
+        except Exception as exc:
+            logger.warning("No se pudieron actualizar las barras W/M de %d "
+                           "activos: %s", len(part), exc)
+
+
+def _save(s, by_asset: dict) -> bool:
+    if not by_asset:
+        return True
+    try:
+        with s.begin_nested():
+            _replace(s, by_asset)
+        return True
+    except Exception as exc:
+        logger.warning("No se pudieron persistir barras W/M (%d activos): %s",
+                       len(by_asset), exc)
+        return False
+
+
+# ── Lectura ───────────────────────────────────────────────────────────────────
+
+def _read(s, asset_ids: list) -> dict:
+    """{freq: {asset_id: barras guardadas}} de los activos pedidos."""
+    out: dict = {f: {} for f in FREQS}
+    for freq in FREQS:
+        t = _MODELS[freq].__table__
+        for i in range(0, len(asset_ids), _IN_CHUNK):
+            sel = (sa.select(t.c.asset_id, *[t.c[c] for c in _COLS + _META])
+                   .where(t.c.asset_id.in_(asset_ids[i:i + _IN_CHUNK]))
+                   .order_by(t.c.asset_id, t.c.date))
+            df = pd.read_sql(sel, s.connection())
+            for aid, g in df.groupby("asset_id"):
+                out[freq][aid] = g
+    return out
+
+
+def _read_saved(s, asset_ids: list) -> dict | None:
+    """_read en un savepoint; None (con warning) si la tabla no se puede
+    leer."""
+    try:
+        with s.begin_nested():
+            return _read(s, asset_ids)
+    except Exception as exc:
+        logger.warning("Barras W/M guardadas no disponibles: %s", exc)
+        return None
+
+
+def load(s, daily: dict, *, recent: dict | None = None,
+         rebuild: bool = False) -> tuple[dict, dict]:
+    """(df_w_cache, df_m_cache) de {asset_id: historia diaria COMPLETA}, lo
+    mismo que _resample_ohlc sobre cada frame.
+
+    recent: {asset_id: cola del diario} — las barras se devuelven recortadas
+    a esa ventana (ver `window`), como las resampleaba el camino de vigentes.
+    rebuild: no leer lo guardado; resamplear todo y reescribirlo (el
+    "Recalcular completo"). Lo reescrito NO se commitea."""
+    ids = [aid for aid, df in daily.items() if df is not None and len(df)]
+    stored = None if rebuild else _read_saved(s, ids)
+    if stored is None:
+        stored = {f: {} for f in FREQS}
+    out: dict = {f: {} for f in FREQS}
+    heal: dict = {}
+    for aid in ids:
+        df = daily[aid]
+        mark = mark_from_df(df)
+        got = {f: stored[f].get(aid) for f in FREQS}
+        if mark is not None and all(g is not None and _fresh(_mark(g), mark)
+                                    for g in got.values()):
+            dtype = pd.to_datetime(df["date"].iloc[:1]).dtype
+            full = {f: _frame(got[f], dtype) for f in FREQS}
+        else:
+            bars = {f: resample(df, f) for f in FREQS}
+            if mark is not None:
+                heal[aid] = bars
+            full = {f: bars[f][_COLS] for f in FREQS}
+        for f in FREQS:
+            tail = recent.get(aid) if recent is not None else None
+            out[f][aid] = full[f] if tail is None else window(full[f], tail, f)
+    if heal:
+        _save(s, heal)
+    return out["W"], out["M"]
+
+
+def bars_for(s, asset_id: int, df: pd.DataFrame | None = None):
+    """(df_w, df_m) de un activo. Sin `df` la marca sale de una query
+    agregada sobre `prices` y el diario se lee solo si hace falta
+    resamplear."""
+    if df is not None:
+        w, m = load(s, {asset_id: df})
+        return w.get(asset_id), m.get(asset_id)
+    mark = price_watermarks(s, [asset_id]).get(asset_id)
+    if mark is None:
+        return None, None
+    got = _read_saved(s, [asset_id])
+    if got is not None:
+        got = {f: got[f].get(asset_id) for f in FREQS}
+        if all(g is not None and _fresh(_mark(g), mark) for g in got.values()):
+            return tuple(_frame(got[f], "datetime64[s]") for f in FREQS)
+    rows = s.execute(sa.select(Price.date, Price.close, Price.high, Price.low)
+                     .where(Price.asset_id == asset_id)
+                     .order_by(Price.date)).all()
+    daily = pd.DataFrame(rows, columns=["date", "close", "high", "low"])
+    w, m = load(s, {asset_id: daily}, rebuild=True)
+    return w.get(asset_id), m.get(asset_id)
+
+
+def rebuild(s, asset_ids: list | None = None, chunk: int = _IN_CHUNK) -> int:
+    """Rearma las barras desde `prices` (todos los activos o los pedidos), por
+    tandas de activos. Devuelve la cantidad de activos escritos. NO commitea."""
+    if asset_ids is None:
+        asset_ids = [aid for (aid,) in s.execute(
+            sa.select(Price.asset_id).distinct().order_by(Price.asset_id))]
+    done = 0
+    for i in range(0, len(asset_ids), chunk):
+        part = asset_ids[i:i + chunk]
+        sel = (sa.select(Price.asset_id, Price.date, Price.close, Price.high,
+                         Price.low)
+               .where(Price.asset_id.in_(part))
+               .order_by(Price.asset_id, Price.date))
+        df = pd.read_sql(sel, s.connection())
+        daily = {aid: g.reset_index(drop=True) for aid, g in df.groupby("asset_id")}
+        load(s, daily, rebuild=True)
+        done += len(daily)
+    return done
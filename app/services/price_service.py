@@ -14,6 +14,7 @@ from sqlalchemy import func
 
 from app.database import get_session, Session as _ScopedSession
 from app.models import Asset, Price, PriceUpdateLog
+from app.services import query_stats_service as _qs
 from app.services.technical_service import (
     backfill_asset_history,
     compute_current_indicators,
@@ -45,12 +46,22 @@ def _delete_from_date(asset_id: int, from_date, session) -> None:
 _PRICE_BATCH = 500  # filas por INSERT — evita superar max_allowed_packet de MariaDB
 
 
-def _upsert_prices(asset_id: int, df, session) -> int:
-    """Inserta filas del DataFrame en la tabla de precios en batches. Devuelve cantidad insertada."""
+def _upsert_prices(asset_id: int, df, session, prev_last=None) -> int:
+    """Inserta filas del DataFrame en la tabla de precios en batches. Devuelve cantidad insertada.
+
+    prev_last: última fecha que el activo tenía ANTES de esta escritura (None =
+    no tenía, o se reemplaza la historia). Las fechas posteriores son dato
+    genuinamente nuevo y marcan el rango sucio de señales en la misma
+    transacción (ver signal_dirty_range); la fecha preliminar que se reescribe
+    no cuenta. Las barras W/M se ponen al día en la misma transacción desde
+    la primera fecha escrita (ver price_bar_store); con prev_last=None la
+    historia escrita es la completa y se resamplea entera. La historia
+    cacheada del activo se descarta al commitear (ver asset_history_reader)."""
     if df.empty:
         return 0
     import math
-    from app.services import db_compat
+    from app.services import (asset_history_reader, db_compat,
+                              price_bar_store, signal_dirty_range)
     from app.services.db_compat import INSERTED
 
     def _f(v):
@@ -81,6 +92,18 @@ def _upsert_prices(asset_id: int, df, session) -> int:
         })
         session.execute(stmt)
 
+    new_dates = [m["date"] for m in mappings
+                 if prev_last is None or m["date"] > prev_last]
+    if new_dates:
+        signal_dirty_range.mark(session, {asset_id: min(new_dates)})
+    asset_history_reader.invalidate_on_commit(session, [asset_id])
+    if prev_last is None:
+        price_bar_store.refresh_from(session, asset_id, None,
+                                     written=pd.DataFrame(mappings))
+    else:
+        price_bar_store.refresh_from(session, asset_id,
+                                     min(m["date"] for m in mappings))
+
     return len(mappings)
 
 
@@ -155,7 +178,7 @@ def update_asset_prices(
         if df.empty:
             raise ValueError(f"No se encontraron datos de precio para '{asset.ticker}'. Verificá que el ticker sea válido en Yahoo Finance.")
 
-        count = _upsert_prices(asset_id, df, s)
+        count = _upsert_prices(asset_id, df, s, prev_last=last_date)
         _save_update_log(asset_id, success=True, error=None, session=s)
         s.commit()
         logger.info("Activo %s: %d filas importadas", asset.ticker, count)
@@ -330,7 +353,8 @@ def _process_yf_asset_worker(
                 synchronize_session=False)
         elif last_date is not None:
             _delete_from_date(asset_id, last_date, s)
-        count = _upsert_prices(asset_id, df, s)
+        count = _upsert_prices(asset_id, df, s,
+                               prev_last=None if full else last_date)
         _save_update_log(asset_id, success=True, error=None, session=s)
         s.commit()
         logger.info("Activo %s: %d filas importadas (batch)", ticker, count)
@@ -475,32 +499,33 @@ def _bulk_download_assets(assets, progress_cb=None, full: bool = False) -> dict:
 
     s = get_session()
 
-    # Fix N+1: un solo query para IDs sintéticos
-    synthetic_ids = {r[0] for r in s.query(SyntheticFormula.asset_id).all()}
-    regular   = [a for a in assets if a.id not in synthetic_ids]
-    synthetic = [a for a in assets if a.id in synthetic_ids]
-
-    # Separar activos Yahoo Finance para batch download
-    yf_src = s.query(PriceSource).filter(PriceSource.name == "Yahoo Finance").first()
-    yf_src_id = yf_src.id if yf_src else None
-
-    yf_assets   = [a for a in regular if yf_src_id and a.price_source_id == yf_src_id]
-    other_regular = [a for a in regular if not (yf_src_id and a.price_source_id == yf_src_id)]
-
-    # Prefetch de last_dates en una sola query GROUP BY.
-    # full=True ignora lo existente: todos descargan la historia completa.
-    yf_ids = [a.id for a in yf_assets]
-    if yf_ids and not full:
-        _max_dates = {
-            r[0]: r[1]
-            for r in s.query(Price.asset_id, func.max(Price.date))
-                      .filter(Price.asset_id.in_(yf_ids))
-                      .group_by(Price.asset_id)
-                      .all()
-        }
-    else:
-        _max_dates = {}
-    yf_last_dates = {a.id: _max_dates.get(a.id) for a in yf_assets}
+    with _qs.phase("px:prefetch"):
+        # Fix N+1: un solo query para IDs sintéticos
+        synthetic_ids = {r[0] for r in s.query(SyntheticFormula.asset_id).all()}
+        regular   = [a for a in assets if a.id not in synthetic_ids]
+        synthetic = [a for a in assets if a.id in synthetic_ids]
+
+        # Separar activos Yahoo Finance para batch download
+        yf_src = s.query(PriceSource).filter(PriceSource.name == "Yahoo Finance").first()
+        yf_src_id = yf_src.id if yf_src else None
+
+        yf_assets   = [a for a in regular if yf_src_id and a.price_source_id == yf_src_id]
+        other_regular = [a for a in regular if not (yf_src_id and a.price_source_id == yf_src_id)]
+
+        # Prefetch de last_dates en una sola query GROUP BY.
+        # full=True ignora lo existente: todos descargan la historia completa.
+        yf_ids = [a.id for a in yf_assets]
+        if yf_ids and not full:
+            _max_dates = {
+                r[0]: r[1]
+                for r in s.query(Price.asset_id, func.max(Price.date))
+                          .filter(Price.asset_id.in_(yf_ids))
+                          .group_by(Price.asset_id)
+                          .all()
+            }
+        else:
+            _max_dates = {}
+        yf_last_dates = {a.id: _max_dates.get(a.id) for a in yf_assets}
 
     # Colectar (id, ticker) ANTES de soltar la sesión: los commits expiran los
     # objetos ORM y acceder a sus atributos después podría fallar si fueron
@@ -528,26 +553,31 @@ def _bulk_download_assets(assets, progress_cb=None, full: bool = False) -> dict:
     # disparado desde un worker sería una race.
     _ScopedSession.remove()
 
-    prefetched = _bulk_prefetch_yfinance(prefetch_args)
+    with _qs.phase("px:descarga"):
+        prefetched = _bulk_prefetch_yfinance(prefetch_args)
 
+    # Fase de los workers (query_stats_service): la escritura por activo, y
+    # la descarga de los que no van por el batch de Yahoo
+    yf_worker    = _qs.phased("px:escritura", _process_yf_asset_worker)
+    other_worker = _qs.phased("px:escritura", _process_other_asset_worker)
     futures: dict = {}
     with ThreadPoolExecutor(max_workers=_UPDATE_WORKERS) as pool:
         for asset_id, asset_ticker in yf_pairs:
             if asset_id in prefetched:
                 futures[pool.submit(
-                    _process_yf_asset_worker,
+                    yf_worker,
                     asset_id, asset_ticker, prefetched[asset_id], yf_last_dates[asset_id],
                     full=full,
                 )] = asset_ticker
             else:
                 futures[pool.submit(
-                    _process_other_asset_worker, asset_id, asset_ticker,
+                    other_worker, asset_id, asset_ticker,
                     full=full,
                 )] = asset_ticker
 
         for asset_id, asset_ticker in other_pairs:
             futures[pool.submit(
-                _process_other_asset_worker, asset_id, asset_ticker,
+                other_worker, asset_id, asset_ticker,
                 full=full,
             )] = asset_ticker
 
@@ -0,0 +1,459 @@
+"""
+Motor de purga de historia por activo: DELETE por lotes, repartido entre
+tablas en paralelo, con avance persistido y barrido de huérfanos.
+
+Borrar un activo (o muchos sintéticos, o un mercado dado de baja) recorre
+todas las tablas que guardan filas por `asset_id`: las de alto volumen, las
+anchas de señales/estrategias y las dinámicas `ind_*`, `sig_*`,
+`strat_res_*` — cientos de tablas. Una por una y con un DELETE por tabla,
+eso tenía tomado el Centro de Datos durante minutos. Acá:
+
+- **En paralelo**: las tablas se reparten entre `WORKERS` conexiones del pool
+  (acotado: cada worker toma UNA conexión por tabla y la devuelve). En sqlite
+  (tests) un solo worker — el archivo no admite escritores concurrentes.
+- **Por lotes**: cada DELETE toca a lo sumo `BATCH` filas y commitea. En
+  PostgreSQL el lote son las `ctid` de las filas del activo (por el índice de
+  asset_id), así cada transacción acota su WAL y los locks; en MySQL el
+  `DELETE … LIMIT` de siempre; en sqlite por `rowid`. Las tablas anchas
+  particionadas por año se recorren partición por partición (la `ctid` solo
+  es única dentro de una partición).
+- **Reanudable**: el avance vive en `purge_job` (tablas ya limpias). Si el
+  proceso muere a mitad, el arranque (`resume_interrupted`) retoma la purga
+  desde las tablas que faltaban, con un lock de corrida por purga
+  (`purge:<id>`) para que dos procesos no la retomen a la vez.
+- **Huérfanos**: las tablas dinámicas y las anchas no tienen FK a `assets`,
+  así que una purga cortada o un borrado por fuera de la app les deja filas
+  de activos que ya no existen. `sweep_orphans` las encuentra y las borra con
+  el mismo motor; el scheduler lo corre una vez por semana.
+
+La tabla `purge_job` es best-effort, como run_history: si falta la
+migración 0110 la purga corre igual, solo que sin avance persistido.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from app.services import db_compat
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 4                  # conexiones del pool en paralelo (tablas a la vez)
+BATCH = 5000                 # filas por DELETE (y por commit)
+RETENTION_DAYS = 180         # prune_old: purgas terminadas más viejas que esto
+_LOCK_RETRIES = 3            # reintentos de un lote ante deadlock / lock wait
+_DYNAMIC_PREFIXES = ("ind_", "sig_", "strat_res_")
+
+_unavailable = False         # latch: purge_job no existe (pre-0110)
+_MISSING_TABLE_MARKERS = (
+    "does not exist", "doesn't exist", "no such table", "undefinedtable",
+)
+
+
+def _note_error(exc: Exception) -> None:
+    global _unavailable
+    if not _unavailable and any(m in str(exc).lower()
+                                for m in _MISSING_TABLE_MARKERS):
+        _unavailable = True
+        logger.warning("purge_job: la tabla no existe (¿falta la migración "
+                       "0110?). Purgas sin avance persistido en este proceso.")
+    else:
+        logger.warning("purge_job: no se pudo registrar el avance: %s", exc)
+
+
+def _lock_op(job_id: int) -> str:
+    return f"purge:{job_id}"
+
+
+# ── Plan: qué tablas recorrer ─────────────────────────────────────────────────
+
+def _expand_partitions(conn, tables) -> list[str]:
+    """Las madres particionadas (PG) se reemplazan por sus particiones."""
+    out = []
+    for t in tables:
+        parts = db_compat.year_partitions(conn, t)
+        out.extend(sorted(parts.values()) if parts else [t])
+    return out
+
+
+def plan_tables(s) -> list[str]:
+    """Todas las tablas con historia por activo: las de alto volumen y las
+    anchas (`asset_service.tablas_de_historia_por_activo`) más las dinámicas
+    descubiertas por prefijo."""
+    from app.services.asset_service import tablas_de_historia_por_activo
+    dyn = db_compat.list_tables_by_prefix(s, *_DYNAMIC_PREFIXES)
+    return _expand_partitions(s.connection(),
+                              [*tablas_de_historia_por_activo(s), *dyn])
+
+
+def orphan_tables(s) -> list[str]:
+    """Las tablas SIN FK a `assets` (donde puede haber huérfanos): las anchas
+    de señales/estrategias y las dinámicas. Las de alto volumen las limpia el
+    ON DELETE CASCADE."""
+    from app.models import signal_store
+    insp = sa.inspect(s.connection())
+    anchas = [t for t in (signal_store.SIG_WIDE_TABLE,
+                          signal_store.STRAT_WIDE_TABLE) if insp.has_table(t)]
+    dyn = db_compat.list_tables_by_prefix(s, *_DYNAMIC_PREFIXES)
+    return _expand_partitions(s.connection(), [*anchas, *dyn])
+
+
+# ── Un lote / una tabla ───────────────────────────────────────────────────────
+
+def delete_sql(dialect: str, table: str, ids, batch: int = BATCH) -> str:
+    """DELETE de a lo sumo `batch` filas de `table` (nombre ya citado) cuyos
+    asset_id están en `ids` (enteros validados: se interpolan)."""
+    id_list = ", ".join(str(int(i)) for i in ids)
+    where = f"asset_id IN ({id_list})"
+    if dialect in ("mysql", "mariadb"):
+        return f"DELETE FROM {table} WHERE {where} LIMIT {batch}"
+    if dialect == "postgresql":
+        # Sin DELETE … LIMIT en PG: el lote son las ctid de las filas del
+        # activo (subconsulta por el índice de asset_id), no un rango de
+        # bloques — un rango recorrería el heap entero por unos pocos activos.
+        return (f"DELETE FROM {table} WHERE ctid = ANY(ARRAY("
+                f"SELECT ctid FROM {table} WHERE {where} LIMIT {batch}))")
+    return (f"DELETE FROM {table} WHERE rowid IN ("
+            f"SELECT rowid FROM {table} WHERE {where} LIMIT {batch})")
+
+
+def _execute_retrying(conn, stmt) -> int:
+    """Un lote con su commit; reintenta deadlocks / lock waits (otra corrida
+    escribiendo la misma tabla) antes de rendirse."""
+    for attempt in range(_LOCK_RETRIES + 1):
+        try:
+            n = conn.execute(stmt).rowcount
+            conn.commit()
+            return n
+        except Exception as exc:
+            conn.rollback()
+            if attempt == _LOCK_RETRIES or not db_compat.is_retryable_lock_error(exc):
+                raise
+            time.sleep(0.5 * (attempt + 1))
+    return 0  # pragma: no cover
+
+
+def delete_batches(conn, table: str, ids, batch: int = BATCH) -> int:
+    """Borra de `table` las filas de `ids`, de a `batch` con commit por lote.
+    Devuelve las filas borradas."""
+    stmt = sa.text(delete_sql(conn.dialect.name,
+                              db_compat.quote_ident(conn, table), ids, batch))
+    total = 0
+    while True:
+        n = _execute_retrying(conn, stmt)
+        total += n
+        if n < batch:
+            return total
+
+
+def _fan_out(tables, work, on_start=None, on_done=None) -> dict[str, int]:
+    """work(conn, tabla) para cada tabla, en hasta WORKERS conexiones propias
+    del pool a la vez. La primera excepción cancela lo que no empezó y se
+    propaga (lo que ya corría termina su tabla)."""
+    from app.database import engine
+    workers = 1 if engine.dialect.name == "sqlite" else WORKERS
+    workers = max(1, min(workers, len(tables)))
+
+    def _one(table):
+        if on_start:
+            on_start(table)
+        with engine.connect() as conn:
+            n = work(conn, table)
+        if on_done:
+            on_done(table, n)
+        return n
+
+    out: dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=workers,
+                            thread_name_prefix="purge") as pool:
+        futures = {pool.submit(_one, t): t for t in tables}
+        try:
+            for f in as_completed(futures):
+                out[futures[f]] = f.result()
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+    return out
+
+
+# ── Avance persistido (purge_job) ─────────────────────────────────────────────
+
+def _job_table():
+    from app.models.purge_job import PurgeJob
+    return PurgeJob.__table__
+
+
+def _job_create(kind: str, ids, n_tables: int) -> int | None:
+    if _unavailable:
+        return None
+    from app.database import engine
+    try:
+        with engine.begin() as conn:
+            res = conn.execute(sa.insert(_job_table()).values(
+                kind=kind, status="running", asset_ids=json.dumps(ids),
+                tables_total=n_tables, tables_done="[]", rows_deleted=0,
+                started_at=datetime.utcnow(), updated_at=datetime.utcnow()))
+            return res.inserted_primary_key[0]
+    except Exception as exc:
+        _note_error(exc)
+        return None
+
+
+def _job_update(job_id: int | None, **values) -> None:
+    if job_id is None or _unavailable:
+        return
+    from app.database import engine
+    t = _job_table()
+    try:
+        with engine.begin() as conn:
+            conn.execute(sa.update(t).where(t.c.id == job_id).values(
+                updated_at=datetime.utcnow(), **values))
+    except Exception as exc:
+        _note_error(exc)
+
+
+def _run(job_id, kind: str, ids: list[int], tables: list[str],
+         done: set[str], rows: int = 0, progress_cb=None) -> int:
+    """Recorre las tablas que faltan (no están en `done`) y, si es una purga
+    de activos, termina con el DELETE de `assets` (el resto de las hijas con
+    FK lo limpia el ON DELETE CASCADE). Devuelve las filas borradas."""
+    from app.database import engine
+    pending = [t for t in tables if t not in done]
+    total = len(tables) + (1 if kind == "assets" else 0)
+    state = {"rows": rows}
+    lock = threading.Lock()
+
+    def _start(table):
+        if progress_cb:
+            progress_cb(len(done), total, table)
+
+    def _done(table, n):
+        with lock:
+            done.add(table)
+            state["rows"] += n
+            _job_update(job_id, tables_done=json.dumps(sorted(done)),
+                        rows_deleted=state["rows"])
+
+    try:
+        _fan_out(pending, lambda conn, t: delete_batches(conn, t, ids),
+                 _start, _done)
+        if kind == "assets":
+            if progress_cb:
+                progress_cb(len(tables), total, "assets")
+            id_list = ", ".join(str(i) for i in ids)
+            with engine.begin() as conn:
+                conn.execute(sa.text(f"DELETE FROM assets WHERE id IN ({id_list})"))
+        if progress_cb:
+            progress_cb(total, total, "")
+    except Exception as exc:
+        _job_update(job_id, status="error", finished_at=datetime.utcnow(),
+                    error=str(exc)[:500])
+        raise
+    _job_update(job_id, status="done", finished_at=datetime.utcnow())
+    return state["rows"]
+
+
+def _locked_run(job_id, kind, ids, tables, done, rows=0, progress_cb=None,
+                token=None) -> int:
+    """_run bajo el lock de corrida de la purga (heartbeat mientras dura):
+    así el arranque de otro proceso no la toma por interrumpida."""
+    from app.services import run_lock_service as rl
+    if job_id is None:
+        return _run(job_id, kind, ids, tables, done, rows, progress_cb)
+    if token is None:
+        token = rl.guarded_acquire(_lock_op(job_id)) or rl.NO_LOCK
+    with rl.heartbeating(_lock_op(job_id), token):
+        return _run(job_id, kind, ids, tables, done, rows, progress_cb)
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+def purge(s, asset_ids, *, progress_cb=None, tables=None) -> int:
+    """Borra los activos y toda su historia, en primer plano. Devuelve las
+    filas de historia borradas.
+
+    `s` es la sesión del llamador: se usa para planificar y se commitea antes
+    de repartir (su transacción de lectura no debe quedar abierta mientras
+    otras conexiones borran). Las guardias (componentes de sintéticos,
+    benchmark) son del llamador — ver asset_service.purge_assets."""
+    ids = sorted({int(a) for a in asset_ids})
+    if not ids:
+        return 0
+    if tables is None:
+        tables = plan_tables(s)
+    s.commit()
+    job_id = _job_create("assets", ids, len(tables))
+    return _locked_run(job_id, "assets", ids, tables, set(),
+                       progress_cb=progress_cb)
+
+
+def _background(job_id, kind, ids, tables, done, rows, token=None) -> None:
+    from app.database import Session
+    from app.services import run_history_service as rh
+    hist_id = rh.start_run("purge", scope=f"{kind}:{job_id}")
+    status, first_error = "ok", None
+    try:
+        _locked_run(job_id, kind, ids, tables, done, rows, token=token)
+    except Exception as exc:
+        logger.exception("Purga %s (%s) falló: %s", job_id, kind, exc)
+        status, first_error = "error", str(exc)
+    finally:
+        rh.finish_run(hist_id, status, total=len(tables), unit="tablas",
+                      ok=len(done), first_error=first_error)
+        Session.remove()
+
+
+def start(s, asset_ids) -> int | None:
+    """Como `purge` pero en un thread de fondo: planifica, registra la purga
+    y vuelve enseguida con su id (None si purge_job no está disponible —
+    igual corre). El avance se consulta con `status`."""
+    ids = sorted({int(a) for a in asset_ids})
+    tables = plan_tables(s)
+    s.commit()
+    job_id = _job_create("assets", ids, len(tables))
+    threading.Thread(target=_background,
+                     args=(job_id, "assets", ids, tables, set(), 0),
+                     daemon=True, name=f"purge-{job_id}").start()
+    return job_id
+
+
+def status(job_id: int) -> dict | None:
+    """{kind, status, tables_total, tables_done, rows_deleted, error} o None."""
+    from app.database import engine
+    t = _job_table()
+    with engine.connect() as conn:
+        row = conn.execute(sa.select(t).where(t.c.id == job_id)).mappings().first()
+    if row is None:
+        return None
+    return {"kind": row["kind"], "status": row["status"],
+            "tables_total": row["tables_total"],
+            "tables_done": len(json.loads(row["tables_done"] or "[]")),
+            "rows_deleted": row["rows_deleted"], "error": row["error"]}
+
+
+def resume(job_id: int, token=None) -> int:
+    """Retoma una purga interrumpida en ESTE thread: vuelve a planificar
+    (pueden haber aparecido tablas) y recorre solo las que no terminó."""
+    from app.database import engine, get_session
+    t = _job_table()
+    with engine.connect() as conn:
+        row = conn.execute(sa.select(t).where(t.c.id == job_id)).mappings().first()
+    if row is None:
+        return 0
+    s = get_session()
+    kind = row["kind"]
+    tables = plan_tables(s) if kind == "assets" else orphan_tables(s)
+    s.commit()
+    done = set(json.loads(row["tables_done"] or "[]")) & set(tables)
+    _job_update(job_id, status="running", tables_total=len(tables), error=None)
+    return _locked_run(job_id, kind, json.loads(row["asset_ids"]), tables,
+                       done, row["rows_deleted"] or 0, token=token)
+
+
+def resume_interrupted() -> int:
+    """Para el ARRANQUE: relanza en segundo plano las purgas que quedaron
+    'running' y cuyo lock de corrida está muerto (proceso caído). Devuelve
+    cuántas relanzó."""
+    from app.database import engine
+    from app.services import run_lock_service as rl
+    if _unavailable:
+        return 0
+    t = _job_table()
+    try:
+        with engine.connect() as conn:
+            ids = [r[0] for r in conn.execute(
+                sa.select(t.c.id).where(t.c.status == "running")
+                .order_by(t.c.id))]
+    except Exception as exc:
+        _note_error(exc)
+        return 0
+    n = 0
+    for job_id in ids:
+        token = rl.guarded_acquire(_lock_op(job_id))
+        if token is None:
+            continue  # otro proceso la tiene viva
+        threading.Thread(target=_resume_background, args=(job_id, token),
+                         daemon=True, name=f"purge-{job_id}").start()
+        n += 1
+    return n
+
+
+def _resume_background(job_id: int, token: str) -> None:
+    from app.database import Session
+    from app.services import run_history_service as rh
+    hist_id = rh.start_run("purge", scope=f"resume:{job_id}")
+    status_, first_error = "ok", None
+    try:
+        resume(job_id, token=token)
+    except Exception as exc:
+        logger.exception("No se pudo retomar la purga %s: %s", job_id, exc)
+        status_, first_error = "error", str(exc)
+    finally:
+        rh.finish_run(hist_id, status_, first_error=first_error)
+        Session.remove()
+
+
+def prune_old(retention_days: int = RETENTION_DAYS) -> int:
+    """Borra las purgas terminadas más viejas que `retention_days`."""
+    from app.database import engine
+    if _unavailable:
+        return 0
+    t = _job_table()
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    try:
+        with engine.begin() as conn:
+            return conn.execute(sa.delete(t).where(
+                t.c.started_at < cutoff, t.c.status != "running")).rowcount or 0
+    except Exception as exc:
+        _note_error(exc)
+        return 0
+
+
+# ── Huérfanos ─────────────────────────────────────────────────────────────────
+
+def find_orphans(s, tables=None) -> dict[str, list[int]]:
+    """{tabla: asset_ids sin fila en `assets`} de las tablas sin FK."""
+    if tables is None:
+        tables = orphan_tables(s)
+    s.commit()
+
+    def _scan(conn, table):
+        q = db_compat.quote_ident(conn, table)
+        return sorted(r[0] for r in conn.execute(sa.text(
+            f"SELECT DISTINCT t.asset_id FROM {q} t WHERE NOT EXISTS "
+            f"(SELECT 1 FROM assets a WHERE a.id = t.asset_id)")))
+
+    found: dict[str, list[int]] = {}
+    lock = threading.Lock()
+
+    def _keep(conn, table):
+        ids = _scan(conn, table)
+        if ids:
+            with lock:
+                found[table] = ids
+        return len(ids)
+
+    _fan_out(tables, _keep)
+    return dict(sorted(found.items()))
+
+
+def sweep_orphans(s=None) -> dict:
+    """Busca y borra las filas huérfanas de las tablas sin FK a `assets`.
+    Devuelve {tables, assets, rows}."""
+    from app.database import get_session
+    s = s or get_session()
+    found = find_orphans(s)
+    ids = sorted({i for v in found.values() for i in v})
+    if not ids:
+        return {"tables": 0, "assets": 0, "rows": 0}
+    tables = list(found)
+    job_id = _job_create("orphans", ids, len(tables))
+    rows = _locked_run(job_id, "orphans", ids, tables, set())
+    logger.info("Barrido de huérfanos: %d filas de %d activos en %d tablas",
+                rows, len(ids), len(tables))
+    return {"tables": len(tables), "assets": len(ids), "rows": rows}
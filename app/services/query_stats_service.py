@@ -0,0 +1,278 @@
+"""
+Instrumentación de la base por FASE de una corrida: sentencias, filas leídas,
+filas escritas y tiempo en la base contra tiempo en Python.
+
+Hasta acá lo único que había era el reloj de pared, el diff de contadores de
+pg_stat (write_stats_service, solo escrituras y solo PostgreSQL) y los
+scripts/profile_*.py a mano — con cProfile inflando los tiempos ~3.7×. Esto es
+más barato: dos listeners del engine (before/after_cursor_execute) que, SOLO
+si el contexto que ejecuta la sentencia tiene una grabación abierta, la suman
+a la fase del thread que la ejecutó. Sin grabación el listener vuelve en la
+primera línea.
+
+Uso:
+    with query_stats_service.recording() as rec:      # chokepoint de la corrida
+        ...
+        with query_stats_service.phase("ind:lotes"):  # dentro del servicio
+            ...
+    rec.summary()                                     # → run_history
+
+- La grabación abierta vive en un ContextVar: dos corridas concurrentes
+  (dos backtests desde la web o el MCP, un Centro de Datos durante un
+  backtest) graban cada una lo suyo, y un callback de la web que no graba no
+  suma nada. Una grabación anidada EN EL MISMO contexto (un servicio que
+  graba por su cuenta, llamado desde el Centro de Datos) se une a la de
+  afuera.
+- Las fases son POR THREAD (una pila por thread; la sentencia va a la fase del
+  tope). Un pool de threads no hereda ni la grabación ni la fase del que lo
+  lanzó: la tarea se envuelve con `phased(nombre, fn)` (o `bound(fn)` si
+  abre sus propias fases), que se lleva la grabación del contexto donde se
+  envolvió. Lo que corre sin fase dentro de la grabación cae en "sin fase".
+- El tiempo de pared de una fase es EXCLUSIVO (sin sus fases anidadas) y se
+  suma entre threads: con N workers en paralelo son segundos-thread, no reloj.
+  Python = pared − base, por fase.
+- Filas leídas: `cursor.rowcount` de los SELECT, que psycopg2 y PyMySQL
+  informan con cursores del lado del cliente; sqlite no (queda en 0). Filas
+  escritas: rowcount de INSERT/UPDATE/DELETE (executemany sin rowcount cuenta
+  los parámetros).
+- Los hijos del ProcessPool graban en su propio proceso y mandan el agregado
+  por la cola IPC de progreso (o en el resultado del lote si no hay cola); el
+  padre lo suma con `merge`.
+"""
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+UNPHASED = "sin fase"
+
+_WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "MERGE", "REPLACE", "COPY")
+_READ_VERBS = ("SELECT", "WITH", "SHOW", "PRAGMA")
+_FIELDS = ("statements", "reads", "writes", "rows_fetched", "rows_written",
+           "db_s", "wall_s")
+
+_lock = threading.Lock()
+_local = threading.local()
+_current: "contextvars.ContextVar[Recorder | None]" = contextvars.ContextVar(
+    "query_stats_recorder", default=None)
+_installed: set = set()
+
+
+class Recorder:
+    """Agregado de una grabación: {fase: {contadores}}."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.seconds = None
+        self.phases: dict[str, dict] = {}
+
+    def _row(self, name: str) -> dict:
+        row = self.phases.get(name)
+        if row is None:
+            row = self.phases[name] = dict.fromkeys(_FIELDS, 0)
+            row["db_s"] = row["wall_s"] = 0.0
+        return row
+
+    def snapshot(self) -> dict:
+        """Copia plana (picklable) de los contadores, para cruzar procesos."""
+        with _lock:
+            return {k: dict(v) for k, v in self.phases.items()}
+
+    def summary(self) -> dict:
+        """{"seconds", "phases": [...], "totals": {...}} redondeado, fases
+        ordenadas por costo (base + Python). Es lo que guarda run_history."""
+        with _lock:
+            phases = {k: dict(v) for k, v in self.phases.items()}
+        seconds = (self.seconds if self.seconds is not None
+                   else time.perf_counter() - self.t0)
+        rows = []
+        for name, r in phases.items():
+            py = (max(r["wall_s"] - r["db_s"], 0.0)
+                  if name != UNPHASED else None)
+            rows.append({"phase": name, **{k: r[k] for k in _FIELDS[:5]},
+                         "db_s": round(r["db_s"], 3),
+                         "py_s": round(py, 3) if py is not None else None})
+        rows.sort(key=lambda r: r["db_s"] + (r["py_s"] or 0), reverse=True)
+        totals = {k: sum(r[k] for r in rows) for k in _FIELDS[:5]}
+        totals["db_s"] = round(sum(r["db_s"] for r in rows), 3)
+        return {"seconds": round(seconds, 3), "phases": rows, "totals": totals}
+
+
+# ── Listeners del engine ──────────────────────────────────────────────────────
+
+def _kind(statement: str) -> str:
+    verb = statement.lstrip()[:8].upper()
+    if verb.startswith(_READ_VERBS):
+        return "read"
+    if verb.startswith(_WRITE_VERBS):
+        return "write"
+    return "other"
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("_qs_t0", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_qs_t0")
+    if not starts:
+        return
+    dt = time.perf_counter() - starts.pop()
+    rec = _current.get()
+    if rec is None:
+        return
+    kind = _kind(statement)
+    try:
+        n = cursor.rowcount
+    except Exception:
+        n = -1
+    if kind == "write" and executemany and (n is None or n < 0):
+        n = len(parameters)
+    with _lock:
+        row = rec._row(current_phase())
+        row["statements"] += 1
+        row["db_s"] += dt
+        if kind == "read":
+            row["reads"] += 1
+            if n is not None and n > 0:
+                row["rows_fetched"] += n
+        elif kind == "write":
+            row["writes"] += 1
+            if n is not None and n > 0:
+                row["rows_written"] += n
+
+
+def _on_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None:
+        starts = conn.info.get("_qs_t0")
+        if starts:
+            starts.pop()
+
+
+def install(engine) -> None:
+    """Engancha los listeners en `engine` (idempotente)."""
+    with _lock:
+        if id(engine) in _installed:
+            return
+        _installed.add(id(engine))
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    event.listen(engine, "handle_error", _on_error)
+
+
+# ── Grabación y fases ─────────────────────────────────────────────────────────
+
+def is_recording() -> bool:
+    return _current.get() is not None
+
+
+@contextmanager
+def recording():
+    """Abre la grabación de la corrida en el contexto actual. Reentrante: una
+    grabación anidada en el mismo contexto (un servicio que graba por su
+    cuenta, llamado desde el Centro de Datos) recibe el mismo Recorder y suma
+    a la de afuera; la de otro thread o request abre siempre la suya."""
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+    from app.database import engine
+    install(engine)
+    rec = Recorder()
+    token = _current.set(rec)
+    try:
+        yield rec
+    finally:
+        _current.reset(token)
+        rec.seconds = time.perf_counter() - rec.t0
+
+
+def _stack() -> list:
+    st = getattr(_local, "stack", None)
+    if st is None:
+        st = _local.stack = []
+    return st
+
+
+def current_phase() -> str:
+    st = getattr(_local, "stack", None)
+    return st[-1][0] if st else UNPHASED
+
+
+@contextmanager
+def phase(name: str):
+    """Atribuye a `name` las sentencias de ESTE thread mientras dure el
+    bloque. Sin grabación abierta no hace nada."""
+    rec = _current.get()
+    if rec is None:
+        yield
+        return
+    st = _stack()
+    frame = [name, time.perf_counter(), 0.0]
+    st.append(frame)
+    try:
+        yield
+    finally:
+        st.pop()
+        dur = time.perf_counter() - frame[1]
+        if st:
+            st[-1][2] += dur
+        with _lock:
+            rec._row(name)["wall_s"] += dur - frame[2]
+
+
+def phased(name: str, fn=None):
+    """`fn` envuelta para correr dentro de `phase(name)` en el thread que la
+    ejecute (tareas de un ThreadPoolExecutor), sumando a la grabación abierta
+    donde se la envolvió. Sin `fn`, decorador: la fase de la función entera,
+    que se lleva lo que no caiga en una fase anidada (y graba en el contexto
+    de quien la llama)."""
+    if fn is None:
+        return lambda f: _in_phase(name, f)
+    return bound(_in_phase(name, fn))
+
+
+def _in_phase(name: str, fn):
+    @functools.wraps(fn)
+    def _run(*args, **kwargs):
+        with phase(name):
+            return fn(*args, **kwargs)
+    return _run
+
+
+def bound(fn):
+    """`fn` envuelta para grabar, en el thread que la ejecute, en la grabación
+    abierta AHORA en este contexto (sin fase propia: un thread de fondo con
+    sus fases adentro). Sin grabación devuelve `fn` tal cual."""
+    rec = _current.get()
+    if rec is None:
+        return fn
+
+    @functools.wraps(fn)
+    def _run(*args, **kwargs):
+        if _current.get() is rec:
+            return fn(*args, **kwargs)
+        token = _current.set(rec)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return _run
+
+
+def merge(phases: dict | None) -> None:
+    """Suma a la grabación abierta el snapshot de otro proceso (hijo del
+    ProcessPool). No-op sin grabación o sin datos."""
+    rec = _current.get()
+    if rec is None or not phases:
+        return
+    with _lock:
+        for name, counts in phases.items():
+            row = rec._row(name)
+            for k in _FIELDS:
+                row[k] += counts.get(k, 0)
@@ -487,13 +487,28 @@ def _resolve_alias(s, entity_type: str, value: str, Model):
     return None
 
 
+def _resolve_folded(s, entity_type: str, value: str, Model):
+    """Entidad cuyo nombre o alias coincide salvo acentos ("Tecnologia" →
+    "Tecnología"), vía el índice del catálogo. El ilike no pliega acentos y
+    sin esto cada variante de un proveedor creaba un duplicado. Best-effort:
+    si el índice no se puede armar, se sigue como antes."""
+    try:
+        from app.services import catalog_search
+        eid = catalog_search.resolve_entity(entity_type, value)
+    except Exception as exc:
+        logger.warning("Resolución por índice del catálogo no disponible: %s", exc)
+        return None
+    return s.get(Model, eid) if eid is not None else None
+
+
 def get_or_create_country(name: str) -> tuple:
     s = get_session()
     value = name.strip()
     entity = _resolve_alias(s, "country", value, Country)
     if entity:
         return entity, False
-    existing = s.query(Country).filter(Country.name.ilike(value)).first()
+    existing = (s.query(Country).filter(Country.name.ilike(value)).first()
+                or _resolve_folded(s, "country", value, Country))
     if existing:
         _upsert_alias(s, "country", value, existing.id)
         s.commit()
@@ -539,7 +554,8 @@ def get_or_create_market(name: str, country_id: int = None) -> tuple:
     entity = _resolve_alias(s, "market", value, Market)
     if entity:
         return entity, False
-    existing = s.query(Market).filter(Market.name.ilike(value)).first()
+    existing = (s.query(Market).filter(Market.name.ilike(value)).first()
+                or _resolve_folded(s, "market", value, Market))
     if existing:
         _upsert_alias(s, "market", value, existing.id)
         s.commit()
@@ -559,7 +575,8 @@ def get_or_create_instrument_type(name: str) -> tuple:
     entity = _resolve_alias(s, "instrument_type", value, InstrumentType)
     if entity:
         return entity, False
-    existing = s.query(InstrumentType).filter(InstrumentType.name.ilike(value)).first()
+    existing = (s.query(InstrumentType).filter(InstrumentType.name.ilike(value)).first()
+                or _resolve_folded(s, "instrument_type", value, InstrumentType))
     if existing:
         _upsert_alias(s, "instrument_type", value, existing.id)
         s.commit()
@@ -579,7 +596,8 @@ def get_or_create_sector(name: str) -> tuple:
     entity = _resolve_alias(s, "sector", value, Sector)
     if entity:
         return entity, False
-    existing = s.query(Sector).filter(Sector.name.ilike(value)).first()
+    existing = (s.query(Sector).filter(Sector.name.ilike(value)).first()
+                or _resolve_folded(s, "sector", value, Sector))
     if existing:
         _upsert_alias(s, "sector", value, existing.id)
         s.commit()
@@ -599,7 +617,8 @@ def get_or_create_industry(name: str, sector_id: int = None) -> tuple:
     entity = _resolve_alias(s, "industry", value, Industry)
     if entity:
         return entity, False
-    existing = s.query(Industry).filter(Industry.name.ilike(value)).first()
+    existing = (s.query(Industry).filter(Industry.name.ilike(value)).first()
+                or _resolve_folded(s, "industry", value, Industry))
     if existing:
         _upsert_alias(s, "industry", value, existing.id)
         s.commit()
@@ -0,0 +1,186 @@
+"""
+Fuerza relativa 52 semanas (relative_strength_52w) agrupada por benchmark.
+
+RS de un activo en la fecha D = retorno 52w del activo − retorno 52w de su
+benchmark, donde "hace 52 semanas" es _one_year_before(D) y cada precio es el
+último cierre <= la fecha pedida (as-of, así un activo que cotiza un día en que
+su benchmark no lo hace usa el cierre anterior del benchmark).
+
+Antes cada activo hacía su propia query de benchmark_id y rearmaba los
+ordinales del benchmark y sus dos búsquedas (cierre "ahora" y de hace un año)
+— aunque miles de activos comparten un puñado de índices. Ahora el lado
+benchmark se arma UNA vez por benchmark (`Benchmark`): ordinales, cierres y su
+retorno 52w por DÍA CALENDARIO entre su primera y su última fecha. El retorno
+del benchmark en cualquier fecha de un activo es una indexación en ese arreglo
+(mismo as-of que antes: el "ahora" y el "hace un año" de un día sin rueda son
+los cierres previos). Por activo queda solo su lado: su cierre de hace un año.
+
+`BenchmarkSet` es el contexto de una corrida — {activo: benchmark} ya cargado
+y los `Benchmark` construidos la primera vez que los pide un miembro; lo usan
+el backfill (technical_service.backfill_indicator) y el valor vigente
+(`current_for_assets`, que recorre los activos agrupados por benchmark).
+
+Paridad EXACTA con el cálculo por activo de siempre: mismas fórmulas en el
+mismo orden, así que los floats salen idénticos (tests/test_relative_strength.py
+guarda la versión por fecha como oráculo).
+"""
+from datetime import date
+
+import numpy as np
+
+_EPOCH_ORD = date(1970, 1, 1).toordinal()
+
+
+def ordinals(dates) -> np.ndarray:
+    """date.toordinal() de toda la columna, vectorizado."""
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    return days + _EPOCH_ORD
+
+
+def year_before(ords: np.ndarray) -> np.ndarray:
+    """_one_year_before sobre ordinales: mismo día un año atrás, y el 29/2 sin
+    equivalente cae en el 28."""
+    days = np.asarray(ords, dtype=np.int64) - _EPOCH_ORD
+    d = days.astype("datetime64[D]")
+    month = d.astype("datetime64[M]")
+    prev = month - np.timedelta64(12, "M")
+    ref = prev.astype("datetime64[D]") + (d - month.astype("datetime64[D]"))
+    month_end = (prev + np.timedelta64(1, "M")).astype("datetime64[D]") \
+        - np.timedelta64(1, "D")
+    return np.minimum(ref, month_end).astype(np.int64) + _EPOCH_ORD
+
+
+def _asof(ords: np.ndarray, closes: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Último cierre con ordinal <= cada target (NaN si no hay)."""
+    idx = np.searchsorted(ords, targets, side="right") - 1
+    valid = idx >= 0
+    return np.where(valid, closes[np.where(valid, idx, 0)], np.nan)
+
+
+class Benchmark:
+    """Lado benchmark del cálculo, armado una vez y compartido por todos los
+    activos que lo usan."""
+
+    __slots__ = ("ords", "closes", "first", "ret")
+
+    def __init__(self, dates, closes):
+        self.ords = ordinals(dates)
+        self.closes = np.asarray(closes, dtype=float)
+        self.first = int(self.ords[0])
+        # Retorno 52w por día calendario [primera, última fecha]
+        self.ret = self._returns(np.arange(self.first, int(self.ords[-1]) + 1))
+
+    def _returns(self, targets: np.ndarray) -> np.ndarray:
+        now = _asof(self.ords, self.closes, targets)
+        ref = _asof(self.ords, self.closes, year_before(targets))
+        ok = ~np.isnan(now) & ~np.isnan(ref) & (ref != 0)
+        return np.where(ok, (now - ref) / ref * 100, np.nan)
+
+    def returns_at(self, targets: np.ndarray) -> np.ndarray:
+        """Retorno 52w del benchmark en cada ordinal pedido."""
+        k = targets - self.first
+        inside = (k >= 0) & (k < len(self.ret))
+        out = np.full(len(targets), np.nan)
+        out[inside] = self.ret[k[inside]]
+        # Fechas del activo posteriores a la última del benchmark: pocas (el
+        # benchmark atrasado un día), se calculan al vuelo.
+        after = k >= len(self.ret)
+        if after.any():
+            out[after] = self._returns(targets[after])
+        return out
+
+
+def rs_series(df, bench: Benchmark) -> list:
+    """Serie completa de RS del activo (alineada a df), None donde no hay
+    dato."""
+    a_ords = ordinals(df["date"])
+    a_cls = df["close"].to_numpy(dtype=float)
+    a_ref = _asof(a_ords, a_cls, year_before(a_ords))
+    ret_bm = bench.returns_at(a_ords)
+    ok = ~np.isnan(ret_bm) & ~np.isnan(a_ref) & (a_ref != 0) & (a_cls != 0)
+    ret_a = np.where(ok, (a_cls - a_ref) / a_ref * 100, np.nan)
+    rs = np.where(ok, np.round(ret_a - ret_bm, 2), np.nan)
+    return [None if np.isnan(v) else float(v) for v in rs]
+
+
+def rs_last(df, bench: Benchmark) -> float | None:
+    """Solo el valor de la última fecha (valor vigente)."""
+    a_ords = ordinals(df["date"])
+    a_cls = df["close"].to_numpy(dtype=float)
+    last, last_close = a_ords[-1:], float(a_cls[-1])
+    a_ref = float(_asof(a_ords, a_cls, year_before(last))[0])
+    ret_bm = float(bench.returns_at(last)[0])
+    if np.isnan(ret_bm) or np.isnan(a_ref) or a_ref == 0 or last_close == 0:
+        return None
+    value = round((last_close - a_ref) / a_ref * 100 - ret_bm, 2)
+    return None if np.isnan(value) else value
+
+
+class BenchmarkSet:
+    """Benchmarks de una corrida: {asset_id: benchmark_id} y cada `Benchmark`
+    construido la primera vez que lo pide un miembro — desde price_cache si el
+    caller ya tiene sus precios, si no con una query."""
+
+    def __init__(self, session, bench_by_asset: dict, price_cache=None):
+        self._s = session
+        self.bench_by_asset = bench_by_asset
+        self._prices = price_cache
+        self._built: dict = {}
+
+    @classmethod
+    def for_asset(cls, session, asset_id: int, price_cache=None):
+        """Contexto de un solo activo (llamadores sueltos, sin corrida)."""
+        from app.models import Asset
+
+        bm_id = session.query(Asset.benchmark_id).filter(
+            Asset.id == asset_id).scalar()
+        return cls(session, {asset_id: bm_id}, price_cache)
+
+    def groups(self, asset_ids) -> dict:
+        """{benchmark_id: [asset_id]} de los activos con benchmark."""
+        out: dict = {}
+        for aid in asset_ids:
+            bm_id = self.bench_by_asset.get(aid)
+            if bm_id:
+                out.setdefault(bm_id, []).append(aid)
+        return out
+
+    def benchmark_of(self, asset_id: int) -> Benchmark | None:
+        bm_id = self.bench_by_asset.get(asset_id)
+        return self.get(bm_id) if bm_id else None
+
+    def get(self, bm_id: int) -> Benchmark | None:
+        if bm_id not in self._built:
+            self._built[bm_id] = self._build(bm_id)
+        return self._built[bm_id]
+
+    def _build(self, bm_id: int) -> Benchmark | None:
+        if self._prices and bm_id in self._prices:
+            df = self._prices[bm_id]
+            if df is None or df.empty:
+                return None
+            return Benchmark(df["date"], df["close"])
+        from app.models import Price
+
+        rows = self._s.query(Price.date, Price.close).filter(
+            Price.asset_id == bm_id).order_by(Price.date.asc()).all()
+        if not rows:
+            return None
+        return Benchmark([r[0] for r in rows], [r[1] for r in rows])
+
+
+def current_for_assets(benchmarks: BenchmarkSet, asset_ids,
+                       price_cache: dict) -> dict:
+    """{asset_id: RS vigente} recorriendo los activos por benchmark: el lado
+    benchmark se arma una vez por grupo. Los activos sin benchmark (o sin
+    precios del benchmark) quedan en None."""
+    out: dict = {aid: None for aid in asset_ids}
+    for bm_id, members in benchmarks.groups(asset_ids).items():
+        bench = benchmarks.get(bm_id)
+        if bench is None:
+            continue
+        for aid in members:
+            df = price_cache.get(aid)
+            if df is not None and len(df):
+                out[aid] = rs_last(df, bench)
+    return out
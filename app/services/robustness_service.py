@@ -0,0 +1,199 @@
+"""
+Robustez de las corridas de cartera: arma el remuestreo de
+robustness_engine sobre un resultado y lo guarda junto al snapshot.
+
+Qué se analiza de una corrida (`run_portfolio_backtest`):
+
+- sus curvas (gated / ranking / benchmark) con bootstrap pareado por bloques
+  → bandas de CAGR, máximo drawdown y Sharpe, la probabilidad de CAGR
+  positivo y la de superar al benchmark equiponderado camino a camino;
+- si trae los trades de las reglas (`result["rules"]`, los de
+  simulate_trades por activo): la permutación de su orden (bandas del
+  drawdown de la secuencia) y las entradas al azar con los mismos activos y
+  duraciones → probabilidad de habilidad.
+
+`save_portfolio_run` lo lanza en un thread de fondo al guardar
+(`start_for_run`: los 10k caminos sobre tres curvas y los trades no deben
+colgar el guardado) y lo persiste en portfolio_run_robustness. Las corridas
+viejas, las que se guardaron sin trades o las que todavía se están
+analizando se analizan al vuelo desde sus curvas (`for_run`) — sin la parte
+de trades, que no se puede reconstruir de un snapshot.
+"""
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+
+from app.services import robustness_engine as eng
+
+logger = logging.getLogger(__name__)
+
+_SUBMODES = (("gated", "gated"), ("ranking", "ranking"),
+             ("benchmark", "benchmark_ew"))
+_BENCH = "benchmark"
+
+
+def _returns(equity):
+    """Retornos de la curva (array) o None si no es una curva usable."""
+    if not equity or len(equity) < 2 or any(v is None for v in equity):
+        return None
+    E = np.asarray(equity, dtype=float)
+    if (E[:-1] == 0).any():
+        return None
+    return E[1:] / E[:-1] - 1
+
+
+def _years(dates):
+    if not dates or len(dates) < 2:
+        return None
+    days = (dates[-1] - dates[0]).days
+    return days / 365.25 if days > 0 else None
+
+
+def _realized(r, years):
+    return {m: _num(v[0]) for m, v in eng.path_metrics(r, years).items()}
+
+
+def _num(x):
+    return float(x) if x is not None and np.isfinite(x) else None
+
+
+def _prob_positive(values):
+    """Fracción de caminos (finitos) con valor > 0."""
+    v = values[np.isfinite(values)]
+    return float((v > 0).mean()) if len(v) else None
+
+
+def analyze(dates, curves, *, rules=None, n_paths=eng.N_PATHS,
+            block=eng.BLOCK, seed=0) -> dict:
+    """Análisis completo. `curves`: {nombre: equity} sobre `dates` (la de
+    nombre "benchmark", si está, es la vara de `prob_beats_benchmark`).
+    `rules`: {"closes": [array por activo], "trades": [(posición, entry_idx,
+    exit_idx, ret, fecha_de_entrada)]} o None."""
+    t0 = time.time()
+    years = _years(dates)
+    rets = {k: r for k, r in ((k, _returns(eq)) for k, eq in curves.items())
+            if r is not None and len(r) == len(dates) - 1}
+    paths = eng.bootstrap(rets, years, n_paths=n_paths, block=block,
+                          seed=seed) if rets else {}
+    out_curves = {}
+    for name, r in rets.items():
+        p = paths[name]
+        row = {"realized": _realized(r, years),
+               "bands": {m: eng.bands(p[m]) for m in eng.METRICS},
+               "prob_positive_cagr": _prob_positive(p["cagr"])}
+        if name != _BENCH and _BENCH in paths:
+            row["prob_beats_benchmark"] = _prob_positive(
+                p["cagr"] - paths[_BENCH]["cagr"])
+        out_curves[name] = row
+    return {"n_paths": n_paths, "block": block, "seed": seed,
+            "n_days": len(dates), "curves": out_curves,
+            "trades": (_trades(rules, n_paths=n_paths, seed=seed)
+                       if rules else None),
+            "duration_seconds": round(time.time() - t0, 3)}
+
+
+def _trades(rules, *, n_paths, seed) -> dict | None:
+    """Permutación del orden y entradas al azar. El drawdown realizado es el
+    de la secuencia CRONOLÓGICA (por fecha de entrada): los trades llegan
+    agrupados por activo, y contra ese orden la permutación no dice nada."""
+    trades = sorted((t for t in rules.get("trades") or [] if t[3] is not None),
+                    key=lambda t: (t[4], t[0]))
+    if not trades:
+        return None
+    rets = np.array([t[3] for t in trades], dtype=float)
+    realized_dd = float(eng.path_metrics(rets, None)["max_drawdown"][0])
+    order = eng.permute_trades(rets, n_paths=n_paths, seed=seed)
+    rand = eng.random_entries(rules["closes"], [t[:3] for t in trades],
+                              n_paths=n_paths, seed=seed)
+    mean_ret = float(rets.mean())
+    return {"n": len(trades),
+            "realized": {"mean_ret": mean_ret, "max_drawdown": realized_dd},
+            "order": {"max_drawdown": eng.bands(order),
+                      "prob_worse_drawdown": eng.share_below(realized_dd,
+                                                             order)},
+            "random_entry": {"mean_ret": eng.bands(rand)},
+            "prob_skill": eng.share_below(mean_ret, rand)}
+
+
+def analyze_result(result, **kw) -> dict:
+    """analyze() de un resultado de run_portfolio_backtest."""
+    curves = {sm: result[key]["equity"] for sm, key in _SUBMODES
+              if result.get(key)}
+    return analyze(result["dates"], curves, rules=result.get("rules"), **kw)
+
+
+# ── Persistencia ──────────────────────────────────────────────────────────────
+
+def save(session, run_id, analysis) -> None:
+    """Guarda (o reemplaza) el análisis de una corrida. Commitea."""
+    from app.models import PortfolioRunRobustness
+
+    row = session.get(PortfolioRunRobustness, run_id)
+    if row is None:
+        row = PortfolioRunRobustness(run_id=run_id)
+        session.add(row)
+    row.n_paths = analysis["n_paths"]
+    row.block = analysis["block"]
+    row.seed = analysis["seed"]
+    row.result = json.dumps(analysis)
+    row.duration_seconds = analysis.get("duration_seconds")
+    session.commit()
+
+
+def load(session, run_id) -> dict | None:
+    from app.models import PortfolioRunRobustness
+
+    row = session.get(PortfolioRunRobustness, run_id)
+    return json.loads(row.result) if row is not None else None
+
+
+def store_for_run(session, run_id, result) -> dict | None:
+    """Analiza y guarda el análisis de la corrida. Fail-open: si el
+    análisis falla la corrida queda guardada igual (el análisis se puede
+    pedir al vuelo después con `for_run`)."""
+    try:
+        analysis = analyze_result(result)
+        save(session, run_id, analysis)
+        return analysis
+    except Exception as exc:                                # noqa: BLE001
+        session.rollback()
+        logger.warning("Robustez de la corrida %s no guardada: %s", run_id, exc)
+        return None
+
+
+def _background(bind, run_id, result) -> None:
+    from sqlalchemy.orm import Session
+    with Session(bind) as session:
+        store_for_run(session, run_id, result)
+
+
+def start_for_run(session, run_id, result) -> threading.Thread:
+    """`store_for_run` en un thread de fondo, con una sesión propia sobre el
+    mismo engine que `session`; vuelve enseguida. La corrida ya tiene que
+    estar commiteada."""
+    th = threading.Thread(target=_background,
+                          args=(session.get_bind(), run_id, result),
+                          daemon=True, name=f"robustness-{run_id}")
+    th.start()
+    return th
+
+
+def for_run(session, run_id, **kw) -> dict | None:
+    """El análisis guardado de la corrida o, si no hay, uno al vuelo desde
+    sus curvas (sin trades, sin guardar). None si la corrida no existe."""
+    from app.services.portfolio_backtest_service import get_portfolio_run
+
+    stored = load(session, run_id)
+    if stored is not None:
+        return {**stored, "stored": True}
+    data = get_portfolio_run(session, run_id)
+    if data is None:
+        return None
+    series = data["series"]
+    dates = max((s["dates"] for s in series.values()), key=len, default=[])
+    curves = {sm: s["equity"] for sm, s in series.items()
+              if s["dates"] == dates}
+    return {**analyze(dates, curves, **kw), "stored": False}
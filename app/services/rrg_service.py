@@ -4,7 +4,8 @@ import numpy as np
 import pandas as pd
 
 from app.database import get_session
-from app.models import Asset, Price
+from app.models import Asset
+from app.services import price_bar_store
 
 logger = logging.getLogger(__name__)
 
@@ -13,19 +14,12 @@ _NORM_WINDOW = 52   # semanas para normalización rolling
 
 
 def _load_weekly(asset_id: int) -> pd.Series:
-    s = get_session()
-    rows = (
-        s.query(Price.date, Price.close)
-         .filter(Price.asset_id == asset_id)
-         .order_by(Price.date.asc())
-         .all()
-    )
-    if not rows:
+    """Cierres semanales: las barras persistidas de price_bar_store (lo mismo
+    que resamplear el diario a "W", sin leer la historia diaria)."""
+    df_w, _ = price_bar_store.bars_for(get_session(), asset_id)
+    if df_w is None or df_w.empty:
         return pd.Series(dtype=float)
-    df = pd.DataFrame(rows, columns=["date", "close"])
-    df["date"] = pd.to_datetime(df["date"])
-    df = df.set_index("date")["close"]
-    return df.resample("W").last().dropna()
+    return df_w.set_index("date")["close"]
 
 
 def _normalize_rolling(s: pd.Series, window: int) -> pd.Series:
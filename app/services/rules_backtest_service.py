@@ -76,6 +76,7 @@ def run_rules_backtest(strategy_id, spec, *, progress_cb=None):
 
     from app.database import get_session
     from app.models import signal_store
+    from app.services import query_stats_service as qs
     from app.services.trade_optimizer import load_series
     from app.services.trade_simulator import simulate_trades, summarize_trades
 
@@ -90,8 +91,10 @@ def run_rules_backtest(strategy_id, spec, *, progress_cb=None):
 
     per_asset = []
     for i, aid in enumerate(asset_ids):
-        closes, scores, pcts = load_series(aid, strategy_id)
-        trades = simulate_trades(closes, scores, spec, percentiles=pcts)
+        with qs.phase("bt:scores"):
+            closes, scores, pcts = load_series(aid, strategy_id)
+        with qs.phase("bt:simulación"):
+            trades = simulate_trades(closes, scores, spec, percentiles=pcts)
         per_asset.append({"asset_id": aid,
                           "summary": summarize_trades(trades),
                           "trades": trades})
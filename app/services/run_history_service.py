@@ -6,6 +6,7 @@ el proceso —latch `_unavailable`— en vez de reintentar en cada corrida
 (martillaría la BD, y PostgreSQL loguea cada fallo como ERROR). El monitoreo
 JAMÁS debe romper una corrida: toda función traga sus excepciones.
 """
+import json
 import logging
 import os
 import socket
@@ -79,9 +80,15 @@ def start_run(op: str, scope: str | None = None) -> int | None:
 
 def finish_run(run_id: int | None, status: str, *, total: int | None = None,
                unit: str | None = None, ok: int | None = None,
-               first_error: str | None = None) -> None:
+               first_error: str | None = None,
+               query_stats: dict | None = None) -> None:
     """Cierra la corrida `run_id` con su estado final. No-op si run_id es None
-    (start_run no pudo abrirla) o la bitácora no está disponible."""
+    (start_run no pudo abrirla) o la bitácora no está disponible.
+    query_stats: el `summary()` de query_stats_service, guardado como JSON.
+    Descarta la historia cacheada de asset_history_reader: una corrida es lo
+    que reescribe valores sobre fechas existentes."""
+    from app.services import asset_history_reader
+    asset_history_reader.invalidate()
     if _unavailable or run_id is None:
         return
     s = get_session()
@@ -89,7 +96,8 @@ def finish_run(run_id: int | None, status: str, *, total: int | None = None,
         s.execute(sa.update(RunHistory).where(RunHistory.id == run_id).values(
             status=status, finished_at=_utcnow(), total=total,
             unit=(unit[:16] if unit else None), ok=ok,
-            first_error=(first_error[:_MAX_FIRST_ERROR] if first_error else None)))
+            first_error=(first_error[:_MAX_FIRST_ERROR] if first_error else None),
+            query_stats=(json.dumps(query_stats) if query_stats else None)))
         s.commit()
     except Exception as exc:
         s.rollback()
@@ -135,6 +143,13 @@ def prune_old(retention_days: int = RETENTION_DAYS) -> int:
         return 0
 
 
+def _loads(raw):
+    try:
+        return json.loads(raw) if raw else None
+    except ValueError:
+        return None
+
+
 def get_recent(limit: int = 50) -> list[dict]:
     """Últimas corridas, más reciente primero — para la UI del Centro de
     Datos. Filas planas (sin objetos ORM) para no arrastrar la sesión."""
@@ -150,6 +165,7 @@ def get_recent(limit: int = 50) -> list[dict]:
             "started_at": r.started_at, "finished_at": r.finished_at,
             "total": r.total, "unit": r.unit, "ok": r.ok,
             "first_error": r.first_error, "host": r.host,
+            "query_stats": _loads(r.query_stats),
         } for r in rows]
     except Exception as exc:
         s.rollback()
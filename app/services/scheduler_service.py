@@ -3,7 +3,9 @@ APScheduler para la actualización diaria de precios y la verificación
 semanal de datos (asset_verification_flag). Un único proceso de
 BackgroundScheduler con dos jobs independientes: el diario se habilita
 junto con "Iniciar" (como siempre), el semanal tiene su propio toggle
-en scheduler_config (weekly_verify_enabled) y nace deshabilitado.
+en scheduler_config (weekly_verify_enabled) y nace deshabilitado. Con el
+scheduler iniciado corre además, fijo, el barrido semanal de huérfanos de
+las tablas dinámicas (purge_service.sweep_orphans).
 """
 import logging
 import threading
@@ -22,6 +24,11 @@ _daily_running = False
 
 _WEEKLY_JOB_ID = "weekly_verification"
 
+# Barrido semanal de huérfanos de las tablas dinámicas (purge_service): fijo,
+# domingo de madrugada UTC, lejos de la corrida diaria.
+_ORPHAN_JOB_ID = "orphan_sweep"
+_ORPHAN_SWEEP_CRON = {"day_of_week": "sun", "hour": 4, "minute": 30}
+
 
 def is_daily_update_running() -> bool:
     return _daily_running
@@ -73,11 +80,14 @@ def _daily_update_job() -> None:
     logger.info("Iniciando actualización diaria de precios (scheduled)")
     # Bitácora persistida: abre la corrida nocturna. Si el proceso muere a
     # mitad, queda 'running' y el próximo arranque la marca 'aborted'.
+    from app.services import query_stats_service as qs
     from app.services import run_history_service as rh
     hist_id = rh.start_run("daily")
     status, total, ok, first_error = "ok", None, None, None
+    rec = None
     try:
-        with rl.heartbeating(rl.HEAVY_WRITE, lock_token):
+        with rl.heartbeating(rl.HEAVY_WRITE, lock_token), \
+                qs.recording() as rec:
             try:
                 from app.services.price_service import update_all_active_assets
                 summary = update_all_active_assets()
@@ -113,7 +123,8 @@ def _daily_update_job() -> None:
                 status, first_error = "error", str(exc)
     finally:
         rh.finish_run(hist_id, status, total=total, unit="fechas", ok=ok,
-                      first_error=first_error)
+                      first_error=first_error,
+                      query_stats=rec.summary() if rec is not None else None)
         _daily_running = False
         # El thread del scheduler se reutiliza entre corridas: liberar la
         # sesión scoped para no retener conexión ni objetos entre días.
@@ -147,6 +158,36 @@ def _weekly_verification_job() -> None:
         Session.remove()
 
 
+def _orphan_sweep_job() -> None:
+    """Borra las filas de tablas dinámicas y anchas (sin FK a assets) cuyo
+    asset_id ya no existe: restos de purgas cortadas o de borrados por fuera
+    de la app. Toma el lock de escritura pesada como la corrida diaria: si hay
+    otra corrida, se saltea hasta la semana siguiente."""
+    from app.services import run_history_service as rh
+    from app.services import run_lock_service as rl
+    lock_token = rl.guarded_acquire(rl.HEAVY_WRITE)
+    if lock_token is None:
+        logger.warning("Barrido de huérfanos salteado: otra corrida pesada en "
+                       "curso (lock de corrida)")
+        return
+    hist_id = rh.start_run("orphans")
+    status, total, first_error = "ok", None, None
+    try:
+        with rl.heartbeating(rl.HEAVY_WRITE, lock_token):
+            from app.services.purge_service import sweep_orphans
+            result = sweep_orphans()
+            total = result["tables"]
+            logger.info("Barrido de huérfanos: %s", result)
+    except Exception as exc:
+        logger.exception("Error en el barrido de huérfanos: %s", exc)
+        status, first_error = "error", str(exc)
+    finally:
+        rh.finish_run(hist_id, status, total=total, unit="tablas", ok=total,
+                      first_error=first_error)
+        from app.database import Session
+        Session.remove()
+
+
 # ── Control del scheduler (job diario) ────────────────────────────────────────
 
 def start_scheduler() -> None:
@@ -171,6 +212,15 @@ def start_scheduler() -> None:
             coalesce=True,
             max_instances=1,
         )
+        _scheduler.add_job(
+            _orphan_sweep_job,
+            trigger=CronTrigger(**_ORPHAN_SWEEP_CRON),
+            id=_ORPHAN_JOB_ID,
+            replace_existing=True,
+            misfire_grace_time=3600,
+            coalesce=True,
+            max_instances=1,
+        )
         if cfg.weekly_verify_enabled:
             _scheduler.add_job(
                 _weekly_verification_job,
@@ -0,0 +1,201 @@
+"""
+Índice invertido para las búsquedas de texto: manual y catálogo.
+
+Antes cada búsqueda normalizaba (minúsculas, sin acentos) el texto ENTERO de
+cada sección y lo recorría con `in`/`find`, en cada tecla del buscador y en
+cada consulta de la IA: el costo crecía con el tamaño del manual. Acá el texto
+se tokeniza y se pliega UNA vez al armar el índice (`término → documento →
+posiciones`, aparte para título y cuerpo), y una consulta solo toca las
+listas de sus términos.
+
+- **Prefijos**: cada término de la consulta matchea los términos del índice
+  que empiezan con él (búsqueda binaria sobre el vocabulario ordenado), así
+  "backt" o "pack" encuentran "backtest" y "packs" mientras se escribe.
+  Entre comillas la consulta es exacta: sin prefijos.
+- **Frases**: los términos tienen que aparecer en posiciones consecutivas del
+  título o del cuerpo.
+- **Ranking BM25**: el título pesa `TITLE_WEIGHT` veces el cuerpo (BM25F
+  simplificado: frecuencia y largo ponderados por campo).
+- **Filtro por documento** (`accept`): rol mínimo del manual, visibilidad de
+  señales y estrategias. Se evalúa solo sobre los candidatos.
+
+Es lógica pura, sin BD ni disco: lo arman y lo cachean manual_service y
+catalog_search.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+_WORD_RE = re.compile(r"\w+")
+
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 3.0
+
+
+def fold(text: str) -> str:
+    """Minúsculas sin acentos — 'analisis' tiene que encontrar 'Análisis'."""
+    desc = unicodedata.normalize("NFD", text.lower())
+    return "".join(c for c in desc if unicodedata.category(c) != "Mn")
+
+
+def tokenize(text: str | None) -> list[tuple[str, int]]:
+    """[(término plegado, offset en el texto ORIGINAL)] — el offset es lo que
+    permite cortar el fragmento de contexto sobre el texto sin plegar."""
+    return [(fold(m.group()), m.start()) for m in _WORD_RE.finditer(text or "")]
+
+
+def parse_query(query: str | None) -> tuple[list[str], bool]:
+    """(términos, exacta). Entre comillas dobles la consulta es exacta."""
+    q = (query or "").strip()
+    exact = len(q) >= 2 and q[0] == q[-1] == '"'
+    return [t for t, _ in tokenize(q[1:-1] if exact else q)], exact
+
+
+@dataclass(frozen=True)
+class Match:
+    key: object        # lo que se indexó (índice de sección, entrada de catálogo)
+    score: float       # BM25
+    matched: int       # términos de la consulta presentes
+    in_title: bool
+    offset: int        # offset del primer match en el cuerpo, -1 si no hay
+
+
+class SearchIndex:
+    """Índice de documentos (key, título, cuerpo). Inmutable: se rearma
+    entero cuando cambia la fuente."""
+
+    def __init__(self, docs: Iterable[tuple[object, str, str]]):
+        self.keys: list = []
+        self._post: dict[str, dict[int, tuple[list[int], list[int]]]] = {}
+        self._offsets: list[list[int]] = []
+        self._length: list[float] = []
+        for key, title, body in docs:
+            d = len(self.keys)
+            self.keys.append(key)
+            t_toks, b_toks = tokenize(title), tokenize(body)
+            for field, toks in ((0, t_toks), (1, b_toks)):
+                for pos, (term, _) in enumerate(toks):
+                    slot = self._post.setdefault(term, {}).setdefault(d, ([], []))
+                    slot[field].append(pos)
+            self._offsets.append([off for _, off in b_toks])
+            self._length.append(TITLE_WEIGHT * len(t_toks) + len(b_toks))
+        self._avg = (sum(self._length) / len(self._length)) if self._length else 1.0
+        self._vocab = sorted(self._post)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def expand(self, term: str, prefix: bool = True) -> list[str]:
+        """Términos del índice que matchean `term` (él mismo o, con prefijo,
+        los que empiezan con él)."""
+        if not prefix:
+            return [term] if term in self._post else []
+        i = bisect.bisect_left(self._vocab, term)
+        out = []
+        while i < len(self._vocab) and self._vocab[i].startswith(term):
+            out.append(self._vocab[i])
+            i += 1
+        return out
+
+    def _slot(self, term: str, prefix: bool) -> dict[int, tuple[list, list]]:
+        """doc → (posiciones en título, en cuerpo) de todas las variantes."""
+        variants = self.expand(term, prefix)
+        if len(variants) == 1:
+            return self._post[variants[0]]
+        merged: dict[int, tuple[list, list]] = {}
+        for v in variants:
+            for d, (pt, pb) in self._post[v].items():
+                m = merged.setdefault(d, ([], []))
+                m[0].extend(pt)
+                m[1].extend(pb)
+        return merged
+
+    def _bm25(self, slots, d: int) -> float:
+        n = len(self.keys)
+        norm = K1 * (1 - B + B * self._length[d] / self._avg)
+        score = 0.0
+        for slot in slots:
+            hit = slot.get(d)
+            if hit is None:
+                continue
+            tf = TITLE_WEIGHT * len(hit[0]) + len(hit[1])
+            idf = math.log(1 + (n - len(slot) + 0.5) / (len(slot) + 0.5))
+            score += idf * tf * (K1 + 1) / (tf + norm)
+        return score
+
+    @staticmethod
+    def _phrase_at(slots, d: int, field: int) -> int:
+        """Posición donde empieza la frase en ese campo, o -1."""
+        rest = [set(s[d][field]) for s in slots[1:]]
+        for p in sorted(slots[0][d][field]):
+            if all(p + k + 1 in r for k, r in enumerate(rest)):
+                return p
+        return -1
+
+    def phrase(self, terms: list[str], *, prefix: bool = True,
+               accept: Callable[[object], bool] | None = None) -> list[Match]:
+        """Documentos con los términos en posiciones consecutivas, primero los
+        que la tienen en el título y después por BM25."""
+        if not terms:
+            return []
+        slots = [self._slot(t, prefix) for t in terms]
+        if not all(slots):
+            return []
+        docs = set(min(slots, key=len))
+        for s in slots:
+            docs.intersection_update(s)
+        out = []
+        for d in docs:
+            if accept is not None and not accept(self.keys[d]):
+                continue
+            in_title = self._phrase_at(slots, d, 0) >= 0
+            pos = self._phrase_at(slots, d, 1)
+            if not in_title and pos < 0:
+                continue
+            out.append((d, Match(self.keys[d], self._bm25(slots, d), len(terms),
+                                 in_title,
+                                 self._offsets[d][pos] if pos >= 0 else -1)))
+        out.sort(key=lambda x: (not x[1].in_title, -x[1].score, x[0]))
+        return [m for _, m in out]
+
+    def any_of(self, terms: list[str], *, prefix: bool = True,
+               accept: Callable[[object], bool] | None = None) -> list[Match]:
+        """Documentos con ALGUNO de los términos: los que tienen más primero,
+        después por BM25."""
+        slots = [s for s in (self._slot(t, prefix) for t in terms) if s]
+        docs: set[int] = set()
+        for s in slots:
+            docs.update(s)
+        out = []
+        for d in docs:
+            if accept is not None and not accept(self.keys[d]):
+                continue
+            present = [s[d] for s in slots if d in s]
+            first = min((p for _, pb in present for p in pb), default=-1)
+            out.append((d, Match(self.keys[d], self._bm25(slots, d), len(present),
+                                 any(pt for pt, _ in present),
+                                 self._offsets[d][first] if first >= 0 else -1)))
+        out.sort(key=lambda x: (-x[1].matched, -x[1].score, x[0]))
+        return [m for _, m in out]
+
+    def search(self, query: str | None, *, limit: int | None = None,
+               accept: Callable[[object], bool] | None = None,
+               stopwords: frozenset = frozenset(), min_term: int = 3
+               ) -> list[Match]:
+        """La frase primero; si no aparece en ningún lado, los términos
+        sueltos (sin conectores ni términos cortos), ordenados por cuántos
+        aparecen. Entre comillas solo la frase exacta."""
+        terms, exact = parse_query(query)
+        hits = self.phrase(terms, prefix=not exact, accept=accept)
+        if not hits and not exact:
+            loose = list(dict.fromkeys(
+                t for t in terms if len(t) >= min_term and t not in stopwords))
+            if loose and not (len(terms) == 1 and loose == terms):
+                hits = self.any_of(loose, accept=accept)
+        return hits[:limit] if limit is not None else hits
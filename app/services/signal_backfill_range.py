@@ -48,6 +48,7 @@ from sqlalchemy.exc import OperationalError
 from app.database import Session as _DbSession
 from app.database import get_session
 from app.services import db_compat
+from app.services import query_stats_service as _qs
 from app.services.db_utils import delete_by_ranges
 from app.models import (
     SignalEvalLog,
@@ -194,10 +195,14 @@ def _consume_writes(q: "queue.Queue", flush_fn, errors_out: list):
             errors_out.append(exc)
 
 
+# Fase de la corrida entera (query_stats_service): se lleva lo que no cae en
+# una etapa — contexto invariante, DDL del alcance, cierre del escritor.
+@_qs.phased("sig:preparación")
 def run_range(dates, *, only_ids, strategy_id, scope_kind,
               latest_price_date, eval_kind, eval_ref, logged,
               progress_cb=None, force=False, full_wipe=False,
-              whole_history=False, strategy_only=False) -> dict:
+              whole_history=False, strategy_only=False,
+              targets=None) -> dict:
     """Equivalente en rango del loop por-fecha de _signal_history_run.
     dates: lista ordenada de fechas a procesar (huecos + última).
 
@@ -216,8 +221,17 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
     una señal no depende de la estrategia) — y solo
     se reconstruye strat_res_{id}. Los barridos de indicadores quedan
     reducidos a lo que el FILTRO de la estrategia necesita. Costo ∝ la
-    estrategia, no ∝ la historia de sus señales."""
+    estrategia, no ∝ la historia de sus señales.
+
+    targets ({fecha: {asset_id}}, con dates = sorted(targets); nunca con
+    force): refresco dirigido de signal_dirty_range. Las señales se evalúan y
+    reescriben SOLO para esas celdas (activo, fecha); los scores del resto de
+    la cross-section se leen de la tabla, como en strategy_only, para
+    recalcular los resultados de estrategia de la fecha entera — el percentil
+    de cada activo depende de todos los demás."""
     s = get_session()
+    if targets is not None and force:
+        raise ValueError("targets es un delta: no se combina con force")
 
     # ── Contexto invariante de la corrida ─────────────────────────────────
     prep = _prepare_signals(s, only_ids)
@@ -268,6 +282,11 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
 
     sig_id_by_key = {sig.key: sig.id for sig in prep["signals"]}
 
+    # Refresco dirigido: el resto de la cross-section se LEE (mismo prefetch
+    # que strategy_only) solo si hay estrategias que rankear.
+    targeted = targets is not None
+    read_stored = strategy_only or (targeted and bool(strat_ctx))
+
     # Códigos a barrer: señales + filtro (historic). En strategy_only solo el
     # filtro necesita indicadores (las señales se leen de la tabla).
     if strategy_only:
@@ -304,6 +323,7 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
             signal_store.ensure_sig_column(sig_id, bind=s.connection())
         for st_id in strat_ids:
             signal_store.ensure_strat_columns(st_id, bind=s.connection())
+        signal_store.ensure_wide_signal_partitions(bind=s.connection())
     else:
         for sig_id in signal_ids_all:
             signal_store.ensure_sig_table(sig_id, bind=s.connection())
@@ -362,6 +382,18 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
                 cols_windows = (
                     [(str(dates[0]), str(dates[-1]))] if whole_history
                     else windows)
+                if scope_kind is None and not strategy_only:
+                    # Alcance total con horizonte: las particiones anuales que
+                    # el rango cubre enteras se vacían de un golpe (sin tuplas
+                    # muertas); el NULL por ventanas solo encuentra filas en
+                    # los años del borde. Sin particiones es no-op.
+                    for tbl in (signal_store.SIG_WIDE_TABLE,
+                                signal_store.STRAT_WIDE_TABLE):
+                        vaciadas = signal_store.truncate_wide_range(
+                            ws, tbl, dates[0], dates[-1])
+                        if vaciadas:
+                            logger.info("signal_backfill_range: %s particiones "
+                                        "vaciadas: %s", tbl, ", ".join(vaciadas))
                 if not strategy_only:
                     signal_store.wide_null_columns_ranges(
                         ws, signal_store.SIG_WIDE_TABLE, _sig_cols, cols_windows)
@@ -404,12 +436,29 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
         ws.connection().exec_driver_sql(
             f"INSERT INTO {table_name} ({cols}) VALUES ({ph})", rows)
 
+    def _dirty_groups(batch_dates):
+        """{activos sucios: [fechas]} del lote: un activo atrasado lo está en
+        todas las fechas desde su marca, así que las fechas se agrupan casi
+        enteras — una sentencia por grupo, no por fecha."""
+        groups: dict = {}
+        for d in batch_dates:
+            groups.setdefault(frozenset(targets[d]), []).append(d)
+        return groups
+
     def _flush_once(ws, batch_dates, sv_by_sig, sr_by_strat, marker_rows):
         if wide:
             # Delta (no force): limpiar las columnas del alcance de las fechas del
             # batch (equivalente al DELETE de fila per-entidad). En rebuild la
             # limpieza ya la hizo _initial_cleanup (truncate o null por rango).
-            if not force:
+            # Dirigido: de las señales, solo las celdas sucias.
+            if targeted:
+                for aids, ds in _dirty_groups(batch_dates).items():
+                    signal_store.wide_null_columns(
+                        ws, signal_store.SIG_WIDE_TABLE, _sig_cols, ds,
+                        asset_ids=sorted(aids))
+                signal_store.wide_null_columns(
+                    ws, signal_store.STRAT_WIDE_TABLE, _strat_cols, batch_dates)
+            elif not force:
                 if not strategy_only:
                     signal_store.wide_null_columns(
                         ws, signal_store.SIG_WIDE_TABLE, _sig_cols, batch_dates)
@@ -431,12 +480,20 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
 
         if not force:
             dates_in = ", ".join(f"'{d}'" for d in batch_dates)
+            if targeted:
+                cells = [(", ".join(f"'{d}'" for d in ds),
+                          ", ".join(str(a) for a in sorted(aids)))
+                         for aids, ds in _dirty_groups(batch_dates).items()]
+            else:
+                cells = [(dates_in, None)]
             for sig_id in signal_ids_all:
                 if strategy_only:
                     break
-                ws.execute(sa.text(
-                    f"DELETE FROM {signal_store.sig_table_name(sig_id)} "
-                    f"WHERE date IN ({dates_in})"))
+                for ds_in, aids_in in cells:
+                    ws.execute(sa.text(
+                        f"DELETE FROM {signal_store.sig_table_name(sig_id)} "
+                        f"WHERE date IN ({ds_in})"
+                        + (f" AND asset_id IN ({aids_in})" if aids_in else "")))
             for st_id in strat_ids:
                 ws.execute(sa.text(
                     f"DELETE FROM {signal_store.strat_table_name(st_id)} "
@@ -465,7 +522,9 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
         _tw0 = time.perf_counter()
         for attempt in range(_MAX_LOCK_RETRIES + 1):
             try:
-                _flush_once(ws, batch_dates, sv_by_sig, sr_by_strat, marker_rows)
+                with _qs.phase("sig:escritura"):
+                    _flush_once(ws, batch_dates, sv_by_sig, sr_by_strat,
+                                marker_rows)
                 break
             except OperationalError as exc:
                 ws.rollback()
@@ -531,24 +590,28 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
         la limpia al salir (remove = cierra y devuelve la conexión al pool,
         sin snapshots InnoDB retenidos entre chunks)."""
         if _readers is None:
-            return [fn(s, *args) for fn, args in tasks]
+            with _qs.phase("sig:lectura"):
+                return [fn(s, *args) for fn, args in tasks]
 
         def _wrap(fn, args):
             _used_readers.add(threading.current_thread().name)
             rs = get_session()
             try:
-                return fn(rs, *args)
+                with _qs.phase("sig:lectura"):
+                    return fn(rs, *args)
             finally:
                 _DbSession.remove()
 
-        futures = [_readers.submit(_wrap, fn, args) for fn, args in tasks]
+        _task = _qs.bound(_wrap)
+        futures = [_readers.submit(_task, fn, args) for fn, args in tasks]
         return [f.result() for f in futures]
 
     def _writer_main():
         ws = get_session()
         try:
             try:
-                _initial_cleanup(ws)
+                with _qs.phase("sig:limpieza"):
+                    _initial_cleanup(ws)
             except Exception as exc:
                 logger.exception(
                     "signal_backfill_range: limpieza inicial falló")
@@ -559,10 +622,12 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
 
     _writer = None
     if use_async:
-        _writer = threading.Thread(target=_writer_main, daemon=True)
+        _writer = threading.Thread(target=_qs.bound(_writer_main),
+                                   daemon=True)
         _writer.start()
     else:
-        _initial_cleanup(s)
+        with _qs.phase("sig:limpieza"):
+            _initial_cleanup(s)
 
     def _emit(batch_dates, sv_by_sig, sr_by_strat, marker_rows):
         """Entrega un lote al escritor (asíncrono) o flushea inline (sync).
@@ -612,7 +677,7 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
                 read_tasks.append(
                     ("closes", None, (_load_price_closes,
                                       (chunk[0], window_end))))
-            if strategy_only:
+            if read_stored:
                 if wide:
                     # Un scan de la ancha trae todas las señales del alcance (una
                     # columna por señal) en vez de N tablas — as-of fiel por
@@ -668,107 +733,121 @@ def run_range(dates, *, only_ids, strategy_id, scope_kind,
             flush_rows = 0  # contador para el flush intermedio por volumen
 
             _tc0, _w0 = time.perf_counter(), _t_wait[0]
-            for d in chunk:
-                done += 1
-                d_str = str(d)
-                if progress_cb:
-                    # segundos vivos de cómputo: acumulado + lo que va de
-                    # este chunk, descontando esperas al escritor
-                    live = (_t_compute[0] + (time.perf_counter() - _tc0)
-                            - (_t_wait[0] - _w0))
-                    progress_cb(done, total,
-                                f"cómputo: {done}/{total} productor "
-                                f"t={live:.0f} {d_str}")
-
-                for sw in sweeps.values():
-                    sw.advance(d)
-
-                # Snapshots as-of de todos los códigos barridos
-                snap = {code: sw.snapshot_asof(d) for code, sw in sweeps.items()}
-
-                if strategy_only:
-                    # Señales LEÍDAS (no evaluadas, no escritas)
-                    sv_scores = stored_sv_by_date.get(d, {})
-                else:
-                    # isnaps para señales de activo (hist + current-si-es-hoy
-                    # + virtual)
-                    isnaps: dict[int, dict] = {}
-                    for code in prep["hist_codes"]:
-                        for aid, val in snap.get(code, {}).items():
-                            isnaps.setdefault(aid, {})[code] = val
-                    if prep["nohist_codes"] and d == latest_price_date:
-                        for code in prep["nohist_codes"]:
-                            for aid, val in current_by_code.get(code, {}).items():
+            with _qs.phase("sig:cómputo"):
+                for d in chunk:
+                    done += 1
+                    d_str = str(d)
+                    if progress_cb:
+                        # segundos vivos de cómputo: acumulado + lo que va de
+                        # este chunk, descontando esperas al escritor
+                        live = (_t_compute[0] + (time.perf_counter() - _tc0)
+                                - (_t_wait[0] - _w0))
+                        progress_cb(done, total,
+                                    f"cómputo: {done}/{total} productor "
+                                    f"t={live:.0f} {d_str}")
+
+                    for sw in sweeps.values():
+                        sw.advance(d)
+
+                    # Snapshots as-of de todos los códigos barridos
+                    snap = {code: sw.snapshot_asof(d) for code, sw in sweeps.items()}
+
+                    if strategy_only:
+                        # Señales LEÍDAS (no evaluadas, no escritas)
+                        sv_scores = stored_sv_by_date.get(d, {})
+                    else:
+                        # isnaps para señales de activo (hist + current-si-es-hoy
+                        # + virtual)
+                        isnaps: dict[int, dict] = {}
+                        for code in prep["hist_codes"]:
+                            for aid, val in snap.get(code, {}).items():
                                 isnaps.setdefault(aid, {})[code] = val
-                    if need_last_close:
-                        for aid, val in closes_by_date.get(d, {}).items():
-                            isnaps.setdefault(aid, {})["last_close"] = val
-
-                    sv_scores = _evaluate_asset_signal_scores(
-                        signals=prep["signals"],
-                        asset_signals=prep["asset_signals"],
-                        params_by_id=prep["params_by_id"],
-                        compiled_by_id=prep["compiled_by_id"], isnaps=isnaps)
-                    for (sig_id, aid), v in sv_scores.items():
-                        sv_by_sig.setdefault(sig_id, []).append(
-                            (aid, d_str, v))
-                    flush_rows += len(sv_scores)
-
-                # Índice por señal, UNA pasada por fecha: sin esto cada
-                # estrategia rebarre los ~8000 scores del día y el costo
-                # crece cuadrático con la densidad (lento en la era moderna)
-                sv_by_signal: dict[int, dict] = {}
-                for (sig_id, aid), sc in sv_scores.items():
-                    sv_by_signal.setdefault(sig_id, {})[aid] = sc
-
-                # Estrategias: mismos insumos que el camino por-fecha, pero
-                # desde memoria (señales recién calculadas + as-of del barrido)
-                for ctx in strat_ctx:
-                    aids = set()
-                    for sig_id in ctx["signal_ids"]:
-                        aids.update(sv_by_signal.get(sig_id, ()))
-                    groups_sub = {aid: asset_groups[aid] for aid in aids
-                                  if aid in asset_groups}
-                    operand_values: dict[tuple, dict] = {}
-                    for t, key, res in ctx["operands"]:
-                        if t == "indicator" and res == "current":
-                            operand_values[(t, key, res)] = current_by_code.get(key, {})
-                        elif t == "indicator":
-                            operand_values[(t, key, res)] = snap.get(key, {})
-                        elif t == "signal":
-                            op_id = sig_id_by_key.get(key)
-                            operand_values[(t, key, res)] = (
-                                sv_by_signal.get(op_id, {})
-                                if op_id is not None else {})
-                    scored = rank_strategy_assets(
-                        components=ctx["components"], asset_groups=groups_sub,
-                        signal_scores=sv_scores,
-                        filter_tree=ctx["tree"], operand_values=operand_values)
-                    pcts = percent_ranks([score for _, score in scored])
-                    sr_by_strat.setdefault(ctx["id"], []).extend(
-                        (aid, d_str, score, pct)
-                        for (aid, score), pct in zip(scored, pcts))
-                    flush_rows += len(scored)
-
-                # En rebuild (force) SIEMPRE se re-marca: _initial_cleanup borró
-                # los markers del alcance, así que reinsertarlos por chunk deja
-                # marcador y dato en la MISMA transacción — un corte nunca separa
-                # "marcado" de "escrito". En delta se respeta `logged` (no
-                # reinsertar los que ya estaban).
-                if force or d not in logged:
-                    marker_rows.append((eval_kind, eval_ref, d_str))
-                batch_dates.append(d)
-
-                # Flush intermedio por volumen: en la era densa un chunk
-                # entero acumularía ~2M filas (memoria + transacción gigante)
-                if flush_rows >= _MAX_ROWS_PER_FLUSH:
-                    _emit(batch_dates, sv_by_sig, sr_by_strat, marker_rows)
-                    sv_by_sig, sr_by_strat = {}, {}
-                    marker_rows = []
-                    batch_dates = []
-                    flush_rows = 0
-
-            _emit(batch_dates, sv_by_sig, sr_by_strat, marker_rows)
+                        if prep["nohist_codes"] and d == latest_price_date:
+                            for code in prep["nohist_codes"]:
+                                for aid, val in current_by_code.get(code, {}).items():
+                                    isnaps.setdefault(aid, {})[code] = val
+                        if need_last_close:
+                            for aid, val in closes_by_date.get(d, {}).items():
+                                isnaps.setdefault(aid, {})["last_close"] = val
+                        if targeted:
+                            dirty = targets[d]
+                            isnaps = {aid: v for aid, v in isnaps.items()
+                                      if aid in dirty}
+
+                        sv_scores = _evaluate_asset_signal_scores(
+                            signals=prep["signals"],
+                            asset_signals=prep["asset_signals"],
+                            params_by_id=prep["params_by_id"],
+                            compiled_by_id=prep["compiled_by_id"], isnaps=isnaps)
+                        for (sig_id, aid), v in sv_scores.items():
+                            sv_by_sig.setdefault(sig_id, []).append(
+                                (aid, d_str, v))
+                        flush_rows += len(sv_scores)
+                        if targeted and strat_ctx:
+                            # Cross-section completa para las estrategias: lo
+                            # guardado de los activos al día + lo recién
+                            # evaluado de los sucios
+                            merged = {k: v for k, v in
+                                      stored_sv_by_date.get(d, {}).items()
+                                      if k[1] not in dirty}
+                            merged.update(sv_scores)
+                            sv_scores = merged
+
+                    # Índice por señal, UNA pasada por fecha: sin esto cada
+                    # estrategia rebarre los ~8000 scores del día y el costo
+                    # crece cuadrático con la densidad (lento en la era moderna)
+                    sv_by_signal: dict[int, dict] = {}
+                    for (sig_id, aid), sc in sv_scores.items():
+                        sv_by_signal.setdefault(sig_id, {})[aid] = sc
+
+                    # Estrategias: mismos insumos que el camino por-fecha, pero
+                    # desde memoria (señales recién calculadas + as-of del barrido)
+                    for ctx in strat_ctx:
+                        aids = set()
+                        for sig_id in ctx["signal_ids"]:
+                            aids.update(sv_by_signal.get(sig_id, ()))
+                        groups_sub = {aid: asset_groups[aid] for aid in aids
+                                      if aid in asset_groups}
+                        operand_values: dict[tuple, dict] = {}
+                        for t, key, res in ctx["operands"]:
+                            if t == "indicator" and res == "current":
+                                operand_values[(t, key, res)] = current_by_code.get(key, {})
+                            elif t == "indicator":
+                                operand_values[(t, key, res)] = snap.get(key, {})
+                            elif t == "signal":
+                                op_id = sig_id_by_key.get(key)
+                                operand_values[(t, key, res)] = (
+                                    sv_by_signal.get(op_id, {})
+                                    if op_id is not None else {})
+                        scored = rank_strategy_assets(
+                            components=ctx["components"], asset_groups=groups_sub,
+                            signal_scores=sv_scores,
+                            filter_tree=ctx["tree"], operand_values=operand_values)
+                        pcts = percent_ranks([score for _, score in scored])
+                        sr_by_strat.setdefault(ctx["id"], []).extend(
+                            (aid, d_str, score, pct)
+                            for (aid, score), pct in zip(scored, pcts))
+                        flush_rows += len(scored)
+
+                    # En rebuild (force) SIEMPRE se re-marca: _initial_cleanup borró
+                    # los markers del alcance, así que reinsertarlos por chunk deja
+                    # marcador y dato en la MISMA transacción — un corte nunca separa
+                    # "marcado" de "escrito". En delta se respeta `logged` (no
+                    # reinsertar los que ya estaban).
+                    if force or d not in logged:
+                        marker_rows.append((eval_kind, eval_ref, d_str))
+                    batch_dates.append(d)
+
+                    # Flush intermedio por volumen: en la era densa un chunk
+                    # entero acumularía ~2M filas (memoria + transacción gigante)
+                    if flush_rows >= _MAX_ROWS_PER_FLUSH:
+                        _emit(batch_dates, sv_by_sig, sr_by_strat, marker_rows)
+                        sv_by_sig, sr_by_strat = {}, {}
+                        marker_rows = []
+                        batch_dates = []
+                        flush_rows = 0
+
+                _emit(batch_dates, sv_by_sig, sr_by_strat, marker_rows)
             # cómputo = loop menos lo que _emit pasó bloqueado esperando
             _t_compute[0] += ((time.perf_counter() - _tc0)
                               - (_t_wait[0] - _w0))
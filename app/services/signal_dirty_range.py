@@ -0,0 +1,144 @@
+"""
+Rango sucio por activo: refresco dirigido de la historia de señales cuando
+los datos de un activo llegan tarde.
+
+El delta de señales (signal_service._signal_history_run) decide QUÉ fechas
+correr de forma global: una fecha que ya tiene algún score no se vuelve a
+tocar (salvo la última). Si un activo no operó un día en que otros sí
+(feriado local, fuente atrasada), ese día sus scores salen del as-of de sus
+indicadores — arrastrados del último día con dato — y cuando su precio real
+llega después, la fecha ya figura como evaluada: el score arrastrado quedaba
+hasta el próximo "Recalcular completo".
+
+Acá se lleva, por activo, la fecha mínima con dato genuinamente nuevo
+(tabla signal_dirty_range):
+
+- las escrituras de precios (price_service._upsert_prices) marcan la primera
+  fecha posterior al último precio que el activo tenía — reescribir la última
+  fecha preliminar NO cuenta;
+- el delta de indicadores marca la primera fecha con valor posterior al
+  max_date cacheado en ind_asset_meta.
+
+La marca se acumula con mínimo. El delta de señales sin alcance la consume:
+recalcula con signal_backfill_range.run_range(targets=...) solo las celdas
+(activo, fecha) YA evaluadas desde esa fecha —más los resultados de
+estrategia de esas fechas, cuyo percentil depende de la cross-section
+entera— y borra la marca si terminó sin errores. Las fechas que el delta
+corre completas (huecos + la última) no entran: ya se recalculan enteras.
+En un activo al día la marca es la fecha nueva, que es justamente la última:
+el costo del refresco dirigido es cero.
+
+Tope: MAX_DAYS días corridos hacia atrás desde el último precio. Una marca
+más vieja (redescarga completa, activo nuevo con historia larga) refresca
+solo esa ventana; lo anterior sigue pidiendo el rebuild, como antes.
+
+Es un atajo: si la tabla falta (migración pendiente) las marcas se pierden
+con un warning y el delta se comporta como siempre.
+"""
+import bisect
+import logging
+from datetime import date, datetime, timedelta
+
+import sqlalchemy as sa
+
+from app.models import SignalDirtyRange
+from app.services import db_compat
+
+logger = logging.getLogger(__name__)
+
+MAX_DAYS = 90
+
+_IN_CHUNK = 500   # activos por query del prefetch (IN acotado)
+
+
+def _as_date(v) -> date:
+    return v.date() if isinstance(v, datetime) else v
+
+
+def mark(session, first_new: dict) -> None:
+    """Acumula {asset_id: primera fecha nueva} con mínimo sobre lo marcado.
+
+    NO commitea: la marca va en la transacción del llamador (precios y marca
+    juntos, o nada). Corre dentro de un savepoint — si la tabla falla, el
+    llamador sigue con su escritura intacta."""
+    first_new = {aid: _as_date(d) for aid, d in first_new.items()
+                 if d is not None}
+    if not first_new:
+        return
+    t = SignalDirtyRange
+    cols = ("min_dirty_date", "seq", "updated_at")
+    try:
+        with session.begin_nested():
+            ids = list(first_new)
+            now = datetime.utcnow()
+            for i in range(0, len(ids), _IN_CHUNK):
+                part = ids[i:i + _IN_CHUNK]
+                stored = {r.asset_id: r for r in session.execute(
+                    sa.select(t.asset_id, t.min_dirty_date, t.seq)
+                    .where(t.asset_id.in_(part)))}
+                rows = []
+                for aid in part:
+                    d, old = first_new[aid], stored.get(aid)
+                    rows.append({
+                        "asset_id": aid,
+                        "min_dirty_date": min(d, old.min_dirty_date) if old else d,
+                        "seq": old.seq + 1 if old else 1,
+                        "updated_at": now})
+                session.execute(db_compat.upsert(
+                    session, t, rows, {c: db_compat.INSERTED for c in cols}))
+    except Exception as exc:
+        logger.warning("No se pudo marcar el rango sucio de señales "
+                       "(%d activos): %s", len(first_new), exc)
+
+
+def pending(session) -> dict[int, tuple]:
+    """{asset_id: (min_dirty_date, seq)} — la foto que el delta consume."""
+    t = SignalDirtyRange
+    try:
+        return {aid: (_as_date(d), seq) for aid, d, seq in session.execute(
+            sa.select(t.asset_id, t.min_dirty_date, t.seq))}
+    except Exception as exc:
+        session.rollback()
+        logger.warning("Rango sucio de señales no disponible: %s", exc)
+        return {}
+
+
+def targets(marks: dict, evaluated, skip, last) -> dict:
+    """{fecha: {asset_id}} a refrescar: fechas ya evaluadas (`evaluated`)
+    desde la marca de cada activo, dentro de los MAX_DAYS previos a `last`,
+    menos las que el delta ya corre completas (`skip`)."""
+    floor = last - timedelta(days=MAX_DAYS)
+    cand = sorted(d for d in evaluated
+                  if floor <= d <= last and d not in skip)
+    out: dict = {}
+    capped = 0
+    for aid, (d0, _seq) in marks.items():
+        if d0 < floor:
+            capped += 1
+        for d in cand[bisect.bisect_left(cand, max(d0, floor)):]:
+            out.setdefault(d, set()).add(aid)
+    if capped:
+        logger.info("signal_dirty_range: %d activos con datos nuevos de hace "
+                    "más de %d días — se refrescan solo los últimos %d (lo "
+                    "anterior necesita 'Recalcular completo')",
+                    capped, MAX_DAYS, MAX_DAYS)
+    return out
+
+
+def consume(session, marks: dict) -> int:
+    """Borra las marcas de la foto `marks` que siguen iguales (mismo seq): una
+    que se movió mientras corría el delta queda para el próximo. Commitea."""
+    if not marks:
+        return 0
+    t = SignalDirtyRange.__table__
+    stmt = sa.delete(t).where(t.c.asset_id == sa.bindparam("aid"),
+                              t.c.seq == sa.bindparam("q"))
+    try:
+        res = session.connection().execute(
+            stmt, [{"aid": aid, "q": seq} for aid, (_d, seq) in marks.items()])
+        session.commit()
+        return res.rowcount or 0
+    except Exception as exc:
+        session.rollback()
+        logger.warning("No se pudo limpiar el rango sucio de señales: %s", exc)
+        return 0
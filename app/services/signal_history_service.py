@@ -3,10 +3,8 @@ Historial de señales por activo — queries para la pantalla de evolución.
 """
 from datetime import date as date_type
 
-import sqlalchemy as sa
-
 from app.database import get_session
-from app.models import SignalDefinition, Strategy, signal_store
+from app.models import SignalDefinition, Strategy
 
 
 def get_asset_signal_history(
@@ -17,22 +15,13 @@ def get_asset_signal_history(
 ) -> dict[int, list[tuple]]:
     """
     {signal_id: [(date, score), ...]} ordenado por fecha asc.
-    Una query por señal (cada una tiene su tabla; el índice
-    (asset_id, date) cubre esta lectura).
+    Una sola lectura de signal_values_wide para todas las señales (una por
+    tabla sig_{id} con el flag ancho apagado), vía asset_history_reader.
     """
-    s = get_session()
-    result: dict[int, list] = {sid: [] for sid in signal_ids}
-    for sig_id in signal_ids:
-        t = signal_store.read_sig_table(s, sig_id)
-        q = (sa.select(t.c.date, t.c.score)
-             .where(t.c.asset_id == asset_id, t.c.score.isnot(None)))
-        if date_from:
-            q = q.where(t.c.date >= date_from)
-        if date_to:
-            q = q.where(t.c.date <= date_to)
-        for dt, score in s.execute(q.order_by(t.c.date)):
-            result[sig_id].append((dt, score))
-    return result
+    from app.services.asset_history_reader import read_asset_history
+    hist = read_asset_history(asset_id, signals=signal_ids,
+                              date_from=date_from, date_to=date_to)
+    return {sid: hist.signal(sid) for sid in signal_ids}
 
 
 def get_signals_for_strategy(strategy_id: int) -> list[SignalDefinition]:
@@ -16,7 +16,7 @@ from app.models import signal_store
 from app.models.indicator_definition import IndicatorDefinition
 from app.models.indicator_store import query_values_asof
 from app.models.price import Price
-from app.services import db_compat, signal_engine
+from app.services import db_compat, signal_dirty_range, signal_engine
 
 logger = logging.getLogger(__name__)
 
@@ -881,6 +881,13 @@ def _signal_history_run(progress_cb=None, days: int | None = None,
 
     dates = _dates_to_compute(trading_dates, computed, force)
 
+    # Rango sucio (datos llegados tarde, ver signal_dirty_range): solo el
+    # alcance total lo consume — una estrategia o señal suelta no refresca
+    # las demás. La foto se toma ANTES de correr: lo que se marque mientras
+    # tanto queda para el próximo delta.
+    dirty_marks = (signal_dirty_range.pending(s)
+                   if scope_kind is None and with_signals else {})
+
     # Modo rango: con muchas fechas, el loop por-fecha repite queries
     # constantes/incrementales 25.000 veces — el barrido cronológico hace lo
     # mismo con una carga por chunk (ver signal_backfill_range). El camino
@@ -889,7 +896,7 @@ def _signal_history_run(progress_cb=None, days: int | None = None,
 
     if len(dates) >= _RANGE_MODE_MIN_DATES:
         from app.services import signal_backfill_range
-        return signal_backfill_range.run_range(
+        result = signal_backfill_range.run_range(
             dates,
             only_ids=only_ids, strategy_id=strategy_id,
             scope_kind=scope_kind, latest_price_date=last,
@@ -898,6 +905,8 @@ def _signal_history_run(progress_cb=None, days: int | None = None,
             full_wipe=(force and horizon is None and scope_kind is None),
             whole_history=(force and horizon is None),
             strategy_only=strategy_only)
+        return _refresh_dirty(s, result, dirty_marks, computed, dates,
+                              last, logged, progress_cb, force, horizon)
 
     total, ok, errors = len(dates), 0, []
     for i, d in enumerate(dates, start=1):
@@ -926,7 +935,47 @@ def _signal_history_run(progress_cb=None, days: int | None = None,
             # compartida en estado rolled-back y TODAS las fechas
             # siguientes fallarían con "issue Session.rollback()"
             s.rollback()
-    return {"total": total, "success": ok, "errors": errors, "unit": "fechas"}
+    result = {"total": total, "success": ok, "errors": errors, "unit": "fechas"}
+    return _refresh_dirty(s, result, dirty_marks, computed, dates, last,
+                          logged, progress_cb, force, horizon)
+
+
+def _refresh_dirty(s, result: dict, marks: dict, computed: set, dates: list,
+                   last, logged: set, progress_cb, force: bool,
+                   horizon) -> dict:
+    """Segunda pasada del alcance total: refresca las celdas (activo, fecha)
+    ya evaluadas que quedaron viejas por datos llegados tarde (ver
+    signal_dirty_range) y consume las marcas si terminó sin errores.
+
+    Un rebuild sin horizonte ya recalculó todo: solo consume. Con horizonte
+    no las toca (lo anterior al horizonte puede seguir sucio)."""
+    from app.services import signal_backfill_range
+
+    if not marks:
+        return result
+    if force:
+        if horizon is None and not result["errors"]:
+            signal_dirty_range.consume(s, marks)
+        return result
+
+    targets = signal_dirty_range.targets(marks, computed, set(dates), last)
+    if targets:
+        cells = sum(len(a) for a in targets.values())
+        logger.info("signal_service: refresco dirigido de %d celdas "
+                    "(activo, fecha) en %d fechas", cells, len(targets))
+        extra = signal_backfill_range.run_range(
+            sorted(targets), only_ids=None, strategy_id=None,
+            scope_kind=None, latest_price_date=last, eval_kind="all",
+            eval_ref=0, logged=logged, progress_cb=progress_cb,
+            targets=targets)
+        result = {**result,
+                  "total": result["total"] + extra["total"],
+                  "success": result["success"] + extra["success"],
+                  "errors": result["errors"] + extra["errors"]}
+        if extra["errors"]:
+            return result
+    signal_dirty_range.consume(s, marks)
+    return result
 
 
 def update_signal_history(progress_cb=None, days: int | None = None,
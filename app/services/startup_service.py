@@ -1,4 +1,9 @@
+import hashlib
+import json
 import logging
+from datetime import datetime
+
+import sqlalchemy as sa
 
 logger = logging.getLogger(__name__)
 
@@ -116,77 +121,184 @@ _BUILTIN_FUND_SOURCES = [
 ]
 
 
-def ensure_builtin_data() -> None:
-    from app.database import get_session
+# ── Manifiesto y reconciliación por conjuntos ───────────────────────────────
+# Antes cada fila integrada era una consulta de existencia más un INSERT (o un
+# UPDATE campo a campo): ~80 round-trips en cada arranque de web, worker y
+# reciclado, creciendo con el catálogo. Ahora cada tabla es UNA lectura, un
+# diff en memoria y UN upsert multi-fila solo de lo que falta o cambió; y si
+# la huella del manifiesto coincide con la del último arranque exitoso
+# (bootstrap_state) ni siquiera eso.
+
+# Campos de IndicatorDefinition que manda el manifiesto (se actualizan si
+# cambiaron) y su valor cuando la entrada no los declara.
+_INDICATOR_FIELDS = {"name": None, "category": None, "scale": None,
+                     "type": None, "description": None,
+                     "keep_history": True, "full_sample": False}
+
+# Subirlo cuando cambie la LÓGICA de reconciliación sin cambiar las listas:
+# fuerza una reconciliación en el próximo arranque de cada base.
+_RECONCILER_VERSION = 1
+_MARKER = "builtin_data"
+
+
+def _indicator_rows() -> list[dict]:
+    return [{"code": ind["code"],
+             **{f: ind.get(f, d) for f, d in _INDICATOR_FIELDS.items()}}
+            for ind in _BUILTIN_INDICATORS]
+
+
+def manifest_hash() -> str:
+    """sha256 del manifiesto completo (y de la versión del reconciliador)."""
+    manifest = {"version": _RECONCILER_VERSION,
+                "price_sources": _BUILTIN_SOURCES,
+                "fundamental_sources": _BUILTIN_FUND_SOURCES,
+                "assets": _BUILTIN_ASSETS,
+                "indicators": _indicator_rows()}
+    raw = json.dumps(manifest, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def reconcile(conn, target, key: str, rows: list[dict],
+              update: tuple = ()) -> tuple[int, int]:
+    """Lleva `target` a contener `rows` (identificadas por `key`, su clave
+    única) con una lectura y a lo sumo un upsert multi-fila. Las columnas de
+    `update` se corrigen si difieren; las filas existentes no se tocan en lo
+    demás (lo que el usuario editó de una fuente integrada se respeta).
+    Devuelve (insertadas, actualizadas)."""
+    from app.services import db_compat
+
+    table = target.__table__
+    current = {r[key]: r for r in conn.execute(
+        sa.select(table.c[key], *(table.c[c] for c in update))).mappings()}
+    missing = [r for r in rows if r[key] not in current]
+    changed = [r for r in rows if r[key] in current
+               and any(current[r[key]][c] != r[c] for c in update)]
+    if missing or changed:
+        # Upsert y no INSERT: web y worker arrancan a la vez y los dos ven la
+        # misma fila faltante. Sin columnas a actualizar, el "update" es
+        # reescribir la clave consigo misma — un no-op que no pisa nada.
+        conn.execute(db_compat.upsert(
+            conn, target, missing + changed,
+            {c: db_compat.INSERTED for c in (update or (key,))}))
+    return len(missing), len(changed)
+
+
+def _read_marker(s) -> str | None:
+    """Huella guardada; None si no hay o la tabla todavía no existe
+    (migración 0111 pendiente) — en ese caso se reconcilia completo."""
+    from app.models import BootstrapState
+    try:
+        with s.begin_nested():
+            return s.execute(sa.select(BootstrapState.manifest_hash).where(
+                BootstrapState.name == _MARKER)).scalar()
+    except Exception:
+        return None
+
+
+def _write_marker(s, digest: str) -> None:
+    from app.models import BootstrapState
+    from app.services import db_compat
+    try:
+        with s.begin_nested():
+            s.execute(db_compat.upsert(
+                s, BootstrapState,
+                {"name": _MARKER, "manifest_hash": digest,
+                 "applied_at": datetime.utcnow()},
+                {"manifest_hash": db_compat.INSERTED,
+                 "applied_at": db_compat.INSERTED}))
+    except Exception as exc:
+        logger.warning("No se pudo guardar la huella del arranque: %s", exc)
+
+
+def _reconcile_builtin_rows(conn) -> None:
     from app.models import Asset, FundamentalSource, PriceSource
     from app.models.indicator_definition import IndicatorDefinition
 
-    s = get_session()
+    def _log(what, counts):
+        if any(counts):
+            logger.info("%s integrados: %d creados, %d actualizados",
+                        what, *counts)
 
-    for src in _BUILTIN_SOURCES:
-        exists = s.query(PriceSource).filter(PriceSource.name == src["name"]).first()
-        if not exists:
-            s.add(PriceSource(name=src["name"], description=src["description"]))
-            logger.info("Creada fuente de precio integrada: %s", src["name"])
-
-    for src in _BUILTIN_FUND_SOURCES:
-        exists = s.query(FundamentalSource).filter(
-            FundamentalSource.name == src["name"]).first()
-        if not exists:
-            s.add(FundamentalSource(name=src["name"],
-                                    description=src["description"]))
-            logger.info("Creada fuente de fundamentales integrada: %s",
-                        src["name"])
-    s.flush()  # asegura ids de fuentes recién creadas para los activos de abajo
-
-    for a in _BUILTIN_ASSETS:
-        exists = s.query(Asset).filter(Asset.ticker == a["ticker"]).first()
-        if not exists:
-            source = s.query(PriceSource).filter(PriceSource.name == a["source"]).first()
-            if source is not None:
-                s.add(Asset(ticker=a["ticker"], name=a["name"],
-                            price_source_id=source.id))
-                logger.info("Creado activo integrado: %s", a["ticker"])
-
-    for ind in _BUILTIN_INDICATORS:
-        exists = s.query(IndicatorDefinition).filter(
-            IndicatorDefinition.code == ind["code"]
-        ).first()
-        if not exists:
-            s.add(IndicatorDefinition(**ind))
-            logger.info("Creado indicador integrado: %s", ind["code"])
-        else:
-            # Actualizar metadatos si cambiaron
-            for field in ("name", "category", "scale", "type", "description", "keep_history", "full_sample"):
-                default = True if field == "keep_history" else False if field == "full_sample" else None
-                val = ind.get(field, default)
-                if getattr(exists, field) != val:
-                    setattr(exists, field, val)
+    _log("Fuentes de precio", reconcile(
+        conn, PriceSource, "name", [dict(r) for r in _BUILTIN_SOURCES]))
+    _log("Fuentes de fundamentales", reconcile(
+        conn, FundamentalSource, "name",
+        [dict(r) for r in _BUILTIN_FUND_SOURCES]))
+
+    # Los activos integrados cuelgan de una fuente por nombre: ids después de
+    # reconciliar las fuentes, en una sola lectura.
+    source_ids = dict(conn.execute(
+        sa.select(PriceSource.name, PriceSource.id)).all())
+    _log("Activos", reconcile(conn, Asset, "ticker", [
+        {"ticker": a["ticker"], "name": a["name"],
+         "price_source_id": source_ids[a["source"]]}
+        for a in _BUILTIN_ASSETS if a["source"] in source_ids]))
+
+    _log("Indicadores", reconcile(
+        conn, IndicatorDefinition, "code", _indicator_rows(),
+        update=tuple(_INDICATOR_FIELDS)))
 
+
+def ensure_builtin_data(force: bool = False) -> None:
+    """Datos integrados y estructura dinámica que todo proceso espera al
+    arrancar. Idempotente: se puede correr en paralelo desde varios procesos.
+
+    Los pasos de datos (filas integradas y tablas ind_{code}) se saltean si la
+    huella del manifiesto coincide con la del último arranque exitoso
+    (`force` los corre igual). Los de mantenimiento —particiones anuales y la
+    reparación del almacenamiento dinámico tras un crash— corren siempre: no
+    dependen del manifiesto sino del calendario y del estado de la base.
+    """
+    from app.database import get_session
+    from app.models.indicator_definition import IndicatorDefinition
+
+    s = get_session()
+    digest = manifest_hash()
+    up_to_date = not force and _read_marker(s) == digest
+    if up_to_date:
+        logger.debug("Datos integrados al día (huella %s): se saltean",
+                     digest[:12])
+    else:
+        _reconcile_builtin_rows(s.connection())
     s.commit()
 
+    ind_ok = True
     # Tablas ind_{code}: no forman parte de Base.metadata (get_ind_table
     # las refleja), así que en una base nacida por create_all + stamp head
-    # no existen — materializarlas desde las definiciones. En una base
-    # migrada ya existen y esto es una inspección por tabla.
-    from app.models.indicator_store import (ensure_ind_table,
+    # no existen — materializarlas desde las definiciones. Una sola lectura
+    # del catálogo de tablas y solo se crean las que faltan (antes era una
+    # inspección por indicador en cada arranque).
+    from app.models.indicator_store import (ensure_ind_partitions,
+                                            ensure_ind_table,
                                             ensure_wide_ind_tables, _WIDE)
+    from app.services import db_compat
     try:
-        for d in s.query(IndicatorDefinition).filter(
-                IndicatorDefinition.keep_history.is_(True)).all():
-            # Los códigos _WIDE viven en las tablas anchas por cadencia desde la
-            # fase 5 (sus ind_{code} per-código se dropearon en la 0079): NO
-            # recrearlas acá, o el drop se desharía en cada arranque.
-            if d.code in _WIDE:
-                continue
-            ensure_ind_table(d.code, d.type or "num")
-        # Tablas anchas: la migración 0077 las crea en bases migradas; acá se
-        # materializan en bases create_all (no están en Base.metadata). En una
-        # base migrada ya existen: es una inspección por tabla.
-        ensure_wide_ind_tables()
+        if not up_to_date:
+            existing = set(db_compat.list_tables_by_prefix(s.get_bind(), "ind_"))
+            for code, ind_type in s.query(
+                    IndicatorDefinition.code, IndicatorDefinition.type).filter(
+                    IndicatorDefinition.keep_history.is_(True)).all():
+                # Los códigos _WIDE viven en las tablas anchas por cadencia
+                # desde la fase 5 (sus ind_{code} per-código se dropearon en la
+                # 0079): NO recrearlas acá, o el drop se desharía en cada
+                # arranque.
+                if code in _WIDE or f"ind_{code}" in existing:
+                    continue
+                ensure_ind_table(code, ind_type or "num")
+            # Tablas anchas: la migración 0077 las crea en bases migradas; acá
+            # se materializan en bases create_all (no están en Base.metadata).
+            ensure_wide_ind_tables()
+        ensure_ind_partitions()
     except Exception as exc:
+        ind_ok = False
         logger.warning("No se pudieron asegurar las tablas ind_*: %s", exc)
 
+    # La huella se guarda solo si filas y tablas quedaron completas: si algo
+    # falló, el próximo arranque reintenta todo.
+    if not up_to_date and ind_ok:
+        _write_marker(s, digest)
+        s.commit()
+
     # Almacenamiento dinámico de señales/estrategias: reparar en el arranque los
     # estados que un crash puede dejar (el DDL de MySQL no es transaccional).
     from app.models import signal_store
@@ -205,6 +317,8 @@ def ensure_builtin_data() -> None:
                 logger.info("Columnas anchas reconciliadas: %d agregadas, "
                             "%d dropeadas", len(wrec["added"]),
                             len(wrec["dropped"]))
+            signal_store.ensure_wide_signal_partitions(bind=s.connection())
+            s.commit()
         else:
             rec = signal_store.reconcile_dynamic_tables(s)
             if rec["dropped"] or rec["created"]:
@@ -7,6 +7,8 @@ estrategia; la lectura va por `signal_store.read_strat_table`, que despacha
 según el flag de tablas anchas).
 """
 import logging
+import threading
+from collections import OrderedDict
 from datetime import date as date_type
 
 import sqlalchemy as sa
@@ -524,38 +526,21 @@ def get_strategy_results_with_breakdown(
       (para que la UI pueda decir cuántos quedaron afuera del tope).
 
     `limit` corta el ranking en el servidor: se queda con los primeros N por
-    score. No es solo cosmética — recorta también las lecturas por señal y la
-    de la fecha anterior, que van con un IN sobre los asset_id traídos.
-    """
-    from app.models import SignalDefinition
+    score. No es solo cosmética — recorta también la lectura de componentes,
+    que va con un IN sobre los asset_id traídos.
 
+    Es la lectura de UNA vez (el Excel, el top-N): la grilla del screener
+    pide el ranking por bloques con `get_strategy_ranking_page`.
+    """
     s = get_session()
     strategy = s.query(Strategy).filter(Strategy.id == strategy_id).first()
     if strategy is None:
         return [], [], 0
 
     components = strategy.components
-    sig_ids = [c.signal_id for c in components]
-
-    sigs_by_id = {
-        sig.id: sig
-        for sig in s.query(SignalDefinition)
-        .filter(SignalDefinition.id.in_(sig_ids))
-        .all()
-    }
+    sigs_by_id = _component_signals(s, components)
 
-    # Resultado base
-    rt = signal_store.read_strat_table(s, strategy_id)
-    q = (
-        sa.select(rt.c.asset_id, rt.c.score, Asset.ticker, Asset.name,
-                  Asset.sector_id, Asset.market_id)
-        .join_from(rt, Asset, Asset.id == rt.c.asset_id)
-        .where(rt.c.date == target_date)
-    )
-    if sector_id is not None:
-        q = q.where(Asset.sector_id == sector_id)
-    if market_id is not None:
-        q = q.where(Asset.market_id == market_id)
+    q = _ranking_select(s, strategy_id, target_date, sector_id, market_id)
 
     # El total se cuenta aparte solo cuando hay tope; sin tope las filas SON
     # el total y una query de más no compra nada.
@@ -564,9 +549,6 @@ def get_strategy_results_with_breakdown(
         total = s.execute(
             sa.select(sa.func.count()).select_from(q.subquery())
         ).scalar() or 0
-
-    q = q.order_by(*db_compat.order_desc_nulls_last(rt.c.score))
-    if limit is not None:
         q = q.limit(limit)
     rows = s.execute(q).all()
     if limit is None:
@@ -575,18 +557,43 @@ def get_strategy_results_with_breakdown(
     if not rows:
         return [], [], total
 
-    asset_ids = [aid for aid, *_ in rows]
+    sv_map = _component_scores(
+        s, [c.signal_id for c in components], target_date,
+        [r.asset_id for r in rows] if limit is not None else None)
+    return (_breakdown_rows(rows, components, sigs_by_id, sv_map),
+            _component_meta(components, sigs_by_id), total)
+
+
+# ── Ranking por bloques (screener) ────────────────────────────────────────────
+# La grilla del screener usa el Infinite Row Model de ag-grid: pide el ranking
+# de a bloques a medida que se scrollea, así que un ranking de 10.000 activos
+# nunca cruza la red entero. La paginación es por CLAVE (score, asset_id), no
+# por OFFSET: el bloque siguiente arranca después de la última fila del
+# anterior y la base no recorre las filas salteadas. El asset_id desempata los
+# scores iguales para que el orden sea total y ningún activo se repita ni se
+# pierda entre bloques.
+#
+# El resumen del ranking (total y máximos para las barras) se calcula al
+# buscar y se reusa en los bloques siguientes: cacheado por (estrategia,
+# fecha, filtros). Una búsqueda nueva lo recalcula siempre, así que una
+# corrida del pipeline que reescriba la fecha se ve en la próxima búsqueda.
+
+_SUMMARY_MAX = 256            # entradas del caché de resúmenes (LRU)
+_summaries: "OrderedDict[tuple, dict]" = OrderedDict()
+_summaries_lock = threading.Lock()
+
+
+def _component_signals(s, components) -> dict:
+    from app.models import SignalDefinition
+    sig_ids = [c.signal_id for c in components]
+    if not sig_ids:
+        return {}
+    return {sig.id: sig for sig in s.query(SignalDefinition)
+            .filter(SignalDefinition.id.in_(sig_ids)).all()}
 
-    sv_map: dict[tuple, float] = {}
-    for sig_id in set(sig_ids):
-        t = signal_store.read_sig_table(s, sig_id)
-        for aid, score in s.execute(
-                sa.select(t.c.asset_id, t.c.score)
-                .where(t.c.date == target_date,
-                       t.c.asset_id.in_(asset_ids))):
-            sv_map[(sig_id, aid)] = score
 
-    comp_meta = [
+def _component_meta(components, sigs_by_id) -> list[dict]:
+    return [
         {
             "signal_key":  sigs_by_id[c.signal_id].key  if c.signal_id in sigs_by_id else str(c.signal_id),
             "signal_name": sigs_by_id[c.signal_id].name if c.signal_id in sigs_by_id else "?",
@@ -595,32 +602,90 @@ def get_strategy_results_with_breakdown(
         for c in components
     ]
 
-    # Fecha anterior con resultados para esta estrategia
-    prev_date = s.execute(
-        sa.select(sa.func.max(rt.c.date)).where(rt.c.date < target_date)
-    ).scalar()
-
-    prev_score_map: dict[int, float] = {}
-    if prev_date:
-        prev_score_map = {
-            aid: score for aid, score in s.execute(
-                sa.select(rt.c.asset_id, rt.c.score)
-                .where(rt.c.date == prev_date,
-                       rt.c.asset_id.in_(asset_ids)))
-        }
 
-    results = []
-    for asset_id, r_score, ticker, name, s_id, m_id in rows:
-        comp_scores: dict[str, float | None] = {}
+def _ranking_select(s, strategy_id, target_date, sector_id=None, market_id=None):
+    """SELECT del ranking de una fecha, ordenado (score desc, asset_id asc),
+    con el score de la fecha anterior por LEFT JOIN en la misma query: la
+    fecha anterior sale de una subconsulta escalar en vez de una lectura
+    aparte. Columnas: asset_id, score, ticker, name, sector_id, market_id,
+    prev_score."""
+    rt = signal_store.read_strat_table(s, strategy_id)
+    prev = rt.alias("prev")
+    last = rt.alias("prev_dates")
+    prev_date = (sa.select(sa.func.max(last.c.date))
+                 .where(last.c.date < target_date).scalar_subquery())
+    q = (
+        sa.select(rt.c.asset_id, rt.c.score, Asset.ticker, Asset.name,
+                  Asset.sector_id, Asset.market_id,
+                  prev.c.score.label("prev_score"))
+        .join_from(rt, Asset, Asset.id == rt.c.asset_id)
+        .outerjoin(prev, sa.and_(prev.c.asset_id == rt.c.asset_id,
+                                 prev.c.date == prev_date))
+        .where(rt.c.date == target_date)
+    )
+    if sector_id is not None:
+        q = q.where(Asset.sector_id == sector_id)
+    if market_id is not None:
+        q = q.where(Asset.market_id == market_id)
+    return q.order_by(*db_compat.order_desc_nulls_last(rt.c.score),
+                      rt.c.asset_id)
 
-        for comp in components:
-            sig = sigs_by_id.get(comp.signal_id)
-            key = sig.key if sig else str(comp.signal_id)
-            comp_scores[key] = sv_map.get((comp.signal_id, asset_id))
 
-        prev_sc   = prev_score_map.get(asset_id)
-        delta_score = round(r_score - prev_sc, 4) if (prev_sc is not None and r_score is not None) else None
+def _after_key(q, after):
+    """Filtra el ranking a lo que viene después de la clave (score, asset_id).
+
+    En el ranking no hay scores NULL (la tabla per-entidad no los guarda y la
+    vista ancha los filtra), así que la clave es simple: score menor, o igual
+    score con asset_id mayor. El score del cursor volvió por JSON como double
+    y la columna es de precisión simple (REAL en PG, FLOAT en MySQL): se
+    compara casteado al tipo de la columna, o el empate nunca daría igual y
+    las filas empatadas con la última del bloque se saltearían."""
+    sc, aid = after
+    score_col, aid_col = q.selected_columns.score, q.selected_columns.asset_id
+    key = sa.cast(sa.literal(sc), score_col.type)
+    return q.where(sa.or_(score_col < key,
+                          sa.and_(score_col == key, aid_col > aid)))
 
+
+def _component_scores(s, sig_ids, target_date, asset_ids=None) -> dict[tuple, float]:
+    """{(signal_id, asset_id): score} de los componentes en la fecha.
+
+    Con las tablas anchas es UNA query con todas las columnas de componente a
+    la vez; per-entidad (flag OFF) queda una por señal. `asset_ids` None lee
+    la fecha entera (el ranking completo: un IN de 10.000 ids no compra nada).
+    """
+    sig_ids = list(dict.fromkeys(sig_ids))
+    if not sig_ids or asset_ids == []:
+        return {}
+    out: dict[tuple, float] = {}
+    if signal_store.use_wide_signal_tables():
+        t = signal_store.sig_wide_view(sig_ids)
+        cols = [t.c[signal_store.sig_column_name(sid)] for sid in sig_ids]
+        q = sa.select(t.c.asset_id, *cols).where(t.c.date == target_date)
+        if asset_ids is not None:
+            q = q.where(t.c.asset_id.in_(asset_ids))
+        for aid, *vals in s.execute(q):
+            for sid, val in zip(sig_ids, vals):
+                if val is not None:
+                    out[(sid, aid)] = val
+        return out
+    for sig_id in sig_ids:
+        t = signal_store.read_sig_table(s, sig_id)
+        q = sa.select(t.c.asset_id, t.c.score).where(t.c.date == target_date)
+        if asset_ids is not None:
+            q = q.where(t.c.asset_id.in_(asset_ids))
+        for aid, score in s.execute(q):
+            out[(sig_id, aid)] = score
+    return out
+
+
+def _breakdown_rows(rows, components, sigs_by_id, sv_map) -> list[dict]:
+    keys = [(c.signal_id, sigs_by_id[c.signal_id].key if c.signal_id in sigs_by_id
+             else str(c.signal_id)) for c in components]
+    results = []
+    for asset_id, r_score, ticker, name, s_id, m_id, prev_sc in rows:
+        comp_scores = {key: sv_map.get((sig_id, asset_id)) for sig_id, key in keys}
+        delta_score = round(r_score - prev_sc, 4) if (prev_sc is not None and r_score is not None) else None
         results.append({
             "asset_id":    asset_id,
             "ticker":      ticker,
@@ -632,8 +697,117 @@ def get_strategy_results_with_breakdown(
             "delta_score": delta_score,
             "comp_scores": comp_scores,
         })
+    return results
+
+
+def _ranking_summary(s, strategy_id, target_date, sector_id, market_id,
+                     components, sigs_by_id, *, refresh: bool) -> dict:
+    """{total, max_abs, comp_max} del ranking filtrado, cacheado por
+    (estrategia, fecha, filtros). `max_abs`/`comp_max` normalizan las barras
+    de la grilla: salen del ranking COMPLETO, así una barra vale lo mismo en
+    el primer bloque que en el último."""
+    key = (int(strategy_id), str(target_date), sector_id, market_id)
+    if not refresh:
+        with _summaries_lock:
+            hit = _summaries.get(key)
+            if hit is not None:
+                _summaries.move_to_end(key)
+                return hit
+
+    ranking = _ranking_select(s, strategy_id, target_date, sector_id,
+                              market_id).order_by(None).subquery()
+    total, max_abs = s.execute(
+        sa.select(sa.func.count(), sa.func.max(sa.func.abs(ranking.c.score)))
+    ).one()
+    comp_max: dict[str, float] = {}
+    sig_ids = list(dict.fromkeys(c.signal_id for c in components))
+    if total and sig_ids:
+        ids = sa.select(ranking.c.asset_id)
+        if signal_store.use_wide_signal_tables():
+            t = signal_store.sig_wide_view(sig_ids)
+            maxes = s.execute(sa.select(*[
+                sa.func.max(sa.func.abs(t.c[signal_store.sig_column_name(sid)]))
+                for sid in sig_ids]).where(t.c.date == target_date,
+                                           t.c.asset_id.in_(ids))).one()
+        else:
+            maxes = []
+            for sid in sig_ids:
+                t = signal_store.read_sig_table(s, sid)
+                maxes.append(s.execute(
+                    sa.select(sa.func.max(sa.func.abs(t.c.score)))
+                    .where(t.c.date == target_date,
+                           t.c.asset_id.in_(ids))).scalar())
+        for sid, mx in zip(sig_ids, maxes):
+            sig = sigs_by_id.get(sid)
+            if mx is not None:
+                comp_max[sig.key if sig else str(sid)] = float(mx)
+
+    summary = {"total": int(total or 0), "max_abs": float(max_abs or 0.0),
+               "comp_max": comp_max}
+    with _summaries_lock:
+        _summaries[key] = summary
+        _summaries.move_to_end(key)
+        while len(_summaries) > _SUMMARY_MAX:
+            _summaries.popitem(last=False)
+    return summary
+
+
+def get_strategy_ranking_page(
+    strategy_id: int,
+    target_date,
+    *,
+    sector_id: int | None = None,
+    market_id: int | None = None,
+    after: tuple | list | None = None,
+    offset: int = 0,
+    page_size: int = 200,
+    refresh: bool = False,
+) -> dict:
+    """Un bloque del ranking de una fecha, para la grilla del screener.
+
+    `after` es la clave (score, asset_id) de la última fila del bloque
+    anterior (el `next` que devolvió): el bloque arranca justo después. Sin
+    `after` se usa `offset` — para el primer bloque, o si el usuario saltó con
+    la barra de scroll a un bloque cuya clave todavía no se conoce.
+
+    Devuelve {rows, components, total, max_abs, comp_max, next}: `rows` con la
+    forma de get_strategy_results_with_breakdown, el resumen del ranking
+    (cacheado; `refresh` lo recalcula, ver _ranking_summary) y `next`, la
+    clave para pedir el bloque siguiente (None si no hay más).
+
+    Los componentes del bloque salen de UNA query sobre signal_values_wide y
+    el score anterior del JOIN de _ranking_select: tres queries por bloque
+    (más el resumen, que se paga una vez por búsqueda).
+    """
+    empty = {"rows": [], "components": [], "total": 0, "max_abs": 0.0,
+             "comp_max": {}, "next": None}
+    s = get_session()
+    strategy = s.query(Strategy).filter(Strategy.id == strategy_id).first()
+    if strategy is None:
+        return empty
 
-    return results, comp_meta, total
+    components = strategy.components
+    sigs_by_id = _component_signals(s, components)
+    summary = _ranking_summary(s, strategy_id, target_date, sector_id,
+                               market_id, components, sigs_by_id,
+                               refresh=refresh)
+
+    q = _ranking_select(s, strategy_id, target_date, sector_id, market_id)
+    if after is not None:
+        q = _after_key(q, after)
+    elif offset:
+        q = q.offset(offset)
+    rows = s.execute(q.limit(page_size)).all()
+
+    sv_map = _component_scores(s, [c.signal_id for c in components],
+                               target_date, [r.asset_id for r in rows])
+    last = rows[-1] if len(rows) == page_size else None
+    return {
+        "rows": _breakdown_rows(rows, components, sigs_by_id, sv_map),
+        "components": _component_meta(components, sigs_by_id),
+        **summary,
+        "next": [last.score, last.asset_id] if last is not None else None,
+    }
 
 
 def get_filter_options(strategy_id: int, target_date) -> dict:
@@ -20,7 +20,7 @@ from sqlalchemy import func
 
 from app.database import get_session, Session as _ScopedSession
 from app.models import Asset, Price, SyntheticComponent, SyntheticFormula
-from app.services import db_compat
+from app.services import asset_history_reader, db_compat, price_bar_store
 from app.services.db_compat import INSERTED
 from app.services.technical_service import (
     backfill_asset_history, compute_current_indicators, _save_indicator_log,
@@ -211,6 +211,18 @@ def _bulk_insert_synthetic_prices(session, asset_id: int, results: dict) -> int:
         }
         for d, vals in sorted(results.items())
     ]
+    return _bulk_insert_price_rows(session, rows)
+
+
+def _bulk_insert_price_rows(session, rows: list[dict], *,
+                            complete: bool = False) -> int:
+    """Upsert de filas de `prices` ya armadas, en lotes de _SYN_PRICE_BATCH. Es
+    el camino de escritura común: un sintético (_bulk_insert_synthetic_prices)
+    o muchos a la vez (currency_conversion_service._compute_new_ratios, que
+    mezcla filas de cientos de sintéticos en los mismos lotes). No commitea;
+    las barras W/M de cada activo se ponen al día en la misma transacción y
+    su historia cacheada se descarta al commitear. complete=True: `rows` es
+    la historia entera de cada activo (ver price_bar_store.refresh_rows)."""
     for i in range(0, len(rows), _SYN_PRICE_BATCH):
         chunk = rows[i : i + _SYN_PRICE_BATCH]
         stmt = db_compat.upsert(session, Price.__table__, chunk, {
@@ -218,6 +230,9 @@ def _bulk_insert_synthetic_prices(session, asset_id: int, results: dict) -> int:
             "low": INSERTED, "close": INSERTED,
         })
         session.execute(stmt)
+    price_bar_store.refresh_rows(session, rows, complete=complete)
+    asset_history_reader.invalidate_on_commit(
+        session, {r["asset_id"] for r in rows})
     return len(rows)
 
 
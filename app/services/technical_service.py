@@ -20,11 +20,16 @@ from app.database import engine, get_session
 from app.models import Asset, DrawdownConfig, Price, RegimeConfig, VolatilityConfig
 from app.models.indicator_definition import IndicatorDefinition
 from app.models.indicator_store import (CurrentIndicatorValue, IndAssetMeta,
+                                        ensure_ind_partitions,
                                         get_ind_table, use_wide_ind_tables,
                                         _WIDE, _WIDE_CADENCE_TABLE,
                                         _WIDE_CADENCE_COLUMNS, _get_wide_table)
 
-from app.services import db_compat, sr_service
+from app.services import (asset_history_reader, best_ma_kernel,
+                          chart_zone_store, db_compat, drawdown_kernel,
+                          price_bar_store, relative_strength,
+                          signal_dirty_range, sr_service)
+from app.services import query_stats_service as _qs
 from app.services.db_compat import INSERTED
 
 logger = logging.getLogger(__name__)
@@ -35,7 +40,7 @@ _MIN_ROWS = 20
 # Barras cargadas en modo quick (~4 años)
 _QUICK_DAYS = 1500
 
-_MA_PERIODS = [5, 8, 10, 13, 15, 21, 25, 30, 34, 50, 55, 89, 100, 144, 200, 233]
+_MA_PERIODS = best_ma_kernel.MA_PERIODS
 
 _Q_MONTH = {1:1, 2:1, 3:1, 4:4, 5:4, 6:4, 7:7, 8:7, 9:7, 10:10, 11:10, 12:10}
 
@@ -43,26 +48,10 @@ _Q_MONTH = {1:1, 2:1, 3:1, 4:4, 5:4, 6:4, 7:7, 8:7, 9:7, 10:10, 11:10, 12:10}
 # ── Helpers de cálculo ────────────────────────────────────────────────────────
 
 def _find_best_ma(close: pd.Series, high: pd.Series, low: pd.Series, kind: str = "sma") -> int | None:
-    best_period = None
-    best_score  = -1.0
-    prev_c = close.shift(1)
-    for period in _MA_PERIODS:
-        if len(close) < period * 2:
-            continue
-        ma = close.rolling(period).mean() if kind == "sma" \
-             else close.ewm(span=period, adjust=False).mean()
-        valid         = ma.notna()
-        touched       = valid & (low <= ma) & (ma <= high)
-        total_touches = int(touched.sum())
-        if total_touches < 5:
-            continue
-        bounce       = ((prev_c >= ma) & (close >= ma)) | ((prev_c <= ma) & (close <= ma))
-        bounces_held = int((touched & bounce).sum())
-        score = bounces_held / total_touches
-        if score > best_score:
-            best_score  = score
-            best_period = period
-    return best_period
+    """Período de MA que mejor "rebotó" (best_sma_* / best_ema_*). Todas las
+    MAs como una matriz en best_ma_kernel; la versión con loop por período
+    quedó como oráculo en tests/test_best_ma_kernel.py."""
+    return best_ma_kernel.best_ma(close, high, low, kind, _MA_PERIODS)
 
 
 def _resample_ohlc(df: pd.DataFrame, freq: str) -> pd.DataFrame:
@@ -91,42 +80,42 @@ def _get_drawdown_config():
 
 
 def _compute_dd_events(df: pd.DataFrame, min_depth_pct: float) -> list[dict]:
-    close = df["close"].values
+    """Episodios de drawdown del overlay del gráfico (drawdown_kernel): de la
+    primera barra bajo el máximo acumulado a la recuperación (`end` None si
+    sigue abierto), solo los de al menos `min_depth_pct` de profundidad."""
     dates = df["date"].values
+    ep = drawdown_kernel.episodes(df["close"].to_numpy(dtype=float))
     events = []
-    ath = close[0]
-    in_dd = False
-    dd_start_i = trough_i = 0
-    for i in range(len(close)):
-        if close[i] >= ath:
-            if in_dd:
-                depth = (close[trough_i] - ath) / ath * 100
-                if depth <= -min_depth_pct:
-                    events.append({
-                        "start":  _date_str(dates[dd_start_i]),
-                        "trough": _date_str(dates[trough_i]),
-                        "end":    _date_str(dates[i]),
-                        "depth":  round(depth, 1),
-                    })
-                in_dd = False
-            ath = close[i]
-        else:
-            if not in_dd:
-                in_dd, dd_start_i, trough_i = True, i, i
-            elif close[i] < close[trough_i]:
-                trough_i = i
-    if in_dd:
-        depth = (close[trough_i] - ath) / ath * 100
+    for start, trough, rec, depth in zip(ep["start"], ep["trough"],
+                                         ep["recovery"], ep["depth"]):
+        depth = depth * 100
         if depth <= -min_depth_pct:
             events.append({
-                "start":  _date_str(dates[dd_start_i]),
-                "trough": _date_str(dates[trough_i]),
-                "end":    None,
-                "depth":  round(depth, 1),
+                "start":  _date_str(dates[start]),
+                "trough": _date_str(dates[trough]),
+                "end":    _date_str(dates[rec]) if rec >= 0 else None,
+                "depth":  round(float(depth), 1),
             })
     return events
 
 
+def _worst_drawdowns(close) -> list[float | None]:
+    """[max1, max2, max3]: la profundidad % de los tres episodios de drawdown
+    más hondos de la historia (uno por episodio, no las tres peores barras,
+    que caían casi siempre en el mismo valle). max1 es 0 en una serie que
+    solo sube (sin caída no hay drawdown); max2/max3 son None si no hay un
+    segundo/tercer episodio — el screener distingue "un solo drawdown" de
+    "ninguno"."""
+    return _dd_pct(drawdown_kernel.worst(np.asarray(close, dtype=float))[0])
+
+
+def _dd_pct(worst_row) -> list[float | None]:
+    out = [None if np.isnan(v) else float(v * 100) for v in worst_row]
+    if out[0] is None:
+        out[0] = 0.0
+    return out
+
+
 def _get_regime_config():
     s = get_session()
     cfg = s.query(RegimeConfig).filter(RegimeConfig.id == 1).first()
@@ -507,8 +496,9 @@ def _atr_pct_price_series(df: pd.DataFrame, period: int) -> pd.Series:
 
 def _drawdown_pct_series(close: pd.Series) -> pd.Series:
     """Caída % desde el máximo acumulado, barra por barra. Misma fórmula que
-    _cur_drawdown_max* y que el espejo JS del gráfico (window._lwc.drawdown):
-    con el máximo EXPANDIDO, así que el valor de una fecha no cambia cuando
+    el espejo JS del gráfico (window._lwc.drawdown) — _cur_drawdown_max* en
+    cambio miden episodios (drawdown_kernel), y su max1 es el mínimo de esta
+    serie —: con el máximo EXPANDIDO, así que el valor de una fecha no cambia cuando
     llegan barras nuevas — pero sí cambia si se corrige un precio viejo (memoria
     ilimitada hacia atrás), y de eso se ocupa _CHECKSUM_DEP_CODES."""
     c      = close.astype(float)
@@ -754,6 +744,14 @@ def _upsert_current_ind(session, asset_id: int, code: str,
     session.execute(stmt)
 
 
+def _clear_current_ind(session, asset_id: int, codes) -> None:
+    """Borra valores vigentes que dejaron de existir (un drawdown_max2 sin
+    segundo episodio): el UPSERT saltea los None y el viejo quedaría."""
+    t = CurrentIndicatorValue.__table__
+    session.execute(t.delete().where(t.c.asset_id == asset_id,
+                                     t.c.code.in_(list(codes))))
+
+
 def _upsert_current_ind_batch(session, asset_id: int, values: list[tuple[str, float]]) -> None:
     """UPSERT en batch de varios códigos vigentes en current_indicator_values:
     a diferencia de _upsert_ind (una tabla ind_* por código, no fusionable),
@@ -1082,7 +1080,9 @@ def _bf_atr_pct_monthly(df, df_w, df_m, vol_cfg, **kw):
                          index=_period_index(df_m))
     return pd.Series(dtype=float)
 
-def _bf_drawdown_pct_daily(df, df_w, df_m, **kw):
+def _bf_drawdown_pct_daily(df, df_w, df_m, dd_cfg=None, zone_sink=None, **kw):
+    if zone_sink is not None and dd_cfg is not None:
+        zone_sink["zones"] = _compute_dd_events(df, dd_cfg.min_depth_pct)
     return _drawdown_pct_series(df["close"]).tolist()
 
 def _bf_price_position_52w(df, df_w, df_m, **kw):
@@ -1108,20 +1108,24 @@ def _bf_rvol_daily(df, df_w, df_m, **kw):
         return [None] * len(df)
     return _rvol_series(df["volume"]).tolist()
 
+# zone_sink (dict, lo pasa backfill_indicator): las zonas calculadas quedan en
+# zone_sink["zones"] para persistirlas como overlay del gráfico (chart_zone_store).
 def _bf_trend(tf_key):
-    def fn(df, df_w, df_m, regime_cfg, **kw):
+    def fn(df, df_w, df_m, regime_cfg, zone_sink=None, **kw):
         df_tf     = {"d": df, "w": df_w, "m": df_m}[tf_key]
         period    = {"d": regime_cfg.ema_period_d, "w": regime_cfg.ema_period_w,
                      "m": regime_cfg.ema_period_m}[tf_key]
         sl, st, cb = regime_cfg.slope_lookback, regime_cfg.slope_threshold_pct, regime_cfg.confirm_bars
         nb, sm    = regime_cfg.nascent_bars, regime_cfg.strong_slope_multiplier
         zones     = _compute_regime_zones(df_tf, period, sl, st, cb, nb, sm)
+        if zone_sink is not None:
+            zone_sink["zones"] = zones
         return _zones_to_series(zones, df, "regime_detail",
                                 df_period=None if tf_key == "d" else df_tf)
     return fn
 
 def _bf_volatility(tf_key):
-    def fn(df, df_w, df_m, vol_cfg, **kw):
+    def fn(df, df_w, df_m, vol_cfg, zone_sink=None, **kw):
         df_tf    = {"d": df, "w": df_w, "m": df_m}[tf_key]
         vol_args = dict(
             atr_period=vol_cfg.atr_period, confirm_bars=vol_cfg.confirm_bars,
@@ -1129,6 +1133,8 @@ def _bf_volatility(tf_key):
             dur_short_pct=vol_cfg.dur_short_pct, dur_long_pct=vol_cfg.dur_long_pct,
         )
         vz       = _compute_vol_zones(df_tf, **vol_args)
+        if zone_sink is not None:
+            zone_sink["zones"] = vz
         combined = [{**z, "_vk": f"{z['vol_regime']}_{z['dur_regime']}"} for z in vz]
         return _zones_to_series(combined, df, "_vk",
                                 df_period=None if tf_key == "d" else df_tf)
@@ -1153,47 +1159,18 @@ def _bf_dist_optimal_sma(tf_key):
         return [None] * len(df)
     return fn
 
-def _bf_relative_strength_52w(df, df_w, df_m, session, asset_id, price_cache=None, **kw):
-    n   = len(df)
-    bm_id = session.query(Asset.benchmark_id).filter(Asset.id == asset_id).scalar()
-    if not bm_id:
-        return [None] * n
-    if price_cache and bm_id in price_cache:
-        bm_df = price_cache[bm_id]
-    else:
-        bm_rows = session.query(Price.date, Price.close).filter(
-            Price.asset_id == bm_id
-        ).order_by(Price.date.asc()).all()
-        if not bm_rows:
-            return [None] * n
-        bm_df = pd.DataFrame(bm_rows, columns=["date", "close"])
-
-    bm_ords   = np.array([d.toordinal() for d in bm_df["date"]])
-    bm_closes = bm_df["close"].values.astype(float)
-    a_ords    = np.array([d.toordinal() for d in df["date"]])
-    a_cls     = df["close"].values.astype(float)
-
-    # Ordinal de referencia (52 semanas atrás) para cada fecha
-    ref_ords = np.empty(n, dtype=np.int64)
-    for i, d in enumerate(df["date"]):
-        ref_ords[i] = _one_year_before(d).toordinal()
-
-    def _vlkup(ords, closes, targets):
-        idx = np.searchsorted(ords, targets, side="right") - 1
-        valid = idx >= 0
-        return np.where(valid, closes[np.where(valid, idx, 0)], np.nan)
-
-    bm_now = _vlkup(bm_ords, bm_closes, a_ords)   # precio benchmark en fecha i
-    bm_ref = _vlkup(bm_ords, bm_closes, ref_ords)  # precio benchmark hace 52w
-    a_ref  = _vlkup(a_ords,  a_cls,     ref_ords)  # precio activo hace 52w
-    # ref_ords[i] < a_ords[i] siempre, por lo que no se necesita slice
-
-    ok = (~np.isnan(bm_now) & ~np.isnan(bm_ref) & (bm_ref != 0) &
-          ~np.isnan(a_ref)  & (a_ref  != 0) & (a_cls != 0))
-    ret_a  = np.where(ok, (a_cls    - a_ref)  / a_ref  * 100, np.nan)
-    ret_bm = np.where(ok, (bm_now   - bm_ref) / bm_ref * 100, np.nan)
-    rs     = np.where(ok, np.round(ret_a - ret_bm, 2), np.nan)
-    return [None if np.isnan(v) else float(v) for v in rs]
+def _bf_relative_strength_52w(df, df_w, df_m, session, asset_id, price_cache=None,
+                              rs_benchmarks=None, **kw):
+    """Serie RS 52w. El lado benchmark sale del BenchmarkSet de la corrida
+    (armado una vez por benchmark, ver relative_strength); sin él — llamador
+    suelto — se arma uno para este activo."""
+    if rs_benchmarks is None:
+        rs_benchmarks = relative_strength.BenchmarkSet.for_asset(
+            session, asset_id, price_cache)
+    bench = rs_benchmarks.benchmark_of(asset_id)
+    if bench is None:
+        return [None] * len(df)
+    return relative_strength.rs_series(df, bench)
 
 
 # Mapa código → función de cómputo para backfill
@@ -1379,6 +1356,17 @@ def _series_stats(dates_list: list, vals_list: list) -> tuple | None:
     return (valid[0], valid[-1], len(valid)) if valid else None
 
 
+def _first_valid_after(dates_list: list, vals_list: list, after):
+    """Primera fecha con valor no nulo posterior a `after` (serie ordenada
+    por fecha) — el dato genuinamente nuevo que marca el rango sucio de
+    señales (ver signal_dirty_range). None si no hay."""
+    k = bisect.bisect_right(dates_list, after)
+    for d, ok in zip(dates_list[k:], pd.notna(vals_list[k:])):
+        if ok:
+            return d
+    return None
+
+
 def _stale_bench_assets(bench_current: dict, bench_stored: dict) -> set:
     """Activos cuyo benchmark vigente difiere del usado en el último cálculo
     guardado (incluye activos sin fila en ind_asset_meta: primera corrida
@@ -1526,14 +1514,16 @@ def _checksum_prefix(dates_list: list, vals_list: list, own_mx) -> str:
 # ── Backfill por indicador ────────────────────────────────────────────────────
 
 def _load_all_prices(_s) -> dict:
-    """Carga todos los precios en memoria via pd.read_sql. {asset_id: df}."""
-    from sqlalchemy import text as _text
+    """Carga todos los precios en memoria via pd.read_sql. {asset_id: df}.
+
+    Select de Core, como _load_batch_prices: con SQL crudo sqlite devolvía
+    las fechas como texto y relative_strength_52w (toordinal) fallaba."""
+    sel = (sa.select(Price.asset_id, Price.date, Price.close,
+                     Price.high, Price.low, Price.volume)
+           .order_by(Price.asset_id, Price.date))
     with engine.connect() as conn:
-        df = pd.read_sql(
-            _text("SELECT asset_id, date, close, high, low, volume FROM prices"
-                  " ORDER BY asset_id, date"),
-            conn,
-        )
+        df = pd.read_sql(sel, conn)
+    df.columns = ["asset_id", "date", "close", "high", "low", "volume"]
     # volume es BigInteger en la base y acá solo alimenta un cociente contra su
     # propio promedio (rvol_daily): a float32 pesa la mitad, y este DataFrame es
     # la base ENTERA en memoria — a 10.000 activos la diferencia son cientos de
@@ -1800,8 +1790,9 @@ def run_asset_batches(asset_ids: list, weights: dict, *, use_procs: bool,
                                Config.IND_CHILD_DB_POOL, Config.LOG_LEVEL) as pool:
             _drain({pool.submit(batch_fn, b, *batch_args(b)): b for b in batches})
     else:
+        task = _qs.bound(batch_fn)
         with _TPE(max_workers=min(len(batches), workers)) as pool:
-            _drain({pool.submit(batch_fn, b, *batch_args(b)): b for b in batches})
+            _drain({pool.submit(task, b, *batch_args(b)): b for b in batches})
     return batches
 
 
@@ -1943,6 +1934,12 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
     t          = get_ind_table(code)
     regime_cfg = _get_regime_config()
     vol_cfg    = _get_volatility_config()
+    # Los códigos que calculan zonas de overlay (tendencia, volatilidad,
+    # drawdown) las dejan persistidas para el gráfico (ver chart_zone_store).
+    dd_cfg     = (_get_drawdown_config()
+                  if chart_zone_store.SOURCES.get(code, ("",))[0] == "dd" else None)
+    zone_sink  = chart_zone_store.collector(s, code, regime_cfg=regime_cfg,
+                                            vol_cfg=vol_cfg, dd_cfg=dd_cfg)
     # Si hay price_cache (camino normal, paralelo), iterar sus asset_id en
     # vez de volver a consultar Asset.id: price_cache es la misma fuente
     # que usó el caller para calcular n_assets/total_work del progreso —
@@ -1966,6 +1963,9 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
     # y _upsert_ind_stats_meta, al final de esta función).
     tail_eligible     = code in _DELTA_TAIL_MODE
     stats_by_asset: dict = {}
+    # {asset_id: primera fecha con valor posterior al max_date cacheado} —
+    # solo en delta (tail_mode): alimenta el rango sucio de señales.
+    dirty_by_asset: dict = {}
     tail_stats: dict = {}
     if tail_mode:
         if precomputed_tail_stats is not None:
@@ -1992,6 +1992,9 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
                 bench_sel = bench_sel.where(IndAssetMeta.asset_id.in_(asset_ids))
             bench_stored = dict(s.execute(bench_sel).fetchall())
             bench_stale = _stale_bench_assets(bench_current, bench_stored)
+    # Un Benchmark por benchmark para toda la pasada, no uno por activo.
+    rs_benchmarks = (relative_strength.BenchmarkSet(s, bench_current, price_cache)
+                     if needs_bench else None)
 
     # Invalidación por checksum (ver _CHECKSUM_DEP_CODES): full_sample sin
     # prefetch completo — se compara el hash del prefijo recién calculado
@@ -2052,6 +2055,8 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
 
     for chunk_start in range(0, len(asset_ids), _EXISTING_CHUNK):
         chunk = asset_ids[chunk_start:chunk_start + _EXISTING_CHUNK]
+        if zone_sink is not None:
+            zone_sink.begin_chunk(chunk)
 
         # Fechas existentes de todo el chunk en una sola query (evita 1 por activo);
         # para full_sample se trae también el valor, para escribir solo cambios.
@@ -2095,18 +2100,20 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
                                   columns=["date", "close", "high", "low", "volume"])
 
             df_w = df_w_cache.get(asset_id) if df_w_cache is not None else None
-            if df_w is None:
-                df_w = _resample_ohlc(df, "W")
             df_m = df_m_cache.get(asset_id) if df_m_cache is not None else None
-            if df_m is None:
-                df_m = _resample_ohlc(df, "M")
+            if df_w is None or df_m is None:
+                df_w, df_m = price_bar_store.bars_for(s, asset_id, df)
 
+            zone_out = {} if zone_sink is not None else None
             values = compute_fn(
                 df=df, df_w=df_w, df_m=df_m,
                 regime_cfg=regime_cfg, vol_cfg=vol_cfg,
                 session=s, asset_id=asset_id,
                 price_cache=price_cache, best_sma_cache=best_sma_cache,
+                dd_cfg=dd_cfg, zone_sink=zone_out, rs_benchmarks=rs_benchmarks,
             )
+            if zone_sink is not None:
+                zone_sink.add(asset_id, df, zone_out.get("zones"))
             dates_list, vals_list = _series_dates_values(values, df)
             if tail_eligible:
                 # se guarda siempre (force, cola o dict-compare) para que el
@@ -2122,6 +2129,12 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
                 # evita repetir el camino lento en cada delta si la
                 # próxima corrida confirma que sigue vacío.
                 stats_by_asset[asset_id] = stats if stats is not None else (None, None, 0)
+                prev = tail_stats.get(asset_id) if tail_mode else None
+                if prev and prev[1] is not None and stats is not None \
+                        and stats[1] > prev[1]:
+                    first_new = _first_valid_after(dates_list, vals_list, prev[1])
+                    if first_new is not None:
+                        dirty_by_asset[asset_id] = first_new
             if needs_checksum and stats is not None:
                 # se guarda siempre (force, cola o dict-compare) para que el
                 # próximo delta arranque con el checksum al día — con la
@@ -2192,6 +2205,8 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
 
         s.commit()   # cierra el lote al fin de cada chunk de activos
         rows_since_commit = 0
+        if zone_sink is not None:
+            zone_sink.flush()
 
     # Meta: persistir SOLO lo que cambió respecto del caché leído (tail_stats /
     # checksum_stored / bench_stored ya están en memoria — comparar es gratis).
@@ -2222,6 +2237,7 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
             "bench_by_asset":    bench_current if needs_bench else None,
             "checksum_by_asset": checksum_by_asset if needs_checksum else None,
             "stats_by_asset":    stats_by_asset if tail_eligible else None,
+            "dirty_by_asset":    dirty_by_asset,
         }
         return result
 
@@ -2231,6 +2247,9 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
         _upsert_ind_asset_meta(s, code, checksum_by_asset=checksum_by_asset)
     if tail_eligible:
         _upsert_ind_stats_meta(s, code, stats_by_asset)
+    if dirty_by_asset:
+        signal_dirty_range.mark(s, dirty_by_asset)
+        s.commit()
 
     return result
 
@@ -2241,6 +2260,9 @@ def backfill_indicator(code: str, *, force: bool = False, asset_tick=None,
 # serían ~240k mensajes sin batchear; con 50, ~4800.
 _IPC_STOP = "__ind_pump_stop__"
 _TICK_FLUSH = 50
+# Marca de los mensajes (_IPC_QSTATS, snapshot) con el agregado de
+# query_stats_service del hijo — los de progreso son dicts {code: n}.
+_IPC_QSTATS = "__ind_query_stats__"
 
 
 def _make_ipc_queue():
@@ -2418,7 +2440,7 @@ def _process_batch_task(batch_idx: int, batch_asset_ids: list, codes: list,
                         force: bool,
                         best_sma_slice: dict | None,
                         tail_stats_slices: dict | None,
-                        progress_q=None) -> dict:
+                        progress_q=None, query_stats: bool = False) -> dict:
     """Tarea del PROCESO HIJO (fase 2 del ProcessPool): carga los precios
     de SU lote (+ benchmarks), resamplea localmente y delega en
     _backfill_batch_worker — la misma unidad de trabajo que valida la
@@ -2431,7 +2453,14 @@ def _process_batch_task(batch_idx: int, batch_asset_ids: list, codes: list,
     _TICK_FLUSH activos, que el padre drena hacia el panel. Nunca deja
     escapar una excepción: los errores viajan como strings en el dict (las
     excepciones de SQLAlchemy pueden fallar al des-picklearse y volverse
-    errores opacos en el padre)."""
+    errores opacos en el padre).
+
+    query_stats: el padre está grabando (query_stats_service) — el hijo graba
+    su lote en SU proceso bajo la fase "ind:lotes" y devuelve el agregado por
+    progress_q como (_IPC_QSTATS, snapshot), o en out["query_stats"] si no hay
+    cola. Si el hijo comparte proceso con una grabación abierta (executor
+    inline) ya suma a esa y no manda nada: se contaría dos veces."""
+    from contextlib import nullcontext
     from app.database import Session as _DbSession
     pending: dict = {}
     acc = [0]
@@ -2447,21 +2476,24 @@ def _process_batch_task(batch_idx: int, batch_asset_ids: list, codes: list,
             pending.clear()
             acc[0] = 0
 
+    rec = None
+    own = query_stats and not _qs.is_recording()
     try:
-        s = get_session()
-        price_cache = _load_prices_for_assets(s, batch_asset_ids)
-        df_w_cache = {aid: _resample_ohlc(price_cache[aid], "W")
-                      for aid in batch_asset_ids if aid in price_cache}
-        df_m_cache = {aid: _resample_ohlc(price_cache[aid], "M")
-                      for aid in batch_asset_ids if aid in price_cache}
-        return _backfill_batch_worker(
-            batch_idx, batch_asset_ids, codes, force,
-            _emit if progress_q is not None else None, price_cache,
-            best_sma_slice, df_w_cache, df_m_cache, tail_stats_slices)
+        with (_qs.recording() if own else nullcontext()) as rec, \
+                _qs.phase("ind:lotes"):
+            s = get_session()
+            price_cache = _load_prices_for_assets(s, batch_asset_ids)
+            df_w_cache, df_m_cache = price_bar_store.load(
+                s, {aid: price_cache[aid] for aid in batch_asset_ids
+                    if aid in price_cache}, rebuild=force)
+            out = _backfill_batch_worker(
+                batch_idx, batch_asset_ids, codes, force,
+                _emit if progress_q is not None else None, price_cache,
+                best_sma_slice, df_w_cache, df_m_cache, tail_stats_slices)
     except Exception as exc:
         logger.warning("Tarea de lote %d falló: %s", batch_idx, exc)
-        return {"batch": batch_idx, "inserted": 0, "per_code": {},
-                "errors": [{"code": f"lote-{batch_idx}", "error": str(exc)}]}
+        out = {"batch": batch_idx, "inserted": 0, "per_code": {},
+               "errors": [{"code": f"lote-{batch_idx}", "error": str(exc)}]}
     finally:
         # flush de la cola pendiente ANTES de retornar: garantiza que todas
         # las cuentas del hijo están en la Queue cuando el padre pone _STOP
@@ -2471,10 +2503,20 @@ def _process_batch_task(batch_idx: int, batch_asset_ids: list, codes: list,
             except Exception:
                 pass
         _DbSession.remove()
+    if rec is not None:
+        snap = rec.snapshot()
+        try:
+            if progress_q is None:
+                raise LookupError
+            progress_q.put((_IPC_QSTATS, snap))
+        except Exception:
+            out["query_stats"] = snap
+    return out
 
 
 def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
-                                  price_cache: dict | None = None) -> dict:
+                                  price_cache: dict | None = None,
+                                  asset_ids: list | None = None) -> dict:
     """
     Backfill histórico paralelizado por LOTES DE ACTIVOS.
 
@@ -2486,7 +2528,8 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
     reparte lotes balanceados por largo de historia, agrega el progreso por
     código entre lotes y consolida ind_asset_meta y diagnósticos como único
     escritor. price_cache permite reutilizar precios ya cargados por el
-    caller.
+    caller. asset_ids acota la corrida a esos activos (None = todos los que
+    tienen precios): price_cache puede traer además sus benchmarks.
     """
     import threading as _th
     s    = get_session()
@@ -2513,16 +2556,18 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
     # carga los precios (cada hijo carga su lote) — el conteo de filas por
     # activo alcanza para el umbral, los lotes y el denominador del
     # progreso, sin pagar la tabla entera en memoria.
+    scope = set(asset_ids) if asset_ids is not None else None
     if price_cache is not None:
         # caller ya cargó los precios (camino threads): pesos gratis del df
-        weights = {aid: len(df) for aid, df in price_cache.items()}
+        weights = {aid: len(df) for aid, df in price_cache.items()
+                   if scope is None or aid in scope}
         n_assets = len(weights)
         use_procs, n_procs = _use_process_pool(n_assets)
     else:
         # sin cache: decidir el modo con un COUNT barato ANTES de cargar
         # nada — en procesos el padre no carga precios, y en threads los
         # pesos salen del cache que se carga igual (sin el GROUP BY extra).
-        n_assets = _count_price_assets(s)
+        n_assets = _count_price_assets(s) if scope is None else len(scope)
         use_procs, n_procs = _use_process_pool(n_assets)
         if use_procs:
             weights = _load_price_weights(s)          # para particionar
@@ -2530,35 +2575,50 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
             if progress_cb:
                 progress_cb(0, 1, "Cargando precios en memoria...")
             logger.info("Pre-cargando precios en memoria...")
-            price_cache = _load_all_prices(s)
+            with _qs.phase("ind:precios"):
+                price_cache = (_load_all_prices(s) if scope is None
+                               else _load_prices_for_assets(s, sorted(scope)))
             weights = {aid: len(df) for aid, df in price_cache.items()}
-            n_assets = len(price_cache)               # autoritativo
+        if scope is not None:
+            weights = {aid: n for aid, n in weights.items() if aid in scope}
+        n_assets = len(weights)                       # autoritativo
     total_work = n_indicators * n_assets
 
     best_sma_cache = _load_best_sma_cache(s)
     logger.info("Backfill por lotes: %d activos, modo %s", n_assets,
                 f"{n_procs} procesos" if use_procs else "threads")
 
-    # Resamples W/M una sola vez, compartidos por referencia entre los
-    # workers-thread; en modo procesos cada hijo resamplea SOLO su lote
-    # (acá no se paga nada).
+    # Barras W/M una sola vez (price_bar_store: leídas de prices_weekly /
+    # prices_monthly, resampleadas solo si no están al día; force las
+    # reescribe), compartidas por referencia entre los workers-thread; en
+    # modo procesos cada hijo carga SOLO su lote (acá no se paga nada).
     df_w_cache = df_m_cache = None
     if not use_procs:
         if progress_cb:
-            progress_cb(0, 1, "Precalculando resamples semanales y mensuales...")
-        df_w_cache = {aid: _resample_ohlc(df, "W") for aid, df in price_cache.items()}
-        df_m_cache = {aid: _resample_ohlc(df, "M") for aid, df in price_cache.items()}
+            progress_cb(0, 1, "Cargando barras semanales y mensuales...")
+        with _qs.phase("ind:precios"):
+            df_w_cache, df_m_cache = price_bar_store.load(s, price_cache,
+                                                          rebuild=force)
 
     # force: reset IZADO al padre, una vez por código y ANTES del pool —
     # con partición por activos un worker no puede truncar (ver
     # _force_reset_ind_tables). Un código cuyo reset falló queda EXCLUIDO
     # de la corrida: backfillear en force sobre una tabla no truncada
     # mezclaría filas nuevas con historia vieja.
+    # Partición anual opcional (indicator_store.PARTITIONED_IND_TABLES): la del
+    # año en curso tiene que existir antes de escribir. No-op fuera de PG o
+    # con la tabla sin particionar; si falla, las filas caen en la DEFAULT.
+    try:
+        ensure_ind_partitions()
+    except Exception as exc:
+        logger.warning("No se pudieron asegurar las particiones de ind_*: %s", exc)
+
     reset_errors: list[dict] = []
     if force:
         if progress_cb:
             progress_cb(0, 1, "Vaciando tablas de indicadores (rebuild)...")
-        reset_errors = _force_reset_ind_tables(s, hist)
+        with _qs.phase("ind:reset"):
+            reset_errors = _force_reset_ind_tables(s, hist)
         if reset_errors:
             bad = {e["code"] for e in reset_errors}
             hist = [c for c in hist if c not in bad]
@@ -2569,7 +2629,8 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
     # full-scaneen su tabla al mismo tiempo cuando arranquen los workers.
     if progress_cb:
         progress_cb(0, 1, "Calculando estadísticas de historial (tail-mode)...")
-    tail_stats_by_code = _precompute_all_tail_stats(s, hist, force)
+    with _qs.phase("ind:tail-stats"):
+        tail_stats_by_code = _precompute_all_tail_stats(s, hist, force)
 
     # Partición por activos: lotes balanceados por largo de historia
     asset_ids = list(weights.keys())
@@ -2635,6 +2696,7 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
     agg_pc:    dict = {}
     agg_slow:  dict = {}
     agg_meta:  dict = {}
+    agg_dirty: dict = {}   # rango sucio de señales, mínimo por activo
 
     def _merge_code_result(code: str, res: dict) -> None:
         if res.get("seconds") is not None:
@@ -2654,6 +2716,10 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
         for key in ("bench_by_asset", "checksum_by_asset", "stats_by_asset"):
             if meta.get(key):
                 tgt[key].update(meta[key])
+        # Rango sucio de señales: por activo, el mínimo entre códigos y lotes
+        for aid, d in (meta.get("dirty_by_asset") or {}).items():
+            prev = agg_dirty.get(aid)
+            agg_dirty[aid] = d if prev is None or d < prev else prev
 
     def _consume_batch(out: dict) -> None:
         nonlocal inserted
@@ -2667,6 +2733,8 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
             errors.append(err)
         for code, res in out.get("per_code", {}).items():
             _merge_code_result(code, res)
+        # agregado de query_stats de un hijo que no tenía cola de progreso
+        _qs.merge(out.get("query_stats"))
 
     def _drain(futures: dict) -> None:
         for future in as_completed(futures):
@@ -2709,14 +2777,17 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
                         break
                     if msg == _IPC_STOP:
                         break
-                    if isinstance(msg, dict):
+                    if isinstance(msg, tuple) and msg[0] == _IPC_QSTATS:
+                        _qs.merge(msg[1])
+                    elif isinstance(msg, dict):
                         for code, delta in msg.items():
                             try:
                                 _bump(code, delta)
                             except Exception:
                                 logger.warning("bomba de progreso falló", exc_info=True)
 
-            pump = _th.Thread(target=_pump, name="ind-progress-pump", daemon=True)
+            pump = _th.Thread(target=_qs.bound(_pump), name="ind-progress-pump",
+                              daemon=True)
             pump.start()
         try:
             with _pp.make_executor(min(len(batches), n_procs), str(BASE_DIR),
@@ -2727,7 +2798,7 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
                                 _slice_by_assets(best_sma_cache, batch),
                                 {c: _slice_by_assets(st, batch)
                                  for c, st in tail_stats_by_code.items()},
-                                pq): i
+                                pq, _qs.is_recording()): i
                     for i, batch in enumerate(batches)
                 }
                 if progress_cb:
@@ -2760,7 +2831,8 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
     elif batches:
         with _TPE(max_workers=min(len(batches), _POOL_WORKERS)) as pool:
             futures = {
-                pool.submit(_backfill_batch_worker, i, batch, hist, force,
+                pool.submit(_qs.phased("ind:lotes", _backfill_batch_worker),
+                            i, batch, hist, force,
                             _tick, price_cache, best_sma_cache,
                             df_w_cache, df_m_cache, tail_stats_by_code): i
                 for i, batch in enumerate(batches)
@@ -2778,76 +2850,81 @@ def backfill_all_indicator_values(progress_cb=None, *, force: bool = False,
     # fallido deja sus metadatos sin actualizar → ese subconjunto cae al
     # camino lento en el próximo delta (mismo criterio de seguridad que el
     # worker por indicador, que ante error no upserteaba nada).
-    s2 = get_session()
-    for code in hist:
-        try:
-            meta = agg_meta.get(code)
-            if meta:
-                if meta["bench_by_asset"]:
-                    _upsert_ind_asset_meta(s2, code, bench_by_asset=meta["bench_by_asset"])
-                if meta["checksum_by_asset"]:
-                    _upsert_ind_asset_meta(s2, code, checksum_by_asset=meta["checksum_by_asset"])
-                if meta["stats_by_asset"]:
-                    _upsert_ind_stats_meta(s2, code, meta["stats_by_asset"])
-            pc = agg_pc.get(code)
-            if pc and sum(pc.values()):
-                logger.info(
-                    "Backfill %s (%.1fs): rápido=%d gap=%d checksum=%d bench=%d empty=%d",
-                    code, durations.get(code, 0),
-                    pc["fast"], pc["gap"], pc["checksum"], pc["bench"], pc["empty"],
-                )
-                slow_ids = agg_slow.get(code) or {}
-                if any(slow_ids.values()):
+    with _qs.phase("ind:metadatos"):
+        s2 = get_session()
+        for code in hist:
+            try:
+                meta = agg_meta.get(code)
+                if meta:
+                    if meta["bench_by_asset"]:
+                        _upsert_ind_asset_meta(s2, code, bench_by_asset=meta["bench_by_asset"])
+                    if meta["checksum_by_asset"]:
+                        _upsert_ind_asset_meta(s2, code, checksum_by_asset=meta["checksum_by_asset"])
+                    if meta["stats_by_asset"]:
+                        _upsert_ind_stats_meta(s2, code, meta["stats_by_asset"])
+                pc = agg_pc.get(code)
+                if pc and sum(pc.values()):
                     logger.info(
-                        "Backfill %s activos no-rápidos — gap=%s checksum=%s bench=%s empty=%s",
-                        code, slow_ids.get("gap"), slow_ids.get("checksum"),
-                        slow_ids.get("bench"), slow_ids.get("empty"),
+                        "Backfill %s (%.1fs): rápido=%d gap=%d checksum=%d bench=%d empty=%d",
+                        code, durations.get(code, 0),
+                        pc["fast"], pc["gap"], pc["checksum"], pc["bench"], pc["empty"],
                     )
-                # Mensaje especial (mismo mecanismo que __init__:) para que
-                # el panel del Centro de Datos muestre cuántos activos
-                # cayeron al camino lento (gap/checksum/bench) por código
-                # — "empty" queda afuera a propósito, no es un hueco real
-                # que amerite revisión (ver comentario en path_counts).
-                if progress_cb:
+                    slow_ids = agg_slow.get(code) or {}
+                    if any(slow_ids.values()):
+                        logger.info(
+                            "Backfill %s activos no-rápidos — gap=%s checksum=%s bench=%s empty=%s",
+                            code, slow_ids.get("gap"), slow_ids.get("checksum"),
+                            slow_ids.get("bench"), slow_ids.get("empty"),
+                        )
+                    # Mensaje especial (mismo mecanismo que __init__:) para que
+                    # el panel del Centro de Datos muestre cuántos activos
+                    # cayeron al camino lento (gap/checksum/bench) por código
+                    # — "empty" queda afuera a propósito, no es un hueco real
+                    # que amerite revisión (ver comentario en path_counts).
+                    if progress_cb:
+                        progress_cb(_assets_done, total_work,
+                                    f"__pc__:{code}:{pc['fast']}:{pc['gap']}:"
+                                    f"{pc['checksum']}:{pc['bench']}")
+                # Fila final autoritativa por código: dn agregado + costo real
+                # (t= suma de segundos entre lotes). Devuelve al panel el costo
+                # POR CÓDIGO que el eje invertido le quitó al span inicio→fin
+                # (todas las filas abren en la primera ola y cierran en la
+                # última), y corrige cualquier tick final desordenado.
+                if progress_cb and code in durations:
                     progress_cb(_assets_done, total_work,
-                                f"__pc__:{code}:{pc['fast']}:{pc['gap']}:"
-                                f"{pc['checksum']}:{pc['bench']}")
-            # Fila final autoritativa por código: dn agregado + costo real
-            # (t= suma de segundos entre lotes). Devuelve al panel el costo
-            # POR CÓDIGO que el eje invertido le quitó al span inicio→fin
-            # (todas las filas abren en la primera ola y cierran en la
-            # última), y corrige cualquier tick final desordenado.
-            if progress_cb and code in durations:
-                progress_cb(_assets_done, total_work,
-                            f"{code}: {_done_by_code.get(code, 0)}/{n_assets}"
-                            f" t={durations[code]}")
-        except Exception as exc:
-            # Un fallo consolidando UN código no aborta el resto (sin esto,
-            # una caída en el primer upsert dejaba a los 24 códigos sin
-            # meta/diagnóstico y el panel mostraba éxito total en verde).
-            logger.warning("Consolidación de meta falló code=%s: %s", code, exc)
+                                f"{code}: {_done_by_code.get(code, 0)}/{n_assets}"
+                                f" t={durations[code]}")
+            except Exception as exc:
+                # Un fallo consolidando UN código no aborta el resto (sin esto,
+                # una caída en el primer upsert dejaba a los 24 códigos sin
+                # meta/diagnóstico y el panel mostraba éxito total en verde).
+                logger.warning("Consolidación de meta falló code=%s: %s", code, exc)
+                try:
+                    s2.rollback()
+                except Exception:
+                    pass
+                failed_codes.add(code)
+                errors.append({"code": code, "error": f"consolidación: {exc}"})
+
+        if agg_dirty:
+            signal_dirty_range.mark(s2, agg_dirty)
+            s2.commit()
+
+        # Persistir las duraciones medidas: ordenan los códigos dentro de los
+        # lotes de la próxima corrida del MISMO modo (ver migración 0056). Con
+        # partición por activos la duración por código es la SUMA entre lotes
+        # (proxy del costo total del código, no wall-clock de un worker) — el
+        # orden relativo, que es lo que LPT necesita, se preserva.
+        if durations:
             try:
-                s2.rollback()
+                attr = "last_rebuild_seconds" if force else "last_backfill_seconds"
+                for d in s2.query(IndicatorDefinition).filter(
+                        IndicatorDefinition.code.in_(list(durations))).all():
+                    setattr(d, attr, durations[d.code])
+                s2.commit()
             except Exception:
-                pass
-            failed_codes.add(code)
-            errors.append({"code": code, "error": f"consolidación: {exc}"})
-
-    # Persistir las duraciones medidas: ordenan los códigos dentro de los
-    # lotes de la próxima corrida del MISMO modo (ver migración 0056). Con
-    # partición por activos la duración por código es la SUMA entre lotes
-    # (proxy del costo total del código, no wall-clock de un worker) — el
-    # orden relativo, que es lo que LPT necesita, se preserva.
-    if durations:
-        try:
-            attr = "last_rebuild_seconds" if force else "last_backfill_seconds"
-            for d in s2.query(IndicatorDefinition).filter(
-                    IndicatorDefinition.code.in_(list(durations))).all():
-                setattr(d, attr, durations[d.code])
-            s2.commit()
-        except Exception:
-            logger.warning("No se pudieron guardar las duraciones de backfill",
-                           exc_info=True)
+                logger.warning("No se pudieron guardar las duraciones de backfill",
+                               exc_info=True)
 
     # errors: UNA entrada por código, como en el pool viejo — los
     # consumidores (panel '{X}/{Y} OK', acumuladores de price_service)
@@ -2895,8 +2972,7 @@ def backfill_asset_history(asset_id: int) -> dict:
         return {"inserted": 0}
 
     df   = pd.DataFrame(rows, columns=["date", "close", "high", "low", "volume"])
-    df_w = _resample_ohlc(df, "W")
-    df_m = _resample_ohlc(df, "M")
+    df_w, df_m = price_bar_store.bars_for(s, asset_id, df)
 
     regime_cfg = _get_regime_config()
     vol_cfg    = _get_volatility_config()
@@ -3093,10 +3169,7 @@ def compute_current_indicators(
         running_max = df["close"].cummax()
         dd_series   = (df["close"] - running_max) / running_max * 100
         dd_current  = float(dd_series.iloc[-1])
-        dd_sorted   = dd_series.nsmallest(3).values
-        dd_max1 = float(dd_sorted[0]) if len(dd_sorted) > 0 else None
-        dd_max2 = float(dd_sorted[1]) if len(dd_sorted) > 1 else None
-        dd_max3 = float(dd_sorted[2]) if len(dd_sorted) > 2 else None
+        dd_max1, dd_max2, dd_max3 = _worst_drawdowns(df["close"])
         dd_cfg    = _dd_cfg if _dd_cfg is not None else _get_drawdown_config()
         dd_events = _compute_dd_events(df, dd_cfg.min_depth_pct)
 
@@ -3112,8 +3185,12 @@ def compute_current_indicators(
         dur_short_pct=vcfg.dur_short_pct, dur_long_pct=vcfg.dur_long_pct,
     )
 
-    df_w_reg = _resample_ohlc(df, "W")
-    df_m_reg = _resample_ohlc(df, "M")
+    # quick: df es solo la cola (_QUICK_DAYS) — se resamplea esa ventana.
+    if quick:
+        df_w_reg = _resample_ohlc(df, "W")
+        df_m_reg = _resample_ohlc(df, "M")
+    else:
+        df_w_reg, df_m_reg = price_bar_store.bars_for(s, asset_id, df)
 
     if quick:
         rz_d = _compute_regime_zones(df,       cfg.ema_period_d, sl, st_pct, cb, nb, sm)
@@ -3331,7 +3408,12 @@ def compute_current_indicators(
         ("resistance_pct",   ind_resist_pct),
         ("support_pct",      ind_support_pct),
     ])
+    gone = [c for c, v in (("drawdown_max2", dd_max2), ("drawdown_max3", dd_max3))
+            if v is None]
+    if gone and not quick:
+        _clear_current_ind(s, asset_id, gone)
 
+    asset_history_reader.invalidate_on_commit(s, [asset_id])
     s.commit()
 
 
@@ -3377,25 +3459,20 @@ def _cur_drawdown_current(df, asset_id=None, ath_cache=None, **kw):
     return round((last - ath) / ath * 100, 2) if ath else 0.0
 
 
-def _cur_drawdown_max1(df, asset_id=None, close_cache=None, **kw):
-    c = pd.Series(close_cache.get(int(asset_id)) if (close_cache and asset_id is not None)
-                  else df["close"].to_numpy(dtype=float))
-    vals = ((c - c.cummax()) / c.cummax() * 100).nsmallest(3).values
-    return round(float(vals[0]), 2) if len(vals) >= 1 else None
-
-
-def _cur_drawdown_max2(df, asset_id=None, close_cache=None, **kw):
-    c = pd.Series(close_cache.get(int(asset_id)) if (close_cache and asset_id is not None)
-                  else df["close"].to_numpy(dtype=float))
-    vals = ((c - c.cummax()) / c.cummax() * 100).nsmallest(3).values
-    return round(float(vals[1]), 2) if len(vals) >= 2 else None
+def _cur_drawdown_max(rank: int):
+    """drawdown_max{rank+1}. En el cálculo por lote los resuelve
+    _drawdown_max_for_assets de una vez; esto es el camino por activo."""
+    def fn(df, asset_id=None, close_cache=None, **kw):
+        c = (close_cache.get(int(asset_id)) if (close_cache and asset_id is not None)
+             else df["close"].to_numpy(dtype=float))
+        v = _worst_drawdowns(c)[rank]
+        return round(v, 2) if v is not None else None
+    return fn
 
 
-def _cur_drawdown_max3(df, asset_id=None, close_cache=None, **kw):
-    c = pd.Series(close_cache.get(int(asset_id)) if (close_cache and asset_id is not None)
-                  else df["close"].to_numpy(dtype=float))
-    vals = ((c - c.cummax()) / c.cummax() * 100).nsmallest(3).values
-    return round(float(vals[2]), 2) if len(vals) >= 3 else None
+_cur_drawdown_max1 = _cur_drawdown_max(0)
+_cur_drawdown_max2 = _cur_drawdown_max(1)
+_cur_drawdown_max3 = _cur_drawdown_max(2)
 
 
 def _cur_best_ma(tf_key: str, kind: str):
@@ -3423,50 +3500,19 @@ def _cur_support_pct(df, **kw):
         return None
 
 
-def _cur_relative_strength_52w(df, session, asset_id,
-                              price_cache=None, benchmark_cache=None, **kw):
-    """Valor vigente: solo el ultimo dato — O(log N) sin loop completo."""
-    d          = df.iloc[-1]["date"]
-    last_close = float(df.iloc[-1]["close"])
-    ref_ord    = _one_year_before(d).toordinal()
-
+def _cur_relative_strength_52w(df, session, asset_id, price_cache=None,
+                              benchmark_cache=None, **kw):
+    """Valor vigente: solo el ultimo dato — O(log N) sin loop completo. El
+    camino por lote (_compute_current_indicator) no pasa por acá: agrupa por
+    benchmark con relative_strength.current_for_assets."""
     if benchmark_cache is not None:
-        bm_id = benchmark_cache.get(asset_id)
+        benchmarks = relative_strength.BenchmarkSet(
+            session, {asset_id: benchmark_cache.get(asset_id)}, price_cache)
     else:
-        bm_id = session.query(Asset.benchmark_id).filter(Asset.id == asset_id).scalar()
-    if not bm_id:
-        return None
-
-    if price_cache and bm_id in price_cache:
-        bm_df = price_cache[bm_id]
-    else:
-        bm_rows = session.query(Price.date, Price.close).filter(
-            Price.asset_id == bm_id
-        ).order_by(Price.date.asc()).all()
-        if not bm_rows:
-            return None
-        bm_df = pd.DataFrame(bm_rows, columns=["date", "close"])
-
-    bm_ords   = np.array([dd.toordinal() for dd in bm_df["date"]])
-    bm_closes = bm_df["close"].values.astype(float)
-    a_ords    = np.array([dd.toordinal() for dd in df["date"]])
-    a_cls     = df["close"].values.astype(float)
-
-    def _lkup(ords, cls, target):
-        j = int(np.searchsorted(ords, target, side="right")) - 1
-        return float(cls[j]) if j >= 0 else None
-
-    bm_now = _lkup(bm_ords, bm_closes, a_ords[-1])
-    bm_ref = _lkup(bm_ords, bm_closes, ref_ord)
-    a_ref  = _lkup(a_ords,  a_cls,     ref_ord)
-
-    if (bm_now is not None and bm_ref and bm_ref != 0
-            and a_ref is not None and a_ref != 0 and last_close != 0):
-        return round(
-            (last_close - a_ref) / a_ref * 100 - (bm_now - bm_ref) / bm_ref * 100,
-            2,
-        )
-    return None
+        benchmarks = relative_strength.BenchmarkSet.for_asset(
+            session, asset_id, price_cache)
+    bench = benchmarks.benchmark_of(asset_id)
+    return relative_strength.rs_last(df, bench) if bench is not None else None
 
 
 def _make_current_fn(code: str):
@@ -3519,6 +3565,61 @@ _CURRENT_ONLY_CODES = frozenset({
 })
 
 
+# best_* → (temporalidad, tipo de MA). Estos códigos se resuelven por lote con
+# best_ma_kernel.best_ma_batch en vez de activo por activo.
+_BEST_MA_CODES = {
+    "best_sma_d": ("d", "sma"), "best_ema_d": ("d", "ema"),
+    "best_sma_w": ("w", "sma"), "best_ema_w": ("w", "ema"),
+    "best_sma_m": ("m", "sma"), "best_ema_m": ("m", "ema"),
+}
+
+
+# drawdown_max* → puesto. Se resuelven por lote con drawdown_kernel.worst_batch
+# (todas las series del lote apiladas en una matriz) en vez de activo por activo.
+_DD_MAX_CODES = {"drawdown_max1": 0, "drawdown_max2": 1, "drawdown_max3": 2}
+
+
+def _drawdown_max_for_assets(code: str, asset_ids: list, price_cache: dict,
+                             close_cache: dict) -> dict:
+    """{asset_id: profundidad %} de un drawdown_max* para todo el lote.
+    Mismo universo que el loop de _compute_current_indicator: los activos sin
+    frame o con historia corta no entran."""
+    rank = _DD_MAX_CODES[code]
+    ids, series = [], []
+    for aid in asset_ids:
+        df = price_cache.get(aid)
+        if df is None or len(df) < _MIN_ROWS:
+            continue
+        c = close_cache.get(int(aid)) if close_cache else None
+        ids.append(aid)
+        series.append(c if c is not None else df["close"].to_numpy(dtype=float))
+    out = {}
+    for aid, w in zip(ids, drawdown_kernel.worst_batch(series)):
+        v = _dd_pct(w)[rank]
+        out[aid] = round(v, 2) if v is not None else None
+    return out
+
+
+def _best_ma_for_assets(code: str, asset_ids: list, price_cache: dict,
+                        df_w_cache: dict, df_m_cache: dict) -> dict:
+    """{asset_id: período | None} de un código best_* para todos los activos
+    del lote en UNA llamada al kernel (matriz barras × activos × períodos).
+    Los activos sin frame o con historia corta no entran: el loop de
+    _compute_current_indicator los trata como siempre."""
+    tf_key, kind = _BEST_MA_CODES[code]
+    ids, series = [], []
+    for aid in asset_ids:
+        df = price_cache.get(aid)
+        if df is None or len(df) < _MIN_ROWS:
+            continue
+        df_tf = {"d": df, "w": df_w_cache.get(aid), "m": df_m_cache.get(aid)}[tf_key]
+        if df_tf is None:
+            continue
+        ids.append(aid)
+        series.append((df_tf["close"], df_tf["high"], df_tf["low"]))
+    return dict(zip(ids, best_ma_kernel.best_ma_batch(series, kind, _MA_PERIODS)))
+
+
 def _compute_current_indicator(code: str, asset_ids: list,
                         *, price_cache: dict, df_w_cache: dict, df_m_cache: dict,
                         best_sma_cache: dict,
@@ -3531,6 +3632,39 @@ def _compute_current_indicator(code: str, asset_ids: list,
     compute_fn   = _CURRENT_FNS[code]
     current_only = code in _CURRENT_ONLY_CODES
 
+    # best_*: todo el lote de una vez. Si el lote entero falla (un frame
+    # corrupto), se cae al cálculo por activo, que aísla el error en el suyo.
+    batched: dict = {}
+    if code in _BEST_MA_CODES:
+        try:
+            batched = _best_ma_for_assets(code, asset_ids, price_cache,
+                                          df_w_cache, df_m_cache)
+        except Exception as exc:
+            logger.warning("best_ma por lote code=%s falló, sigue por activo: %s",
+                           code, exc)
+            batched = {}
+    elif code in _DD_MAX_CODES:
+        try:
+            batched = _drawdown_max_for_assets(code, asset_ids, price_cache,
+                                               close_cache)
+        except Exception as exc:
+            logger.warning("drawdown_max por lote code=%s falló, sigue por "
+                           "activo: %s", code, exc)
+            batched = {}
+    elif code in _BENCHMARK_DEP_CODES and benchmark_cache is not None:
+        # RS: el lado benchmark una vez por benchmark, no una por activo.
+        try:
+            ids = [aid for aid in asset_ids
+                   if price_cache.get(aid) is not None
+                   and len(price_cache[aid]) >= _MIN_ROWS]
+            batched = relative_strength.current_for_assets(
+                relative_strength.BenchmarkSet(s, benchmark_cache, price_cache),
+                ids, price_cache)
+        except Exception as exc:
+            logger.warning("RS por benchmark code=%s falló, sigue por activo: %s",
+                           code, exc)
+            batched = {}
+
     pending = 0
     for asset_id in asset_ids:
         df = price_cache.get(asset_id)
@@ -3544,7 +3678,7 @@ def _compute_current_indicator(code: str, asset_ids: list,
         df_m = df_m_cache.get(asset_id)
 
         try:
-            val = compute_fn(
+            val = batched[asset_id] if asset_id in batched else compute_fn(
                 df=df, df_w=df_w, df_m=df_m,
                 regime_cfg=regime_cfg, vol_cfg=vol_cfg,
                 session=s, asset_id=asset_id,
@@ -3563,6 +3697,8 @@ def _compute_current_indicator(code: str, asset_ids: list,
                         _upsert_current_ind(s, asset_id, code, value_num=v_num, value_str=v_str)
                     else:
                         _upsert_ind(s, code, asset_id, asset_date, val)
+                elif code in _DD_MAX_CODES:
+                    _clear_current_ind(s, asset_id, [code])
             pending += 1
             if pending >= _EXISTING_CHUNK:
                 s.commit()
@@ -3622,8 +3758,8 @@ def _current_batch(batch_asset_ids: list, codes: list, preloaded: dict | None =
             price_cache, ath_cache, close_cache = _derive_recent_caches(full)
             # computar SOLO los activos del lote (full puede traer benchmarks de otros)
             ids = [aid for aid in batch_asset_ids if aid in price_cache]
-            df_w_cache = {aid: _resample_ohlc(price_cache[aid], "W") for aid in ids}
-            df_m_cache = {aid: _resample_ohlc(price_cache[aid], "M") for aid in ids}
+            df_w_cache, df_m_cache = price_bar_store.load(
+                s, {aid: full[aid] for aid in ids}, recent=price_cache)
             best_sma_cache  = _load_best_sma_cache(s, batch_asset_ids)
             benchmark_cache = _load_benchmark_cache(s, batch_asset_ids)
         if not ids:
@@ -3705,10 +3841,10 @@ def recompute_current_indicators(progress_cb=None, *, codes=None,
     preloaded = None
     if not use_procs and price_cache is not None:
         rec, ath, close = _derive_recent_caches(price_cache)
+        df_w_cache, df_m_cache = price_bar_store.load(s, price_cache, recent=rec)
         preloaded = {
             "price_cache": rec, "ath_cache": ath, "close_cache": close,
-            "df_w_cache": {aid: _resample_ohlc(df, "W") for aid, df in rec.items()},
-            "df_m_cache": {aid: _resample_ohlc(df, "M") for aid, df in rec.items()},
+            "df_w_cache": df_w_cache, "df_m_cache": df_m_cache,
             "best_sma_cache":  _load_best_sma_cache(s),
             "benchmark_cache": _load_benchmark_cache(s),
         }
@@ -3768,7 +3904,8 @@ def recompute_current_indicators(progress_cb=None, *, codes=None,
         for aid, errs in asset_errors.items()
     ]
 
-    return {"total": n_assets, "success": n_assets - len(errors), "errors": errors}
+    return {"total": n_assets, "success": n_assets - len(errors), "errors": errors,
+            "asset_errors": asset_errors}
 
 
 # ── Acciones combinadas (Centro de Datos) ───────────────────────────────────────
@@ -3810,7 +3947,8 @@ def _announce_worker_union(progress_cb, s, n_assets: int,
     return cur, hist
 
 
-def _run_current_and_backfill(progress_cb, *, force: bool) -> dict:
+def _run_current_and_backfill(progress_cb, *, force: bool,
+                              asset_ids: list | None = None) -> dict:
     """recompute_current_indicators + backfill_all_indicator_values en
     secuencia, con una barra de progreso COMBINADA entre las dos fases.
 
@@ -3823,21 +3961,28 @@ def _run_current_and_backfill(progress_cb, *, force: bool) -> dict:
     En modo PROCESOS el padre YA NO carga la tabla de precios entera (era el
     techo de memoria): universo y pesos salen de _load_price_weights (un COUNT
     liviano) y cada hijo de AMBAS fases carga su slice. En modo threads (escala
-    chica) sí carga el full una vez y lo reusa para el backfill."""
+    chica) sí carga el full una vez y lo reusa para el backfill.
+
+    asset_ids acota las dos fases a esos activos (None = todo el universo con
+    precios); en ese caso el indicator_update_log de cada uno registra
+    también los códigos del backfill que fallaron."""
     s = get_session()
-    use_procs = _use_process_pool(_count_price_assets(s))[0]
+    scope = set(asset_ids) if asset_ids is not None else None
+    use_procs = _use_process_pool(
+        _count_price_assets(s) if scope is None else len(scope))[0]
     if use_procs:
         weights          = _load_price_weights(s)
-        asset_ids        = sorted(weights.keys())
-        n_assets         = len(asset_ids)
         price_cache_full = None
     else:
         if progress_cb:
             progress_cb(0, 1, "Cargando precios en memoria...")
-        price_cache_full = _load_all_prices(s)
-        asset_ids        = sorted(price_cache_full.keys())
+        price_cache_full = (_load_all_prices(s) if scope is None
+                            else _load_prices_for_assets(s, sorted(scope)))
         weights          = {aid: len(df) for aid, df in price_cache_full.items()}
-        n_assets         = len(asset_ids)
+    if scope is not None:
+        weights = {aid: n for aid, n in weights.items() if aid in scope}
+    asset_ids = sorted(weights.keys())
+    n_assets  = len(asset_ids)
 
     cb1 = cb2 = progress_cb
     if progress_cb:
@@ -3861,24 +4006,36 @@ def _run_current_and_backfill(progress_cb, *, force: bool) -> dict:
                                  price_cache=price_cache_full)
     # Fase 2: en procesos cada hijo carga los precios de SU lote (price_cache
     # None → pesos por COUNT); en threads reusa el full ya cargado.
+    bf_ids = asset_ids if scope is not None else None
     if use_procs:
-        r2 = backfill_all_indicator_values(progress_cb=cb2, force=force)
+        r2 = backfill_all_indicator_values(progress_cb=cb2, force=force,
+                                           asset_ids=bf_ids)
     else:
         r2 = backfill_all_indicator_values(progress_cb=cb2, force=force,
-                                           price_cache=price_cache_full)
+                                           price_cache=price_cache_full,
+                                           asset_ids=bf_ids)
+    if scope is not None and r2["errors"]:
+        failed = [f"backfill {e['code']}: {e['error']}" for e in r2["errors"]]
+        _save_indicator_logs_bulk(
+            asset_ids, {aid: r1.get("asset_errors", {}).get(aid, []) + failed
+                        for aid in asset_ids}, get_session())
     errors = r1["errors"] + r2["errors"]
     total  = r1["total"]
     return {"total": total, "success": max(total - len(errors), 0),
             "errors": errors, "unit": "activos"}
 
 
-def update_indicator_history(progress_cb=None) -> dict:
+def update_indicator_history(progress_cb=None, *,
+                             asset_ids: list | None = None) -> dict:
     """Recomputa los indicadores vigentes sin historia (best_*, drawdowns, S/R)
     y completa huecos históricos de los demás (backfill delta).
 
     Los precios se cargan una sola vez, y el valor de hoy de los indicadores
-    con historia lo escribe el backfill (no se computa dos veces)."""
-    return _run_current_and_backfill(progress_cb, force=False)
+    con historia lo escribe el backfill (no se computa dos veces). asset_ids
+    acota la corrida a esos activos (p.ej. los sintéticos que acaba de crear
+    currency_conversion_service.sync_all)."""
+    return _run_current_and_backfill(progress_cb, force=False,
+                                     asset_ids=asset_ids)
 
 
 def rebuild_indicator_history(progress_cb=None) -> dict:
@@ -12,7 +12,9 @@ cómputo que usa backfill_indicator (_BACKFILL_FNS[code]) directo en
 memoria, sin pasar por el camino rápido/lento — el resultado es
 equivalente a lo que produciría un rebuild completo (force=True) para ese
 activo puntual. Compara esa serie "fresca" contra lo que hoy está
-guardado en ind_{code}, fecha por fecha.
+guardado en ind_{code}, fecha por fecha — en dos etapas: primero una huella
+por (activo, código, año) calculada en la base, y solo los años cuya huella
+no coincide se leen completos (ver _prefetch_fingerprints).
 
 También hace chequeos de cordura (¿el valor tiene sentido, sin importar
 cómo se calculó?) — RSI fuera de [0,100], un trend_* que no es ninguna
@@ -46,6 +48,7 @@ from app.models.indicator_store import get_ind_table
 # Valores posibles por indicador categórico: catálogo compartido con el
 # constructor de filtros de estrategia (ver indicator_catalog.py).
 from app.services.indicator_catalog import CATEGORICAL_VALUES as _CATEGORICAL_VALUES
+from app.services import price_bar_store
 from app.services.fundamental_service import (
     _ALL_FUND_CODES, _FUND_DAILY_CODES, _Quarter, _compute_daily_ratios,
     _compute_quarterly_ratios, _daily_ratio_series, _ref_1y_ord,
@@ -55,7 +58,7 @@ from app.services.fundamental_service import (
 # el particionador — la unidad de trabajo pasa de "un activo" a "un lote".
 from app.services.technical_service import (
     _BACKFILL_FNS, _DELTA_TAIL_MODE, _get_regime_config,
-    _get_volatility_config, _resample_ohlc, _series_dates_values,
+    _get_volatility_config, _series_dates_values,
     _use_process_pool, run_asset_batches,
 )
 
@@ -212,6 +215,132 @@ def _prefetch_stored(session, codes: list, asset_ids: list) -> dict:
     return out
 
 
+# ── Verificación en dos etapas: huellas por año en SQL ──────────────────────
+# Traer TODO lo guardado (_prefetch_stored) para compararlo contra el
+# recálculo mueve cada celda de la historia por la red: 24 códigos × 10000
+# activos × ~8000 fechas son miles de millones de celdas, y por eso la
+# verificación se corría sobre una muestra. Primero se compara una HUELLA por
+# (activo, código, año) calculada en la base contra la misma huella de la serie
+# fresca; solo los años que no coinciden se traen a resolución completa.
+#
+# Huella numérica: (filas, Σ posición, Σ centavos, Σ centavos × posición), con
+# centavos = round(valor × 100) — el mismo redondeo a 2 decimales que escribe
+# el sistema — y posición = mes × 32 + día. Σ posición atrapa fechas movidas
+# (incluso con valor cero) y la suma ponderada lo que la suma sola no ve: dos
+# valores intercambiados o corridos una fecha. Huella
+# categórica: por valor, (filas, Σ posición). Todo es aritmética entera exacta
+# en double (< 2^53 para cualquier año real), así que la comparación es por
+# igualdad.
+#
+# Una huella distinta NO es una diferencia: solo manda ese año a la segunda
+# etapa, que compara con _TOL/_REL_TOL como siempre (un valor grande en una
+# columna de precisión simple puede caer en otro centavo y ser igual dentro de
+# la tolerancia). Una huella igual se toma como año idéntico: la serie fresca
+# hace de "guardado" para esas fechas — con el mismo centavo no hay valor
+# que _values_equal rechace.
+
+def _fp_pos(d) -> int:
+    return d.month * 32 + d.day
+
+
+def _is_str_code(t) -> bool:
+    return isinstance(t.c.value.type, sa.String)
+
+
+def _prefetch_fingerprints(session, codes: list, asset_ids: list) -> dict:
+    """Una query agregada por código (como _prefetch_stored, pero devuelve una
+    fila por activo y año en vez de una por fecha).
+    code -> {asset_id: {año: huella}}."""
+    out: dict = {}
+    if not asset_ids:
+        return {code: {} for code in codes}
+    for code in codes:
+        t = get_ind_table(code)
+        year = sa.extract("year", t.c.date)
+        pos = (sa.extract("month", t.c.date) * 32
+               + sa.extract("day", t.c.date))
+        base = (sa.select().where(t.c.asset_id.in_(asset_ids))
+                .where(t.c.value.isnot(None)))
+        by_asset: dict = {}
+        if _is_str_code(t):
+            q = (base.add_columns(t.c.asset_id, year, t.c.value,
+                                  sa.func.count(), sa.func.sum(pos))
+                 .group_by(t.c.asset_id, year, t.c.value))
+            for aid, y, v, n, sp in session.execute(q).all():
+                by_asset.setdefault(aid, {}).setdefault(int(y), []).append(
+                    (str(v), int(n), int(sp)))
+            for years in by_asset.values():
+                for y in years:
+                    years[y] = tuple(sorted(years[y]))
+        else:
+            cents = sa.func.round(t.c.value * 100.0)
+            q = (base.add_columns(t.c.asset_id, year, sa.func.count(),
+                                  sa.func.sum(pos), sa.func.sum(cents),
+                                  sa.func.sum(cents * pos))
+                 .group_by(t.c.asset_id, year))
+            for aid, y, n, sp, sc, scp in session.execute(q).all():
+                by_asset.setdefault(aid, {})[int(y)] = (
+                    int(n), int(sp), int(round(sc)), int(round(scp)))
+        out[code] = by_asset
+    return out
+
+
+def _fingerprints(fresh: dict, as_str: bool) -> dict | None:
+    """La misma huella que _prefetch_fingerprints, sobre la serie fresca.
+    None si algún valor no entra en la aritmética (inf, no numérico): ese
+    activo/código va entero a la segunda etapa."""
+    out: dict = {}
+    try:
+        if as_str:
+            acc: dict = {}
+            for d, v in fresh.items():
+                n, sp = acc.get((d.year, str(v)), (0, 0))
+                acc[(d.year, str(v))] = (n + 1, sp + _fp_pos(d))
+            for (y, v), (n, sp) in acc.items():
+                out.setdefault(y, []).append((v, n, sp))
+            return {y: tuple(sorted(rows)) for y, rows in out.items()}
+        for d, v in fresh.items():
+            c, p = round(float(v) * 100), _fp_pos(d)
+            n, sp, sc, scp = out.get(d.year, (0, 0, 0, 0))
+            out[d.year] = (n + 1, sp + p, sc + c, scp + c * p)
+        return out
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _fetch_stored_years(session, code: str, asset_id: int, years) -> dict:
+    """Segunda etapa: lo guardado a resolución completa, solo en `years`."""
+    if not years:
+        return {}
+    t = get_ind_table(code)
+    rango = sa.or_(*(sa.and_(t.c.date >= _date_type(y, 1, 1),
+                             t.c.date < _date_type(y + 1, 1, 1))
+                     for y in sorted(years)))
+    rows = session.execute(
+        sa.select(t.c.date, t.c.value)
+        .where(t.c.asset_id == asset_id)
+        .where(t.c.value.isnot(None))
+        .where(rango)
+    ).all()
+    return {d: v for d, v in rows}
+
+
+def _stored_from_fingerprints(session, code: str, asset_id: int, fresh: dict,
+                              stored_fp: dict) -> dict:
+    """Lo guardado que necesita _diffs_for_series, armado en dos etapas: en
+    los años con huella igual, la serie fresca; en el resto, lo leído de la
+    base."""
+    fresh_fp = _fingerprints(fresh, _is_str_code(get_ind_table(code)))
+    if fresh_fp is None:
+        years = set(stored_fp) | {d.year for d in fresh}
+    else:
+        years = {y for y in set(stored_fp) | set(fresh_fp)
+                 if stored_fp.get(y) != fresh_fp.get(y)}
+    stored = {d: v for d, v in fresh.items() if d.year not in years}
+    stored.update(_fetch_stored_years(session, code, asset_id, years))
+    return stored
+
+
 def _values_equal(fresh, stored) -> bool:
     try:
         f, s = float(fresh), float(stored)
@@ -283,10 +412,15 @@ def _diff_masks(code: str, fresh: dict, stored: dict) -> tuple:
 
 
 def verify_asset_code(session, code: str, asset_id: int, df, df_w, df_m,
-                      regime_cfg, vol_cfg, stored: dict) -> list:
+                      regime_cfg, vol_cfg, stored: dict,
+                      stored_fp: dict | None = None) -> list:
     """Devuelve la lista de diferencias (fecha, motivo, guardado, fresco,
     categoría) — ver _diff_category. df_w/df_m y stored se calculan una
-    sola vez por activo (ver _verify_one_asset) en vez de por cada código."""
+    sola vez por activo (ver _verify_one_asset) en vez de por cada código.
+
+    stored_fp: huellas por año de lo guardado (_prefetch_fingerprints); si
+    se pasa, `stored` se ignora y se arma en dos etapas
+    (_stored_from_fingerprints)."""
     compute_fn = _BACKFILL_FNS[code]
     values = compute_fn(
         df=df, df_w=df_w, df_m=df_m,
@@ -295,6 +429,12 @@ def verify_asset_code(session, code: str, asset_id: int, df, df_w, df_m,
         price_cache=None, best_sma_cache=None,
     )
     dates_list, vals_list = _series_dates_values(values, df)
+    if stored_fp is not None:
+        notna_mask = pd.notna(vals_list) if vals_list else ()
+        fresh = {d: v for d, v, ok in zip(dates_list, vals_list, notna_mask)
+                 if ok}
+        stored = _stored_from_fingerprints(session, code, asset_id, fresh,
+                                           stored_fp)
     return _diffs_for_series(code, dates_list, vals_list, stored)
 
 
@@ -356,10 +496,13 @@ def ids_from_tickers(session, tickers: list) -> tuple[list, list]:
 
 def _verify_one_asset(asset_id: int, ticker: str, codes: list,
                       regime_cfg, vol_cfg, stored_by_code: dict,
-                      session=None) -> list:
-    """Verifica TODOS los codes para un único activo. df_w/df_m se resamplean
-    una sola vez por activo, no una vez por código (antes verify_asset_code
-    lo repetía).
+                      session=None, fp_by_code: dict | None = None) -> list:
+    """Verifica TODOS los codes para un único activo. df_w/df_m se cargan
+    una sola vez por activo (price_bar_store, verificadas contra la marca de
+    los precios), no una vez por código (antes verify_asset_code lo repetía).
+
+    fp_by_code: huellas de _prefetch_fingerprints; si se pasa, la comparación
+    va en dos etapas y stored_by_code no se usa (ver _verify_batch).
 
     session: si se pasa (desde _verify_batch), NO abre ni cierra sesión
     propia — el LOTE la administra (una sola sesión por lote, para que
@@ -371,13 +514,14 @@ def _verify_one_asset(asset_id: int, ticker: str, codes: list,
         df = _load_price_df(s, asset_id)
         if df.empty:
             return []
-        df_w = _resample_ohlc(df, "W")
-        df_m = _resample_ohlc(df, "M")
+        df_w, df_m = price_bar_store.bars_for(s, asset_id, df)
         out = []
         for code in codes:
             stored = stored_by_code.get(code, {}).get(asset_id, {})
+            fp = (None if fp_by_code is None
+                  else fp_by_code.get(code, {}).get(asset_id, {}))
             diffs = verify_asset_code(s, code, asset_id, df, df_w, df_m,
-                                      regime_cfg, vol_cfg, stored)
+                                      regime_cfg, vol_cfg, stored, fp)
             if diffs:
                 out.append({"code": code, "asset_id": asset_id,
                            "ticker": ticker, "diffs": diffs})
@@ -400,18 +544,22 @@ def _verify_batch(batch_asset_ids: list, ticker_map: dict, codes: list) -> dict:
     vacíos. Si no, update_flags_for_assets leería "sin resultados" como "sin
     hallazgos" y BORRARÍA la marca de activos que en realidad no se
     verificaron. Mejor una corrida abortada (marcas intactas) que marcas
-    silenciosamente incorrectas."""
+    silenciosamente incorrectas.
+
+    Lo guardado no se trae entero: se comparan huellas por año calculadas en
+    la base y solo los años distintos se leen a resolución completa (ver
+    _prefetch_fingerprints)."""
     from app.database import Session as _ScopedSession
     s = get_session()
     try:
         regime_cfg = _get_regime_config()
         vol_cfg    = _get_volatility_config()
-        stored_by_code = _prefetch_stored(s, codes, batch_asset_ids)
+        fp_by_code = _prefetch_fingerprints(s, codes, batch_asset_ids)
         out = []
         for aid in batch_asset_ids:
             out.extend(_verify_one_asset(
                 aid, ticker_map.get(aid, "?"), codes,
-                regime_cfg, vol_cfg, stored_by_code, session=s))
+                regime_cfg, vol_cfg, {}, session=s, fp_by_code=fp_by_code))
         return {"results": out, "n_assets": len(batch_asset_ids)}
     finally:
         _ScopedSession.remove()
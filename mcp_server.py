@@ -135,13 +135,11 @@ async def _listar_herramientas(
 async def _ejecutar_herramienta(
     ctx: ServerRequestContext, params: types.CallToolRequestParams
 ) -> types.CallToolResult:
-    from app.database import Session
-
     caller = _caller_autenticado()
-    try:
-        salida = mcp_adapter.ejecutar(params.name, caller, params.arguments)
-    finally:
-        Session.remove()   # ver el comentario en _VerificadorDeToken
+    # En el pool de herramientas (mcp_adapter.ejecutar_en_pool): un backtest
+    # largo no frena las demás llamadas. El pool suelta la sesión del thread.
+    salida = await mcp_adapter.ejecutar_en_pool(params.name, caller,
+                                                params.arguments)
 
     if caller is not None:
         logger.info("MCP %s user=%s ok=%s", params.name, caller.user_id,
@@ -11,10 +11,11 @@ Al estar acá, su unpickle no importa nada de `app`: el initializer setea el
 entorno y recién la PRIMERA TAREA importa `app.database` con Config leyendo
 el entorno ya correcto.
 
-(El import de dash/pandas vía app igual ocurre al importar la primera tarea
-—app.services.technical_service—; es inevitable y se amortiza porque el
-executor reusa cada hijo entre lotes. Lo que este módulo garantiza es solo
-el timing del entorno del pool de BD.)
+La primera tarea importa app.services.technical_service: pandas/numpy y el
+núcleo headless, NO Dash — `app/__init__.py` ya no trae la fábrica web
+(app.web), así que un hijo nace sin Dash, Plotly ni las páginas (ver
+app.core y scripts/measure_cold_start.py). Eso baja el costo de spawn y con
+él el umbral a partir del cual conviene el pool de procesos.
 """
 import os
 import sys
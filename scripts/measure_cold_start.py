@@ -0,0 +1,116 @@
+"""
+Mide el arranque en frío de cada tipo de proceso: tiempo de pared desde que
+arranca el intérprete hasta que el proceso está listo, RSS máximo y si cargó
+la web (Dash/Plotly/páginas).
+
+Tipos:
+  web     create_app() completo (páginas, callbacks, arranque headless)
+  worker  app.core.bootstrap() + start_scheduler(), lo que corre worker.py
+  mcp     import de mcp_server (registro de herramientas, OAuth, Starlette)
+  child   hijo del ProcessPool: child_initializer + import de la tarea
+          (app.services.technical_service._process_batch_task)
+
+El tiempo del hijo es el que paga cada proceso nuevo del pool antes de su
+primer lote: cuanto más chico, más bajo el umbral a partir del cual el pool
+de procesos le gana a los threads (technical_service._use_process_pool).
+
+Corre cada tipo en un subproceso limpio contra un sqlite temporal con el
+esquema creado (create_all), --repeat veces, y reporta el mínimo de tiempo.
+
+Uso:
+    python scripts/measure_cold_start.py
+    python scripts/measure_cold_start.py --repeat 5 --only child --only worker
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_PROBE = """
+import json, resource, sys
+sys.path.insert(0, {root!r})
+{body}
+print(json.dumps({{
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "web": [m for m in ("dash", "plotly", "dash_ag_grid", "app.pages")
+            if m in sys.modules],
+    "modules": len(sys.modules),
+}}))
+"""
+
+_BODIES = {
+    "web": "from app import create_app\ncreate_app()",
+    "worker": "from app import core\ncore.bootstrap()\ncore.start_scheduler()",
+    "mcp": "import mcp_server",
+    "child": ("import process_child\n"
+              "process_child.child_initializer({root!r}, 2, 'WARNING')\n"
+              "from app.services.technical_service import _process_batch_task"),
+}
+
+_SCHEMA = ("import app.models\n"
+           "from app.database import Base, engine\n"
+           "Base.metadata.create_all(engine)")
+
+
+def _run(body: str, env: dict) -> tuple[float, dict]:
+    code = _PROBE.format(root=str(ROOT), body=body.format(root=str(ROOT)))
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1]
+                           if proc.stderr.strip() else "falló sin salida")
+    return wall, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Arranque en frío por tipo de proceso")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--only", action="append", choices=sorted(_BODIES))
+    ap.add_argument("--json", action="store_true", help="salida en JSON")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="cold-start-")
+    env = {**os.environ,
+           "DATABASE_URL": f"sqlite:///{Path(tmp) / 'cold.db'}",
+           "RUN_SCHEDULER": "1", "LOG_LEVEL": "WARNING",
+           "LOG_FILE": str(Path(tmp) / "app.log")}
+    try:
+        _run(_SCHEMA, env)
+        out = {}
+        for kind in args.only or _BODIES:
+            try:
+                runs = [_run(_BODIES[kind], env) for _ in range(max(1, args.repeat))]
+            except RuntimeError as exc:
+                out[kind] = {"error": str(exc)}
+                continue
+            wall, info = min(runs, key=lambda r: r[0])
+            out[kind] = {"seconds": round(wall, 3),
+                         "rss_mb": round(info["rss_mb"], 1),
+                         "modules": info["modules"], "web": info["web"]}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(out, indent=2))
+        return 0
+    print(f"{'proceso':<8}{'seg':>8}{'RSS MB':>9}{'módulos':>9}  web cargada")
+    for kind, r in out.items():
+        if "error" in r:
+            print(f"{kind:<8}  ERROR: {r['error']}")
+            continue
+        print(f"{kind:<8}{r['seconds']:>8.2f}{r['rss_mb']:>9.1f}"
+              f"{r['modules']:>9}  {', '.join(r['web']) or 'no'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,10 @@ Mide cuánto tarda un backtest de cuantiles contra la base REAL, desglosado por
 fase, para saber si `run_backtest_preview` (la herramienta MCP) entra en el
 tiempo que un cliente de IA está dispuesto a esperar.
 
-Es de SOLO LECTURA: no escribe nada, no persiste el run y no toma el `run_lock`.
+No persiste el run ni toma el `run_lock`. Lo único que escribe es el panel de
+retornos forward (backtest_forward_panel), caché derivado de `prices`: la
+primera medición lo arma y las siguientes lo reusan — el informe dice cuántos
+activos salieron de cada lado.
 Igual corre contra producción, así que lee bastante — no lo dispares en medio de
 una corrida del Centro de Datos.
 
@@ -93,7 +96,7 @@ def medir(strategy_id: int, desde: str | None, hasta: str | None,
     t_scores = time.perf_counter() - t0
 
     t0 = time.perf_counter()
-    fwd = bs._retornos_forward(s, scores, cfg, None)
+    fwd, panel = bs._retornos_forward(s, scores, cfg, None)
     t_precios = time.perf_counter() - t0
 
     t0 = time.perf_counter()
@@ -108,6 +111,7 @@ def medir(strategy_id: int, desde: str | None, hasta: str | None,
                   ("_agregar", t_agregar)],
         "filas_score": len(scores),
         "activos": len(fwd),
+        "panel": panel,
         "fechas": datos["n_dates"],
         "rango": f"{datos['date_from']} .. {datos['date_to']}",
     }
@@ -117,6 +121,9 @@ def _informe(titulo: str, r: dict) -> None:
     print(f"\n── {titulo} ──")
     print(f"   {r['filas_score']:,} scores · {r['activos']} activos · "
           f"{r['fechas']} fechas · {r['rango']}")
+    p = r["panel"]
+    print(f"   panel forward: {p['reused']} reusados · {p['refreshed']} recalculados"
+          f" · ahorro estimado {p['seconds_saved']:.2f} s")
     for nombre, seg in r["fases"]:
         pct = (seg / r["total"] * 100) if r["total"] else 0
         print(f"   {nombre:<20} {_fmt(seg)}  {pct:5.1f}%")
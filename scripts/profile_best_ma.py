@@ -0,0 +1,109 @@
+"""
+Compara el costo POR ACTIVO de best_sma_* / best_ema_*: el loop por período de
+siempre (16 rolling/ewm de pandas + Series booleanas por período) contra
+best_ma_kernel (todas las MAs como una matriz), de a un activo y por lote.
+
+Es cómputo PURO sobre random-walks sintéticos, así que corre LOCAL — no toca la
+BD. Mide wall-clock con perf_counter (no cProfile: infla los tiempos de las
+llamadas chicas de pandas, que es justo lo que se compara acá) y verifica de
+paso que ambos caminos elijan el mismo período en cada activo.
+
+Uso:
+    ./venv/Scripts/python.exe scripts/profile_best_ma.py [n_activos] [barras]
+
+Defaults: 200 activos × 3000 barras diarias (+ sus semanales y mensuales,
+que es lo que recorre compute_current_indicators por activo).
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Stub sqlite ANTES de importar app (mismo criterio que tests/conftest.py y
+# scripts/profile_regime_zones.py). El cómputo perfilado no toca la BD.
+_STUB = Path(tempfile.gettempdir()) / "profile_best_ma_stub.db"
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_STUB}")
+os.environ.setdefault("USE_WIDE_IND_TABLES", "0")
+
+import numpy as np
+import pandas as pd
+
+from app.services.best_ma_kernel import MA_PERIODS, best_ma, best_ma_batch
+from app.services.technical_service import _resample_ohlc
+
+
+def _loop_find_best_ma(close, high, low, kind="sma"):
+    """El loop por período previo al kernel (copia de
+    tests/test_best_ma_kernel.py::_ref_find_best_ma)."""
+    best_period, best_score = None, -1.0
+    prev_c = close.shift(1)
+    for period in MA_PERIODS:
+        if len(close) < period * 2:
+            continue
+        ma = close.rolling(period).mean() if kind == "sma" \
+            else close.ewm(span=period, adjust=False).mean()
+        touched = ma.notna() & (low <= ma) & (ma <= high)
+        total = int(touched.sum())
+        if total < 5:
+            continue
+        bounce = ((prev_c >= ma) & (close >= ma)) | ((prev_c <= ma) & (close <= ma))
+        score = int((touched & bounce).sum()) / total
+        if score > best_score:
+            best_score, best_period = score, period
+    return best_period
+
+
+def _random_walk_df(n, seed):
+    rng = np.random.RandomState(seed)
+    close = np.abs(100 + rng.randn(n).cumsum()) + 5
+    return pd.DataFrame({
+        "date":  [date(2010, 1, 1) + timedelta(days=i) for i in range(n)],
+        "close": close,
+        "high":  close * (1 + rng.rand(n) * 0.02),
+        "low":   close * (1 - rng.rand(n) * 0.02),
+    })
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    n_assets = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_bars   = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    frames = []
+    for i in range(n_assets):
+        df = _random_walk_df(n_bars - (i % 7) * 100, seed=i)
+        frames.append({"d": df, "w": _resample_ohlc(df, "W"), "m": _resample_ohlc(df, "M")})
+    print(f"{n_assets} activos × ~{n_bars} barras diarias (+ semanal/mensual)\n")
+
+    print(f"{'tf':>3} {'tipo':>4} | {'loop ms/act':>11} {'kernel ms/act':>13} "
+          f"{'lote ms/act':>11} | {'x kernel':>8} {'x lote':>7}")
+    tot_loop = tot_one = tot_batch = 0.0
+    for tf in ("d", "w", "m"):
+        series = [(f[tf]["close"], f[tf]["high"], f[tf]["low"]) for f in frames]
+        for kind in ("sma", "ema"):
+            ref, t_loop = _timed(lambda: [_loop_find_best_ma(c, h, lo, kind)
+                                          for c, h, lo in series])
+            one, t_one = _timed(lambda: [best_ma(c, h, lo, kind) for c, h, lo in series])
+            bat, t_bat = _timed(lambda: best_ma_batch(series, kind))
+            assert ref == one == bat, f"paridad rota en {tf}/{kind}"
+            tot_loop, tot_one, tot_batch = tot_loop + t_loop, tot_one + t_one, tot_batch + t_bat
+            print(f"{tf:>3} {kind:>4} | {t_loop / n_assets * 1000:11.3f} "
+                  f"{t_one / n_assets * 1000:13.3f} {t_bat / n_assets * 1000:11.3f} | "
+                  f"{t_loop / t_one:8.1f} {t_loop / t_bat:7.1f}")
+
+    print(f"\nTotal por activo (6 códigos best_*): loop {tot_loop / n_assets * 1000:.2f} ms, "
+          f"kernel {tot_one / n_assets * 1000:.2f} ms, lote {tot_batch / n_assets * 1000:.2f} ms")
+    print("Mismo período elegido en todos los activos y temporalidades.")
+
+
+if __name__ == "__main__":
+    main()
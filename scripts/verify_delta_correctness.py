@@ -8,6 +8,7 @@ nunca escribe.
 Uso (en el Codespace, con la BD levantada):
     python scripts/verify_delta_correctness.py                          # indicadores técnicos, 30 activos al azar
     python scripts/verify_delta_correctness.py --sample 100
+    python scripts/verify_delta_correctness.py --all                    # universo completo (huellas en la base, ver el servicio)
     python scripts/verify_delta_correctness.py --codes trend_daily,relative_strength_52w
     python scripts/verify_delta_correctness.py --tickers AAPL,GGAL.BA
     python scripts/verify_delta_correctness.py --domain fundamentals    # ratios fundamentales en vez de indicadores
@@ -33,6 +34,8 @@ def main():
                         help="códigos separados por coma (default: todos los del dominio elegido)")
     parser.add_argument("--sample", type=int, default=30,
                         help="cantidad de activos al azar (default: 30, ignorado si se pasa --tickers)")
+    parser.add_argument("--all", action="store_true",
+                        help="todos los activos en vez de una muestra")
     parser.add_argument("--tickers", default=None,
                         help="tickers puntuales separados por coma, en vez de muestra al azar")
     parser.add_argument("--max-print", type=int, default=10,
@@ -47,7 +50,8 @@ def main():
             print(f"  ... {cur}/{tot}  {label}", file=sys.stderr)
 
     run_fn = run_verification if args.domain == "indicators" else run_fund_verification
-    result = run_fn(codes=codes, sample=args.sample, tickers=tickers, progress_cb=_progress)
+    sample = None if args.all else args.sample
+    result = run_fn(codes=codes, sample=sample, tickers=tickers, progress_cb=_progress)
 
     if result["missing_tickers"]:
         print(f"(aviso: tickers no encontrados, salteados: {', '.join(result['missing_tickers'])})")
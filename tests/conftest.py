@@ -48,6 +48,10 @@ os.environ["USE_WIDE_IND_TABLES"] = "0"
 # per-entidad (sig_{id}/strat_res_{id}); en prod el default es ancho desde el
 # cutover. Los tests de paridad ancha lo vuelven a "1" con monkeypatch.
 os.environ["USE_WIDE_SIGNAL_TABLES"] = "0"
+# Ídem el caché de resultados de las herramientas de IA (app/ai/cache.py): los
+# fixtures borran y recrean estrategias con los mismos ids. Sus tests lo
+# prenden con monkeypatch.
+os.environ["AI_RESULT_CACHE"] = "0"
 
 
 def pytest_sessionstart(session):
@@ -74,3 +78,13 @@ def pytest_sessionstart(session):
             f"base (assets -> CASCADE -> prices e ind_*).\n"
             f"Revisá el forzado de DATABASE_URL en tests/conftest.py.",
             returncode=3)
+
+
+@pytest.fixture(autouse=True)
+def _asset_history_cache_vacio():
+    """El caché de asset_history_reader queda prendido, pero cada test arranca
+    vacío: los fixtures reescriben tablas con SQL crudo (fuera de los caminos
+    de escritura que lo invalidan) y un bloque de otro test las taparía."""
+    from app.services import asset_history_reader
+    asset_history_reader.clear_cache()
+    yield
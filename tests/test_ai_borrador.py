@@ -316,6 +316,17 @@ def test_el_contador_sube_por_usuario(db):
     assert prudencia.registrar_intento(AiCaller(user_id=_ADMIN)) == 1
 
 
+def test_el_contador_no_pierde_intentos_entre_workers(db):
+    """Las herramientas corren en el pool del servidor MCP: cada intento
+    simultáneo recibe su propio número."""
+    from concurrent.futures import ThreadPoolExecutor
+    caller = AiCaller(user_id=_ANA)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        vistos = list(pool.map(lambda _: prudencia.registrar_intento(caller),
+                               range(400)))
+    assert sorted(vistos) == list(range(1, 401))
+
+
 def test_el_aviso_de_sobreajuste_aparece_recien_al_cuarto_intento(db):
     """Antes es exploración normal, y un cartel en cada respuesta es ruido que
     se termina ignorando."""
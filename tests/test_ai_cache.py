@@ -0,0 +1,214 @@
+"""Caché de resultados de las herramientas de IA y el pool del servidor MCP.
+
+Lo que se fija: un acierto no recomputa pero tampoco saltea nada — ni el scope,
+ni la visibilidad (la clave lleva el alcance del caller), ni el contador de
+simulaciones (la vista previa reusada cuenta como un intento más) — y una
+corrida del pipeline o una definición nueva lo invalidan.
+"""
+import asyncio
+import datetime
+import threading
+
+import pytest
+
+from app.ai import cache, mcp_adapter, prudencia, registry
+from app.ai.caller import AiCaller, ScopeDenegado
+from app.database import Base, Session, engine
+
+_ANA, _OTRO = 7, 9
+
+
+@pytest.fixture()
+def con_cache(monkeypatch):
+    import app.models  # noqa: F401
+
+    Base.metadata.create_all(engine)
+    monkeypatch.setenv("AI_RESULT_CACHE", "1")
+    registry._cargar()
+    cache.clear()
+    yield
+    cache.clear()
+    Session.remove()
+
+
+def _registrar(monkeypatch, nombre, handler, **kw):
+    monkeypatch.setitem(registry._REGISTRO, nombre, registry.Tool(
+        name=nombre, description="x", input_schema={"type": "object"},
+        handler=handler, familia="catalogo", **kw))
+
+
+def _contador(monkeypatch, nombre="t_cache", **kw):
+    llamadas = []
+
+    def handler(caller, **args):
+        llamadas.append((caller.user_id, args))
+        return {"n": len(llamadas), "filas": [1, 2, 3]}
+
+    _registrar(monkeypatch, nombre, handler, **kw)
+    return llamadas
+
+
+def test_un_acierto_no_recomputa_y_devuelve_una_copia(con_cache, monkeypatch):
+    llamadas = _contador(monkeypatch, cache=True)
+    ana = AiCaller(user_id=_ANA)
+
+    a = registry.call("t_cache", ana, {"x": 1})
+    a["filas"].append(99)                       # el caller muta lo que recibe
+    b = registry.call("t_cache", ana, {"x": 1, "y": None})   # None = no pedido
+    assert len(llamadas) == 1
+    assert b == {"n": 1, "filas": [1, 2, 3]}
+    assert cache.stats()["aciertos"] == 1
+
+    registry.call("t_cache", ana, {"x": 2})
+    assert len(llamadas) == 2
+
+
+def test_sin_cache_o_apagado_siempre_recomputa(con_cache, monkeypatch):
+    llamadas = _contador(monkeypatch)
+    ana = AiCaller(user_id=_ANA)
+    registry.call("t_cache", ana, {})
+    registry.call("t_cache", ana, {})
+    assert len(llamadas) == 2
+
+    otras = _contador(monkeypatch, "t_cache2", cache=True)
+    monkeypatch.setenv("AI_RESULT_CACHE", "0")
+    registry.call("t_cache2", ana, {})
+    registry.call("t_cache2", ana, {})
+    assert len(otras) == 2
+
+
+def test_la_visibilidad_separa_las_entradas(con_cache, monkeypatch):
+    llamadas = _contador(monkeypatch, cache=True)
+    registry.call("t_cache", AiCaller(user_id=_ANA), {})
+    registry.call("t_cache", AiCaller(user_id=_OTRO), {})
+    registry.call("t_cache", AiCaller(user_id=_OTRO, is_admin=True), {})
+    registry.call("t_cache", AiCaller(user_id=_ANA, is_admin=True), {})
+    assert [u for u, _ in llamadas] == [_ANA, _OTRO, _OTRO]
+
+
+def test_el_scope_se_exige_antes_del_cache(con_cache, monkeypatch):
+    _contador(monkeypatch, cache=True, scope="write")
+    with pytest.raises(ScopeDenegado):
+        registry.call("t_cache", AiCaller(user_id=_ANA), {})
+
+
+def test_una_corrida_o_una_estrategia_nueva_invalidan(con_cache, monkeypatch):
+    from app.database import get_session
+    from app.models import Strategy
+    from app.services import run_history_service as rh
+
+    llamadas = _contador(monkeypatch, cache=True)
+    ana = AiCaller(user_id=_ANA)
+    registry.call("t_cache", ana, {})
+
+    rid = rh.start_run("daily")
+    rh.finish_run(rid, "ok")
+    registry.call("t_cache", ana, {})
+    registry.call("t_cache", ana, {})
+    assert len(llamadas) == 2
+
+    s = get_session()
+    st = Strategy(name="cache-inv", owner_id=None, is_public=True)
+    s.add(st)
+    s.commit()
+    try:
+        registry.call("t_cache", ana, {})
+        assert len(llamadas) == 3
+    finally:
+        s.delete(st)
+        s.commit()
+
+
+def test_lru_acotado_por_entradas_y_por_tamano(con_cache, monkeypatch):
+    llamadas = _contador(monkeypatch, cache=True)
+    monkeypatch.setattr(cache, "MAX_ENTRADAS", 2)
+    ana = AiCaller(user_id=_ANA)
+    for x in (1, 2, 1, 3):          # 1 se reusa y queda reciente; sale 2
+        registry.call("t_cache", ana, {"x": x})
+    assert len(llamadas) == 3 and cache.stats()["entradas"] == 2
+    registry.call("t_cache", ana, {"x": 1})
+    assert len(llamadas) == 3
+    registry.call("t_cache", ana, {"x": 2})
+    assert len(llamadas) == 4
+
+    monkeypatch.setattr(cache, "MAX_BYTES_ENTRADA", 10)
+    registry.call("t_cache", ana, {"x": 9})
+    registry.call("t_cache", ana, {"x": 9})
+    assert len(llamadas) == 6       # demasiado grande: no se guardó
+
+
+def test_la_vista_previa_reusada_cuenta_como_intento(con_cache, monkeypatch):
+    from app.database import get_session
+    from app.models import Strategy
+    from app.services import backtest_service
+
+    computos = []
+
+    def falso(strategy_id, cfg):
+        computos.append(cfg)
+        return {"config": {"horizons": [5], "n_quantiles": 10},
+                "ic_points": [{"date": datetime.date(2024, 1, 1), "horizon": 5,
+                               "ic": 0.3, "spread": 1.0, "n_assets": 30}],
+                "quantile_stats": [], "date_from": datetime.date(2024, 1, 1),
+                "date_to": datetime.date(2024, 1, 1), "n_dates": 1,
+                "duration_seconds": 0.4}
+
+    monkeypatch.setattr(backtest_service, "compute_backtest", falso)
+    s = get_session()
+    st = Strategy(name="cache-prev", owner_id=None, is_public=True)
+    s.add(st)
+    s.commit()
+    prudencia.reiniciar_contador()
+    try:
+        ana = AiCaller(user_id=_ANA)
+        outs = [registry.call("run_backtest_preview", ana,
+                              {"strategy_id": st.id, "horizons": [5]})
+                for _ in range(4)]
+    finally:
+        prudencia.reiniciar_contador()
+        s.delete(st)
+        s.commit()
+
+    assert len(computos) == 1
+    assert [o["simulaciones_en_esta_sesion"] for o in outs] == [1, 2, 3, 4]
+    assert "aviso_sobreajuste" not in outs[2]
+    assert "aviso_sobreajuste" in outs[3]
+
+
+# ── Pool del servidor MCP ─────────────────────────────────────────────────────
+
+def test_las_livianas_no_esperan_a_las_pesadas(monkeypatch):
+    registry._cargar()
+    monkeypatch.setenv("MCP_TOOL_WORKERS", "2")
+    monkeypatch.setattr(mcp_adapter, "_pool", None)
+    monkeypatch.setattr(mcp_adapter, "_pesadas", None)
+    soltar = threading.Event()
+    hilos = set()
+
+    def pesada(caller):
+        hilos.add(threading.current_thread().name)
+        soltar.wait(10)
+        return "pesada"
+
+    _registrar(monkeypatch, "t_pesada", pesada, pesada=True)
+    _registrar(monkeypatch, "t_liviana", lambda caller: "liviana")
+    ana = AiCaller(user_id=_ANA)
+
+    async def escenario():
+        pesadas = [asyncio.create_task(
+            mcp_adapter.ejecutar_en_pool("t_pesada", ana)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        # Con 2 workers, las dos pesadas tienen UN cupo: la liviana entra igual.
+        liviana = await asyncio.wait_for(
+            mcp_adapter.ejecutar_en_pool("t_liviana", ana), 5)
+        soltar.set()
+        return liviana, await asyncio.gather(*pesadas)
+
+    try:
+        liviana, pesadas = asyncio.run(escenario())
+    finally:
+        soltar.set()
+        mcp_adapter._pool.shutdown(wait=True)
+    assert liviana == {"ok": True, "resultado": "liviana"}
+    assert [p["resultado"] for p in pesadas] == ["pesada", "pesada"]
+    assert all(h.startswith("mcp-tool") for h in hilos)
@@ -295,3 +295,29 @@ def test_una_cartera_sin_miembros_avisa_en_vez_de_romper(db):
 
     assert out["kpis"] is None
     assert "miembros" in out["aviso"]
+
+
+# ── Robustez: cuánto del resultado puede ser suerte ───────────────────────────
+
+def test_robustez_de_una_cartera_curada_se_calcula_sin_guardar(db):
+    from app.models import PortfolioRunRobustness
+
+    a1 = _activo("AAA", 1.0)
+    pid = _cartera("mia", owner=_ANA, publica=False, miembros=[(a1, 1.0)])
+
+    out = registry.call("get_portfolio_robustness", AiCaller(user_id=_ANA),
+                        {"portfolio_id": pid})
+
+    assert out["guardado"] is False
+    bandas = out["curves"]["cartera"]["bands"]
+    assert set(bandas) == {"cagr", "max_drawdown", "sharpe"}
+    assert out["curves"]["cartera"]["prob_positive_cagr"] == 1.0
+    assert out["trades"] is None
+    assert get_session().query(PortfolioRunRobustness).count() == 0
+
+
+def test_la_robustez_respeta_la_visibilidad(db):
+    pid = _cartera("de otro", owner=_OTRO, publica=False)
+    with pytest.raises(ValueError, match="no existe"):
+        registry.call("get_portfolio_robustness", AiCaller(user_id=_ANA),
+                      {"portfolio_id": pid})
@@ -88,6 +88,9 @@ _PROHIBIDO = (
     # corre con compute_backtest, que no escribe. `run_backtest` tampoco va:
     # computa Y guarda, que es justo lo que no queremos que pueda hacer.
     "save_backtest_run", "run_backtest(", "save_portfolio_run",
+    # Ídem el análisis de robustez guardado junto a la corrida: la IA lo lee
+    # o lo calcula al vuelo (robustness_service.for_run), no lo persiste.
+    "store_for_run",
     # SQL libre
     "text(", "execute(",
 )
@@ -0,0 +1,230 @@
+"""Lector unificado de la historia de un activo (asset_history_reader).
+
+Lo que fija: una query por tabla física para cualquier combinación de códigos,
+señales y estrategias (contada con un listener del engine), las mismas series
+que la lectura código por código de siempre, la alineación sobre la unión de
+fechas y el caché por (activo, tabla), que se invalida desde la escritura.
+
+Toca el sqlite stub (tablas anchas creadas y borradas en los fixtures).
+"""
+import datetime as dt
+
+import pytest
+import sqlalchemy as sa
+
+from app.database import Base, engine, get_session
+from app.models import indicator_store as _mod
+from app.models import signal_store
+from app.models.indicator_store import ensure_wide_ind_tables, get_ind_table
+from app.services import asset_history_reader as ahr
+from app.services.technical_service import upsert_ind_cadence
+
+_D = [dt.date(2026, 7, d) for d in (6, 7, 8, 9)]
+_IND_TABLES = ("ind_daily", "ind_weekly", "ind_monthly")
+
+
+@pytest.fixture()
+def wide_ind(monkeypatch):
+    Base.metadata.create_all(engine)
+    ensure_wide_ind_tables(bind=engine)
+    monkeypatch.setenv("USE_WIDE_IND_TABLES", "1")
+    ahr.clear_cache()
+    yield
+    with engine.begin() as conn:
+        for n in _IND_TABLES:
+            conn.execute(sa.text(f"DROP TABLE IF EXISTS {n}"))
+        conn.execute(sa.text("DELETE FROM run_history"))
+    for n in _IND_TABLES:
+        if n in _mod._meta.tables:
+            _mod._meta.remove(_mod._meta.tables[n])
+    ahr.clear_cache()
+    get_session().rollback()
+
+
+@pytest.fixture()
+def wide_sig(monkeypatch):
+    signal_store.ensure_wide_signal_tables(bind=engine)
+    for sid in (1, 2):
+        signal_store.ensure_sig_column(sid, bind=engine)
+    signal_store.ensure_strat_columns(1, bind=engine)
+    monkeypatch.setenv("USE_WIDE_SIGNAL_TABLES", "1")
+    ahr.clear_cache()
+    yield
+    with engine.begin() as conn:
+        for t in (signal_store.SIG_WIDE_TABLE, signal_store.STRAT_WIDE_TABLE):
+            conn.execute(sa.text(f"DELETE FROM {t}"))
+    ahr.clear_cache()
+
+
+@pytest.fixture()
+def selects():
+    """Texto de cada SELECT que pasa por el engine."""
+    seen = []
+
+    def _on(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            seen.append(statement)
+
+    sa.event.listen(engine, "before_cursor_execute", _on)
+    yield seen
+    sa.event.remove(engine, "before_cursor_execute", _on)
+
+
+def _data_selects(seen, table):
+    """SELECTs que leen valores de `table` (sin la reflexión del catálogo)."""
+    return [q for q in seen if f"FROM {table}" in q]
+
+
+def _seed_ind():
+    s = get_session()
+    upsert_ind_cadence(s, "daily", ["rsi_daily", "adx_daily", "trend_daily"], [
+        (1, _D[0], 50.0, None, "bullish"),
+        (1, _D[1], 55.0, 20.0, "bullish"),
+        (1, _D[2], None, 21.0, "bearish"),
+        (2, _D[2], 99.0, 99.0, "bullish"),      # otro activo: no se mezcla
+    ])
+    upsert_ind_cadence(s, "weekly", ["trend_weekly"], [
+        (1, _D[0], "neutral"), (1, _D[3], "bullish"),
+    ])
+    s.commit()
+
+
+def _old_reader(code, asset_id):
+    """La lectura código por código que reemplaza el lector."""
+    t = get_ind_table(code)
+    return [tuple(r) for r in get_session().execute(
+        sa.select(t.c.date, t.c.value)
+        .where(t.c.asset_id == asset_id, t.c.value.isnot(None))
+        .order_by(t.c.date)).all()]
+
+
+def test_una_query_por_tabla_y_mismas_series(wide_ind, selects):
+    _seed_ind()
+    codes = ("rsi_daily", "adx_daily", "trend_daily", "trend_weekly")
+    hist = ahr.read_asset_history(1, codes=codes)
+
+    # ind_daily e ind_weekly: una lectura cada una, no una por código
+    assert len(_data_selects(selects, "ind_daily")) == 1
+    assert len(_data_selects(selects, "ind_weekly")) == 1
+    for code in codes:
+        assert hist.indicator(code) == _old_reader(code, 1)
+    assert hist.last(ahr.ind_key("trend_weekly")) == "bullish"
+    assert hist.last(ahr.ind_key("rsi_daily")) == 55.0
+
+
+def test_columnas_alineadas_sobre_la_union_de_fechas(wide_ind):
+    _seed_ind()
+    hist = ahr.read_asset_history(1, codes=("adx_daily", "trend_weekly"))
+    assert hist.dates == _D
+    assert hist.values[ahr.ind_key("adx_daily")] == [None, 20.0, 21.0, None]
+    assert hist.values[ahr.ind_key("trend_weekly")] == [
+        "neutral", None, None, "bullish"]
+
+    rango = ahr.read_asset_history(1, codes=("adx_daily", "trend_weekly"),
+                                   date_from=_D[1], date_to=_D[2])
+    assert rango.dates == _D[1:3]
+    assert rango.indicator("adx_daily") == [(_D[1], 20.0), (_D[2], 21.0)]
+
+
+def test_codigo_sin_tabla_queda_en_missing(wide_ind):
+    _seed_ind()
+    hist = ahr.read_asset_history(1, codes=("rsi_daily", "codigo_que_no_existe"))
+    assert ahr.ind_key("codigo_que_no_existe") in hist.missing
+    assert hist.indicator("codigo_que_no_existe") == []
+    assert len(hist.indicator("rsi_daily")) == 2
+
+
+def test_senales_y_estrategias_anchas_en_una_query(wide_sig, selects):
+    s = get_session()
+    signal_store.wide_upsert(s, signal_store.SIG_WIDE_TABLE, ["sig_1", "sig_2"], [
+        (1, str(_D[0]), 10.0, None), (1, str(_D[1]), 20.0, -5.0),
+        (2, str(_D[1]), 77.0, 77.0),
+    ])
+    signal_store.wide_upsert(
+        s, signal_store.STRAT_WIDE_TABLE, ["strat_1_score", "strat_1_pct"],
+        [(1, str(_D[1]), 3.0, 40.0)])
+    s.commit()
+    selects.clear()
+
+    hist = ahr.read_asset_history(1, signals=(1, 2), strategies=(1,))
+    assert len(_data_selects(selects, signal_store.SIG_WIDE_TABLE)) == 1
+    assert len(_data_selects(selects, signal_store.STRAT_WIDE_TABLE)) == 1
+    assert hist.signal(1) == [(_D[0], 10.0), (_D[1], 20.0)]
+    assert hist.signal(2) == [(_D[1], -5.0)]
+    assert hist.strategy(1) == [(_D[1], 3.0)]
+    assert hist.series(ahr.pct_key(1)) == [(_D[1], 40.0)]
+
+    from app.services.signal_history_service import get_asset_signal_history
+    assert get_asset_signal_history(1, [1, 2], date_from=_D[1]) == {
+        1: [(_D[1], 20.0)], 2: [(_D[1], -5.0)]}
+
+
+# ── Caché ─────────────────────────────────────────────────────────────────────
+
+def test_cache_reusa_el_bloque_sin_consultar_la_base(wide_ind, selects):
+    _seed_ind()
+    h1 = ahr.read_asset_history(1, codes=("rsi_daily", "adx_daily"))
+    n = len(selects)
+    # un subconjunto y otro rango: del caché, sin ninguna query
+    h2 = ahr.read_asset_history(1, codes=("rsi_daily",), date_from=_D[1])
+    assert len(selects) == n
+    assert h2.indicator("rsi_daily") == h1.indicator("rsi_daily")[1:]
+
+    # una columna que el bloque no tiene: relee con la unión
+    h3 = ahr.read_asset_history(1, codes=("trend_daily",))
+    assert len(_data_selects(selects, "ind_daily")) == 2
+    assert h3.last(ahr.ind_key("trend_daily")) == "bearish"
+    ahr.read_asset_history(1, codes=("rsi_daily", "trend_daily"))
+    assert len(_data_selects(selects, "ind_daily")) == 2
+
+
+def _rsi(value):
+    s = get_session()
+    upsert_ind_cadence(s, "daily", ["rsi_daily"], [(1, _D[3], value)])
+    s.commit()
+
+
+def _last_rsi(asset_id=1):
+    return ahr.read_asset_history(asset_id, codes=("rsi_daily",)).last(
+        ahr.ind_key("rsi_daily"))
+
+
+def test_cache_se_invalida_desde_la_escritura(wide_ind):
+    import pandas as pd
+    from app.services import price_service
+    from app.services import run_history_service as rh
+
+    _seed_ind()
+    assert _last_rsi() == 55.0
+    assert _last_rsi(2) == 99.0
+    _rsi(60.0)                       # escritura sin corrida ni precios: caché
+    assert _last_rsi() == 55.0
+    s = get_session()
+    upsert_ind_cadence(s, "daily", ["rsi_daily"], [(2, _D[2], 98.0)])
+    s.commit()
+
+    # precios nuevos del activo: se descarta ESE activo, al commitear
+    bar = pd.DataFrame([{"date": _D[3], "open": 1.0, "high": 1.0, "low": 1.0,
+                         "close": 1.0, "volume": 0}])
+    price_service._upsert_prices(1, bar, s, prev_last=_D[2])
+    assert _last_rsi() == 55.0       # todavía sin commitear
+    s.rollback()
+    assert _last_rsi() == 55.0       # un rollback no invalida
+    price_service._upsert_prices(1, bar, s, prev_last=_D[2])
+    s.commit()
+    assert _last_rsi() == 60.0
+    assert _last_rsi(2) == 99.0      # el otro activo sigue cacheado
+
+    # un recálculo sobre fechas existentes llega con una corrida del pipeline
+    _rsi(61.0)
+    assert _last_rsi() == 60.0
+    rh.finish_run(rh.start_run("indicators", "test"), "ok")
+    assert _last_rsi() == 61.0
+
+
+def test_cache_vence_por_ttl(wide_ind, monkeypatch):
+    _seed_ind()
+    assert _last_rsi() == 55.0
+    _rsi(60.0)
+    monkeypatch.setattr(ahr, "TTL_SECONDS", 0)
+    assert _last_rsi() == 60.0
@@ -13,7 +13,7 @@ import sqlalchemy as sa
 from app.database import Base, engine, get_session
 
 _TABLES = ("backtest_ic_point", "backtest_quantile_stat", "backtest_run",
-           "strategy", "prices", "assets")
+           "backtest_forward_panel", "strategy", "prices", "assets")
 
 
 @pytest.fixture()
@@ -149,8 +149,8 @@ def test_piso_de_precios_recorta_la_cabeza_sin_cambiar_los_retornos(bt_db):
     con_piso = bs.normalize_config({**base,
                                     "date_from": puntuadas[0].isoformat()})
 
-    completo = bs._retornos_forward(s, score_rows, sin_piso, None)
-    recortado = bs._retornos_forward(s, score_rows, con_piso, None)
+    completo, _ = bs._retornos_forward(s, score_rows, sin_piso, None)
+    recortado, _ = bs._retornos_forward(s, score_rows, con_piso, None)
 
     # 1. La cabeza se recorta de verdad (40 ruedas menos por activo).
     assert dates[0] in completo[1][0]
@@ -177,3 +177,76 @@ def test_normalize_config_valida():
         normalize_config({"horizons": []})
     with pytest.raises(ValueError):
         normalize_config({"n_quantiles": 1})
+
+
+# ── Panel persistido de retornos forward ─────────────────────────────────────
+
+@pytest.mark.parametrize("lag", [0, 1, 3])
+def test_columnas_forward_identicas_al_motor(lag):
+    """forward_columns es la forma vectorizada de
+    backtest_engine.forward_returns_for_series: tiene que dar los MISMOS
+    floats (None ↔ NaN), incluido el close de entrada no positivo."""
+    import numpy as np
+    from app.services import backtest_engine as eng
+    from app.services.forward_return_store import ForwardColumns, forward_columns
+
+    rng = np.random.default_rng(lag)
+    closes = list(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 80))))
+    closes[10] = 0.0
+    closes[11] = -1.0
+    horizons = [1, 5, 20, 90]
+    ref = eng.forward_returns_for_series(closes, horizons, lag)
+    got = ForwardColumns(forward_columns(np.array(closes), horizons, lag))
+    assert len(got) == len(ref)
+    assert [got[i] for i in range(len(ref))] == ref
+
+
+def test_panel_se_reusa_y_refresca_solo_lo_que_cambio(bt_db):
+    from app.models import BacktestForwardPanel, Price
+    from app.services import backtest_service as bs
+
+    dates = _trading_dates(30)
+    _seed(dates)
+    s = get_session()
+    score_rows = [(d, aid, 1.0) for d in dates for aid in (1, 2)]
+    cfg = bs.normalize_config({"horizons": [1, 5], "n_quantiles": 2,
+                               "min_assets": 2})
+
+    primero, inf1 = bs._retornos_forward(s, score_rows, cfg, None)
+    assert (inf1["reused"], inf1["refreshed"]) == (0, 2)
+    assert s.query(BacktestForwardPanel).count() == 4   # 2 activos × 2 h
+
+    segundo, inf2 = bs._retornos_forward(s, score_rows, cfg, None)
+    assert (inf2["reused"], inf2["refreshed"]) == (2, 0)
+    for aid in (1, 2):
+        pos1, fwd1 = primero[aid]
+        pos2, fwd2 = segundo[aid]
+        assert pos1 == pos2
+        assert [fwd1[i] for i in range(len(fwd1))] == [fwd2[i] for i in range(len(fwd2))]
+
+    # Corrección de un precio viejo del activo 2: solo él se rehace, y el
+    # retorno que lo usa refleja el precio nuevo.
+    p = s.get(Price, (2, dates[3]))
+    p.close = p.close * 2
+    s.commit()
+    tercero, inf3 = bs._retornos_forward(s, score_rows, cfg, None)
+    assert (inf3["reused"], inf3["refreshed"]) == (1, 1)
+    pos, fwd = tercero[2]
+    assert fwd[pos[dates[1]]][1] == pytest.approx(2 * 0.99 - 1, rel=1e-9)
+
+    # Un horizonte que el panel no tiene también obliga a rehacer.
+    cfg20 = bs.normalize_config({**cfg, "horizons": [1, 20]})
+    _, inf4 = bs._retornos_forward(s, score_rows, cfg20, None)
+    assert inf4["refreshed"] == 2
+
+
+def test_backtest_informa_el_panel(bt_db):
+    from app.services.backtest_service import compute_backtest
+
+    _seed(_trading_dates(10))
+    primero = compute_backtest(1, _CFG)
+    segundo = compute_backtest(1, _CFG)
+    assert primero["forward_panel"]["refreshed"] == 3   # ARRASTRADO tiene 1 precio
+    assert segundo["forward_panel"]["reused"] == 3
+    assert segundo["forward_panel"]["seconds_saved"] >= 0
+    assert primero["ic_points"] == segundo["ic_points"]
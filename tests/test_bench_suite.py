@@ -0,0 +1,115 @@
+"""
+Partes puras del banco de pruebas offline (scripts/bench_suite.py): el
+universo sintético, la selección de casos con sus requisitos y la comparación
+contra la línea de base. La corrida completa toca la base y no se prueba acá.
+"""
+import pandas as pd
+
+from scripts import bench_suite as bs
+
+
+# ── Universo sintético ────────────────────────────────────────────────────────
+
+def test_calendario_sin_fines_de_semana_ni_feriados_fijos():
+    cal = bs.trading_calendar(3)
+    assert (cal.dayofweek < 5).all()
+    assert not ((cal.month == 12) & (cal.day == 25)).any()
+    assert not ((cal.month == 1) & (cal.day == 1)).any()
+    assert cal[-1].date() == bs.DEFAULT_END
+
+
+def test_universo_determinista_y_consistente():
+    a = bs.synthetic_universe(40, 4, seed=3)
+    b = bs.synthetic_universe(40, 4, seed=3)
+    assert [u["ticker"] for u in a] == [u["ticker"] for u in b]
+    for ua, ub in zip(a, b):
+        pd.testing.assert_frame_equal(ua["frame"], ub["frame"])
+    assert not bs.synthetic_universe(40, 4, seed=4)[1]["frame"].equals(a[1]["frame"])
+
+    for u in a:
+        f = u["frame"]
+        assert f.index.is_monotonic_increasing and f.index.is_unique
+        assert (f["high"] >= f[["open", "close"]].max(axis=1)).all()
+        assert (f["low"] <= f[["open", "close"]].min(axis=1)).all()
+        assert (f["low"] > 0).all() and (f["volume"] > 0).all()
+
+
+def test_universo_trae_listados_tardios_huecos_y_splits():
+    uni = bs.synthetic_universe(60, 5, seed=7)
+    cal = bs.trading_calendar(5)
+    bench = uni[0]
+    assert bench["ticker"] == bs.BENCHMARK_TICKER
+    assert len(bench["frame"]) == len(cal)        # historia entera y limpia
+    assert bench["gap"] is None and bench["split"] is None
+
+    assert any(u["listed"] > cal[0].date() for u in uni)
+    gapped = [u for u in uni if u["gap"]]
+    assert gapped
+    for u in gapped:
+        g0, g1 = u["gap"]
+        dates = u["frame"].index.date
+        assert not ((dates >= g0) & (dates <= g1)).any()
+
+    split = [u for u in uni if u["split"]]
+    assert split
+    for u in split:
+        d, ratio = u["split"]
+        f = u["frame"]
+        prev = f[f.index.date < d]["close"].iloc[-1]
+        nxt = f[f.index.date >= d]["close"].iloc[0]
+        assert prev / nxt > ratio * 0.7           # salto sin ajustar
+
+
+# ── Selección de casos ────────────────────────────────────────────────────────
+
+_CASES = [
+    ("ind_precios", None, ()),
+    ("ind_backfill:rsi_daily", None, ()),
+    ("ind_backfill:adx_daily", None, ()),
+    ("signal_range", None, ("ind_backfill",)),
+    ("backtest:rules", None, ("signal_range",)),
+    ("synthetic", None, ()),
+]
+
+
+def test_only_arrastra_los_requisitos_sin_cronometrar():
+    sel = bs.select_cases(_CASES, ["backtest"])
+    assert [(n, t) for n, _, t in sel] == [
+        ("ind_backfill:rsi_daily", False), ("ind_backfill:adx_daily", False),
+        ("signal_range", False), ("backtest:rules", True)]
+    assert [n for n, _, t in bs.select_cases(_CASES, None) if t] == [
+        n for n, _, _ in _CASES]
+    assert [n for n, _, _ in bs.select_cases(_CASES, ["ind_backfill:adx_daily"])
+            ] == ["ind_backfill:adx_daily"]
+
+
+# ── Comparación contra la base ────────────────────────────────────────────────
+
+def _res(**secs):
+    return {k: {"seconds": v} for k, v in secs.items()}
+
+
+def test_regresion_necesita_tolerancia_y_delta_minimo():
+    base = _res(a=1.0, b=0.010, c=2.0, d=1.0)
+    now = _res(a=1.30, b=0.030, c=1.0, e=0.5)
+    rows = {r["case"]: r for r in bs.compare(now, base, 0.25, 0.05)}
+    assert rows["a"]["status"] == "regresión" and rows["a"]["ratio"] == 1.3
+    assert rows["b"]["status"] == "igual"         # ×3, pero 20 ms es ruido
+    assert rows["c"]["status"] == "mejora"
+    assert rows["d"]["status"] == "sin correr"
+    assert rows["e"]["status"] == "nuevo"
+    assert bs.compare(_res(a=1.2), base, 0.25, 0.05)[0]["status"] == "igual"
+
+
+def test_base_de_otro_universo_o_motor_no_es_comparable():
+    run = {"version": bs.FORMAT_VERSION,
+           "params": {"assets": 60, "years": 6, "seed": 7},
+           "env": {"engine": "sqlite", "wide_ind": True, "python": "3.11.7"}}
+    same = {**run, "env": {**run["env"], "python": "3.12.1"}}
+    assert bs.incompatibilities(run, same) == []
+    other = {**run, "params": {**run["params"], "assets": 200},
+             "env": {**run["env"], "engine": "postgresql"}}
+    problems = bs.incompatibilities(run, other)
+    assert len(problems) == 2
+    assert any("assets" in p for p in problems)
+    assert any("engine" in p for p in problems)
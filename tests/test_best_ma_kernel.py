@@ -0,0 +1,115 @@
+"""Paridad del kernel matricial de best_ma contra el loop por período.
+
+_ref_find_best_ma es copia LITERAL de technical_service._find_best_ma antes
+del kernel: la versión lenta y obviamente correcta queda como oráculo. El
+kernel tiene que elegir el MISMO período — empates incluidos — porque
+best_sma_* alimenta dist_optimal_sma_*, que está en el set de checksum de
+muestra completa (un cambio de período reescribiría toda su historia).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from app.services import best_ma_kernel
+from app.services.best_ma_kernel import MA_PERIODS, best_ma, best_ma_batch
+
+_MA_PERIODS = MA_PERIODS
+
+
+def _ref_find_best_ma(close: pd.Series, high: pd.Series, low: pd.Series, kind: str = "sma") -> int | None:
+    best_period = None
+    best_score  = -1.0
+    prev_c = close.shift(1)
+    for period in _MA_PERIODS:
+        if len(close) < period * 2:
+            continue
+        ma = close.rolling(period).mean() if kind == "sma" \
+             else close.ewm(span=period, adjust=False).mean()
+        valid         = ma.notna()
+        touched       = valid & (low <= ma) & (ma <= high)
+        total_touches = int(touched.sum())
+        if total_touches < 5:
+            continue
+        bounce       = ((prev_c >= ma) & (close >= ma)) | ((prev_c <= ma) & (close <= ma))
+        bounces_held = int((touched & bounce).sum())
+        score = bounces_held / total_touches
+        if score > best_score:
+            best_score  = score
+            best_period = period
+    return best_period
+
+
+def _ohlc(n: int, seed: int, flat: bool = False, scale: float = 100.0):
+    rng = np.random.default_rng(seed)
+    close = scale * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    if flat:
+        # Tramos planos largos (activo ilíquido): high == low == close
+        for start in range(0, n, 97):
+            close[start:start + 40] = close[start]
+    spread = np.abs(rng.normal(0, 0.01, n)) * close
+    high, low = close + spread, close - spread
+    if flat:
+        for start in range(0, n, 97):
+            high[start:start + 40] = low[start:start + 40] = close[start]
+    return pd.Series(close), pd.Series(high), pd.Series(low)
+
+
+@pytest.mark.parametrize("kind", ["sma", "ema"])
+@pytest.mark.parametrize("n,seed,flat", [
+    (30, 1, False), (300, 2, False), (1200, 3, False), (5000, 4, False),
+    (600, 5, True), (3000, 6, True),
+])
+def test_mismo_periodo_que_el_loop(kind, n, seed, flat):
+    c, h, lo = _ohlc(n, seed, flat)
+    assert best_ma(c, h, lo, kind) == _ref_find_best_ma(c, h, lo, kind)
+
+
+@pytest.mark.parametrize("kind", ["sma", "ema"])
+def test_lote_de_largos_distintos_igual_que_uno_por_uno(kind):
+    series = [_ohlc(n, seed, flat=seed % 3 == 0)
+              for seed, n in enumerate([25, 80, 470, 1300, 2600, 9, 0, 700])]
+    got = best_ma_batch(series, kind)
+    assert got == [_ref_find_best_ma(c, h, lo, kind) for c, h, lo in series]
+
+
+def test_lote_partido_en_sub_lotes(monkeypatch):
+    """Con un tope de celdas chico el lote se parte; el resultado no cambia."""
+    series = [_ohlc(400 + 50 * i, 10 + i) for i in range(6)]
+    ref = best_ma_batch(series, "ema")
+    monkeypatch.setattr(best_ma_kernel, "_MAX_CELLS", 500 * 16 * 2)
+    assert best_ma_batch(series, "ema") == ref
+
+
+def test_empate_gana_el_periodo_mas_corto():
+    """Serie constante: toda MA es el mismo valor, todos los períodos con
+    historia empatan en score 1.0 → el primero de la lista."""
+    c = pd.Series([10.1] * 60)
+    assert _ref_find_best_ma(c, c, c, "sma") == 5
+    assert best_ma(c, c, c, "sma") == 5
+    assert best_ma(c, c, c, "ema") == _ref_find_best_ma(c, c, c, "ema")
+
+
+def test_close_con_huecos_va_por_el_fallback():
+    c, h, lo = _ohlc(800, 7)
+    c = c.copy()
+    c.iloc[[100, 101, 400]] = np.nan
+    for kind in ("sma", "ema"):
+        assert best_ma(c, h, lo, kind) == _ref_find_best_ma(c, h, lo, kind)
+
+
+def test_sin_historia_suficiente_da_none():
+    c, h, lo = _ohlc(9, 8)
+    assert best_ma(c, h, lo) is None
+    assert best_ma_batch([]) == []
+
+
+@settings(max_examples=60, deadline=None)
+@given(n=st.integers(min_value=10, max_value=700),
+       seed=st.integers(min_value=0, max_value=10_000),
+       flat=st.booleans(),
+       scale=st.sampled_from([0.01, 1.0, 100.0, 25_000.0]),
+       kind=st.sampled_from(["sma", "ema"]))
+def test_propiedad_paridad(n, seed, flat, scale, kind):
+    c, h, lo = _ohlc(n, seed, flat, scale)
+    assert best_ma(c, h, lo, kind) == _ref_find_best_ma(c, h, lo, kind)
@@ -104,3 +104,17 @@ def test_ensure_ind_table_crea_num_y_str_y_es_idempotente():
     # índice por date (migración 0062)
     assert any(ix["column_names"] == ["date"]
                for ix in insp.get_indexes("ind_rsi_daily"))
+
+
+def test_particion_anual_0102_renderiza_con_la_variable(monkeypatch, capsys):
+    """La 0102 es opt-in (WIDE_TABLE_PARTITIONS): con la variable, el bloque DO
+    tiene que renderizar en PG y seguir siendo no-op en MySQL."""
+    monkeypatch.setenv("WIDE_TABLE_PARTITIONS", "1")
+    command.upgrade(_cfg("postgresql://"), "0101:0102", sql=True)
+    sql = capsys.readouterr().out
+    assert "PARTITION BY RANGE (date)" in sql
+    for t in ("ind_daily", "signal_values_wide", "strategy_results_wide"):
+        assert f"CREATE TABLE {t}_ydefault PARTITION OF {t}__part DEFAULT" in sql
+
+    command.upgrade(_cfg("mysql://"), "0101:0102", sql=True)
+    assert "PARTITION" not in capsys.readouterr().out
@@ -0,0 +1,106 @@
+"""Búsqueda sobre el catálogo (catalog_search) contra el stub sqlite.
+
+Lo que se fija: el índice encuentra entidades de referencia por sus aliases
+y sin acentos; las señales y estrategias privadas de otro no aparecen; un
+cambio ORM invalida el índice al commitearse (no al flushear); y
+reference_service resuelve "Tecnologia" contra "Tecnología" en vez de crear
+un duplicado.
+"""
+import pytest
+import sqlalchemy as sa
+
+from app.ai import registry
+from app.ai.caller import AiCaller
+from app.database import Base, Session, engine, get_session
+from app.services import catalog_search as cs
+
+_ANA, _OTRO = 7, 9
+_NOMBRES = {"a": "Tecnología", "b": "Energía", "c": "Salud"}
+
+
+@pytest.fixture()
+def db():
+    import app.models  # noqa: F401
+    from app.models import CatalogAlias, Sector, Strategy
+
+    Session.remove()
+    Base.metadata.create_all(engine)
+    _limpiar()
+    s = get_session()
+    tec = Sector(name="Tecnología")
+    s.add_all([tec, Sector(name="Energía"),
+               Strategy(name="Momentum pública", owner_id=1, is_public=True),
+               Strategy(name="Momentum de Ana", owner_id=_ANA, is_public=False),
+               Strategy(name="Momentum de otro", owner_id=_OTRO,
+                        is_public=False)])
+    s.flush()
+    s.add(CatalogAlias(entity_type="sector", source_value="Information Tech",
+                       entity_id=tec.id))
+    s.commit()
+    cs.invalidate()
+    yield s
+    _limpiar()
+    Session.remove()
+    cs.invalidate()
+
+
+def _limpiar():
+    with engine.begin() as conn:
+        conn.execute(sa.text("DELETE FROM strategy_component"))
+        conn.execute(sa.text("DELETE FROM strategy"))
+        conn.execute(sa.text("DELETE FROM catalog_aliases WHERE entity_type = "
+                             "'sector' AND entity_id IN (SELECT id FROM "
+                             "sectors WHERE name IN (:a, :b, :c))"),
+                     _NOMBRES)
+        conn.execute(sa.text("DELETE FROM sectors WHERE name IN (:a, :b, :c)"),
+                     _NOMBRES)
+
+
+def test_busca_sin_acentos_y_por_alias(db):
+    assert [e.name for e in cs.search("tecnologia", kinds=("sector",))] \
+        == ["Tecnología"]
+    assert [e.name for e in cs.search("information te", kinds=("sector",))] == ["Tecnología"]
+    assert cs.resolve_entity("sector", "TECNOLOGIA") is not None
+    assert cs.resolve_entity("sector", "information tech") \
+        == cs.resolve_entity("sector", "Tecnología")
+    assert cs.resolve_entity("sector", "Salud") is None
+
+
+def test_respeta_la_visibilidad(db):
+    nombres = {e.name for e in cs.search("momentum", user_id=_ANA,
+                                         kinds=("strategy",))}
+    assert nombres == {"Momentum pública", "Momentum de Ana"}
+    assert len(cs.search("momentum", is_admin=True, kinds=("strategy",))) == 3
+    out = registry.call("search_catalog", AiCaller(user_id=_ANA),
+                        {"query": "momentum", "kinds": ["strategy"]})
+    assert "Momentum de otro" not in {r["name"] for r in out["resultados"]}
+
+
+def test_un_cambio_orm_invalida_el_indice_al_commitear(db):
+    from app.models import Sector
+    assert cs.search("salud", kinds=("sector",)) == []
+    db.add(Sector(name="Salud"))
+    db.flush()
+    gen = cs._generation
+    # flusheado pero sin commitear: un armado ahora leería lo viejo
+    assert cs._generation == gen and cs._built is not None
+    db.rollback()
+    assert cs._generation == gen
+    with db.begin_nested():                 # soltar el savepoint no commitea
+        db.add(Sector(name="Salud"))
+    assert cs._generation == gen
+    db.commit()
+    assert cs._generation == gen + 1
+    assert [e.name for e in cs.search("salud", kinds=("sector",))] == ["Salud"]
+
+
+def test_get_or_create_resuelve_variantes_sin_acento(db):
+    from app.services.reference_service import get_or_create_sector
+    obj, creado = get_or_create_sector("Tecnologia")
+    assert not creado and obj.name == "Tecnología"
+    with engine.connect() as conn:
+        assert conn.execute(sa.text(
+            "SELECT COUNT(*) FROM sectors WHERE name LIKE 'Tecnolog%'")).scalar() == 1
+    # la variante queda como alias: la próxima vez la resuelve el alias
+    obj, creado = get_or_create_sector("Energia")
+    assert not creado and obj.name == "Energía"
@@ -0,0 +1,144 @@
+"""Zonas de los overlays del gráfico persistidas por el pipeline.
+
+Lo que se fija: lo que deja backfill_indicator en chart_zones es EXACTAMENTE
+lo que el gráfico calculaba (get_*_for_chart sobre get_prices_df), el overlay
+lo lee sin tocar precios, un delta sin precios nuevos no reescribe nada, y un
+precio nuevo o una config distinta hacen que el overlay recalcule y persista.
+"""
+import math
+from datetime import date, timedelta
+
+import pytest
+import sqlalchemy as sa
+
+import app.services.technical_service as ts
+from app.services import chart_zone_store as czs
+
+_A1, _A2 = 99951, 99952
+_CODES = ("trend_daily", "trend_weekly", "trend_monthly", "volatility_daily",
+          "volatility_weekly", "volatility_monthly", "drawdown_pct_daily")
+
+
+def _dates(n, start=date(2022, 1, 3)):
+    out, d = [], start
+    while len(out) < n:
+        if d.weekday() < 5:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+
+@pytest.fixture()
+def zonas_db():
+    import app.models  # noqa: F401
+    from app.database import Base, Session, engine, get_session
+    from app.models import Asset, ChartZone, Price
+    from app.models.indicator_store import ensure_ind_table
+
+    Base.metadata.create_all(engine)
+    for code in _CODES:
+        ensure_ind_table(code, "num" if code == "drawdown_pct_daily" else "str")
+    s = get_session()
+    ids = [_A1, _A2]
+
+    def limpiar():
+        s.rollback()
+        s.query(ChartZone).filter(ChartZone.asset_id.in_(ids)).delete(
+            synchronize_session=False)
+        s.query(Price).filter(Price.asset_id.in_(ids)).delete(
+            synchronize_session=False)
+        for code in _CODES:
+            s.execute(sa.text(f"DELETE FROM ind_{code} WHERE asset_id IN "
+                              f"({_A1}, {_A2})"))
+            s.execute(sa.text("DELETE FROM ind_asset_meta WHERE code = :c"),
+                      {"c": code})
+        s.query(Asset).filter(Asset.id.in_(ids)).delete(synchronize_session=False)
+        s.commit()
+
+    limpiar()
+    for k, aid in enumerate(ids):
+        s.add(Asset(id=aid, ticker=f"CZ{aid}", name=f"CZ{aid}", price_source_id=1))
+        for i, d in enumerate(_dates(700)):
+            c = 100 + 25 * math.sin(i / (35 + 10 * k)) + 0.04 * i
+            s.add(Price(asset_id=aid, date=d, open=c, close=c,
+                        high=c * 1.012, low=c * 0.988))
+    s.commit()
+    yield s, ids
+    limpiar()
+    Session.remove()
+
+
+def _pipeline(s, ids):
+    caches = ts._load_prices_for_assets(s, ids)
+    for code in _CODES:
+        ts.backfill_indicator(code, asset_ids=ids, price_cache=caches)
+
+
+def test_el_pipeline_persiste_lo_que_el_grafico_calculaba(zonas_db, monkeypatch):
+    from app.models import ChartZone
+    from app.services.price_service import get_prices_df
+
+    s, ids = zonas_db
+    _pipeline(s, ids)
+    assert s.query(ChartZone).filter(ChartZone.asset_id.in_(ids)).count() == 14
+
+    esperado = {aid: get_prices_df(aid) for aid in ids}
+    monkeypatch.setattr("app.services.price_service.get_prices_df",
+                        lambda aid: pytest.fail("el overlay releyó precios"))
+    for aid in ids:
+        df = esperado[aid]
+        regimen = czs.regime_zones(aid)
+        assert regimen == ts.get_regime_zones_for_chart(df)
+        assert all(regimen[tf] for tf in ("D", "W"))
+        assert czs.vol_zones(aid) == ts.get_vol_zones_for_chart(df)
+        eventos = czs.dd_events(aid)
+        assert eventos and eventos == ts.get_dd_events_for_chart(df)
+
+
+def test_un_delta_sin_precios_nuevos_no_reescribe(zonas_db, monkeypatch):
+    s, ids = zonas_db
+    _pipeline(s, ids)
+    escrituras = []
+    real = czs._save
+    monkeypatch.setattr(czs, "_save",
+                        lambda s_, rows: escrituras.append(len(rows)) or real(s_, rows))
+    _pipeline(s, ids)
+    assert escrituras == []
+
+
+def test_precio_nuevo_o_config_distinta_recalculan(zonas_db):
+    from app.models import ChartZone, DrawdownConfig, Price
+    from app.services.price_service import get_prices_df
+
+    s, ids = zonas_db
+    _pipeline(s, ids)
+    aid = ids[0]
+
+    # Un desplome nuevo: la fila quedó vieja y el overlay recalcula.
+    s.add(Price(asset_id=aid, date=date(2030, 1, 2), open=40, close=40,
+                high=41, low=39))
+    s.commit()
+    eventos = czs.dd_events(aid)
+    assert eventos == ts.get_dd_events_for_chart(get_prices_df(aid))
+    assert eventos[-1]["end"] is None
+    fila = s.get(ChartZone, (aid, czs.DD_CODE))
+    s.refresh(fila)
+    assert fila.last_date == date(2030, 1, 2)
+
+    cfg = s.get(DrawdownConfig, 1)
+    previo = cfg.min_depth_pct
+    try:
+        cfg.min_depth_pct = 50.0
+        s.commit()
+        solo_el_ultimo = czs.dd_events(aid)
+        assert solo_el_ultimo == eventos[-1:]
+        s.refresh(fila)
+        assert fila.config_checksum == czs.config_checksum("dd", cfg)
+    finally:
+        cfg.min_depth_pct = previo
+        s.commit()
+
+
+def test_sin_precios_no_hay_overlay(zonas_db):
+    assert czs.regime_zones(123456789) is None
+    assert czs.dd_events(123456789) is None
@@ -0,0 +1,171 @@
+"""Matriz de correlación por bloques (correlation_service).
+
+El kernel tiene que dar lo mismo que `DataFrame.corr(min_periods=...)` —
+pairwise-complete, par por par — sin importar el tamaño de bloque, y sobre un
+calendario sin huecos lo mismo que `scatter_service.returns_correlation`, que
+es la cifra que ya mostraban las pantallas. La parte con BD fija el caché: se
+reusa mientras la marca de agua de la ventana no cambie.
+"""
+import math
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from app.database import Base, engine, get_session
+from app.services import correlation_service as cs
+from app.services.scatter_service import returns_correlation
+
+
+def _panel(seed=7, t=120, n=9, hole_frac=0.15):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0, 0.01, (t, 1))
+    rets = 0.6 * base + rng.normal(0, 0.01, (t, n)) * rng.uniform(0.5, 2, n)
+    rets[rng.random((t, n)) < hole_frac] = np.nan
+    rets[:100, 3] = np.nan                  # pocas observaciones → NaN
+    rets[:, 5] = np.where(np.isnan(rets[:, 5]), np.nan, 0.002)   # constante
+    return rets
+
+
+@pytest.mark.parametrize("max_cells", [1, 20, 10_000])
+def test_bloques_dan_lo_mismo_que_pandas_pairwise(max_cells):
+    rets = _panel()
+    esperado = pd.DataFrame(rets).corr(min_periods=25).to_numpy()
+    got = np.full_like(esperado, np.nan)
+    for s0, block in cs.correlation_blocks(rets, min_periods=25, max_cells=max_cells):
+        got[s0:s0 + len(block)] = block
+    off = ~np.eye(len(esperado), dtype=bool)
+    assert np.array_equal(np.isnan(got[off]), np.isnan(esperado[off]))
+    ok = off & np.isfinite(esperado)
+    assert np.allclose(got[ok], esperado[ok], atol=1e-10)
+    assert np.isnan(got[:, 5]).all() and np.isnan(got[3, :]).all()
+
+
+def test_mismo_calendario_coincide_con_returns_correlation():
+    rng = np.random.default_rng(3)
+    a = 100 * np.cumprod(1 + rng.normal(0, 0.02, 60))
+    b = 50 * np.cumprod(1 + rng.normal(0, 0.02, 60))
+    rets = pd.DataFrame({1: a[1:] / a[:-1] - 1, 2: b[1:] / b[:-1] - 1})
+    m = cs.compute_matrix(rets, min_periods=3)
+    esperado = returns_correlation(a.tolist(), b.tolist())
+    assert math.isclose(float(m.corr[0, 1]), esperado, abs_tol=1e-6)
+    assert m.corr[0, 0] == 1.0
+
+
+def test_shrinkage_va_hacia_la_media_sin_cambiar_el_orden():
+    rets = pd.DataFrame(_panel(hole_frac=0.0)).drop(columns=[3, 5])
+    m = cs.compute_matrix(rets, min_periods=10)
+    crudo = m.row(0)
+    encogido = m.row(0, shrinkage=0.5)
+    media = m.mean_offdiag()
+    assert encogido[0] == 1.0
+    assert np.allclose(encogido[1:], 0.5 * crudo[1:] + 0.5 * media)
+    assert list(np.argsort(crudo[1:])) == list(np.argsort(encogido[1:]))
+    assert [a for a, _ in cs.top_neighbours(m, k=3)[0]] == \
+        [a for a, _ in cs.top_neighbours(m, k=3, shrinkage=0.5)[0]]
+
+
+def test_fila_suelta_igual_a_la_matriz():
+    rets = _panel()
+    m = cs.compute_matrix(pd.DataFrame(rets), min_periods=25)
+    u = cs.UniverseReturns(list(range(rets.shape[1])), rets)
+    assert math.isclose(u.mean_offdiag(25), m.mean_offdiag(), abs_tol=1e-6)
+    for aid in (0, 3, 5, 8):
+        for lam in (0.0, 0.3):
+            got, want = u.row(aid, 25, lam), m.row(aid, lam)
+            assert np.array_equal(np.isnan(got), np.isnan(want))
+            ok = np.isfinite(want)
+            assert np.allclose(got[ok], want[ok], atol=1e-6)
+
+
+# ── Con BD ────────────────────────────────────────────────────────────────────
+
+_TABLES = ("prices", "assets", "sectors")
+
+
+@pytest.fixture()
+def corr_db():
+    import app.models  # noqa: F401 — registra los modelos en Base.metadata
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for t in _TABLES:
+            conn.execute(sa.text(f"DELETE FROM {t}"))
+    cs.clear_cache()
+    yield
+    with engine.begin() as conn:
+        for t in _TABLES:
+            conn.execute(sa.text(f"DELETE FROM {t}"))
+    cs.clear_cache()
+    get_session().rollback()
+
+
+def _seed(n_days=40):
+    """Sector 1: A, B (B = A con ruido chico) y C (al revés de A); D en otro
+    sector, idéntico a A (no tiene que aparecer con scope=sector)."""
+    from app.models import Asset, Price, Sector
+    s = get_session()
+    s.add_all([Sector(id=1, name="S1"), Sector(id=2, name="S2")])
+    for aid, tk, sec in ((1, "A", 1), (2, "B", 1), (3, "C", 1), (4, "D", 2)):
+        s.add(Asset(id=aid, ticker=tk, name=tk, sector_id=sec, price_source_id=1))
+    s.flush()
+    rng = np.random.default_rng(11)
+    ra = rng.normal(0, 0.02, n_days)
+    series = {1: ra, 2: ra + rng.normal(0, 0.004, n_days), 3: -ra, 4: ra}
+    d0 = date(2025, 1, 1)
+    for aid, r in series.items():
+        p = 100.0
+        for i, x in enumerate(r):
+            s.add(Price(asset_id=aid, date=d0 + timedelta(days=i), close=p))
+            p *= 1 + x
+    s.commit()
+    return d0, d0 + timedelta(days=n_days - 1)
+
+
+def test_vecinos_por_sector_en_orden(corr_db):
+    d0, d1 = _seed()
+    rows = cs.neighbours(1, "sector", d0, d1, k=5)
+    assert [r["ticker"] for r in rows] == ["B", "C"]
+    assert rows[0]["corr"] > 0.9 and math.isclose(rows[1]["corr"], -1.0, abs_tol=1e-5)
+    todos = cs.neighbours(1, "all", d0, d1, k=1)
+    assert [r["ticker"] for r in todos] == ["D"]
+
+
+def test_vecinos_sin_matriz_completa(corr_db, monkeypatch):
+    d0, d1 = _seed()
+    monkeypatch.setattr(cs, "compute_matrix", lambda *a, **k: 1 / 0)
+    assert [r["ticker"] for r in cs.neighbours(1, "all", d0, d1, k=2)] == ["D", "B"]
+    monkeypatch.setattr(cs, "_MAX_MATRIX_ASSETS", 3)
+    with pytest.raises(ValueError):
+        cs.get_matrix(cs.universe_ids(1, "all"), d0, d1)
+
+
+def test_cache_se_reusa_y_se_invalida_con_la_marca(corr_db):
+    from app.models import Price
+    d0, d1 = _seed()
+    ids = cs.universe_ids(1, "sector")
+    m1 = cs.get_matrix(ids, d0, d1)
+    assert cs.get_matrix(ids, d0, d1) is m1
+
+    # Un precio FUERA de la ventana no la toca
+    s = get_session()
+    s.add(Price(asset_id=1, date=d1 + timedelta(days=5), close=1.0))
+    s.commit()
+    assert cs.get_matrix(ids, d0, d1) is m1
+
+    # Una corrección dentro de la ventana la rehace
+    s.query(Price).filter(Price.asset_id == 2, Price.date == d0 + timedelta(days=10)) \
+        .update({Price.close: 999.0})
+    s.commit()
+    m2 = cs.get_matrix(ids, d0, d1)
+    assert m2 is not m1
+    assert m2.corr[0, 1] != m1.corr[0, 1]
+
+
+def test_correlacion_movil_del_par(corr_db):
+    d0, d1 = _seed()
+    roll = cs.rolling_correlation(1, 3, window=10, date_from=d0, date_to=d1)
+    assert len(roll) == 39 - 10 + 1
+    assert np.allclose(roll.to_numpy(), -1.0, atol=1e-6)
+    assert cs.rolling_correlation(1, 3, window=100, date_from=d0, date_to=d1).empty
@@ -0,0 +1,198 @@
+"""Modo bulk de currency_conversion_service.sync_all.
+
+El cálculo matricial (_ratio_matrix) tiene que dar EXACTAMENTE lo mismo que
+_compute_by_type del camino par por par para un ratio base/divisor de peso 1:
+es el oráculo. Las altas en bloque se verifican contra el stub sqlite.
+"""
+import sys
+import types
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.modules.setdefault("yfinance", types.ModuleType("yfinance"))
+
+from app.services.currency_conversion_service import (  # noqa: E402
+    _ratio_matrix, _ratio_price_rows,
+)
+from app.services.synthetic_service import _compute_by_type  # noqa: E402
+
+D = [date(2024, 1, 1) + timedelta(days=i) for i in range(6)]
+
+
+def _frame(pairs: dict) -> pd.DataFrame:
+    """{date: (open, close)} -> frame de _load_price_frame (close/eff_open)."""
+    rows = [(d, c, o if (o is not None and o != 0) else c) for d, (o, c) in pairs.items()]
+    return pd.DataFrame(rows, columns=["date", "close", "eff_open"]).set_index("date").sort_index()
+
+
+def _matrix(frames: dict):
+    """Matriz fechas × activo como la arma _load_price_matrix."""
+    close = pd.DataFrame({aid: f["close"] for aid, f in frames.items()}).sort_index()
+    eff   = pd.DataFrame({aid: f["eff_open"] for aid, f in frames.items()}).sort_index()
+    pres  = pd.DataFrame({aid: pd.Series(True, index=f.index) for aid, f in frames.items()})
+    pres  = pres.reindex(close.index).fillna(False).astype(bool)
+    return close, eff, pres
+
+
+def _escalar(base_frame, div_frame):
+    comps = [SimpleNamespace(asset_id=1, role="numerator", weight=1.0),
+             SimpleNamespace(asset_id=2, role="denominator", weight=1.0)]
+    return _compute_by_type(SimpleNamespace(formula_type="ratio"), comps,
+                            {1: base_frame, 2: div_frame})
+
+
+BASES = {
+    10: _frame({D[0]: (10, 12), D[1]: (12, 14), D[2]: (14, 16), D[4]: (0, 18)}),
+    11: _frame({D[1]: (5, 6), D[3]: (6, 7), D[4]: (7, 8), D[5]: (8, 9)}),
+    12: _frame({D[5]: (1, 1)}),
+}
+DIVISOR = _frame({D[0]: (100, 110), D[1]: (0, 120), D[2]: (0, 0),
+                  D[3]: (130, 140), D[4]: (140, 150)})
+
+
+def test_ratio_matrix_paridad_con_el_camino_escalar():
+    close, eff, pres = _matrix(BASES)
+    out = _ratio_matrix(close, eff, pres, DIVISOR)
+
+    for base_id, frame in BASES.items():
+        ref = _escalar(frame, DIVISOR)
+        if not ref:
+            assert base_id not in out
+            continue
+        dates, open_, close_ = out[base_id]
+        assert dates == sorted(ref)
+        for d, o, c in zip(dates, open_, close_):
+            assert o == ref[d]["open"]
+            assert c == ref[d]["close"]
+
+
+def test_filas_con_el_mismo_redondeo_que_el_escalar():
+    close, eff, pres = _matrix(BASES)
+    dates, open_, close_ = _ratio_matrix(close, eff, pres, DIVISOR)[10]
+    ref = _escalar(BASES[10], DIVISOR)
+    for row in _ratio_price_rows(99, dates, open_, close_):
+        v = ref[row["date"]]
+        assert row["asset_id"] == 99 and row["volume"] is None
+        for k in ("open", "high", "low", "close"):
+            assert row[k] == round(v[k], 8)
+
+
+def test_divisor_vacio_no_produce_nada():
+    close, eff, pres = _matrix(BASES)
+    assert _ratio_matrix(close, eff, pres, _frame({})) == {}
+
+
+def test_fila_presente_con_close_nulo_se_respeta_como_el_escalar():
+    """_common_index alinea por índice: una fecha con fila pero close NULL
+    entra al resultado (con NaN), no se descarta."""
+    base = pd.DataFrame({"close": [10.0, np.nan], "eff_open": [10.0, np.nan]},
+                        index=pd.Index([D[0], D[1]], name="date"))
+    ref = _escalar(base, DIVISOR)
+    close, eff, pres = _matrix({10: base})
+    dates, _, close_ = _ratio_matrix(close, eff, pres, DIVISOR)[10]
+    assert dates == sorted(ref)
+    assert np.isnan(close_[1]) and np.isnan(ref[D[1]]["close"])
+
+
+# ── altas en bloque contra el stub sqlite ─────────────────────────────────────
+
+def _seed_bases():
+    from app.database import Base, engine, get_session
+    import app.models  # noqa: F401
+    from app.models import Asset, Price, PriceSource
+    Base.metadata.create_all(engine)
+    s = get_session()
+    if s.get(PriceSource, 1) is None:
+        s.add(PriceSource(id=1, name="test")); s.flush()
+    for aid, tk in ((8101, "CCB1"), (8102, "CCB2"), (8103, "CCDIV")):
+        if s.get(Asset, aid) is None:
+            s.add(Asset(id=aid, ticker=tk, name=tk, price_source_id=1))
+    s.flush()
+    for i, d in enumerate(D[:4]):
+        s.add(Price(asset_id=8101, date=d, open=10 + i, close=11 + i))
+        s.add(Price(asset_id=8103, date=d, open=100, close=200))
+    s.add(Price(asset_id=8102, date=D[5], open=1, close=1))
+    s.commit()
+    return s
+
+
+@pytest.fixture
+def bases():
+    """Siembra las bases y el divisor y los borra al terminar (con sus
+    sintéticos): otros tests cargan TODOS los precios del stub y se verían
+    afectados por filas sobrantes."""
+    from app.models import Asset, Price, SyntheticComponent, SyntheticFormula
+    s = _seed_bases()
+    yield s
+    s.rollback()
+    syn_ids = [r[0] for r in s.query(Asset.id).filter(Asset.ticker.like("CCB%_CCDIV"))]
+    ids = syn_ids + [8101, 8102, 8103]
+    f_ids = [r[0] for r in s.query(SyntheticFormula.id)
+             .filter(SyntheticFormula.asset_id.in_(syn_ids))]
+    s.query(SyntheticComponent).filter(SyntheticComponent.formula_id.in_(f_ids)).delete()
+    s.query(SyntheticFormula).filter(SyntheticFormula.id.in_(f_ids)).delete()
+    s.query(Price).filter(Price.asset_id.in_(ids)).delete()
+    s.query(Asset).filter(Asset.id.in_(ids)).delete()
+    s.commit()
+
+
+def test_alta_en_bloque_y_precios_por_tanda(bases):
+    from app.models import Asset, Price, SyntheticComponent, SyntheticFormula
+    from app.services.currency_conversion_service import (
+        _compute_new_ratios, _create_synthetics_bulk,
+    )
+    from app.services.synthetic_service import _load_price_frame
+
+    s = bases
+    div_asset = SimpleNamespace(ticker="CCDIV", currency_id=None)
+    div = SimpleNamespace(divisor_asset=div_asset, divisor_asset_id=8103)
+    pairs = [(s.get(Asset, 8101), div), (s.get(Asset, 8102), div)]
+
+    created, errors = _create_synthetics_bulk(s, pairs, cal_id=1)
+    assert [tk for *_, tk in created] == ["CCB1_CCDIV", "CCB2_CCDIV"]
+    assert errors == []
+    for syn_id, base_id, div_id, _ in created:
+        f = s.query(SyntheticFormula).filter(SyntheticFormula.asset_id == syn_id).one()
+        roles = {(c.asset_id, c.role) for c in
+                 s.query(SyntheticComponent).filter(SyntheticComponent.formula_id == f.id)}
+        assert roles == {(base_id, "numerator"), (div_id, "denominator")}
+
+    avances = []
+    computed, errors = _compute_new_ratios(
+        created, {8103: _load_price_frame(8103, None)},
+        progress_cb=lambda cur, tot: avances.append((cur, tot)))
+
+    # CCB2 no comparte ninguna fecha con el divisor: error propio, sin precios.
+    assert computed == [created[0][0]]
+    assert [e["ticker"] for e in errors] == ["CCB2_CCDIV"]
+    assert avances[0] == (0, 2) and avances[-1] == (2, 2)
+    closes = [r[0] for r in s.query(Price.close).filter(Price.asset_id == created[0][0])
+              .order_by(Price.date)]
+    assert closes == pytest.approx([0.055, 0.06, 0.065, 0.07])
+
+
+def test_un_par_en_conflicto_no_frena_el_alta(bases):
+    """Un ticker que ya existe (dado de alta por otro proceso entre la
+    búsqueda de faltantes y el INSERT) queda como error de ESE par; el resto
+    de la tanda entra."""
+    from app.models import Asset, SyntheticFormula
+    from app.services.currency_conversion_service import _create_synthetics_bulk
+
+    s = bases
+    s.add(Asset(id=8104, ticker="CCB2_CCDIV", name="x", price_source_id=1))
+    s.commit()
+    div_asset = SimpleNamespace(ticker="CCDIV", currency_id=None)
+    div = SimpleNamespace(divisor_asset=div_asset, divisor_asset_id=8103)
+    pairs = [(s.get(Asset, 8101), div), (s.get(Asset, 8102), div)]
+
+    created, errors = _create_synthetics_bulk(s, pairs, cal_id=1)
+    assert [(b, tk) for _, b, _, tk in created] == [(8101, "CCB1_CCDIV")]
+    assert [e["ticker"] for e in errors] == ["CCB2_CCDIV"]
+    assert s.query(SyntheticFormula).filter(
+        SyntheticFormula.asset_id == created[0][0]).count() == 1
+    assert s.query(SyntheticFormula).filter(
+        SyntheticFormula.asset_id == 8104).count() == 0
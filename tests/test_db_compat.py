@@ -416,3 +416,73 @@ def test_list_tables_by_prefix_y_approx_rows():
         s.commit()
         rows = db_compat.approx_table_rows(s, "sig_")
     assert rows == {"sig_3": 2}
+
+
+# ── Particiones anuales (solo PG): SQL emitido contra un catálogo falso ──────
+
+class _PgCatalog(_Sess):
+    """Session PG falsa con un catálogo mínimo: `parts` son las particiones de
+    la tabla y `outside` las que tienen filas fuera del rango consultado."""
+    def __init__(self, parts, outside=(), default_rows=False):
+        super().__init__(postgresql.dialect())
+        self.parts, self.outside, self.default_rows = parts, set(outside), default_rows
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.executed.append(sql)
+        if "pg_partitioned_table" in sql:
+            return _Rows([(1,)])
+        if "pg_inherits" in sql:
+            return _Rows([(p,) for p in self.parts])
+        if sql.startswith("SELECT 1 FROM"):
+            part = sql.split()[3].strip('"')
+            hit = part in self.outside or (
+                part.endswith("_ydefault") and self.default_rows)
+            return _Rows([(1,)] if hit else [])
+        return _Rows([])
+
+
+class _Rows(list):
+    def first(self):
+        return self[0] if self else None
+
+    def fetchall(self):
+        return list(self)
+
+
+def test_truncate_covered_partitions_vacia_solo_las_cubiertas():
+    s = _PgCatalog(["w_y2023", "w_y2024", "w_y2025", "w_ydefault"],
+                   outside={"w_y2024"})
+    done = db_compat.truncate_covered_partitions(
+        s, "w", date(2024, 3, 1), date(2025, 12, 31))
+    # 2023 no toca el rango (ni se consulta); 2024 tiene filas antes de marzo
+    assert done == ["w_y2025", "w_ydefault"]
+    assert [q for q in s.executed if q.startswith("TRUNCATE")] == [
+        'TRUNCATE TABLE "w_y2025"', 'TRUNCATE TABLE "w_ydefault"']
+    assert not any('"w_y2023"' in q for q in s.executed)
+
+
+def test_ensure_year_partitions_muda_las_filas_de_la_default():
+    s = _PgCatalog(["w_y2025", "w_ydefault"], default_rows=True)
+    assert db_compat.ensure_year_partitions(s, "w", [2025, 2026]) == [2026]
+    ddl = [q for q in s.executed if not q.startswith("SELECT")]
+    assert ddl == [
+        'ALTER TABLE "w" DETACH PARTITION "w_ydefault"',
+        'CREATE TABLE "w_y2026" PARTITION OF "w" '
+        "FOR VALUES FROM ('2026-01-01') TO ('2027-01-01')",
+        'INSERT INTO "w" SELECT * FROM "w_ydefault" '
+        "WHERE date >= '2026-01-01' AND date < '2027-01-01'",
+        "DELETE FROM \"w_ydefault\" WHERE date >= '2026-01-01' AND date < '2027-01-01'",
+        'ALTER TABLE "w" ATTACH PARTITION "w_ydefault" DEFAULT',
+    ]
+
+
+def test_particiones_son_no_op_fuera_de_postgres():
+    for d in (mysql.dialect(), sqlite.dialect()):
+        s = _Sess(d)
+        assert db_compat.year_partitions(s, "ind_daily") == {}
+        assert db_compat.truncate_covered_partitions(
+            s, "ind_daily", date(2020, 1, 1), date(2026, 1, 1)) == []
+        assert db_compat.maintain_year_partitions(s, "ind_daily") == []
+        assert db_compat.partition_by_year(s, "ind_daily") is False
+        assert s.executed == []
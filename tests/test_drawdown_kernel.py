@@ -0,0 +1,128 @@
+"""Paridad del kernel de drawdowns contra los loops que reemplaza.
+
+_ref_episodes es el loop de technical_service._compute_dd_events antes del
+kernel (con índices en vez de fechas) y _ref_max_drawdown el de
+portfolio_metrics.max_drawdown: las versiones lentas y obviamente correctas
+quedan como oráculo. Lo que se fija además: el apilado con largos distintos
+no mezcla series, un NaN intermedio no abre episodios y `worst` da UNA
+profundidad por episodio (drawdown_max2 ya no es otra barra del mismo valle).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from app.services import drawdown_kernel as dk
+from app.services import portfolio_metrics as pm
+
+
+def _ref_episodes(close):
+    out = []
+    ath = close[0]
+    in_dd = False
+    start = trough = 0
+    for i in range(len(close)):
+        if close[i] >= ath:
+            if in_dd:
+                out.append((start, trough, i, (close[trough] - ath) / ath))
+                in_dd = False
+            ath = close[i]
+        else:
+            if not in_dd:
+                in_dd, start, trough = True, i, i
+            elif close[i] < close[trough]:
+                trough = i
+    if in_dd:
+        out.append((start, trough, -1, (close[trough] - ath) / ath))
+    return out
+
+
+def _ref_max_drawdown(equity):
+    if len(equity) < 2:
+        return None
+    dd, peak = [], None
+    for v in equity:
+        if peak is None or v > peak:
+            peak = v
+        dd.append(v / peak - 1 if peak and peak > 0 else 0.0)
+    trough_idx = min(range(len(dd)), key=lambda i: dd[i])
+    peak_idx = max(range(trough_idx + 1), key=lambda i: equity[i])
+    recovery_idx = next((i for i in range(trough_idx + 1, len(equity))
+                         if equity[i] >= equity[peak_idx]), None)
+    return {"mdd": dd[trough_idx], "peak_idx": peak_idx,
+            "trough_idx": trough_idx, "recovery_idx": recovery_idx}
+
+
+def _rows(ep, i):
+    sel = ep["series"] == i
+    return [(int(s), int(t), int(r), d) for s, t, r, d in zip(
+        ep["start"][sel], ep["trough"][sel], ep["recovery"][sel],
+        ep["depth"][sel])]
+
+
+_prices = st.lists(st.integers(1, 6), min_size=1, max_size=40).map(
+    lambda xs: [float(x) * 10 for x in xs])
+
+
+@settings(max_examples=200, deadline=None)
+@given(st.lists(_prices, min_size=1, max_size=5))
+def test_episodios_iguales_al_loop(series):
+    ep = dk.episodes(dk.stack(series))
+    for i, close in enumerate(series):
+        got, ref = _rows(ep, i), _ref_episodes(close)
+        assert [g[:3] for g in got] == [r[:3] for r in ref]
+        assert [g[3] for g in got] == pytest.approx([r[3] for r in ref])
+
+
+@settings(max_examples=200, deadline=None)
+@given(st.lists(st.integers(-2, 6), min_size=0, max_size=30).map(
+    lambda xs: [float(x) for x in xs]))
+def test_max_drawdown_igual_al_loop(equity):
+    assert pm.max_drawdown(equity) == _ref_max_drawdown(equity)
+    ref, peak = [], None
+    for v in equity:
+        peak = v if peak is None or v > peak else peak
+        ref.append(v / peak - 1 if peak > 0 else 0.0)
+    assert pm.drawdown_series(equity) == ref
+
+
+def test_pico_duracion_y_nan_intermedio():
+    ep = dk.episodes([100, 120, 120, 60, np.nan, 90, 130, 110])
+    assert list(ep["peak"]) == [1, 6]
+    assert list(ep["start"]) == [3, 7]
+    assert list(ep["trough"]) == [3, 7]
+    assert list(ep["recovery"]) == [6, -1]
+    assert list(ep["duration"]) == [5, 1]
+    assert ep["depth"][0] == pytest.approx(-0.5)
+    assert len(dk.episodes([100, 120, 60, 130], min_depth=0.6)["series"]) == 0
+
+
+def test_worst_un_valor_por_episodio_y_lotes(monkeypatch):
+    a = [100, 50, 40, 100, 90, 100, 70]             # -60%, -10%, -30% abierto
+    b = [10, 11, 12]                                # sin episodios
+    w = dk.worst(dk.stack([a, b]))
+    assert w[0] == pytest.approx([-0.6, -0.3, -0.1])
+    assert np.isnan(w[1]).all()
+    monkeypatch.setattr(dk, "_MAX_CELLS", 8)
+    lotes = dk.worst_batch([a, b, a[:3]])
+    assert lotes[0] == pytest.approx(w[0]) and np.isnan(lotes[1]).all()
+    assert lotes[2][0] == pytest.approx(-0.6) and np.isnan(lotes[2][1:]).all()
+
+
+def test_overlay_y_drawdown_max_usan_el_kernel():
+    from app.services.technical_service import (_compute_dd_events,
+                                                _cur_drawdown_max2)
+    dates = pd.date_range("2024-01-01", periods=7)
+    df = pd.DataFrame({"date": dates,
+                       "close": [100.0, 50, 40, 100, 90, 100, 70]})
+    ev = _compute_dd_events(df, 20)
+    assert [e["depth"] for e in ev] == [-60.0, -30.0]
+    assert ev[0]["end"] is not None and ev[1]["end"] is None
+    assert _cur_drawdown_max2(df) == pytest.approx(-30.0)
+
+
+def test_drawdown_max_sin_episodio_es_none():
+    from app.services.technical_service import _worst_drawdowns
+    assert _worst_drawdowns([100.0, 80, 120, 130]) == [
+        pytest.approx(-20.0), None, None]       # un solo drawdown
+    assert _worst_drawdowns([100.0, 110, 120]) == [0.0, None, None]   # ninguno
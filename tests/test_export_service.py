@@ -0,0 +1,118 @@
+"""Exportaciones por streaming (export_service).
+
+Lo que se fija: el CSV sale por bloques y con las comillas justas; el tope
+corta y lo marca, salvo override explícito; el XLSX write-only se lee de
+vuelta igual; la descarga es del usuario que la pidió, la de primer plano es
+de un solo uso y la de segundo plano sirve su archivo al terminar. La consulta
+corre contra el stub sqlite con cursor en streaming.
+"""
+import csv
+import io
+import time
+from datetime import date, datetime, timezone
+
+import openpyxl
+import pytest
+import sqlalchemy as sa
+
+from app.database import Base, engine
+from app.services import export_service as ex
+
+
+def _body(parts):
+    return b"".join(parts).decode("utf-8")
+
+
+def test_csv_por_bloques_con_comillas():
+    rows = [(1, "a,b", None), (2, 'dice "hola"', 3.5), (3, "x\ny", date(2024, 1, 2))]
+    parts = list(ex.csv_chunks(["id", "txt", "v"], rows, chunk=2))
+    assert len(parts) == 2
+    back = list(csv.reader(io.StringIO("".join(parts))))
+    assert back == [["id", "txt", "v"], ["1", "a,b", ""],
+                    ["2", 'dice "hola"', "3.5"], ["3", "x\ny", "2024-01-02"]]
+
+
+def test_tope_corta_y_se_puede_levantar():
+    rows = [(i,) for i in range(10)]
+    t = ex.register(ex.rows_source(["n"], rows), "csv", "x", user_id=1,
+                    max_rows=4)
+    name, mime, parts = ex.open_download(t, 1)
+    assert name == "x.csv" and mime.startswith("text/csv")
+    assert _body(parts).splitlines() == ["n", "0", "1", "2", "3"]
+
+    t = ex.register(ex.rows_source(["n"], rows), "csv", "x", user_id=1,
+                    max_rows=None)
+    assert len(_body(ex.open_download(t, 1)[2]).splitlines()) == 11
+
+
+def test_descarga_es_del_usuario_y_de_un_solo_uso():
+    t = ex.register(ex.rows_source(["n"], [(1,)]), "csv", "x", user_id=7)
+    assert ex.open_download(t, 8) is None
+    assert ex.open_download(t, 7) is not None
+    assert ex.open_download(t, 7) is None
+    with pytest.raises(ValueError):
+        ex.register(ex.rows_source(["n"], []), "pdf", "x")
+
+
+def test_xlsx_write_only_se_lee_igual(tmp_path):
+    rows = [(1, "uno", date(2024, 5, 1), None),
+            (2, "ctrl\x01", datetime(2024, 5, 2, 10, tzinfo=timezone.utc), b"\x01\xff")]
+    t = ex.register(ex.rows_source(["id", "txt", "d", "x"], rows), "xlsx",
+                    "datos.csv", user_id=1, sheet="Resultados")
+    name, _mime, parts = ex.open_download(t, 1)
+    assert name == "datos.xlsx"
+    path = tmp_path / name
+    path.write_bytes(b"".join(parts))
+    ws = openpyxl.load_workbook(path)["Resultados"]
+    got = [list(r) for r in ws.iter_rows(values_only=True)]
+    assert got[0] == ["id", "txt", "d", "x"]
+    assert got[1] == [1, "uno", datetime(2024, 5, 1), None]
+    assert got[2] == [2, "ctrl", "2024-05-02T10:00:00+00:00", "01ff"]
+
+
+def test_consulta_en_streaming_y_en_segundo_plano():
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(sa.text("DROP TABLE IF EXISTS export_probe"))
+        conn.execute(sa.text("CREATE TABLE export_probe (n INTEGER, s TEXT)"))
+        conn.execute(sa.text("INSERT INTO export_probe VALUES (:n, :s)"),
+                     [{"n": i, "s": f"f{i}"} for i in range(25)])
+    try:
+        src = ex.sql_source("SELECT n, s FROM export_probe ORDER BY n", chunk=4)
+        t = ex.register(src, "csv", "q", user_id=1, max_rows=20)
+        lines = _body(ex.open_download(t, 1)[2]).splitlines()
+        assert lines[0] == "n,s" and lines[1] == "0,f0" and len(lines) == 21
+
+        t = ex.register(src, "csv", "q", user_id=1, max_rows=None,
+                        background=True)
+        for _ in range(200):
+            st = ex.status(t, 1)
+            if st["state"] in ("done", "error"):
+                break
+            time.sleep(0.02)
+        assert st == {"state": "done", "rows": 25, "truncated": False,
+                      "error": None, "filename": "q.csv"}
+        body = _body(ex.open_download(t, 1)[2])
+        assert len(body.splitlines()) == 26
+        # el archivo de segundo plano se puede volver a bajar hasta vencer
+        assert _body(ex.open_download(t, 1)[2]) == body
+    finally:
+        with engine.begin() as conn:
+            conn.execute(sa.text("DROP TABLE IF EXISTS export_probe"))
+
+
+def test_segundo_plano_con_error_y_vencimiento(monkeypatch):
+    def _falla():
+        raise RuntimeError("sin tabla")
+        yield  # pragma: no cover
+    t = ex.register(ex.rows_source(["n"], _falla()), "csv", "x", user_id=1,
+                    background=True)
+    for _ in range(200):
+        if ex.status(t, 1)["state"] == "error":
+            break
+        time.sleep(0.02)
+    assert ex.status(t, 1)["error"] == "sin tabla"
+    assert ex.open_download(t, 1) is None
+    monkeypatch.setattr(ex, "_TTL_MIN", -1)
+    ex.purge_stale()
+    assert ex.status(t, 1) is None
@@ -0,0 +1,62 @@
+"""El núcleo headless (app.core) no arrastra la web.
+
+El worker del scheduler, el servidor MCP y los hijos del ProcessPool importan
+servicios, modelos y las herramientas de IA — nunca Dash, Plotly,
+dash_ag_grid ni las páginas. Un import de UI arriba de un servicio (p.ej.
+`from app.components.ui_constants import …` antes de que el paquete fuera
+perezoso) le vuelve a sumar segundos y ~100 MB de RSS a cada proceso nuevo
+del pool, y no lo ve ningún otro test: todos corren en el mismo proceso que
+ya cargó Dash. Por eso se prueba en un intérprete limpio.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_WEB = ("dash", "plotly", "dash_ag_grid", "dash_bootstrap_components",
+        "app.pages", "app.callbacks", "app.web")
+
+_PROBE = """
+import importlib, json, pathlib, sys
+sys.path.insert(0, {root!r})
+web = {web!r}
+mods = ["app", "app.core", "app.database", "app.models", "process_child"]
+mods += sorted("app.services." + p.stem for p in pathlib.Path({root!r}, "app",
+               "services").glob("*.py") if p.stem != "__init__")
+mods += ["app.ai.mcp_adapter", "app.ai.oauth", "app.ai.tokens"]
+culpable = {{}}
+for m in mods:
+    importlib.import_module(m)
+    cargada = [w for w in web if w in sys.modules]
+    if cargada:
+        culpable[m] = cargada
+        break
+from app.ai import registry
+registry._cargar()                      # módulos de herramientas
+cargada = [w for w in web if w in sys.modules]
+if cargada and not culpable:
+    culpable["app.ai.tools"] = cargada
+print(json.dumps(culpable))
+"""
+
+
+def test_servicios_y_herramientas_no_importan_la_web():
+    code = _PROBE.format(root=str(ROOT), web=_WEB)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                          env=dict(os.environ), capture_output=True, text=True,
+                          timeout=300)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    culpable = json.loads(proc.stdout.strip().splitlines()[-1])
+    assert culpable == {}, (
+        f"Import de la web en el núcleo headless: {culpable}. Mover el import "
+        f"de UI (plotly, app.components) adentro de la función que lo usa.")
+
+
+def test_create_app_sigue_en_el_paquete():
+    import app
+    from app import web
+    assert callable(app.create_app)
+    assert "create_app" in vars(web)
@@ -486,3 +486,87 @@ def test_import_e2e_fuente_sin_implementacion_no_aborta_el_archivo(db_import, fa
     # el activo válido quedó creado y su log persistido
     assert s.query(svc.Asset).filter_by(ticker=f"{_E2E}OK").first() is not None
     assert s.query(svc.ImportLog).filter_by(ticker=f"{_E2E}BAD").first().status == "error"
+
+
+def test_import_por_chunks_retoma_desde_el_ultimo_commit(db_import, fake_registry,
+                                                         monkeypatch):
+    # El proceso "muere" al empezar el segundo chunk: el primero (activos,
+    # logs y cursor) ya está commiteado. Volver a subir el MISMO archivo
+    # retoma ahí — sin revalidar lo importado — y al terminar asigna el
+    # benchmark que una fila del primer chunk pedía de una del último.
+    s = db_import
+    s.query(svc.ImportJob).delete()
+    s.commit()
+    src = _FakeSource()
+    fake_registry["FakeE2E"] = src
+    monkeypatch.setattr(svc, "_CHUNK_ROWS", 2)
+    rows = [_fila_completa(f"{_E2E}R1", fuente="FakeE2E",
+                           benchmark_ticker=f"{_E2E}R5"),
+            _fila_completa(f"{_E2E}R2", fuente="FakeE2E"),
+            _fila_completa(f"{_E2E}R3", fuente="FakeE2E"),
+            _fila_completa(f"{_E2E}R4", fuente="NoExiste"),
+            _fila_completa(f"{_E2E}R5", fuente="FakeE2E")]
+    archivo = _xlsx(rows)
+
+    real = svc._import_chunk
+    llamadas = []
+
+    def muere_en_el_segundo(*a, **kw):
+        llamadas.append(1)
+        if len(llamadas) == 2:
+            raise KeyboardInterrupt("proceso caído")
+        return real(*a, **kw)
+
+    monkeypatch.setattr(svc, "_import_chunk", muere_en_el_segundo)
+    with pytest.raises(KeyboardInterrupt):
+        svc.import_from_excel(archivo)
+    job = s.query(svc.ImportJob).one()
+    assert (job.status, job.next_row, job.total_rows) == ("running", 2, 5)
+    assert s.query(svc.Asset).filter(svc.Asset.ticker.like(f"{_E2E}R%")).count() == 2
+
+    monkeypatch.setattr(svc, "_import_chunk", real)
+    src.calls.clear()
+    results = svc.import_from_excel(archivo)
+    assert [r["ticker"] for r in results] == [f"{_E2E}R3", f"{_E2E}R4", f"{_E2E}R5"]
+    assert {t for t, _ in src.calls} == {f"{_E2E}R3", f"{_E2E}R5"}
+
+    s.expire_all()
+    job = s.query(svc.ImportJob).one()
+    assert (job.status, job.next_row) == ("done", 5)
+    assert (job.n_imported, job.n_skipped, job.n_error) == (4, 0, 1)
+    r1 = s.query(svc.Asset).filter_by(ticker=f"{_E2E}R1").one()
+    r5 = s.query(svc.Asset).filter_by(ticker=f"{_E2E}R5").one()
+    assert r1.benchmark_id == r5.id
+    logs = {l.ticker: l.status for l in s.query(svc.ImportLog)
+            .filter(svc.ImportLog.ticker.like(f"{_E2E}R%"))}
+    assert logs == {f"{_E2E}R1": "imported", f"{_E2E}R2": "imported",
+                    f"{_E2E}R3": "imported", f"{_E2E}R4": "error",
+                    f"{_E2E}R5": "imported"}
+
+    # Un archivo ya terminado se importa de nuevo desde cero (todo duplicado).
+    again = svc.import_from_excel(archivo)
+    assert len(again) == 5
+    assert {r["status"] for r in again} == {"skipped", "error"}
+
+
+def test_stream_rows_convierte_como_read_excel_dtype_str():
+    filas, total = svc._stream_rows(_xlsx([
+        {"ticker": 7203, "fuente_precios": "Fake", "nombre": 1.5},
+        {"ticker": 7204.0, "fuente_precios": "Fake"},
+    ]))
+    filas = list(filas)
+    assert total == 2
+    assert filas[0]["ticker"] == "7203" and filas[0]["nombre"] == "1.5"
+    assert filas[1]["ticker"] == "7204" and filas[1]["sector"] == ""
+    with pytest.raises(ValueError, match="obligatorias"):
+        svc._stream_rows(_xlsx_sin_fuente())
+
+
+def _xlsx_sin_fuente() -> bytes:
+    import openpyxl
+    from io import BytesIO
+    wb = openpyxl.Workbook()
+    wb.active.append(["ticker", "nombre"])
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
@@ -184,7 +184,7 @@ def _stub_orquestacion(monkeypatch, calls, n_assets=3):
     monkeypatch.setattr(ts, "_load_price_weights",
                         lambda s: {i: 10 * i for i in range(1, n_assets + 1)})
     monkeypatch.setattr(ts, "_count_price_assets", lambda s: n_assets)
-    monkeypatch.setattr(ts, "_resample_ohlc", lambda df, f: None)
+    monkeypatch.setattr(ts.price_bar_store, "load", lambda s, d, **kw: ({}, {}))
     monkeypatch.setattr(ts, "_load_best_sma_cache", lambda s: {})
     monkeypatch.setattr(ts, "_precompute_all_tail_stats", lambda s, c, f: {})
     monkeypatch.setattr(ts, "_MIN_BATCH_ASSETS", 1)   # varios lotes aun con pocos activos
@@ -754,6 +754,44 @@ def test_process_task_emite_progreso_batcheado(monkeypatch):
         Session.remove()
 
 
+def test_process_task_manda_query_stats_por_la_cola():
+    """Con query_stats=True el hijo graba su lote (fase "ind:lotes") y manda
+    el agregado por la cola como (_IPC_QSTATS, snapshot); sin cola, viaja en
+    el resultado. Dentro de una grabación del mismo proceso no manda nada."""
+    import queue
+    import app.models  # noqa: F401
+    from app.database import Base, Session, engine, get_session
+    from app.models import Asset, Price
+    from app.models.indicator_definition import IndicatorDefinition
+    from app.models.indicator_store import ensure_ind_table
+    from app.services import query_stats_service as qs
+
+    Base.metadata.create_all(engine)
+    code = "return_daily"
+    ensure_ind_table(code, "num")
+    s = get_session()
+    ids = [_A1, _A2]
+    try:
+        _seed_assets(s, Asset, Price, ids)
+        s.commit()
+        q: queue.Queue = queue.Queue()
+        out = ts._process_batch_task(0, ids, [code], False, {}, {}, q, True)
+        assert out["errors"] == [] and "query_stats" not in out
+        stats = [m[1] for m in list(q.queue) if isinstance(m, tuple)]
+        assert len(stats) == 1 and stats[0]["ind:lotes"]["statements"] > 0
+
+        out = ts._process_batch_task(0, ids, [code], True, {}, {}, None, True)
+        assert out["query_stats"]["ind:lotes"]["writes"] > 0
+
+        with qs.recording() as rec:
+            out = ts._process_batch_task(0, ids, [code], True, {}, {}, None, True)
+        assert "query_stats" not in out
+        assert rec.phases["ind:lotes"]["statements"] > 0
+    finally:
+        _cleanup(s, engine, Asset, Price, IndicatorDefinition, code, ids)
+        Session.remove()
+
+
 def test_process_task_carga_benchmark_por_su_cuenta():
     """La task del hijo no recibe precios: los carga ella, incluyendo el
     benchmark de sus activos aunque no esté en el lote."""
@@ -34,3 +34,35 @@ def test_update_corre_current_antes_que_backfill(monkeypatch):
     _stub_pipeline(monkeypatch, calls)
     ts.update_indicator_history()
     assert calls == ["current", "backfill"]
+
+
+def test_update_acotado_a_activos_no_toca_el_resto(monkeypatch):
+    """asset_ids (p.ej. los sintéticos de una sincronización de monedas)
+    acota las dos fases y el log por activo registra el backfill fallido."""
+    import pandas as pd
+    seen, logs = {}, {}
+    monkeypatch.setattr(ts, "get_session", lambda: object())
+    monkeypatch.setattr(ts, "_use_process_pool", lambda n: (False, 1))
+
+    def _global(s):
+        raise AssertionError("cargó los precios de todo el universo")
+
+    monkeypatch.setattr(ts, "_load_all_prices", _global)
+    # el 9 es el benchmark de alguno: viene en los precios pero no se recalcula
+    monkeypatch.setattr(ts, "_load_prices_for_assets", lambda s, ids: {
+        a: pd.DataFrame({"close": [1.0] * a}) for a in (*ids, 9)})
+    monkeypatch.setattr(ts, "recompute_current_indicators",
+                        lambda **kw: seen.setdefault("current", kw) and {
+                            "total": 2, "errors": [],
+                            "asset_errors": {3: ["rsi: x"]}})
+    monkeypatch.setattr(ts, "backfill_all_indicator_values",
+                        lambda **kw: seen.setdefault("backfill", kw) and {
+                            "total": 1, "errors": [{"code": "sma", "error": "y"}]})
+    monkeypatch.setattr(ts, "_save_indicator_logs_bulk",
+                        lambda ids, errs, s: logs.update(errs))
+
+    ts.update_indicator_history(asset_ids=[3, 2])
+    assert seen["current"]["asset_ids"] == [2, 3]
+    assert seen["current"]["weights"] == {2: 2, 3: 3}
+    assert seen["backfill"]["asset_ids"] == [2, 3]
+    assert logs == {2: ["backfill sma: y"], 3: ["rsi: x", "backfill sma: y"]}
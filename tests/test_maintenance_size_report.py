@@ -24,6 +24,9 @@ def test_classify_table_familias():
     assert ms.classify_table("signal_values_wide") == "Señales"
     assert ms.classify_table("strat_res_2") == "Estrategias"
     assert ms.classify_table("strategy_results_wide") == "Estrategias"
+    # particiones anuales (WIDE_TABLE_PARTITIONS) → familia de la madre
+    assert ms.classify_table("signal_values_wide_y2024") == "Señales"
+    assert ms.classify_table("strategy_results_wide_ydefault") == "Estrategias"
     assert ms.classify_table("fundamental_quarterly") == "Fundamentales"
     assert ms.classify_table("backtest_run") == "Backtest / Carteras"
     assert ms.classify_table("portfolio_transaction") == "Backtest / Carteras"
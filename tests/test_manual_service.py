@@ -255,6 +255,28 @@ def test_search_ignora_los_conectores():
         == ["b"]
 
 
+def test_search_visible_filtra_por_nivel_con_el_indice_cacheado(monkeypatch):
+    """Un solo índice para todos los roles: el nivel se filtra al consultar,
+    y se rearma solo cuando load_sections devuelve otra lista."""
+    secciones = [_sec("todos", title="Backtest"),
+                 _sec("admin", title="Backtest avanzado", roles="admin")]
+    monkeypatch.setattr(ms, "load_sections", lambda: secciones)
+    ms.clear_cache()
+    try:
+        analista = ms.level_of(ms.ROLE_ANALYST)
+        assert [h.section.slug for h in ms.search_visible("backt", analista)] \
+            == ["todos"]
+        assert [h.section.slug for h in ms.search_visible(
+            "backtest", ms.level_of(ms.ROLE_ADMIN))] == ["todos", "admin"]
+        indice = ms._index()
+        assert ms._index() is indice
+        secciones = secciones + [_sec("nueva", title="Backtest nuevo")]
+        assert ms._index() is not indice
+        assert len(ms.search_visible('"backtest nuevo"', analista)) == 1
+    finally:
+        ms.clear_cache()
+
+
 # ── Carga desde disco ────────────────────────────────────────────────────────
 
 def _escribir(directorio, nombre, texto):
@@ -0,0 +1,184 @@
+"""Escáner de pares (pair_scan_service).
+
+El kernel por bloques tiene que dar, par por par, lo mismo que pandas sobre
+el spread de ese par solo — z-score del log-ratio en la ventana corta,
+pendiente AR(1) del log-spread, correlación de log-retornos en toda la
+ventana y su desvío entre tramos — sin importar el tamaño de bloque ni los
+huecos. La parte con BD fija que el ranking se guarda por grupo, se reemplaza
+al reescanear y que get_pair_data (ahora por columnas) devuelve lo mismo.
+"""
+import math
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from app.database import Base, engine, get_session
+from app.services import pair_scan_service as ps
+
+
+def _panel(seed=5, t=150, n=7):
+    """Cierres con un factor común, un par que revierte (1 ≈ 0 + ruido AR),
+    huecos al azar, un activo que arranca tarde y uno sin la última fecha."""
+    rng = np.random.default_rng(seed)
+    base = np.cumsum(rng.normal(0, 0.01, t))
+    L = base[:, None] + np.cumsum(rng.normal(0, 0.01, (t, n)), axis=0)
+    ar = np.zeros(t)
+    for k in range(1, t):
+        ar[k] = 0.8 * ar[k - 1] + rng.normal(0, 0.01)
+    L[:, 1] = L[:, 0] + ar + 0.3
+    C = 100 * np.exp(L)
+    C[rng.random((t, n)) < 0.1] = np.nan
+    C[:90, 4] = np.nan
+    C[-1, 5] = np.nan
+    return C
+
+
+def _oracle(C, i, j, zw, n_blocks, min_periods):
+    L = pd.DataFrame(np.log(C))
+    s = L[i] - L[j]
+    out = {"n_obs": float((L[i].notna() & L[j].notna()).sum())}
+
+    tail = s.iloc[len(s) - zw:]
+    w = tail.dropna()
+    z = np.nan
+    if np.isfinite(tail.iloc[-1]) and len(w) >= max(3, zw // 2) and w.std() > 0:
+        z = (tail.iloc[-1] - w.mean()) / w.std()
+    out["zscore"] = z
+
+    reg = pd.DataFrame({"x": s.shift(1), "y": s.diff()}).dropna()
+    b = np.cov(reg["x"], reg["y"])[0, 1] / reg["x"].var()
+    out["half_life"] = -math.log(2) / math.log1p(b) if -1 < b < 0 else np.nan
+
+    R = L.diff().iloc[1:]
+    out["corr"] = R[[i, j]].corr(min_periods=min_periods).iloc[0, 1]
+    sub = [R.iloc[idx][[i, j]].corr(min_periods=max(3, min_periods // n_blocks))
+           .iloc[0, 1] for idx in np.array_split(np.arange(len(R)), n_blocks)]
+    sub = [c for c in sub if np.isfinite(c)]
+    out["corr_std"] = float(np.std(sub)) if len(sub) >= 2 else np.nan
+    return out
+
+
+@pytest.mark.parametrize("max_cells", [1, 15, 10_000])
+def test_bloques_dan_lo_mismo_que_pandas_par_por_par(max_cells):
+    C = _panel()
+    n = C.shape[1]
+    got = {k: np.full((n, n), np.nan) for k in
+           ("n_obs", "zscore", "half_life", "corr", "corr_std")}
+    for s0, blk in ps.pair_blocks(C, z_window=40, n_blocks=3, min_periods=20,
+                                  max_cells=max_cells):
+        for k, v in blk.items():
+            got[k][s0:s0 + len(v)] = v
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                continue
+            want = _oracle(C, i, j, 40, 3, 20)
+            for k, w in want.items():
+                g = got[k][i, j]
+                assert np.isnan(g) == np.isnan(w), (k, i, j)
+                if np.isfinite(w):
+                    assert math.isclose(g, w, rel_tol=1e-7, abs_tol=1e-9), (k, i, j)
+    # el activo sin la última fecha no tiene z; el par (1, 0) revierte
+    assert np.isnan(got["zscore"][5]).all()
+    assert 0 < got["half_life"][1, 0] < 10
+    assert np.allclose(got["zscore"], -got["zscore"].T, equal_nan=True)
+
+
+def test_mismo_activo_escalado_no_tiene_z_ni_vida_media():
+    rng = np.random.default_rng(1)
+    a = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 80)))
+    C = np.column_stack([a, 3 * a])
+    (_, blk), = ps.pair_blocks(C, z_window=30)
+    assert np.isnan(blk["zscore"]).all() and np.isnan(blk["half_life"]).all()
+    assert math.isclose(blk["corr"][0, 1], 1.0, abs_tol=1e-9)
+
+
+def test_ranking_deja_el_par_que_revierte_primero():
+    C = _panel(t=250)
+    closes = ps.align(pd.DataFrame(C, columns=[10, 11, 12, 13, 14, 15, 16]))
+    rows = ps.rank_pairs(closes, top=5)
+    assert rows and (rows[0]["asset_id_1"], rows[0]["asset_id_2"]) == (10, 11)
+    assert all(r["asset_id_1"] < r["asset_id_2"] for r in rows)
+    zs = [abs(r["zscore"]) for r in rows]
+    assert zs == sorted(zs, reverse=True)
+    for r in rows:
+        assert r["corr"] >= ps.MIN_CORR and r["half_life"] <= ps.MAX_HALF_LIFE
+    assert ps.rank_pairs(closes[[10]]) == []
+
+
+def test_align_rellena_solo_huecos_cortos():
+    col = [1.0, np.nan, 3.0] + [np.nan] * (ps.FFILL_LIMIT + 2)
+    out = ps.align(pd.DataFrame({1: col}))[1].tolist()
+    assert out[1] == 1.0 and out[3:3 + ps.FFILL_LIMIT] == [3.0] * ps.FFILL_LIMIT
+    assert np.isnan(out[-1])
+
+
+# ── Con BD ────────────────────────────────────────────────────────────────────
+
+_TABLES = ("pair_scan_result", "prices", "assets", "sectors")
+
+
+@pytest.fixture()
+def scan_db():
+    import app.models  # noqa: F401 — registra los modelos en Base.metadata
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for t in _TABLES:
+            conn.execute(sa.text(f"DELETE FROM {t}"))
+    yield
+    with engine.begin() as conn:
+        for t in _TABLES:
+            conn.execute(sa.text(f"DELETE FROM {t}"))
+    get_session().rollback()
+
+
+def _seed():
+    from app.models import Asset, Price, Sector
+    s = get_session()
+    s.add(Sector(id=1, name="S1"))
+    C = _panel(t=200)[:, :4]
+    C[:, 2:] = 100 * np.exp(np.cumsum(
+        np.random.default_rng(2).normal(0, 0.02, (200, 2)), axis=0))
+    for k in range(4):
+        s.add(Asset(id=k + 1, ticker=f"T{k + 1}", name=f"T{k + 1}",
+                    sector_id=1, price_source_id=1))
+    s.flush()
+    d0 = date(2025, 1, 1)
+    for k in range(4):
+        for t in range(200):
+            if np.isfinite(C[t, k]):
+                s.add(Price(asset_id=k + 1, date=d0 + timedelta(days=t),
+                            close=float(C[t, k])))
+    s.commit()
+    return d0, d0 + timedelta(days=199)
+
+
+def test_escaneo_guarda_y_reemplaza_el_ranking(scan_db):
+    d0, d1 = _seed()
+    assert ps.ranked("sector", 1) is None
+    out = ps.scan("sector", 1, d0, d1)
+    assert out["rows"][0]["rank"] == 1
+    assert (out["rows"][0]["ticker_1"], out["rows"][0]["ticker_2"]) == ("T1", "T2")
+    assert ps.ranked("sector", 1)["rows"] == out["rows"]
+
+    again = ps.scan("sector", 1, d0, d1, top=1)
+    assert len(again["rows"]) == 1
+    assert len(ps.ranked("sector", 1)["rows"]) == 1
+    assert ps.ranked("sector", 2) is None
+
+
+def test_get_pair_data_por_columnas(scan_db):
+    from app.services.pair_analysis_service import get_pair_data
+    d0, d1 = _seed()
+    label1, label2, df1, df2, merged, error = get_pair_data(1, 2, d0, d1)
+    assert error is None and (label1, label2) == ("T1 — T1", "T2 — T2")
+    assert isinstance(df1.index, pd.DatetimeIndex) and list(df1.columns) == ["close"]
+    assert df1["close"].notna().all() and df1.index.is_monotonic_increasing
+    assert list(merged.columns) == ["close_1", "close_2"]
+    assert len(merged) == len(df1.index.intersection(df2.index))
+    assert get_pair_data(1, 99, d0, d1)[-1] == "Activo 99 no encontrado"
+    assert get_pair_data(1, 2, d1 + timedelta(days=1), None)[-1] == \
+        "T1: sin datos en el período"
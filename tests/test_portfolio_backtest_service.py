@@ -206,6 +206,79 @@ def test_list_portfolio_runs_visibility():
     assert len(pbs.list_portfolio_runs(s, 1, True)) == 2
 
 
+def test_save_portfolio_run_guarda_su_robustez(tmp_path, monkeypatch):
+    """Guardar la corrida deja su análisis de robustez al lado (en un thread
+    de fondo, con su propia sesión); una corrida sin análisis guardado se
+    analiza al vuelo desde sus curvas (sin trades)."""
+    import numpy as np
+
+    from app.models import PortfolioRunRobustness
+    from app.services import robustness_service as rs
+
+    eng = sa.create_engine(f"sqlite:///{tmp_path / 'rob.db'}")
+    Base.metadata.create_all(eng)
+    s = Session(eng)
+    hilos = []
+    real = rs.start_for_run
+    monkeypatch.setattr(rs, "start_for_run",
+                        lambda *a: hilos.append(real(*a)) or hilos[-1])
+    rng = np.random.default_rng(0)
+    dates = [date(2025, 1, 1) + timedelta(days=i) for i in range(250)]
+    bench = np.cumprod(1 + rng.normal(0.0003, 0.01, 250))
+    gated = bench * np.cumprod(np.full(250, 1.0004))
+    result = _mini_result(dates, list(gated), list(bench * 1.0), list(bench))
+    closes = 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, 250))
+    result["rules"] = {"closes": [closes],
+                       "trades": [(0, t0, t1, r, dates[t0]) for t0, t1, r in (
+                           (10, 30, closes[30] / closes[10] - 1),
+                           (50, 55, closes[55] / closes[50] - 1),
+                           (90, 140, None))]}
+    run = pbs.save_portfolio_run(s, 1, 7, "Rob", {}, result)
+    assert len(hilos) == 1
+    hilos[0].join(timeout=120)
+    s.expire_all()
+
+    got = rs.for_run(s, run.id)
+    assert got["stored"] is True and got["n_paths"] == 10_000
+    assert set(got["curves"]) == {"gated", "ranking", "benchmark"}
+    g = got["curves"]["gated"]
+    assert g["bands"]["cagr"]["p5"] <= g["bands"]["cagr"]["p95"]
+    # gated = benchmark con +0,04 % diario: le gana en todos los caminos.
+    assert g["prob_beats_benchmark"] == 1.0
+    assert "prob_beats_benchmark" not in got["curves"]["benchmark"]
+    assert got["trades"]["n"] == 2                      # el sin ret no cuenta
+    assert 0.0 <= got["trades"]["prob_skill"] <= 1.0
+
+    s.query(PortfolioRunRobustness).delete()
+    s.commit()
+    fly = rs.for_run(s, run.id, n_paths=200)
+    assert fly["stored"] is False and fly["trades"] is None
+    assert fly["curves"]["gated"]["realized"] == g["realized"]
+    assert rs.for_run(s, 99999) is None
+
+
+def test_robustez_de_trades_en_orden_cronologico():
+    """Los trades llegan agrupados por activo: el drawdown realizado es el de
+    la secuencia por fecha de entrada, no el del orden de llegada."""
+    import numpy as np
+
+    from app.services import robustness_engine as eng
+    from app.services import robustness_service as rs
+
+    d = [date(2025, 1, 1) + timedelta(days=i) for i in range(4)]
+    closes = [np.full(10, 100.0), np.full(10, 100.0)]
+    # activo 0: las dos pérdidas; activo 1: las dos ganancias — intercaladas
+    # en el tiempo, la secuencia real alterna y casi no tiene drawdown
+    trades = [(0, 0, 1, -0.2, d[0]), (0, 2, 3, -0.2, d[2]),
+              (1, 1, 2, 0.3, d[1]), (1, 3, 4, 0.3, d[3])]
+    got = rs.analyze(d, {}, rules={"closes": closes, "trades": trades},
+                     n_paths=50)["trades"]
+    crono = eng.path_metrics(np.array([-0.2, 0.3, -0.2, 0.3]), None)
+    assert got["realized"]["max_drawdown"] == pytest.approx(
+        float(crono["max_drawdown"][0]))
+    assert got["realized"]["max_drawdown"] > -0.36     # el agrupado: −36 %
+
+
 # ── carteras 'strategy' promovidas: curva gated desde el snapshot ─────────────
 
 _PROMO_CFG = {"top_n": 5, "rebalance": 2, "cost_bps": 10.0,
@@ -0,0 +1,81 @@
+"""Métricas de cartera en forma matricial (portfolio_metrics_matrix.py).
+
+El oráculo es portfolio_metrics, curva por curva: lo elemento a elemento
+(total_return, CAGR, drawdown con sus índices, matriz mensual) tiene que dar
+los mismos floats; vol/Sharpe/Sortino, a lo sumo el último bit (statistics
+suma exacto). Los None salen en los mismos lugares, máscaras incluidas.
+"""
+import math
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.services import portfolio_metrics as pm
+from app.services import portfolio_metrics_matrix as pmm
+
+_CLOSE = ("volatility", "sharpe", "sortino")
+
+
+def _dates(n, start=date(2020, 1, 1)):
+    return [start + timedelta(days=i) for i in range(n)]
+
+
+def _curves(k, n, seed):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0.0004, 0.012, (k, n)), axis=1)
+
+
+def _assert_row(got, want):
+    assert got.keys() == want.keys()
+    for key, w in want.items():
+        g = got[key]
+        if key in _CLOSE and w is not None:
+            assert g is not None and math.isclose(g, w, rel_tol=1e-12), key
+        else:
+            assert g == w, key
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_summary_igual_a_la_escalar(seed):
+    E = _curves(6, 260, seed)
+    E[1, 40:] = E[1, 39]                       # se aplana: sin retornos negativos
+    E[2] = 100.0                               # constante: desvío 0
+    E[3, 100] = 0.0                            # equity en cero: retorno None
+    ds = _dates(E.shape[1])
+    got = pmm.summary_many(E, ds, risk_free=0.03)
+    for i, row in enumerate(got):
+        _assert_row(row, pm.summary(list(E[i]), dates=ds, risk_free=0.03))
+
+
+def test_mascaras_son_tramos_de_la_misma_grilla():
+    E = _curves(1, 300, 7)
+    ds = _dates(300, date(2021, 11, 20))
+    tramos = [(0, 300), (0, 1), (10, 12), (50, 140), (140, 300), (5, 5)]
+    mask = np.zeros((len(tramos), 300), dtype=bool)
+    for i, (a, b) in enumerate(tramos):
+        mask[i, a:b] = True
+    got = pmm.summary_many(np.repeat(E, len(tramos), axis=0), ds, mask)
+    for (a, b), row in zip(tramos, got):
+        _assert_row(row, pm.summary(list(E[0, a:b]), dates=ds[a:b]))
+
+
+def test_curvas_de_largo_distinto():
+    curves = [list(c[:n]) for c, n in zip(_curves(5, 90, 3), (90, 2, 1, 0, 45))]
+    E, mask = pmm.stack(curves)
+    for c, row in zip(curves, pmm.summary_many(E, mask=mask)):
+        _assert_row(row, pm.summary(c))
+    for c, s in zip(curves, pmm.sharpe_many(E, mask)):
+        w = pm.sharpe(pm.returns_from_equity(c))
+        assert (s is None) == (w is None)
+        assert w is None or math.isclose(s, w, rel_tol=1e-12)
+
+
+def test_drawdown_y_sus_indices():
+    E = _curves(4, 200, 11)
+    E[0, 150:] = E[0].max() * 1.1              # recupera el pico
+    E[1, 0] = -5.0                             # pico no positivo al arrancar
+    dd = pmm.drawdown_many(E)
+    for i, m in enumerate(pmm.max_drawdown_many(E)):
+        assert list(dd[i]) == pm.drawdown_series(list(E[i]))
+        assert m == pm.max_drawdown(list(E[i]))
@@ -0,0 +1,253 @@
+"""Barras semanales y mensuales persistidas.
+
+Lo que se fija: las barras guardadas son EXACTAMENTE las de _resample_ohlc
+(el oráculo) — recién escritas, después de un delta de precios que reescribe
+solo la cola, recortadas a la ventana de los vigentes y después de una
+escritura por fuera que las deja viejas (el lector las corrige solo).
+"""
+import math
+import re
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+import app.services.technical_service as ts
+from app.services import price_bar_store as pbs
+
+_A = 99961
+
+
+def _daily(start, n, seed=0):
+    rng = np.random.default_rng(seed)
+    out, d = [], start
+    while len(out) < n:
+        if d.weekday() < 5:
+            out.append(d)
+        d += timedelta(days=1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({"date": out, "open": close, "close": close,
+                         "high": close * 1.01, "low": close * 0.99,
+                         "volume": 1000.0})
+
+
+def _oracle(df):
+    return {f: ts._resample_ohlc(df, f) for f in pbs.FREQS}
+
+
+@pytest.fixture()
+def barras_db():
+    import app.models  # noqa: F401
+    from app.database import Base, Session, engine, get_session
+    from app.models import Asset, Price, PriceMonthly, PriceWeekly
+
+    Base.metadata.create_all(engine)
+    s = get_session()
+
+    def limpiar():
+        s.rollback()
+        for m in (PriceWeekly, PriceMonthly, Price):
+            s.query(m).filter(m.asset_id == _A).delete(synchronize_session=False)
+        s.query(Asset).filter(Asset.id == _A).delete(synchronize_session=False)
+        s.commit()
+
+    limpiar()
+    s.add(Asset(id=_A, ticker="PB1", name="PB1", price_source_id=1))
+    s.commit()
+    yield s
+    limpiar()
+    Session.remove()
+
+
+def _history(s):
+    from app.models import Price
+    rows = s.query(Price.date, Price.close, Price.high, Price.low, Price.volume) \
+        .filter(Price.asset_id == _A).order_by(Price.date).all()
+    return pd.DataFrame(rows, columns=["date", "close", "high", "low", "volume"])
+
+
+def _assert_bars(got, df):
+    for f, want in _oracle(df).items():
+        pd.testing.assert_frame_equal(got[f], want)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_resample_igual_a_resample_ohlc(seed):
+    df = _daily(date(2019, 11, 4 + seed), 700, seed)
+    df.loc[[5, 6, 40, 41, 42, 43, 44], "close"] = np.nan     # semana sin closes
+    df.loc[[100, 300], ["high", "low"]] = np.nan
+    for f in pbs.FREQS:
+        pd.testing.assert_frame_equal(pbs.resample(df, f)[pbs._COLS],
+                                      ts._resample_ohlc(df, f))
+        bars = pbs.resample(df, f)
+        assert bars["n_days"].sum() == df["close"].notna().sum()
+        assert math.isclose(bars["close_sum"].sum(), df["close"].sum())
+
+
+def test_escritura_de_precios_mantiene_las_barras(barras_db, monkeypatch):
+    from app.services.price_service import _upsert_prices
+
+    s = barras_db
+    df = _daily(date(2023, 1, 2), 400)
+    _upsert_prices(_A, df.iloc[:380], s, prev_last=None)
+    s.commit()
+    # El delta: reescribe la última fecha (preliminar) y suma las nuevas.
+    last = df["date"].iloc[379]
+    _upsert_prices(_A, df.iloc[379:], s, prev_last=last)
+    s.commit()
+
+    hist = _history(s)
+    monkeypatch.setattr(pbs, "resample",
+                        lambda *a: pytest.fail("resampleó lo que estaba al día"))
+    w, m = pbs.load(s, {_A: hist})
+    _assert_bars({"W": w[_A], "M": m[_A]}, hist)
+    w2, m2 = pbs.bars_for(s, _A)
+    pd.testing.assert_frame_equal(w2, w[_A])
+    pd.testing.assert_frame_equal(m2, m[_A])
+
+
+def test_ventana_de_los_vigentes(barras_db):
+    from app.services.price_service import _upsert_prices
+
+    s = barras_db
+    _upsert_prices(_A, _daily(date(2020, 6, 3), 900), s, prev_last=None)
+    s.commit()
+    hist = _history(s)
+    for cut in (date(2021, 3, 3), date(2021, 8, 1), date(2022, 2, 28)):
+        tail = hist[hist["date"] >= cut].reset_index(drop=True)
+        w, m = pbs.load(s, {_A: hist}, recent={_A: tail})
+        _assert_bars({"W": w[_A], "M": m[_A]}, tail)
+
+
+def test_escritura_por_fuera_se_corrige_y_rebuild(barras_db):
+    from app.models import Price, PriceWeekly
+    from app.services.price_service import _upsert_prices
+
+    s = barras_db
+    _upsert_prices(_A, _daily(date(2022, 1, 3), 300), s, prev_last=None)
+    s.commit()
+    # Una corrección que no pasa por price_service.
+    s.execute(sa.update(Price).where(Price.asset_id == _A,
+                                     Price.date == date(2022, 3, 9))
+              .values(close=1.0))
+    s.commit()
+    hist = _history(s)
+    w, m = pbs.load(s, {_A: hist})
+    _assert_bars({"W": w[_A], "M": m[_A]}, hist)
+    # ...y quedó reescrita con la marca de los precios de ahora.
+    marca = pbs._mark(pbs._read(s, [_A])["W"][_A])
+    assert marca.n_prices == len(hist) and marca.last_date == hist["date"].iloc[-1]
+
+    s.query(PriceWeekly).filter(PriceWeekly.asset_id == _A).delete()
+    s.commit()
+    assert pbs.rebuild(s, [_A]) == 1
+    w, m = pbs.bars_for(s, _A)
+    _assert_bars({"W": w, "M": m}, hist)
+
+
+def test_no_toca_la_transaccion_del_llamador(barras_db, monkeypatch):
+    from app.database import engine
+    from app.models import Price, PriceWeekly
+
+    s = barras_db
+    hist = _daily(date(2022, 1, 3), 60)
+    # Filas del llamador todavía sin commitear (como el backfill de
+    # indicadores entre commits).
+    s.add(Price(asset_id=_A, date=date(2030, 1, 2), close=1.0))
+    s.flush()
+
+    def _pendientes():
+        return s.query(Price).filter(Price.asset_id == _A).count()
+
+    def _visibles():
+        with engine.connect() as conn:
+            return conn.execute(sa.select(sa.func.count()).select_from(
+                PriceWeekly.__table__).where(PriceWeekly.asset_id == _A)).scalar()
+
+    # La reparación va en la transacción del llamador: no se commitea sola.
+    w, m = pbs.bars_for(s, _A, hist)
+    _assert_bars({"W": w, "M": m}, hist)
+    assert _pendientes() == 1 and _visibles() == 0
+
+    # Una lectura y una escritura que fallan no deshacen lo del llamador.
+    def _roto(s, *a):
+        s.execute(sa.text("SELECT * FROM tabla_que_no_existe"))
+    monkeypatch.setattr(pbs, "_read", _roto)
+    monkeypatch.setattr(pbs, "_replace", _roto)
+    w, m = pbs.bars_for(s, _A, hist)
+    _assert_bars({"W": w, "M": m}, hist)
+    assert _pendientes() == 1
+    s.commit()
+    assert _visibles() > 0
+
+
+def test_refresh_rows_de_muchos_activos_por_tanda(barras_db, monkeypatch):
+    """El camino de los sintéticos: barras iguales al oráculo para cada
+    activo, con una lectura y un DELETE por temporalidad por tanda (no por
+    activo); complete=True resamplea de las filas, sin releer `prices`."""
+    from app.database import engine
+    from app.models import Asset, Price, PriceMonthly, PriceWeekly
+
+    s = barras_db
+    ids = [_A, _A + 1, _A + 2]
+    for aid in ids[1:]:
+        s.add(Asset(id=aid, ticker=f"PB{aid}", name="PB", price_source_id=1))
+    s.commit()
+    monkeypatch.setattr(pbs, "_IN_CHUNK", 2)
+
+    def _filas(aid, df):
+        return [{"asset_id": aid, **r} for r in df.to_dict("records")]
+
+    def _escribir(rows, **kw):
+        stmts = []
+
+        def _cuenta(conn, cursor, statement, *a):
+            stmts.append(" ".join(statement.split()).upper())
+
+        for r in rows:
+            s.merge(Price(**{k: r[k] for k in
+                             ("asset_id", "date", "close", "high", "low", "volume")}))
+        s.flush()
+        sa.event.listen(engine, "before_cursor_execute", _cuenta)
+        try:
+            pbs.refresh_rows(s, rows, **kw)
+        finally:
+            sa.event.remove(engine, "before_cursor_execute", _cuenta)
+        s.commit()
+        return stmts
+
+    def _cuantas(stmts, patron):
+        return sum(1 for st in stmts if re.match(patron, st))
+
+    dfs = {aid: _daily(date(2021, 1, 4), 300, seed=aid) for aid in ids}
+    stmts = _escribir([r for aid in ids for r in _filas(aid, dfs[aid])],
+                      complete=True)
+    assert _cuantas(stmts, r"SELECT .* FROM PRICES\b") == 0
+    # 2 tandas (de 2 y de 1 activos) × 2 temporalidades
+    assert _cuantas(stmts, r"DELETE FROM PRICES_") == 4
+
+    # Delta: cada activo reescribe desde una fecha distinta.
+    for k, aid in enumerate(ids):
+        extra = _daily(date(2022, 3, 1), 20 + k, seed=10 + aid)
+        dfs[aid] = pd.concat([dfs[aid][dfs[aid]["date"] < extra["date"].iloc[0]],
+                              extra], ignore_index=True)
+    stmts = _escribir([r for k, aid in enumerate(ids)
+                       for r in _filas(aid, dfs[aid].iloc[-(20 + k):])])
+    assert _cuantas(stmts, r"SELECT .* FROM PRICES\b") == 2
+    assert _cuantas(stmts, r"DELETE FROM PRICES_") == 4
+
+    try:
+        for aid in ids:
+            got = pbs._read(s, [aid])
+            hist = dfs[aid][["date", "close", "high", "low", "volume"]]
+            for f in pbs.FREQS:
+                pd.testing.assert_frame_equal(
+                    pbs._frame(got[f][aid], ts._resample_ohlc(hist, f)["date"].dtype),
+                    ts._resample_ohlc(hist, f))
+    finally:
+        for m in (PriceWeekly, PriceMonthly, Price):
+            s.query(m).filter(m.asset_id.in_(ids[1:])).delete(synchronize_session=False)
+        s.query(Asset).filter(Asset.id.in_(ids[1:])).delete(synchronize_session=False)
+        s.commit()
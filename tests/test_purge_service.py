@@ -0,0 +1,153 @@
+"""Motor de purga de historia por activo (purge_service).
+
+Lo que se fija: el DELETE por lotes de cada motor (ctid en PG, LIMIT en
+MySQL, rowid en sqlite) borra solo las filas del activo y en lotes del tamaño
+pedido; la purga recorre también las tablas dinámicas, deja el avance en
+purge_job y una purga interrumpida se retoma saltando las tablas ya limpias;
+el barrido de huérfanos borra solo filas de activos que ya no existen.
+"""
+import json
+import sys
+import types
+from datetime import date, datetime
+
+import pytest
+import sqlalchemy as sa
+
+# Mismo motivo que test_purge_componente: asset_service arrastra yfinance.
+sys.modules.setdefault("yfinance", types.ModuleType("yfinance"))
+
+from app.database import Base, engine, get_session  # noqa: E402
+from app.services import purge_service as pg  # noqa: E402
+
+_PROBE = "ind_purge_probe"
+
+
+def test_delete_sql_por_motor():
+    pg_sql = pg.delete_sql("postgresql", '"t"', [3, 1], batch=10)
+    assert "ctid = ANY(ARRAY(SELECT ctid FROM \"t\"" in pg_sql
+    assert "asset_id IN (3, 1) LIMIT 10" in pg_sql
+    assert pg.delete_sql("mysql", "`t`", [2]) == (
+        f"DELETE FROM `t` WHERE asset_id IN (2) LIMIT {pg.BATCH}")
+    assert "rowid IN (SELECT rowid" in pg.delete_sql("sqlite", '"t"', [2])
+    with pytest.raises(ValueError):
+        pg.delete_sql("sqlite", '"t"', ["1; DROP TABLE assets"])
+
+
+@pytest.fixture()
+def purge_db(monkeypatch):
+    import app.models  # noqa: F401 — registra los modelos en Base.metadata
+    from app.models import Asset, Price, PriceSource
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(sa.text(f"DROP TABLE IF EXISTS {_PROBE}"))
+        conn.execute(sa.text(f"CREATE TABLE {_PROBE} (asset_id INTEGER, "
+                             "date DATE, value FLOAT)"))
+        conn.execute(sa.text("DELETE FROM purge_job"))
+    s = get_session()
+    if s.get(PriceSource, 1) is None:
+        s.add(PriceSource(id=1, name="test"))
+        s.flush()
+    for aid in (7201, 7202):
+        s.add(Asset(id=aid, ticker=f"PG{aid}", price_source_id=1))
+    s.flush()
+    for aid in (7201, 7202):
+        for d in range(1, 8):
+            s.add(Price(asset_id=aid, date=date(2024, 1, d), close=100.0 + d))
+    s.commit()
+    with engine.begin() as conn:
+        conn.execute(sa.text(f"INSERT INTO {_PROBE} VALUES (:a, :d, 1.0)"),
+                     [{"a": a, "d": date(2024, 1, d)}
+                      for a in (7201, 7202, 7299) for d in range(1, 6)])
+    monkeypatch.setattr(pg, "BATCH", 2)
+    yield s
+    s.rollback()
+    with engine.begin() as conn:
+        conn.execute(sa.text(f"DROP TABLE IF EXISTS {_PROBE}"))
+        conn.execute(sa.text("DELETE FROM prices WHERE asset_id IN (7201, 7202)"))
+        conn.execute(sa.text("DELETE FROM assets WHERE id IN (7201, 7202)"))
+        conn.execute(sa.text("DELETE FROM purge_job"))
+
+
+def _count(table, asset_id):
+    with engine.connect() as conn:
+        return conn.execute(sa.text(
+            f"SELECT COUNT(*) FROM {table} WHERE asset_id = :a"),
+            {"a": asset_id}).scalar()
+
+
+def _jobs():
+    with engine.connect() as conn:
+        return [dict(r) for r in conn.execute(sa.text(
+            "SELECT * FROM purge_job ORDER BY id")).mappings()]
+
+
+def test_delete_batches_por_lotes(purge_db):
+    with engine.connect() as conn:
+        n = pg.delete_batches(conn, _PROBE, [7201], batch=2)
+    assert n == 5
+    assert _count(_PROBE, 7201) == 0 and _count(_PROBE, 7202) == 5
+
+
+def test_purga_recorre_dinamicas_y_registra_avance(purge_db):
+    from app.services.asset_service import purge_assets
+    s = purge_db
+    seen = []
+    assert purge_assets(s, [7201], progress_cb=lambda *a: seen.append(a)) == 1
+
+    assert _count("prices", 7201) == 0 and _count(_PROBE, 7201) == 0
+    assert _count("prices", 7202) == 7 and _count(_PROBE, 7202) == 5
+    with engine.connect() as conn:
+        assert conn.execute(sa.text(
+            "SELECT COUNT(*) FROM assets WHERE id = 7201")).scalar() == 0
+
+    job, = _jobs()
+    done = json.loads(job["tables_done"])
+    assert job["kind"] == "assets" and job["status"] == "done"
+    assert "prices" in done and _PROBE in done
+    assert job["tables_total"] == len(done) and job["rows_deleted"] >= 12
+    assert pg.status(job["id"])["status"] == "done"
+    total = seen[-1][1]
+    assert seen[-1] == (total, total, "") and seen[-2][2] == "assets"
+
+
+def test_purga_interrumpida_se_retoma_sin_repetir_tablas(purge_db):
+    from app.models.purge_job import PurgeJob
+    with engine.begin() as conn:
+        job_id = conn.execute(sa.insert(PurgeJob.__table__).values(
+            kind="assets", status="running", asset_ids=json.dumps([7201]),
+            tables_total=0, tables_done=json.dumps(["prices"]),
+            rows_deleted=7, started_at=datetime.utcnow()
+        )).inserted_primary_key[0]
+
+    pg.resume(job_id)
+
+    # "prices" figuraba como limpia: no se volvió a recorrer
+    assert _count("prices", 7201) == 7
+    assert _count(_PROBE, 7201) == 0 and _count(_PROBE, 7202) == 5
+    job, = _jobs()
+    assert job["status"] == "done" and job["rows_deleted"] >= 12
+    assert "prices" in json.loads(job["tables_done"])
+
+
+def test_error_en_una_tabla_marca_la_purga(purge_db, monkeypatch):
+    def _falla(conn, table, ids, batch=2):
+        raise RuntimeError(f"falló {table}")
+    monkeypatch.setattr(pg, "delete_batches", _falla)
+    with pytest.raises(RuntimeError, match="falló"):
+        pg.purge(purge_db, [7201], tables=[_PROBE])
+    job, = _jobs()
+    assert job["status"] == "error" and "falló" in job["error"]
+    assert _count(_PROBE, 7201) == 5
+
+
+def test_barrido_de_huerfanos(purge_db):
+    s = purge_db
+    found = pg.find_orphans(s)
+    assert found.get(_PROBE) == [7299]
+    out = pg.sweep_orphans(s)
+    assert out["assets"] >= 1 and out["rows"] >= 5
+    assert _count(_PROBE, 7299) == 0
+    assert _count(_PROBE, 7201) == 5 and _count(_PROBE, 7202) == 5
+    assert pg.find_orphans(s) == {}
+    assert _jobs()[-1]["kind"] == "orphans"
@@ -0,0 +1,158 @@
+"""Instrumentación por fase (query_stats_service): sentencias y filas por la
+fase del thread que las ejecutó, tiempo exclusivo con fases anidadas,
+grabaciones concurrentes aisladas por contexto, fusión del agregado de un
+hijo del ProcessPool y el viaje del resumen a run_history.
+
+Toca el sqlite stub (una tabla propia, creada y borrada en el fixture).
+"""
+import threading
+
+import pytest
+import sqlalchemy as sa
+
+import app.models  # noqa: F401 — registra RunHistory
+from app.database import Base, engine
+from app.services import query_stats_service as qs
+from app.services import run_history_service as rh
+
+_T = "qs_probe"
+
+
+@pytest.fixture()
+def probe():
+    with engine.begin() as conn:
+        conn.execute(sa.text(f"CREATE TABLE {_T} (id INTEGER, v REAL)"))
+    yield
+    with engine.begin() as conn:
+        conn.execute(sa.text(f"DROP TABLE IF EXISTS {_T}"))
+
+
+def _phase(summary, name):
+    return next(p for p in summary["phases"] if p["phase"] == name)
+
+
+def test_sin_grabacion_no_cuenta_nada(probe):
+    with qs.phase("x"):
+        with engine.begin() as conn:
+            conn.execute(sa.text(f"SELECT * FROM {_T}"))
+    assert not qs.is_recording()
+    with qs.recording() as rec:
+        pass
+    assert rec.summary()["phases"] == []
+
+
+def test_sentencias_y_filas_por_fase(probe):
+    with qs.recording() as rec:
+        with qs.phase("escritura"), engine.begin() as conn:
+            conn.execute(sa.text(f"INSERT INTO {_T} VALUES (:i, :v)"),
+                         [{"i": i, "v": i * 1.5} for i in range(5)])
+            conn.execute(sa.text(f"UPDATE {_T} SET v = 0 WHERE id < 2"))
+        with qs.phase("lectura"), engine.begin() as conn:
+            conn.execute(sa.text(f"SELECT * FROM {_T}")).all()
+        with engine.begin() as conn:
+            conn.execute(sa.text(f"SELECT count(*) FROM {_T}"))
+
+    out = rec.summary()
+    w = _phase(out, "escritura")
+    assert (w["statements"], w["writes"], w["reads"]) == (2, 2, 0)
+    assert w["rows_written"] == 7          # 5 del executemany + 2 del UPDATE
+    r = _phase(out, "lectura")
+    assert (r["statements"], r["reads"], r["rows_written"]) == (1, 1, 0)
+    assert _phase(out, qs.UNPHASED)["py_s"] is None
+    assert out["totals"]["statements"] == 4
+    assert not qs.is_recording()
+
+
+def test_fases_anidadas_tiempo_exclusivo_y_por_thread(probe, monkeypatch):
+    reloj = iter([0.0, 1.0, 4.0, 10.0])    # afuera 0→10, adentro 1→4
+    with qs.recording() as rec:
+        monkeypatch.setattr(qs.time, "perf_counter", lambda: next(reloj))
+        with qs.phase("afuera"):
+            with qs.phase("adentro"):
+                pass
+        monkeypatch.undo()
+
+        def _worker():
+            with engine.begin() as conn:
+                conn.execute(sa.text(f"SELECT * FROM {_T}"))
+
+        # un thread no hereda la grabación ni la fase: con phased() sí
+        # graba, en la suya; sin phased() no suma nada
+        t = threading.Thread(target=qs.phased("worker", _worker))
+        t.start()
+        t.join()
+        with qs.phase("afuera"):
+            t = threading.Thread(target=_worker)
+            t.start()
+            t.join()
+
+    out = rec.summary()
+    assert _phase(out, "adentro")["py_s"] == 3.0
+    assert _phase(out, "afuera")["statements"] == 0
+    assert _phase(out, "worker")["statements"] == 1
+    assert out["totals"]["statements"] == 1
+
+
+def test_grabacion_reentrante_y_merge_del_hijo():
+    with qs.recording() as rec:
+        with qs.recording() as inner:
+            assert inner is rec
+        assert qs.is_recording()
+        qs.merge({"ind:lotes": {"statements": 3, "writes": 3,
+                                "rows_written": 90, "db_s": 0.5, "wall_s": 2.0}})
+        qs.merge({"ind:lotes": {"statements": 1, "reads": 1,
+                                "rows_fetched": 10, "db_s": 0.1, "wall_s": 1.0}})
+    assert not qs.is_recording()
+    p = _phase(rec.summary(), "ind:lotes")
+    assert (p["statements"], p["rows_written"], p["rows_fetched"]) == (4, 90, 10)
+    assert p["db_s"] == 0.6 and p["py_s"] == 2.4
+    qs.merge({"x": {"statements": 1}})      # sin grabación: no-op
+
+
+def test_grabaciones_concurrentes_no_se_mezclan(probe):
+    listos = threading.Barrier(3)
+    recs = {}
+
+    def _corrida(nombre, n):
+        with qs.recording() as rec:
+            listos.wait()
+            for _ in range(n):
+                with engine.begin() as conn:
+                    conn.execute(sa.text(f"SELECT * FROM {_T}"))
+            listos.wait()
+        recs[nombre] = rec
+
+    def _request():                        # un thread que no graba
+        listos.wait()
+        with engine.begin() as conn:
+            conn.execute(sa.text(f"SELECT * FROM {_T}"))
+        listos.wait()
+
+    hilos = [threading.Thread(target=_corrida, args=("a", 2)),
+             threading.Thread(target=_corrida, args=("b", 3)),
+             threading.Thread(target=_request)]
+    for t in hilos:
+        t.start()
+    for t in hilos:
+        t.join()
+    assert recs["a"] is not recs["b"]
+    assert recs["a"].summary()["totals"]["statements"] == 2
+    assert recs["b"].summary()["totals"]["statements"] == 3
+
+
+def test_resumen_viaja_a_run_history():
+    Base.metadata.create_all(engine)
+    rh._unavailable = False
+    with qs.recording() as rec:
+        qs.merge({"sig:escritura": {"statements": 2, "writes": 2,
+                                    "rows_written": 40, "db_s": 0.2,
+                                    "wall_s": 0.3}})
+    rid = rh.start_run("signals", "qs-con")
+    rh.finish_run(rid, "ok", total=1, unit="fechas", ok=1,
+                  query_stats=rec.summary())
+    sin = rh.start_run("signals", "qs-sin")
+    rh.finish_run(sin, "ok")
+    rows = {r["scope"]: r for r in rh.get_recent(10)}
+    qs_row = rows["qs-con"]["query_stats"]
+    assert _phase(qs_row, "sig:escritura")["rows_written"] == 40
+    assert rows["qs-sin"]["query_stats"] is None
@@ -0,0 +1,118 @@
+"""Paridad de la RS 52w agrupada por benchmark contra el cálculo por activo.
+
+_ref_series y _ref_last son copia LITERAL del núcleo de
+technical_service._bf/_cur_relative_strength_52w antes de agrupar (sin la
+query del benchmark): el oráculo. Los valores tienen que salir idénticos —
+relative_strength_52w guarda la serie entera y el delta compara contra ella.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import relative_strength as rs
+from app.services.technical_service import _one_year_before
+
+
+def _ref_series(df, bm_df):
+    n = len(df)
+    bm_ords   = np.array([d.toordinal() for d in bm_df["date"]])
+    bm_closes = bm_df["close"].values.astype(float)
+    a_ords    = np.array([d.toordinal() for d in df["date"]])
+    a_cls     = df["close"].values.astype(float)
+    ref_ords = np.empty(n, dtype=np.int64)
+    for i, d in enumerate(df["date"]):
+        ref_ords[i] = _one_year_before(d).toordinal()
+
+    def _vlkup(ords, closes, targets):
+        idx = np.searchsorted(ords, targets, side="right") - 1
+        valid = idx >= 0
+        return np.where(valid, closes[np.where(valid, idx, 0)], np.nan)
+
+    bm_now = _vlkup(bm_ords, bm_closes, a_ords)
+    bm_ref = _vlkup(bm_ords, bm_closes, ref_ords)
+    a_ref  = _vlkup(a_ords,  a_cls,     ref_ords)
+    ok = (~np.isnan(bm_now) & ~np.isnan(bm_ref) & (bm_ref != 0) &
+          ~np.isnan(a_ref)  & (a_ref  != 0) & (a_cls != 0))
+    ret_a  = np.where(ok, (a_cls    - a_ref)  / a_ref  * 100, np.nan)
+    ret_bm = np.where(ok, (bm_now   - bm_ref) / bm_ref * 100, np.nan)
+    out    = np.where(ok, np.round(ret_a - ret_bm, 2), np.nan)
+    return [None if np.isnan(v) else float(v) for v in out]
+
+
+def _ref_last(df, bm_df):
+    d          = df.iloc[-1]["date"]
+    last_close = float(df.iloc[-1]["close"])
+    ref_ord    = _one_year_before(d).toordinal()
+    bm_ords   = np.array([dd.toordinal() for dd in bm_df["date"]])
+    bm_closes = bm_df["close"].values.astype(float)
+    a_ords    = np.array([dd.toordinal() for dd in df["date"]])
+    a_cls     = df["close"].values.astype(float)
+
+    def _lkup(ords, cls, target):
+        j = int(np.searchsorted(ords, target, side="right")) - 1
+        return float(cls[j]) if j >= 0 else None
+
+    bm_now = _lkup(bm_ords, bm_closes, a_ords[-1])
+    bm_ref = _lkup(bm_ords, bm_closes, ref_ord)
+    a_ref  = _lkup(a_ords,  a_cls,     ref_ord)
+    if (bm_now is not None and bm_ref and bm_ref != 0
+            and a_ref is not None and a_ref != 0 and last_close != 0):
+        return round(
+            (last_close - a_ref) / a_ref * 100 - (bm_now - bm_ref) / bm_ref * 100,
+            2,
+        )
+    return None
+
+
+def _frame(rng, start, end, p_skip):
+    """Ruedas hábiles con huecos al azar (feriados de cada mercado)."""
+    days, d = [], start
+    while d <= end:
+        if d.weekday() < 5 and rng.random() >= p_skip:
+            days.append(d)
+        d += timedelta(days=1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(days))))
+    return pd.DataFrame({"date": days, "close": np.round(close, 4)})
+
+
+def test_year_before_igual_a_one_year_before():
+    d0 = date(2015, 1, 1)
+    ds = [d0 + timedelta(days=i) for i in range(3700)]
+    got = rs.year_before(rs.ordinals(ds))
+    assert [date.fromordinal(int(o)) for o in got] == [_one_year_before(d) for d in ds]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_serie_y_vigente_identicas_al_calculo_por_activo(seed):
+    rng = np.random.default_rng(seed)
+    # El benchmark arranca después y termina antes que el activo: fechas sin
+    # referencia, fechas posteriores a su última rueda y un 29/2 en el medio.
+    bm = _frame(rng, date(2019, 6, 3), date(2024, 3, 1 + seed), 0.05)
+    df = _frame(rng, date(2018, 1, 1), date(2024, 3, 8), 0.1)
+    bench = rs.Benchmark(bm["date"], bm["close"])
+    assert rs.rs_series(df, bench) == _ref_series(df, bm)
+    for n in (len(df), len(df) - 3, 300, 10):
+        assert rs.rs_last(df.head(n), bench) == _ref_last(df.head(n), bm)
+
+
+def test_un_benchmark_por_grupo_y_activos_sin_benchmark(monkeypatch):
+    rng = np.random.default_rng(7)
+    prices = {1: _frame(rng, date(2020, 1, 1), date(2023, 6, 30), 0),
+              2: _frame(rng, date(2020, 1, 1), date(2023, 6, 30), 0)}
+    for aid in (10, 11, 12, 13):
+        prices[aid] = _frame(rng, date(2021, 1, 1), date(2023, 6, 30), 0.05)
+    bench_by_asset = {10: 1, 11: 1, 12: 2, 13: None}
+
+    armados = []
+    real = rs.Benchmark.__init__
+    monkeypatch.setattr(rs.Benchmark, "__init__",
+                        lambda self, d, c: armados.append(1) or real(self, d, c))
+    got = rs.current_for_assets(rs.BenchmarkSet(None, bench_by_asset, prices),
+                                [10, 11, 12, 13], prices)
+    assert len(armados) == 2
+    assert got == {10: _ref_last(prices[10], prices[1]),
+                   11: _ref_last(prices[11], prices[1]),
+                   12: _ref_last(prices[12], prices[2]), 13: None}
+    assert got[10] is not None
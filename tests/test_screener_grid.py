@@ -6,13 +6,15 @@ es lo que se puede testear sin navegador: que las columnas salgan completas y
 en orden, que las filas queden planas (la grilla no sabe leer `comp_scores`
 anidado) y que los renderers que Python nombra existan del lado JS — un typo
 ahí no rompe nada visible desde Python: deja las celdas en blanco.
+
+Las filas llegan de a bloques (Infinite Row Model): `_block` traduce el
+pedido de la grilla a la API paginada del servicio y lleva las claves.
 """
 import re
 from pathlib import Path
 
-from app.callbacks.screener_signals_callbacks import (
-    _column_defs, _maximos, _row_data,
-)
+from app.callbacks import screener_signals_callbacks as cb
+from app.callbacks.screener_signals_callbacks import _block, _column_defs, _row_data
 
 ROOT = Path(__file__).resolve().parent.parent
 
@@ -28,25 +30,6 @@ _ROWS = [
 ]
 
 
-# ── Máximos (normalizan las barras) ──────────────────────────────────────────
-
-def test_los_maximos_son_por_valor_absoluto():
-    """La barra tiene que reflejar igual de fuerte un −90 que un +90."""
-    max_total, por_comp = _maximos(_ROWS)
-
-    assert max_total == 80.0
-    assert por_comp == {"rsi": 60.0, "mm": 90.0}
-
-
-def test_los_maximos_ignoran_los_faltantes_y_nunca_dan_cero():
-    """Un cero como máximo haría una división por cero en el renderer."""
-    max_total, por_comp = _maximos(
-        [{"score": None, "comp_scores": {"rsi": None}}])
-
-    assert max_total == 1.0
-    assert por_comp == {}
-
-
 # ── Columnas ─────────────────────────────────────────────────────────────────
 
 def test_las_columnas_fijas_van_primero_y_despues_una_por_senal():
@@ -143,3 +126,53 @@ def test_el_js_no_hardcodea_colores():
         encoding="utf-8")
 
     assert not re.findall(r"#[0-9a-fA-F]{6}\b", js)
+
+
+# ── Bloques del Infinite Row Model ───────────────────────────────────────────
+
+def _fake_page(calls, total=1000):
+    def page(strategy_id, target_date, *, sector_id, market_id, after, offset,
+             page_size):
+        calls.append({"after": after, "offset": offset, "page_size": page_size})
+        return {"rows": _ROWS, "components": _META, "total": total,
+                "max_abs": 80.0, "comp_max": {}, "next": [-40.0, 2]}
+    return page
+
+
+_QUERY = {"strategy_id": 1, "date": "2026-07-24", "sector_id": None,
+          "market_id": None, "limit": None}
+
+
+def test_el_bloque_siguiente_sale_por_clave(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cb.svc, "get_strategy_ranking_page", _fake_page(calls))
+
+    resp, cursors = _block(_QUERY, 0, 200, {})
+    assert resp["rowCount"] == 1000
+    assert resp["rowData"] == _row_data(_ROWS, _META)
+    assert cursors == {"200": [-40.0, 2]}
+    assert calls[-1] == {"after": None, "offset": 0, "page_size": 200}
+
+    _block(_QUERY, 200, 400, cursors)
+    assert calls[-1] == {"after": [-40.0, 2], "offset": 0, "page_size": 200}
+
+
+def test_un_salto_sin_clave_va_por_offset(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cb.svc, "get_strategy_ranking_page", _fake_page(calls))
+
+    _block(_QUERY, 600, 800, {"200": [1.0, 1]})
+    assert calls[-1] == {"after": None, "offset": 600, "page_size": 200}
+
+
+def test_el_tope_de_mostrar_corta_el_ultimo_bloque_y_el_conteo(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cb.svc, "get_strategy_ranking_page", _fake_page(calls))
+    query = {**_QUERY, "limit": 500}
+
+    resp, _ = _block(query, 400, 600, {})
+    assert calls[-1]["page_size"] == 100
+    assert resp["rowCount"] == 500
+
+    resp, _ = _block(query, 600, 800, {})
+    assert resp["rowData"] == [] and len(calls) == 1
@@ -133,3 +133,180 @@ def test_la_etiqueta_avisa_cuando_el_ranking_quedo_cortado():
 
     assert _result_label(500, 10000) == ("500 de 10.000 activos", True)
     assert _result_label(120, 120)   == ("120 activos", False)
+
+
+# ── Ranking por bloques (Infinite Row Model) ─────────────────────────────────
+
+def _recorrer(svc, page_size, **kw):
+    """Pide el ranking de a bloques siguiendo la clave `next` hasta el final."""
+    filas, after, primero = [], None, True
+    while True:
+        page = svc.get_strategy_ranking_page(1, _TARGET, after=after,
+                                             page_size=page_size,
+                                             refresh=primero, **kw)
+        primero = False
+        filas.extend(page["rows"])
+        after = page["next"]
+        if after is None:
+            return filas, page
+
+
+def test_los_bloques_por_clave_reconstruyen_el_ranking_completo(sc_db):
+    """Con scores EMPATADOS a propósito: el asset_id desempata, así que ningún
+    activo se repite ni se pierde en el borde entre dos bloques."""
+    from app.models import signal_store
+    from app.services import strategy_service as svc
+    _seed(10)
+    s = get_session()
+    rt = signal_store.get_strat_table(1)
+    s.execute(rt.update().where(rt.c.date == _TARGET, rt.c.asset_id.in_([3, 4, 5, 6]))
+              .values(score=50.0))
+    s.commit()
+
+    completo, _meta, total = svc.get_strategy_results_with_breakdown(1, _TARGET)
+    for tam in (1, 3, 4, 10, 50):
+        filas, ultimo = _recorrer(svc, tam)
+        assert filas == completo, f"bloques de {tam}"
+        assert ultimo["total"] == total == 10
+    assert [r["asset_id"] for r in completo[6:]] == [3, 4, 5, 6]
+
+
+def test_empates_en_el_score_real_cruzan_el_borde_del_bloque(sc_db):
+    """El score es de precisión simple y el cursor vuelve como double: con
+    varios activos empatados en un valor que float4 no representa (33.3), cada
+    uno aparece exactamente una vez, corte donde corte el bloque. La clave se
+    compara casteada al tipo de la columna (REAL en PG)."""
+    from sqlalchemy.dialects import postgresql
+    from app.models import signal_store
+    from app.services import strategy_service as svc
+    _seed(10)
+    s = get_session()
+    rt = signal_store.get_strat_table(1)
+    s.execute(rt.update().where(rt.c.date == _TARGET,
+                                rt.c.asset_id.in_([2, 3, 4, 5, 6, 7]))
+              .values(score=33.3))
+    s.commit()
+
+    for tam in (1, 2, 3, 4):
+        filas, _ultimo = _recorrer(svc, tam)
+        ids = [r["asset_id"] for r in filas]
+        assert sorted(ids) == list(range(1, 11)), f"bloques de {tam}"
+        assert ids[-6:] == [2, 3, 4, 5, 6, 7]
+
+    q = svc._after_key(svc._ranking_select(s, 1, _TARGET), [33.3, 4])
+    assert "AS FLOAT(24)" in str(q.compile(dialect=postgresql.dialect()))
+
+
+def test_el_offset_cubre_el_salto_sin_clave(sc_db):
+    from app.services import strategy_service as svc
+    _seed(10)
+
+    page = svc.get_strategy_ranking_page(1, _TARGET, offset=4, page_size=3,
+                                         refresh=True)
+    assert [r["ticker"] for r in page["rows"]] == ["A004", "A005", "A006"]
+    assert page["next"] == [94.0, 7]
+
+
+def test_el_bloque_trae_desglose_delta_y_maximos_del_ranking_entero(sc_db):
+    from app.services import strategy_service as svc
+    _seed(10)
+
+    page = svc.get_strategy_ranking_page(1, _TARGET, page_size=2, refresh=True)
+    key = page["components"][0]["signal_key"]
+    assert [r["comp_scores"][key] for r in page["rows"]] == [100.0, 99.0]
+    assert [r["delta_score"] for r in page["rows"]] == [1.0, 1.0]
+    # Los máximos son del ranking completo, no del bloque: la barra vale lo
+    # mismo arriba y abajo.
+    assert page["max_abs"] == 100.0
+    assert page["comp_max"] == {key: 100.0}
+
+
+def test_el_resumen_se_reusa_entre_bloques_y_se_rehace_al_buscar(sc_db):
+    from app.models import signal_store
+    from app.services import strategy_service as svc
+    _seed(5)
+    assert svc.get_strategy_ranking_page(1, _TARGET, refresh=True)["total"] == 5
+
+    s = get_session()
+    rt = signal_store.get_strat_table(1)
+    s.execute(rt.delete().where(rt.c.asset_id == 5))
+    s.commit()
+
+    # Un bloque siguiente no vuelve a contar…
+    assert svc.get_strategy_ranking_page(1, _TARGET, offset=2)["total"] == 5
+    # …una búsqueda nueva sí.
+    assert svc.get_strategy_ranking_page(1, _TARGET, refresh=True)["total"] == 4
+
+
+def test_el_bloque_respeta_el_filtro_de_mercado(sc_db):
+    from app.models import Asset
+    from app.services import strategy_service as svc
+    _seed(6)
+    s = get_session()
+    s.query(Asset).filter(Asset.id.in_([2, 4, 6])).update({"market_id": 3})
+    s.commit()
+
+    filas, ultimo = _recorrer(svc, 2, market_id=3)
+    assert [r["ticker"] for r in filas] == ["A001", "A003", "A005"]
+    assert ultimo["total"] == 3
+
+
+def test_estrategia_inexistente_da_bloque_vacio(sc_db):
+    from app.services import strategy_service as svc
+    page = svc.get_strategy_ranking_page(999, _TARGET)
+    assert page["rows"] == [] and page["total"] == 0 and page["next"] is None
+
+
+@pytest.fixture()
+def wide_db(sc_db, monkeypatch):
+    """Mismo seeding sobre las tablas ANCHAS (el camino vivo en producción):
+    ahí los componentes salen de una sola query sobre signal_values_wide."""
+    from app.models import signal_store
+    signal_store.ensure_wide_signal_tables(bind=engine)
+    for sid in (1, 2):
+        signal_store.ensure_sig_column(sid, bind=engine)
+    signal_store.ensure_strat_columns(1, bind=engine)
+    monkeypatch.setenv("USE_WIDE_SIGNAL_TABLES", "1")
+    yield
+    with engine.begin() as conn:
+        for t in (signal_store.SIG_WIDE_TABLE, signal_store.STRAT_WIDE_TABLE):
+            conn.execute(sa.text(f"DELETE FROM {t}"))
+
+
+def test_camino_ancho_una_query_para_todos_los_componentes(wide_db):
+    from app.models import (Asset, SignalDefinition, Strategy,
+                            StrategyComponent, signal_store)
+    from app.services import strategy_service as svc
+    s = get_session()
+    for sid, key in ((1, "sig_a"), (2, "sig_b")):
+        s.add(SignalDefinition(id=sid, key=key, name=key,
+                               indicator_key="trend_daily",
+                               formula_type="discrete_map",
+                               params=json.dumps({"map": {"bullish": 100}}),
+                               is_public=True))
+    s.add(Strategy(id=1, name="Ancha", is_public=True))
+    s.add(StrategyComponent(id=1, strategy_id=1, signal_id=1, weight=1.0))
+    s.add(StrategyComponent(id=2, strategy_id=1, signal_id=2, weight=2.0))
+    for i in range(1, 6):
+        s.add(Asset(id=i, ticker=f"W{i}", name=f"W{i}", price_source_id=1))
+    s.commit()
+
+    signal_store.wide_upsert(
+        s, signal_store.STRAT_WIDE_TABLE,
+        signal_store.strat_columns([1]),
+        [(i, str(_TARGET), 10.0 * i, 0.1 * i) for i in range(1, 6)]
+        + [(i, str(_PREV), 10.0 * i - 2, 0.1 * i) for i in range(1, 6)])
+    signal_store.wide_upsert(
+        s, signal_store.SIG_WIDE_TABLE, signal_store.sig_columns([1, 2]),
+        [(i, str(_TARGET), float(i), (-3.0 * i if i != 2 else None))
+         for i in range(1, 6)])
+    s.commit()
+
+    filas, ultimo = _recorrer(svc, 2)
+    assert [r["ticker"] for r in filas] == ["W5", "W4", "W3", "W2", "W1"]
+    assert filas[0]["comp_scores"] == {"sig_a": 5.0, "sig_b": -15.0}
+    assert filas[3]["comp_scores"] == {"sig_a": 2.0, "sig_b": None}
+    assert all(r["delta_score"] == 2.0 for r in filas)
+    assert ultimo["comp_max"] == {"sig_a": 5.0, "sig_b": 15.0}
+    completo, _meta, _total = svc.get_strategy_results_with_breakdown(1, _TARGET)
+    assert completo == filas
@@ -0,0 +1,61 @@
+"""Índice invertido de búsqueda (search_index): lógica pura.
+
+Lo que se fija: el plegado de acentos; el prefijo por palabra y la frase por
+posiciones consecutivas; las comillas apagan el prefijo; BM25 pone arriba al
+documento donde el término pesa más; el filtro por documento corre sobre los
+candidatos; y el offset del match apunta al texto ORIGINAL.
+"""
+from app.services import search_index as si
+
+
+def _idx():
+    return si.SearchIndex([
+        ("a", "Análisis técnico", "El walk forward valida la estrategia."),
+        ("b", "Backtest", "Un backtest mide; el walk, otra forma, forward."),
+        ("c", "Señales", "señales señales y más señales de momentum"),
+        ("d", "Momentum", "Definición del momentum."),
+    ])
+
+
+def test_fold_y_tokenize_guardan_offsets_del_original():
+    assert si.fold("Análisis ÑANDÚ") == "analisis nandu"
+    assert si.tokenize("¿Qué es? Ñandú") == [("que", 1), ("es", 5), ("nandu", 9)]
+    assert si.parse_query('"walk forward"') == (["walk", "forward"], True)
+    assert si.parse_query("Walk  forw") == (["walk", "forw"], False)
+
+
+def test_prefijo_por_palabra_y_frase_consecutiva():
+    idx = _idx()
+    assert idx.expand("back") == ["backtest"]
+    assert [m.key for m in idx.search("analisis")] == ["a"]
+    # "walk forward" consecutivo solo en "a"; en "b" están separados
+    assert [m.key for m in idx.search("walk forw")] == ["a"]
+    body = "El walk forward valida la estrategia."
+    m, = idx.search("walk forward")
+    assert body[m.offset:].startswith("walk")
+
+
+def test_comillas_apagan_el_prefijo():
+    idx = _idx()
+    assert idx.search('"walk forw"') == []
+    assert [m.key for m in idx.search('"walk forward"')] == ["a"]
+
+
+def test_titulo_primero_y_despues_bm25():
+    idx = _idx()
+    hits = idx.search("momentum")
+    assert [m.key for m in hits] == ["d", "c"]
+    assert hits[0].in_title and not hits[1].in_title
+    hits = idx.search("señales")
+    assert hits[0].key == "c" and hits[0].score > 0
+
+
+def test_terminos_sueltos_y_filtro_por_documento():
+    idx = _idx()
+    # "forward momentum" no aparece como frase: pasa a términos sueltos
+    hits = idx.search("forward momentum zzz")
+    assert {m.key for m in hits} == {"a", "b", "c", "d"}
+    assert all(m.matched == 1 for m in hits)
+    hits = idx.search("forward momentum", accept=lambda k: k in ("b", "c"))
+    assert {m.key for m in hits} == {"b", "c"}
+    assert idx.search("walk", limit=1, accept=lambda k: k != "a")[0].key == "b"
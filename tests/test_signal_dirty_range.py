@@ -0,0 +1,172 @@
+"""Refresco dirigido de la historia de señales por datos llegados tarde.
+
+Lo que se fija: un activo cuyos precios e indicadores llegan DESPUÉS de que
+el delta ya evaluó esas fechas (con sus scores arrastrados por el as-of)
+queda, tras el próximo delta, idéntico al pipeline corrido con todos los
+datos a tiempo — sin "Recalcular completo" y recalculando solo sus celdas —,
+y la marca se consume. Reescribir la fecha preliminar no marca nada, y una
+marca que se mueve mientras corre el delta sobrevive.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from app.database import engine, get_session
+from app.models import signal_store
+from app.services import signal_dirty_range as sdr
+from tests.test_signal_range_parity_wide import _drop_wide, _snapshot_wide
+from tests.test_signal_range_parity import (  # noqa: F401  (fixture + helpers)
+    _seed,
+    _snapshot,
+    _trading_dates,
+    _wipe_derived,
+    pipeline_db,
+)
+
+_LATE = 6          # últimas ruedas del activo 1 que llegan tarde
+
+
+@pytest.fixture()
+def sin_marcas(pipeline_db):  # noqa: F811
+    def limpiar():
+        with engine.begin() as conn:
+            conn.execute(sa.text("DELETE FROM signal_dirty_range"))
+    limpiar()
+    yield
+    limpiar()
+
+
+def _marcas():
+    return sdr.pending(get_session())
+
+
+@pytest.mark.parametrize("ancho", [False, True], ids=["per-entidad", "ancho"])
+def test_precio_tardio_refresca_solo_sus_celdas(sin_marcas, monkeypatch, ancho):
+    from app.models import Price
+    from app.services import (signal_backfill_range, signal_service,
+                              strategy_service)
+    from app.services.price_service import _upsert_prices
+
+    dates = _trading_dates()
+    _seed(dates)
+    last = dates[-1]
+    for d in dates:
+        signal_service.compute_signal_values(d, latest_price_date=last)
+        strategy_service.compute_all_strategies(d)
+    reference = _snapshot()
+    _wipe_derived()
+    _drop_wide()
+    snapshot = _snapshot
+    if ancho:
+        monkeypatch.setenv("USE_WIDE_SIGNAL_TABLES", "1")
+        # Lo que hace el alta de señales/estrategias con el flag prendido
+        from app.models import SignalDefinition, Strategy
+        signal_store.ensure_wide_signal_tables(bind=engine)
+        for (sid,) in get_session().query(SignalDefinition.id):
+            signal_store.ensure_signal_storage(sid, bind=engine)
+        for (sid,) in get_session().query(Strategy.id):
+            signal_store.ensure_strategy_storage(sid, bind=engine)
+        snapshot = _snapshot_wide
+
+    # El activo 1 se atrasa: sus últimas ruedas (precios + indicadores
+    # diarios) todavía no llegaron cuando corre el delta.
+    late = dates[-_LATE:]
+    s = get_session()
+    guardado = {}
+    for tbl in ("ind_trend_daily", "ind_zz_par_rsi"):
+        guardado[tbl] = [dict(r._mapping) for r in s.execute(sa.text(
+            f"SELECT asset_id, date, value FROM {tbl} "
+            f"WHERE asset_id = 1 AND date >= :d0"), {"d0": late[0]})]
+        s.execute(sa.text(f"DELETE FROM {tbl} WHERE asset_id = 1 "
+                          f"AND date >= :d0"), {"d0": late[0]})
+    precios = pd.DataFrame([
+        {"date": p.date, "open": p.open, "high": p.high, "low": p.low,
+         "close": p.close, "volume": p.volume}
+        for p in s.query(Price).filter(Price.asset_id == 1,
+                                       Price.date >= late[0])])
+    s.query(Price).filter(Price.asset_id == 1, Price.date >= late[0]).delete()
+    s.commit()
+
+    assert signal_service.update_signal_history()["errors"] == []
+    assert snapshot() != reference           # scores arrastrados
+
+    # Llegan: el precio marca desde su primera fecha nueva.
+    with engine.begin() as conn:
+        for tbl, rows in guardado.items():
+            conn.execute(sa.text(f"INSERT INTO {tbl} (asset_id, date, value) "
+                                 f"VALUES (:asset_id, :date, :value)"), rows)
+    _upsert_prices(1, precios, s, prev_last=dates[-_LATE - 1])
+    s.commit()
+    assert _marcas() == {1: (late[0], 1)}
+
+    pedidos = []
+    real = signal_backfill_range.run_range
+    monkeypatch.setattr(signal_backfill_range, "run_range",
+                        lambda d, **kw: pedidos.append(kw.get("targets"))
+                        or real(d, **kw))
+    res = signal_service.update_signal_history()
+
+    assert res["errors"] == []
+    # La última fecha la corre el delta entero; el resto, solo el activo 1.
+    assert pedidos == [{d: {1} for d in late[:-1]}]
+    assert snapshot() == reference
+    assert _marcas() == {}
+    _drop_wide()
+
+
+def test_reescribir_la_fecha_preliminar_no_marca(sin_marcas):
+    from app.services.price_service import _upsert_prices
+
+    dates = _trading_dates()
+    _seed(dates)
+    s = get_session()
+    fila = {"open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1}
+    _upsert_prices(2, pd.DataFrame([{"date": dates[-1], **fila}]), s,
+                   prev_last=dates[-1])
+    s.commit()
+    assert _marcas() == {}
+
+    nueva = date(2026, 12, 1)
+    _upsert_prices(2, pd.DataFrame([{"date": dates[-1], **fila},
+                                    {"date": nueva, **fila}]), s,
+                   prev_last=dates[-1])
+    s.commit()
+    assert _marcas() == {2: (nueva, 1)}
+
+
+def test_la_marca_acumula_el_minimo_y_sobrevive_si_se_movio(sin_marcas):
+    s = get_session()
+    _seed(_trading_dates())
+    sdr.mark(s, {1: date(2026, 2, 10), 2: date(2026, 2, 3)})
+    sdr.mark(s, {1: date(2026, 2, 5)})
+    sdr.mark(s, {1: date(2026, 2, 20)})
+    s.commit()
+    foto = _marcas()
+    assert foto == {1: (date(2026, 2, 5), 3), 2: (date(2026, 2, 3), 1)}
+
+    sdr.mark(s, {2: date(2026, 1, 9)})        # llega mientras corre el delta
+    s.commit()
+    assert sdr.consume(s, foto) == 1
+    assert _marcas() == {2: (date(2026, 1, 9), 2)}
+
+
+def test_targets_recorta_a_lo_evaluado_y_al_tope(monkeypatch):
+    monkeypatch.setattr(sdr, "MAX_DAYS", 10)
+    evaluadas = [date(2026, 3, d) for d in (2, 5, 9, 12, 16, 19)]
+    marcas = {7: (date(2026, 3, 1), 1), 8: (date(2026, 3, 12), 4),
+              9: (date(2026, 3, 19), 1)}
+    got = sdr.targets(marcas, set(evaluadas), {date(2026, 3, 19)},
+                      date(2026, 3, 19))
+    assert got == {date(2026, 3, 9): {7}, date(2026, 3, 12): {7, 8},
+                   date(2026, 3, 16): {7, 8}}
+
+
+def test_el_delta_de_indicadores_marca_desde_el_primer_valor_nuevo():
+    from app.services.technical_service import _first_valid_after
+
+    ds = [date(2026, 1, d) for d in (5, 6, 7, 8, 9)]
+    assert _first_valid_after(ds, [1.0, 2.0, None, float("nan"), 3.0],
+                              date(2026, 1, 6)) == date(2026, 1, 9)
+    assert _first_valid_after(ds, [1.0] * 5, date(2026, 1, 9)) is None
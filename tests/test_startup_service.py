@@ -0,0 +1,75 @@
+"""Arranque: reconciliación por conjuntos de los datos integrados
+(startup_service) contra el stub sqlite.
+
+Lo que se fija: la huella del manifiesto es estable y cambia con él; la
+reconciliación inserta lo que falta, corrige solo los campos que manda el
+manifiesto y una segunda pasada no escribe nada; y con la huella al día el
+arranque saltea las filas, pero no si se fuerza o cambió el manifiesto.
+"""
+import pytest
+import sqlalchemy as sa
+
+from app.database import Base, Session, engine, get_session
+from app.services import startup_service as st
+
+
+@pytest.fixture()
+def db():
+    import app.models  # noqa: F401
+    Session.remove()
+    Base.metadata.create_all(engine)
+    yield get_session()
+    Session.remove()
+
+
+def test_huella_estable_y_sensible_al_manifiesto(monkeypatch):
+    h = st.manifest_hash()
+    assert h == st.manifest_hash() and len(h) == 64
+    monkeypatch.setattr(st, "_BUILTIN_SOURCES",
+                        st._BUILTIN_SOURCES + [{"name": "X", "description": ""}])
+    assert st.manifest_hash() != h
+
+
+def test_reconcile_inserta_corrige_y_es_idempotente(db):
+    from app.models.indicator_definition import IndicatorDefinition
+    rows = st._indicator_rows()
+    with engine.begin() as conn:
+        st.reconcile(conn, IndicatorDefinition, "code", rows,
+                     update=tuple(st._INDICATOR_FIELDS))
+        conn.execute(sa.update(IndicatorDefinition.__table__)
+                     .where(IndicatorDefinition.code == "rsi_daily")
+                     .values(name="editado", last_backfill_seconds=3.0))
+        conn.execute(sa.delete(IndicatorDefinition.__table__)
+                     .where(IndicatorDefinition.code == "adx_weekly"))
+
+        assert st.reconcile(conn, IndicatorDefinition, "code", rows,
+                            update=tuple(st._INDICATOR_FIELDS)) == (1, 1)
+        assert st.reconcile(conn, IndicatorDefinition, "code", rows,
+                            update=tuple(st._INDICATOR_FIELDS)) == (0, 0)
+        name, secs = conn.execute(sa.select(
+            IndicatorDefinition.name, IndicatorDefinition.last_backfill_seconds)
+            .where(IndicatorDefinition.code == "rsi_daily")).one()
+        # el campo del manifiesto vuelve; lo que no manda, se respeta
+        assert name == "RSI Daily" and secs == 3.0
+
+
+def test_huella_al_dia_saltea_las_filas(db, monkeypatch):
+    llamadas = []
+    real = st._reconcile_builtin_rows
+    monkeypatch.setattr(st, "_reconcile_builtin_rows",
+                        lambda conn: (llamadas.append(1), real(conn)))
+    st.ensure_builtin_data(force=True)
+    assert len(llamadas) == 1
+    with engine.connect() as conn:
+        assert conn.execute(sa.text(
+            "SELECT manifest_hash FROM bootstrap_state WHERE name = "
+            "'builtin_data'")).scalar() == st.manifest_hash()
+
+    st.ensure_builtin_data()
+    assert len(llamadas) == 1
+
+    monkeypatch.setattr(st, "_RECONCILER_VERSION", st._RECONCILER_VERSION + 1)
+    st.ensure_builtin_data()
+    assert len(llamadas) == 2
+    st.ensure_builtin_data()
+    assert len(llamadas) == 2
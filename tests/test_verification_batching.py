@@ -152,3 +152,92 @@ def test_verify_batch_equivale_a_por_activo(_wide, monkeypatch):
         s.query(Asset).filter(Asset.id.in_(ids)).delete(synchronize_session=False)
         s.commit()
         Session.remove()
+
+
+# ── Dos etapas: huellas por año en la base ────────────────────────────────────
+
+def _fresco(s, code, aid):
+    df = vs._load_price_df(s, aid)
+    vals = ts._BACKFILL_FNS[code](
+        df=df, df_w=ts._resample_ohlc(df, "W"), df_m=ts._resample_ohlc(df, "M"),
+        regime_cfg=ts._get_regime_config(), vol_cfg=ts._get_volatility_config(),
+        session=s, asset_id=aid, price_cache=None, best_sma_cache=None)
+    dates, values = ts._series_dates_values(vals, df)
+    return {d: v for d, v in zip(dates, values) if v is not None and v == v}
+
+
+def test_huellas_igual_resultado_que_traer_todo_y_solo_leen_los_anios_distintos(
+        _wide, monkeypatch):
+    """Lo guardado es el recálculo fresco con daños SOLO en 2025 —numérico: un
+    valor cambiado, dos intercambiados, uno borrado y uno de más; categórico:
+    una fecha con otra categoría— y 2026 intacto. El resultado tiene que ser el
+    mismo que comparando todo, y la segunda etapa solo tiene que leer 2025."""
+    import app.models  # noqa: F401
+    from app.models import Asset, Price
+    from app.models.indicator_store import _WIDE
+    monkeypatch.setenv("USE_WIDE_IND_TABLES", "1")
+
+    Base.metadata.create_all(engine)
+    s = get_session()
+    aid, codes = _A1, ["return_daily", "trend_daily"]
+    try:
+        s.add(Asset(id=aid, ticker="VBFP", name="VBFP", price_source_id=1))
+        for i in range(400):
+            d = dt.date(2025, 6, 1) + dt.timedelta(days=i)
+            c = 100.0 + (i % 17) * 1.5 - (i % 5) + i * 0.05
+            s.add(Price(asset_id=aid, date=d, close=c, high=c + 1, low=c - 1))
+        s.commit()
+
+        num = _fresco(s, "return_daily", aid)
+        d25 = sorted(d for d in num if d.year == 2025)
+        g_num = dict(num)
+        g_num[d25[10]] = num[d25[10]] + 0.5
+        j = next(k for k in range(20, len(d25) - 1)
+                 if abs(num[d25[k]] - num[d25[k + 1]]) > 0.1)
+        g_num[d25[j]], g_num[d25[j + 1]] = num[d25[j + 1]], num[d25[j]]
+        del g_num[d25[j + 5]]
+        g_num[dt.date(2025, 5, 1)] = 1.0
+
+        cat = _fresco(s, "trend_daily", aid)
+        g_cat = dict(cat)
+        c25 = sorted(d for d in cat if d.year == 2025)
+        g_cat[c25[-1]] = "otra"
+
+        table, _col, _cad = _WIDE["return_daily"]
+        t = _ind_mod._get_wide_table(table)
+        filas: dict = {}
+        for code, serie in (("return_daily", g_num), ("trend_daily", g_cat)):
+            for d, v in serie.items():
+                filas.setdefault(d, {"asset_id": aid, "date": d})[_WIDE[code][1]] = v
+        cols = {_WIDE[c][1] for c in codes}
+        s.execute(t.insert(), [{**{c: None for c in cols}, **f}
+                               for f in filas.values()])
+        s.commit()
+
+        leidos = []
+        orig = vs._fetch_stored_years
+        monkeypatch.setattr(vs, "_fetch_stored_years", lambda *a: (
+            leidos.append((a[1], set(a[3]))), orig(*a))[1])
+
+        regime, vol = ts._get_regime_config(), ts._get_volatility_config()
+        full = vs._verify_one_asset(aid, "VBFP", codes, regime, vol,
+                                    vs._prefetch_stored(s, codes, [aid]),
+                                    session=s)
+        fp = vs._prefetch_fingerprints(s, codes, [aid])
+        dos = vs._verify_one_asset(aid, "VBFP", codes, regime, vol, {},
+                                   session=s, fp_by_code=fp)
+
+        assert leidos == [("return_daily", {2025}), ("trend_daily", {2025})]
+        assert set(fp["return_daily"][aid]) == {2025, 2026}
+        assert dos == full
+        por_codigo = {r["code"]: [x[1] for x in r["diffs"]] for r in full}
+        assert por_codigo["return_daily"].count("valor distinto") == 3
+        assert any("solo en DB" in m for m in por_codigo["return_daily"])
+        assert any("falta en DB" in m for m in por_codigo["return_daily"])
+        assert "valor distinto" in por_codigo["trend_daily"]
+    finally:
+        s.rollback()
+        s.query(Price).filter(Price.asset_id == aid).delete(synchronize_session=False)
+        s.query(Asset).filter(Asset.id == aid).delete(synchronize_session=False)
+        s.commit()
+        Session.remove()
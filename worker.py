@@ -7,8 +7,10 @@ el/los proceso(s) web se despliegan con RUN_SCHEDULER=0.
 
 Fuerza RUN_SCHEDULER=1 (su única razón de existir es correr el scheduler),
 así el operador solo tiene que setear RUN_SCHEDULER=0 en el servicio web.
-No sirve HTTP: create_app() arranca APScheduler en threads daemon y el
-proceso se mantiene vivo bloqueando el thread principal.
+No sirve HTTP: arranca con el núcleo headless (app.core, sin Dash ni las
+páginas — antes llamaba a create_app() entero solo para esto), APScheduler
+corre en threads daemon y el proceso se mantiene vivo bloqueando el thread
+principal. Los jobs importan sus servicios al dispararse.
 
 Railway: agregar un servicio (o process type) con start command
 `python worker.py`; setear RUN_SCHEDULER=0 en el servicio web (gunicorn).
@@ -17,15 +19,16 @@ con las corridas manuales del Centro de Datos.
 """
 import os
 
-# ANTES de importar app.config (vía create_app): Config lee el entorno al
+# ANTES de importar app.config (vía app.core): Config lee el entorno al
 # importarse, así que el override tiene que estar seteado ya.
 os.environ["RUN_SCHEDULER"] = "1"
 
 import threading
 
-from app import create_app
+from app import core
 
 if __name__ == "__main__":
-    create_app()   # arranca APScheduler (start_if_enabled si está enabled en DB)
+    core.bootstrap()
+    core.start_scheduler()   # start_if_enabled: solo si está enabled en DB
     print("Worker de scheduler activo (APScheduler en background).", flush=True)
     threading.Event().wait()   # mantener vivo el proceso; los jobs corren en daemon threads